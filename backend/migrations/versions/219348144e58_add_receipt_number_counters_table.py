@@ -0,0 +1,41 @@
+"""Add receipt_number_counters table
+
+Revision ID: 219348144e58
+Revises: 524f2d885d3c
+Create Date: 2026-10-16 09:12:41.503218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '219348144e58'
+down_revision = '524f2d885d3c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('receipt_number_counters',
+    sa.Column('counter_date', sa.Date(), nullable=False),
+    sa.Column('last_value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('counter_date')
+    )
+
+    # Seed the counters from receipts that were already numbered (R-YYYYMMDD-NNNN)
+    # so numbering continues where the old LIKE/ORDER BY generator left off
+    op.execute(
+        sa.text(r"""
+            INSERT INTO receipt_number_counters (counter_date, last_value)
+            SELECT TO_DATE(SUBSTRING(receipt_number FROM 3 FOR 8), 'YYYYMMDD'),
+                   MAX(CAST(SPLIT_PART(receipt_number, '-', 3) AS INTEGER))
+            FROM receipts
+            WHERE receipt_number ~ '^R-[0-9]{8}-[0-9]+$'
+            GROUP BY 1
+        """)
+    )
+
+
+def downgrade():
+    op.drop_table('receipt_number_counters')
@@ -0,0 +1,31 @@
+"""Add (created_at, id) indexes for keyset pagination
+
+Revision ID: 7c41d2e8a9b5
+Revises: 219348144e58
+Create Date: 2026-10-16 14:03:27.118402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c41d2e8a9b5'
+down_revision = '219348144e58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Built concurrently so the multi-year fuel_orders table stays writable
+    with op.get_context().autocommit_block():
+        op.create_index('ix_fuel_orders_created_at_id', 'fuel_orders', ['created_at', 'id'],
+                        unique=False, postgresql_concurrently=True)
+        op.create_index('ix_receipts_created_at_id', 'receipts', ['created_at', 'id'],
+                        unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_receipts_created_at_id', table_name='receipts', postgresql_concurrently=True)
+        op.drop_index('ix_fuel_orders_created_at_id', table_name='fuel_orders', postgresql_concurrently=True)
@@ -0,0 +1,53 @@
+"""Add fuel order status and completion counter tables
+
+Revision ID: a3f9c6e1b742
+Revises: 7c41d2e8a9b5
+Create Date: 2026-10-16 16:21:05.482917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f9c6e1b742'
+down_revision = '7c41d2e8a9b5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('fuel_order_status_counts',
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('status')
+    )
+    op.create_table('fuel_order_completion_counts',
+    sa.Column('completion_date', sa.Date(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('completion_date')
+    )
+
+    # Seed from the existing orders; the flush hooks keep them current from here on
+    op.execute(
+        sa.text("""
+            INSERT INTO fuel_order_status_counts (status, order_count)
+            SELECT CAST(status AS VARCHAR), COUNT(*)
+            FROM fuel_orders
+            GROUP BY status
+        """)
+    )
+    op.execute(
+        sa.text("""
+            INSERT INTO fuel_order_completion_counts (completion_date, order_count)
+            SELECT CAST(completion_timestamp AS DATE), COUNT(*)
+            FROM fuel_orders
+            WHERE status IN ('COMPLETED', 'REVIEWED') AND completion_timestamp IS NOT NULL
+            GROUP BY CAST(completion_timestamp AS DATE)
+        """)
+    )
+
+
+def downgrade():
+    op.drop_table('fuel_order_completion_counts')
+    op.drop_table('fuel_order_status_counts')
@@ -0,0 +1,35 @@
+"""Add (updated_at, id) indexes for incremental analytics exports
+
+Revision ID: d5e8b21f4c90
+Revises: a3f9c6e1b742
+Create Date: 2026-10-16 18:47:12.306158
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e8b21f4c90'
+down_revision = 'a3f9c6e1b742'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Built concurrently so the tables stay writable
+    with op.get_context().autocommit_block():
+        op.create_index('ix_fuel_orders_updated_at_id', 'fuel_orders', ['updated_at', 'id'],
+                        unique=False, postgresql_concurrently=True)
+        op.create_index('ix_receipts_updated_at_id', 'receipts', ['updated_at', 'id'],
+                        unique=False, postgresql_concurrently=True)
+        op.create_index('ix_receipt_line_items_updated_at_id', 'receipt_line_items', ['updated_at', 'id'],
+                        unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_receipt_line_items_updated_at_id', table_name='receipt_line_items',
+                      postgresql_concurrently=True)
+        op.drop_index('ix_receipts_updated_at_id', table_name='receipts', postgresql_concurrently=True)
+        op.drop_index('ix_fuel_orders_updated_at_id', table_name='fuel_orders', postgresql_concurrently=True)
@@ -91,6 +91,20 @@ def create_app(config_name=None):
     
     init_cli(app)
 
+    # Maintain the dashboard status counters on every fuel order flush
+    from src.services.fuel_order_status_counters import register_order_status_counters
+    register_order_status_counters()
+
+    # Keep this worker's permission memory cache in sync with the other workers
+    if app.config.get('PERMISSION_INVALIDATION_BUS_ENABLED'):
+        from src.services.permission_service import enhanced_permission_service
+        enhanced_permission_service.start_invalidation_listener(app)
+
+    # Precompute permissions for active users so the first requests after a deploy hit the cache
+    if app.config.get('PERMISSION_WARM_ON_BOOT'):
+        from src.services.permission_service import enhanced_permission_service
+        enhanced_permission_service.start_warm_up(app)
+
     # JWT User Lookup Loader - sets g.current_user automatically when JWT is present
     @jwt.user_lookup_loader
     def user_lookup_callback(_jwt_header, jwt_data):
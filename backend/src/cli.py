@@ -222,6 +222,60 @@ def cleanup_expired_versions():
     else:
         click.echo("🚫 Cleanup cancelled by user")
 
+@maintenance_cli.command('warm-permissions')
+@click.option('--batch-size', default=500, show_default=True, help='Users per query and Redis pipeline.')
+@with_appcontext
+def warm_permissions(batch_size):
+    """Precompute effective permissions for all active users."""
+    from .services.permission_service import enhanced_permission_service
+    
+    click.echo("🔥 Warming permission cache for active users...")
+    result = enhanced_permission_service.warm_permission_cache(batch_size=batch_size)
+    click.echo(f"✅ Warmed {result['users_warmed']} users in {result['batches']} batches")
+    if result['failed_batches']:
+        click.echo(f"⚠️  {result['failed_batches']} batches failed; see the log for details")
+
+@maintenance_cli.command('reconcile-order-counts')
+@with_appcontext
+def reconcile_order_counts():
+    """Rebuild the fuel order status counters from fuel_orders (run nightly)."""
+    from .services.fuel_order_status_counters import reconcile_order_status_counts
+    
+    click.echo("🧮 Reconciling fuel order status counters...")
+    result = reconcile_order_status_counts()
+    if result['corrected']:
+        click.echo(f"⚠️  Corrected drift in: {', '.join(result['corrected'])}")
+    else:
+        click.echo("✅ Counters already matched fuel_orders")
+
+@maintenance_cli.command('export-analytics')
+@click.option('--output-dir', default=None, help='Export directory (default: ANALYTICS_EXPORT_DIR).')
+@click.option('--table', 'tables', multiple=True, type=click.Choice(['fuel_orders', 'receipts', 'receipt_line_items']),
+              help='Table to export; repeat for several (default: all).')
+@click.option('--full', is_flag=True, help='Ignore the updated_at watermarks and export every row again.')
+@click.option('--batch-size', default=50000, show_default=True, help='Rows per query batch and Parquet row group.')
+@click.option('--rows-per-file', default=1000000, show_default=True, help='Rows per Parquet part file.')
+@with_appcontext
+def export_analytics(output_dir, tables, full, batch_size, rows_per_file):
+    """Export fuel orders and receipts changed since the last run as Parquet."""
+    from flask import current_app
+    from .services.analytics_export import export_analytics as run_export
+    
+    output_dir = output_dir or current_app.config.get('ANALYTICS_EXPORT_DIR')
+    if not output_dir:
+        click.echo("❌ No output directory: pass --output-dir or set ANALYTICS_EXPORT_DIR")
+        return
+    
+    click.echo(f"📦 Exporting analytics tables to {output_dir}...")
+    try:
+        result = run_export(output_dir, tables=tables, full=full, batch_size=batch_size, rows_per_file=rows_per_file)
+    except RuntimeError as e:
+        click.echo(f"❌ {str(e)}")
+        return
+    for name, table_result in result['tables'].items():
+        click.echo(f"   - {name}: {table_result['rows']} rows in {len(table_result['files'])} files")
+    click.echo(f"✅ Export complete (rows updated up to {result['until']})")
+
 def init_app(app):
     """Register CLI commands."""
     app.cli.add_command(create_admin)
@@ -27,6 +27,29 @@ class Config:
     APP_NAME = os.getenv('APP_NAME', 'FBO LaunchPad')
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG')
 
+    # Receipt PDFs (finalized receipts are rendered once and cached on disk)
+    RECEIPT_PDF_CACHE_DIR = os.getenv('RECEIPT_PDF_CACHE_DIR')
+    RECEIPT_PDF_WORKERS = int(os.getenv('RECEIPT_PDF_WORKERS', '2'))
+
+    # Permission caching (the invalidation bus keeps worker memory caches in sync over REDIS_URL).
+    # Off by default because create_app starts its listener, CLI invocations included; enable it
+    # for multi-worker web processes, otherwise other workers see changes after PERMISSION_MEMORY_CACHE_TTL
+    PERMISSION_INVALIDATION_BUS_ENABLED = os.getenv('PERMISSION_INVALIDATION_BUS_ENABLED', 'False').lower() == 'true'
+    PERMISSION_MEMORY_CACHE_TTL = int(os.getenv('PERMISSION_MEMORY_CACHE_TTL', '3600'))
+    # Every worker and CLI invocation runs create_app; prefer 'flask maintenance warm-permissions' in deploys
+    PERMISSION_WARM_ON_BOOT = os.getenv('PERMISSION_WARM_ON_BOOT', 'False').lower() == 'true'
+    PERMISSION_PREFETCH_ON_LOGIN = os.getenv('PERMISSION_PREFETCH_ON_LOGIN', 'True').lower() == 'true'
+    # Coalesce permission cache misses across workers too, not only within one
+    PERMISSION_SINGLE_FLIGHT_REDIS_LOCK = os.getenv('PERMISSION_SINGLE_FLIGHT_REDIS_LOCK', 'False').lower() == 'true'
+    # Embed version-stamped permission bitsets in access tokens (needs Redis for the version stamps)
+    PERMISSION_JWT_CLAIMS_ENABLED = os.getenv('PERMISSION_JWT_CLAIMS_ENABLED', 'False').lower() == 'true'
+
+    # Push dashboard status counts to csr_room whenever an order changes status
+    ORDER_STATUS_COUNTS_PUSH_ENABLED = os.getenv('ORDER_STATUS_COUNTS_PUSH_ENABLED', 'True').lower() == 'true'
+
+    # Parquet files for the analytics warehouse ('flask maintenance export-analytics' and the admin route)
+    ANALYTICS_EXPORT_DIR = os.getenv('ANALYTICS_EXPORT_DIR')
+
     @staticmethod
     def init_app(app):
         pass
@@ -57,6 +80,14 @@ class TestingConfig(Config):
     PROPAGATE_EXCEPTIONS = True
     # Disable Flask-DebugToolbar if installed
     DEBUG_TB_ENABLED = False
+    # Render receipt PDFs in the calling thread instead of a process pool
+    RECEIPT_PDF_WORKERS = 0
+    # Tests run a single process, so there is nobody to notify
+    PERMISSION_INVALIDATION_BUS_ENABLED = False
+    # Background threads would race the per-test database setup
+    PERMISSION_PREFETCH_ON_LOGIN = False
+    # No Socket.IO clients (or message queue) in tests
+    ORDER_STATUS_COUNTS_PUSH_ENABLED = False
 
     @classmethod
     def init_app(cls, app):
@@ -10,6 +10,7 @@ from .aircraft import Aircraft
 from .customer import Customer
 from .fuel_truck import FuelTruck
 from .fuel_order import FuelOrder, FuelOrderStatus
+from .fuel_order_status_count import FuelOrderStatusCount, FuelOrderCompletionCount
 from .fuel_price import FuelPrice, FuelTypeEnum
 from .fuel_type import FuelType
 
@@ -20,6 +21,7 @@ from .fee_rule import FeeRule, CalculationBasis, WaiverStrategy
 from .waiver_tier import WaiverTier
 from .receipt import Receipt, ReceiptStatus
 from .receipt_line_item import ReceiptLineItem, LineItemType
+from .receipt_number_counter import ReceiptNumberCounter
 from .audit_log import AuditLog
 from .fee_rule_override import FeeRuleOverride
 from .fee_schedule_version import FeeScheduleVersion
@@ -41,6 +43,8 @@ __all__ = [
     'FuelTruck',
     'FuelOrder',
     'FuelOrderStatus',
+    'FuelOrderStatusCount',
+    'FuelOrderCompletionCount',
     'FuelPrice',
     'FuelTypeEnum',
     'FuelType',
@@ -55,6 +59,7 @@ __all__ = [
     'ReceiptStatus',
     'ReceiptLineItem',
     'LineItemType',
+    'ReceiptNumberCounter',
     'AuditLog',
     'FeeRuleOverride',
     'FeeScheduleVersion'
@@ -20,6 +20,12 @@ class FuelOrderPriority(enum.Enum):
 
 class FuelOrder(db.Model):
     __tablename__ = 'fuel_orders'
+    __table_args__ = (
+        # Keyset pagination seeks on (created_at, id)
+        db.Index('ix_fuel_orders_created_at_id', 'created_at', 'id'),
+        # Incremental analytics exports read in (updated_at, id) order
+        db.Index('ix_fuel_orders_updated_at_id', 'updated_at', 'id'),
+    )
 
     # Primary Key
     id = db.Column(db.Integer, primary_key=True)
@@ -0,0 +1,28 @@
+from ..extensions import db
+
+
+class FuelOrderStatusCount(db.Model):
+    """Model holding the number of fuel orders in each status.
+    Maintained by the fuel order flush hooks in the same transaction as the
+    status change, so dashboard counts never scan fuel_orders."""
+
+    __tablename__ = 'fuel_order_status_counts'
+
+    status = db.Column(db.String(20), primary_key=True)  # FuelOrderStatus name
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<FuelOrderStatusCount {self.status}: {self.order_count}>'
+
+
+class FuelOrderCompletionCount(db.Model):
+    """Model holding the number of completed or reviewed fuel orders per
+    completion day, for the dashboard's completed-today card."""
+
+    __tablename__ = 'fuel_order_completion_counts'
+
+    completion_date = db.Column(db.Date, primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<FuelOrderCompletionCount {self.completion_date}: {self.order_count}>'
@@ -17,6 +17,10 @@ class Receipt(db.Model):
     __tablename__ = 'receipts'
     __table_args__ = (
         db.UniqueConstraint('receipt_number', name='_receipt_number_uc'),
+        # Keyset pagination seeks on (created_at, id)
+        db.Index('ix_receipts_created_at_id', 'created_at', 'id'),
+        # Incremental analytics exports read in (updated_at, id) order
+        db.Index('ix_receipts_updated_at_id', 'updated_at', 'id'),
     )
 
     id = db.Column(db.Integer, primary_key=True)
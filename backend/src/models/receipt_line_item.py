@@ -16,6 +16,10 @@ class ReceiptLineItem(db.Model):
     Supports different types of charges including fuel, fees, waivers, taxes, and discounts."""
     
     __tablename__ = 'receipt_line_items'
+    __table_args__ = (
+        # Incremental analytics exports read in (updated_at, id) order
+        db.Index('ix_receipt_line_items_updated_at_id', 'updated_at', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     receipt_id = db.Column(db.Integer, db.ForeignKey('receipts.id'), nullable=False)
@@ -0,0 +1,15 @@
+from ..extensions import db
+
+
+class ReceiptNumberCounter(db.Model):
+    """Model holding the last receipt sequence number handed out for each day.
+    Incremented with a single INSERT ... ON CONFLICT DO UPDATE ... RETURNING so
+    concurrent workers never read the receipts table or share a number."""
+
+    __tablename__ = 'receipt_number_counters'
+
+    counter_date = db.Column(db.Date, primary_key=True)
+    last_value = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ReceiptNumberCounter {self.counter_date}: {self.last_value}>'
@@ -146,7 +146,8 @@ class User(db.Model):
             bool: True if the user has the permission, False otherwise.
             
         Note:
-            This method now uses the enhanced PermissionService for comprehensive permission checking.
+            This method now uses the enhanced PermissionService for comprehensive permission checking,
+            sharing its L1/L2 caches and per-request memoization with the v2 decorators.
             Falls back to legacy role-based checking for backward compatibility.
         """
         if not self.is_active:
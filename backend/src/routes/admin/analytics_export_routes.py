@@ -0,0 +1,73 @@
+"""
+Admin routes for the analytics warehouse export.
+
+Runs the same incremental Parquet export as 'flask maintenance export-analytics'
+into the server's ANALYTICS_EXPORT_DIR.
+"""
+
+from flask import request, jsonify, current_app
+from src.utils.enhanced_auth_decorators_v2 import require_permission_v2
+from ...services.analytics_export import export_analytics
+from .routes import admin_bp
+
+
+@admin_bp.route('/analytics-export', methods=['POST'])
+@require_permission_v2('administrative_operations')
+def run_analytics_export():
+    """
+    Export fuel orders, receipts and line items changed since the last export.
+
+    Writes typed Parquet part files under ANALYTICS_EXPORT_DIR and advances the
+    per-table updated_at watermarks. Runs synchronously, so full re-exports
+    are refused here; run them with 'flask maintenance export-analytics --full'.
+
+    ---
+    tags:
+      - Admin - Analytics Export
+    security:
+      - bearerAuth: []
+    requestBody:
+      required: false
+      content:
+        application/json:
+          schema:
+            type: object
+            properties:
+              tables:
+                type: array
+                items:
+                  type: string
+                  enum: [fuel_orders, receipts, receipt_line_items]
+    responses:
+      200:
+        description: Export finished; rows, files and watermark per table
+      400:
+        description: Unknown table, full export requested, or no export directory configured
+      409:
+        description: Another export is running or pyarrow is not installed
+    """
+    output_dir = current_app.config.get('ANALYTICS_EXPORT_DIR')
+    if not output_dir:
+        return jsonify({"error": "Analytics export is not configured (ANALYTICS_EXPORT_DIR)"}), 400
+
+    data = request.get_json(silent=True) or {}
+    tables = data.get('tables')
+    if tables is not None and not isinstance(tables, list):
+        return jsonify({"error": "tables must be a list of table names"}), 400
+    if data.get('full'):
+        # Rewriting every row would hold this request (and a worker) for the whole backfill
+        return jsonify({
+            "error": "Full exports are not run over HTTP; use 'flask maintenance export-analytics --full'"
+        }), 400
+
+    try:
+        result = export_analytics(output_dir, tables=tables)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+    except Exception as e:
+        current_app.logger.error(f"Analytics export failed: {str(e)}")
+        return jsonify({"error": "Analytics export failed"}), 500
+
+    return jsonify(result), 200
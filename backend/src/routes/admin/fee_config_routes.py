@@ -749,3 +749,16 @@ def export_fee_configuration():
     except Exception as e:
         current_app.logger.error(f"Error exporting fee configuration: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
+
+
+@admin_fee_config_bp.route('/api/admin/fee-schedule/quote-cache', methods=['GET'])
+@require_permission_v2('manage_fbo_fee_schedules')
+def get_fee_quote_cache_stats():
+    """Get fee quote memoization statistics."""
+    try:
+        from ...services.fee_quote_cache import get_fee_quote_cache
+        return jsonify({'quote_cache': get_fee_quote_cache().get_stats()}), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Error getting fee quote cache stats: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
@@ -189,35 +189,15 @@ def warm_cache():
     try:
         data = request.get_json() or {}
         
-        # Get list of active users to warm cache for
-        from ...models.user import User
-        
         limit = data.get('user_limit', 100)
-        users = User.query.filter_by(is_active=True).limit(limit).all()
-        
-        warmed_entries = 0
-        errors = 0
-        
-        for user in users:
-            try:
-                # Get user permissions to populate cache
-                permissions = enhanced_permission_service.get_user_permissions(user.id, include_groups=True)
-                
-                # Cache each permission
-                for permission in permissions:
-                    cache_key = redis_permission_cache.generate_cache_key(user.id, permission)
-                    redis_permission_cache.set(cache_key, True, ttl=1800)
-                    warmed_entries += 1
-                    
-            except Exception as e:
-                errors += 1
-                continue
+        result = enhanced_permission_service.warm_permission_cache(limit=limit)
         
         return jsonify({
             'message': 'Cache warming completed',
-            'users_processed': len(users),
-            'entries_warmed': warmed_entries,
-            'errors': errors
+            'users_processed': result['users_processed'],
+            # One permission bitset entry is written per user
+            'entries_warmed': result['users_warmed'],
+            'failed_batches': result['failed_batches']
         }), 200
         
     except Exception as e:
@@ -11,6 +11,7 @@ from .aircraft_admin_routes import *
 from .lst_admin_routes import *
 from .fuel_truck_admin_routes import *
 from .fuel_type_admin_routes import *
+from .analytics_export_routes import *
 from .performance_monitor_routes import performance_monitor_bp
 
 # Register routes with the admin blueprint
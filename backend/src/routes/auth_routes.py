@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify, current_app, g
 from ..services.auth_service import AuthService
+from ..services.permission_service import enhanced_permission_service
 from flask_jwt_extended import create_access_token, jwt_required
 from ..schemas import (
     RegisterRequestSchema,
@@ -162,13 +163,21 @@ def login():
             return jsonify({'error': 'Invalid email or password'}), 401
             
         # Generate access token with user roles and status
+        additional_claims = {
+            'username': user.username,
+            'roles': [role.name for role in user.roles],
+            'is_active': user.is_active
+        }
+        # Optionally embed a version-stamped permission bitset so decorators can skip permission lookups
+        if current_app.config.get('PERMISSION_JWT_CLAIMS_ENABLED'):
+            additional_claims.update(enhanced_permission_service.issue_permission_claims(user.id))
+        # Otherwise compute the user's permissions while the client is still handling the login response
+        elif current_app.config.get('PERMISSION_PREFETCH_ON_LOGIN', True):
+            enhanced_permission_service.prefetch_user_permissions(current_app._get_current_object(), user.id)
+        
         access_token = create_access_token(
             identity=str(user.id),
-            additional_claims={
-                'username': user.username,
-                'roles': [role.name for role in user.roles],
-                'is_active': user.is_active
-            }
+            additional_claims=additional_claims
         )
         
         # Construct user payload for the response, ensuring roles is a list of strings
@@ -1,15 +1,16 @@
-from flask import Blueprint, request, jsonify, g, Response, current_app
+from flask import Blueprint, request, jsonify, g, Response, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..utils.enhanced_auth_decorators_v2 import require_permission_v2, require_permission_or_ownership_v2, require_any_permission_v2
+from ..utils.keyset_pagination import KeysetPage
 from ..models.user import UserRole
 from ..models.fuel_order import FuelOrder, FuelOrderStatus
 from ..services.fuel_order_service import FuelOrderService
+from ..services.fuel_order_projection import get_row_serializer, parse_fields
 from ..schemas import OrderStatusCountsResponseSchema, ErrorResponseSchema
 from ..schemas.fuel_order_schemas import (
     FuelOrderCreateRequestSchema,
     FuelOrderCreateResponseSchema,
     FuelOrderResponseSchema,
-    FuelOrderBriefResponseSchema,
     FuelOrderListResponseSchema,
     PaginationSchema
 )
@@ -122,21 +123,28 @@ def get_fuel_orders():
         current_app.logger.info(f"[get_fuel_orders] User: {getattr(g, 'current_user', None)} | Args: {request.args}")
         from src.services.fuel_order_service import FuelOrderService
         filters = dict(request.args)
-        paginated_result, message = FuelOrderService.get_fuel_orders(current_user=g.current_user, filters=filters)
+        try:
+            # Projected rows, serialized to the FuelOrderBriefResponseSchema shape
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        paginated_result, message = FuelOrderService.get_fuel_orders(current_user=g.current_user, filters=filters, fields=fields)
         if paginated_result is not None:
-            # Use Marshmallow schema for consistent serialization
-            brief_schema = FuelOrderBriefResponseSchema(many=True)
-            orders_data = brief_schema.dump(paginated_result.items)
+            serialize = get_row_serializer(fields)
+            orders_data = [serialize(row) for row in paginated_result.items]
             
             pagination_schema = PaginationSchema()
-            pagination_data = pagination_schema.dump({
-                'page': paginated_result.page,
-                'per_page': paginated_result.per_page,
-                'total_pages': paginated_result.pages,
-                'total_items': paginated_result.total,
-                'has_next': paginated_result.has_next,
-                'has_prev': paginated_result.has_prev
-            })
+            if isinstance(paginated_result, KeysetPage):
+                pagination_data = pagination_schema.dump(paginated_result.to_dict())
+            else:
+                pagination_data = pagination_schema.dump({
+                    'page': paginated_result.page,
+                    'per_page': paginated_result.per_page,
+                    'total_pages': paginated_result.pages,
+                    'total_items': paginated_result.total,
+                    'has_next': paginated_result.has_next,
+                    'has_prev': paginated_result.has_prev
+                })
             
             response = {
                 "orders": orders_data,
@@ -544,15 +552,35 @@ def review_fuel_order(order_id):
 @require_permission_v2('export_orders_csv')
 def export_fuel_orders_csv():
     """Export fuel orders to a CSV file.
-    Requires export_orders_csv permission.
+    Requires export_orders_csv permission. The file is streamed as it is generated.
     ---
     tags:
       - Fuel Orders
     security:
       - bearerAuth: []
+    parameters:
+      - name: status
+        in: query
+        type: string
+        required: false
+        description: Status to export (defaults to REVIEWED)
+      - name: date_from
+        in: query
+        type: string
+        format: date
+        required: false
+        description: Only orders created on or after this ISO date/datetime
+      - name: date_to
+        in: query
+        type: string
+        format: date
+        required: false
+        description: Only orders created on or before this ISO date/datetime
     responses:
       200:
         description: CSV file exported successfully
+      400:
+        description: Invalid status or date filter
       401:
         description: Unauthorized
       403:
@@ -562,29 +590,26 @@ def export_fuel_orders_csv():
     """
     # Extract filter parameters from request.args
     filters = {
-        'status': request.args.get('status', None, type=str)
-        # TODO: Add date_from, date_to filters later
+        'status': request.args.get('status', None, type=str),
+        'date_from': request.args.get('date_from', None, type=str),
+        'date_to': request.args.get('date_to', None, type=str)
     }
 
-    # Call service method to generate CSV data
-    csv_data, message, status_code = FuelOrderService.export_fuel_orders_to_csv(
+    # Call service method to get the streamed CSV chunks
+    csv_chunks, message, status_code = FuelOrderService.export_fuel_orders_to_csv(
         current_user=g.current_user,
         filters=filters
     )
 
     # Handle the result from the service
-    if csv_data is not None and status_code == 200:
-        # Check if we got an empty list (no data found)
-        if isinstance(csv_data, list) and len(csv_data) == 0:
-            return jsonify({"message": message}), 200
-
+    if csv_chunks is not None and status_code == 200:
         # Generate dynamic filename with timestamp
         timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
         filename = f"fuel_orders_export_{timestamp}.csv"
 
-        # Create response with CSV data and appropriate headers
+        # Stream the CSV as it is generated instead of buffering the whole file
         response = Response(
-            csv_data,
+            stream_with_context(csv_chunks),
             mimetype='text/csv',
             headers={
                 "Content-Disposition": f"attachment; filename={filename}"
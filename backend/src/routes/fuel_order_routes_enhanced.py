@@ -4,6 +4,8 @@ Demonstrates advanced authorization features including resource contexts,
 permission groups, and enhanced caching.
 """
 
+from datetime import datetime
+
 from flask import Blueprint, request, jsonify, g
 from flask_jwt_extended import get_jwt_identity
 
@@ -15,6 +17,7 @@ from ..utils.enhanced_auth_decorators_v2 import (
     cache_user_permissions
 )
 from ..services.permission_service import ResourceContext
+from ..services.fuel_order_status_counters import get_order_status_counts
 from ..models.fuel_order import FuelOrder
 from ..schemas.fuel_order_schema import FuelOrderSchema
 from ..extensions import db
@@ -181,14 +184,15 @@ def get_order_statistics():
     Demonstrates advanced decorator composition.
     """
     try:
-        # Get basic statistics
-        total_orders = FuelOrder.query.count()
-        pending_orders = FuelOrder.query.filter_by(status='pending').count()
-        completed_orders = FuelOrder.query.filter_by(status='completed').count()
+        # Get basic statistics from the materialized status counters
+        counts = get_order_status_counts()
+        total_orders = counts['total_orders']
+        pending_orders = counts['pending_count']
+        completed_orders = counts['completed_count']
         
-        # Get user-specific statistics if they have ownership scope
+        # Get user-specific statistics if they have ownership scope (indexed count)
         current_user_id = get_jwt_identity()
-        user_orders = FuelOrder.query.filter_by(assigned_lst_id=current_user_id).count()
+        user_orders = FuelOrder.query.filter_by(assigned_lst_user_id=current_user_id).count()
         
         statistics = {
             'total_orders': total_orders,
@@ -196,7 +200,7 @@ def get_order_statistics():
             'completed_orders': completed_orders,
             'user_assigned_orders': user_orders,
             'completion_rate': (completed_orders / total_orders * 100) if total_orders > 0 else 0,
-            'generated_at': db.func.now(),
+            'generated_at': datetime.utcnow().isoformat(),
             'generated_by': current_user_id
         }
         
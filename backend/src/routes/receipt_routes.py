@@ -13,10 +13,12 @@ from typing import Dict, Any
 from ..models.receipt import Receipt
 from ..models.receipt_line_item import ReceiptLineItem
 from ..services.receipt_service import ReceiptService
+from ..services.fee_calculation_service import FeeCalculationContext
 from ..services.admin_fee_config_service import AdminFeeConfigService
 from ..schemas.receipt_schemas import (
     create_draft_receipt_schema,
     update_draft_receipt_schema,
+    batch_calculate_fees_schema,
     receipt_list_query_schema,
     receipt_schema,
     receipt_detail_response_schema,
@@ -37,6 +39,9 @@ receipt_bp = Blueprint('receipts', __name__)
 # Initialize service
 receipt_service = ReceiptService()
 
+# List query parameters that control paging rather than filter receipts
+PAGINATION_PARAMS = ('page', 'per_page', 'pagination', 'cursor', 'include_total')
+
 
 @receipt_bp.errorhandler(ValidationError)
 def handle_validation_error(e):
@@ -219,6 +224,41 @@ def calculate_receipt_fees(receipt_id):
             return jsonify({'error': error_msg}), 400
 
 
+@receipt_bp.route('/api/receipts/calculate-fees/batch', methods=['POST'])
+@require_permission_v2('calculate_receipt_fees')
+def calculate_fees_batch():
+    """
+    Calculate fees for many transactions at once without modifying any receipts.
+    
+    Used by end-of-day billing and receipt backfills. All transactions are priced
+    against the same fee schedule snapshot.
+    
+    Body:
+        transactions (list): Up to 1000 objects with aircraft_type_id, customer_id,
+            fuel_uplift_gallons, fuel_price_per_gallon and optional additional_services
+        
+    Returns:
+        200: Calculation results in the same order as the submitted transactions
+        400: Validation error
+    """
+    try:
+        json_data = request.get_json()
+        if not isinstance(json_data, dict):
+            raise ValidationError({'_schema': ['Invalid input type. Expected a JSON object.']})
+        data = batch_calculate_fees_schema.load(json_data)
+        
+        contexts = [FeeCalculationContext(**transaction) for transaction in data['transactions']]
+        results = receipt_service.fee_calculation_service.calculate_for_transactions(contexts)
+        
+        return jsonify({
+            'results': [result.to_dict() for result in results],
+            'count': len(results)
+        }), 200
+        
+    except ValidationError as e:
+        return jsonify({"error": "Invalid request data", "details": e.messages}), 400
+
+
 @receipt_bp.route('/api/receipts/<int:receipt_id>/generate', methods=['POST'])
 @require_permission_v2('generate_receipt')
 def generate_receipt(receipt_id):
@@ -344,6 +384,9 @@ def list_receipts():
         search (str, optional): Search by receipt number, tail number, or customer name
         page (int, optional): Page number (default: 1)
         per_page (int, optional): Items per page (default: 50, max: 100)
+        pagination (str, optional): 'offset' (default) or 'cursor'
+        cursor (str, optional): next_cursor/prev_cursor from a previous page; implies cursor mode
+        include_total (bool, optional): In cursor mode, include an approximate total
         
     Returns:
         200: List of receipts with pagination info
@@ -356,13 +399,16 @@ def list_receipts():
         # Extract filters and pagination
         if not isinstance(query_params, dict):
             raise ValidationError('Invalid query parameters format')
-        filters = {k: v for k, v in query_params.items() if k not in ['page', 'per_page']}
+        filters = {k: v for k, v in query_params.items() if k not in PAGINATION_PARAMS}
         page = query_params.get('page', 1)
         per_page = query_params.get('per_page', 50)
         result = receipt_service.get_receipts(
             filters=filters,
             page=page,
-            per_page=per_page
+            per_page=per_page,
+            cursor=query_params.get('cursor'),
+            pagination=query_params.get('pagination', 'offset'),
+            include_total=query_params.get('include_total', False)
         )
         
         return jsonify(result), 200
@@ -372,6 +418,11 @@ def list_receipts():
             'error': 'Invalid query parameters',
             'details': e.messages
         }), 400
+    except ValueError as e:
+        return jsonify({
+            'error': 'Invalid query parameters',
+            'details': {'cursor': [str(e)]}
+        }), 400
 
 
 @receipt_bp.route('/api/receipts/<int:receipt_id>', methods=['GET'])
@@ -461,13 +512,16 @@ def download_receipt_pdf(receipt_id):
     """
     Generate and download a PDF of the receipt.
     
+    Finalized receipts are streamed from the on-disk PDF cache; drafts are
+    rendered on every request.
+    
     Returns:
         200: PDF file response
         404: Receipt not found
         500: PDF generation error
     """
     try:
-        from flask import Response
+        from flask import Response, send_file
         import io
         
         # Get receipt data
@@ -475,12 +529,31 @@ def download_receipt_pdf(receipt_id):
         if not receipt:
             return jsonify({'error': 'Receipt not found'}), 404
         
+        filename = f"Receipt_{receipt.receipt_number or receipt_id}.pdf"
+        
+        # Stream the cached PDF for finalized receipts
+        pdf_path = receipt_service.get_receipt_pdf_path(receipt)
+        if pdf_path:
+            def send_pdf(path):
+                return send_file(
+                    path,
+                    mimetype='application/pdf',
+                    as_attachment=True,
+                    download_name=filename,
+                    max_age=0
+                )
+            
+            try:
+                return send_pdf(pdf_path)
+            except FileNotFoundError:
+                # Pruned as superseded between the lookup and the open; the lookup re-renders it
+                return send_pdf(receipt_service.get_receipt_pdf_path(receipt))
+        
         # Generate PDF
         pdf_data = receipt_service.generate_receipt_pdf(receipt)
         
         # Create file response
         pdf_stream = io.BytesIO(pdf_data)
-        filename = f"Receipt_{receipt.receipt_number or receipt_id}.pdf"
         
         return Response(
             pdf_stream.getvalue(),
@@ -498,6 +571,49 @@ def download_receipt_pdf(receipt_id):
         return jsonify({'error': 'Failed to generate PDF'}), 500
 
 
+@receipt_bp.route('/api/receipts/export/pdf', methods=['GET'])
+@require_permission_v2('view_receipts')
+def export_receipt_pdfs():
+    """
+    Download every receipt matching the list filters as a ZIP of PDFs.
+    
+    The archive is streamed while receipts are rendered, so large exports
+    start downloading immediately and are not buffered in memory.
+    
+    Query Parameters:
+        status (str, optional): Filter by receipt status
+        customer_id (int, optional): Filter by customer ID
+        date_from (datetime, optional): Filter by creation date from
+        date_to (datetime, optional): Filter by creation date to
+        search (str, optional): Search by receipt number, tail number, or customer name
+        
+    Returns:
+        200: Streamed ZIP file response
+        400: Validation error in query parameters
+    """
+    from flask import Response, stream_with_context
+    
+    try:
+        query_params = receipt_list_query_schema.load(request.args.to_dict())
+    except ValidationError as e:
+        return jsonify({
+            'error': 'Invalid query parameters',
+            'details': e.messages
+        }), 400
+    
+    filters = {k: v for k, v in query_params.items() if k not in PAGINATION_PARAMS}
+    filename = f"Receipts_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.zip"
+    
+    return Response(
+        stream_with_context(receipt_service.export_receipt_pdfs(filters=filters)),
+        mimetype='application/zip',
+        headers={
+            'Content-Disposition': f'attachment; filename={filename}',
+            'Content-Type': 'application/zip'
+        }
+    )
+
+
 @receipt_bp.route('/api/receipts/health', methods=['GET'])
 def receipt_health_check():
     """
@@ -196,6 +196,9 @@ class PaginationSchema(Schema):
     total_items = fields.Int(dump_only=True)
     has_next = fields.Bool(dump_only=True)
     has_prev = fields.Bool(dump_only=True)
+    next_cursor = fields.Str(dump_only=True, allow_none=True)
+    prev_cursor = fields.Str(dump_only=True, allow_none=True)
+    total_is_approximate = fields.Bool(dump_only=True)
 
 class FuelOrderListResponseSchema(Schema):
     message = fields.Str(dump_only=True)
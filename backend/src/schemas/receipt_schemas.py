@@ -9,6 +9,29 @@ from datetime import datetime
 from typing import Dict, Any
 
 
+def _validate_additional_services(value):
+    """Validate the structure of an additional services list."""
+    if not isinstance(value, list):
+        raise ValidationError('Additional services must be a list')
+    
+    for service in value:
+        if not isinstance(service, dict):
+            raise ValidationError('Each service must be a dictionary')
+        
+        if 'fee_code' not in service:
+            raise ValidationError('Each service must have a fee_code')
+        
+        if 'quantity' not in service:
+            raise ValidationError('Each service must have a quantity')
+        
+        try:
+            quantity = float(service['quantity'])
+            if quantity <= 0:
+                raise ValidationError('Service quantity must be positive')
+        except (ValueError, TypeError):
+            raise ValidationError('Service quantity must be a number')
+
+
 class CreateDraftReceiptSchema(Schema):
     """Schema for creating a draft receipt from a fuel order."""
     fuel_order_id = fields.Integer(required=True, validate=validate.Range(min=1))
@@ -27,25 +50,33 @@ class UpdateDraftReceiptSchema(Schema):
     @validates('additional_services')
     def validate_additional_services(self, value):
         """Validate additional services structure."""
-        if not isinstance(value, list):
-            raise ValidationError('Additional services must be a list')
-        
-        for service in value:
-            if not isinstance(service, dict):
-                raise ValidationError('Each service must be a dictionary')
-            
-            if 'fee_code' not in service:
-                raise ValidationError('Each service must have a fee_code')
-            
-            if 'quantity' not in service:
-                raise ValidationError('Each service must have a quantity')
-            
-            try:
-                quantity = float(service['quantity'])
-                if quantity <= 0:
-                    raise ValidationError('Service quantity must be positive')
-            except (ValueError, TypeError):
-                raise ValidationError('Service quantity must be a number')
+        _validate_additional_services(value)
+
+
+class FeeCalculationRequestSchema(Schema):
+    """Schema for a single transaction in a batch fee calculation request."""
+    aircraft_type_id = fields.Integer(required=True, validate=validate.Range(min=1))
+    customer_id = fields.Integer(required=True, validate=validate.Range(min=1))
+    fuel_uplift_gallons = fields.Decimal(required=True, validate=validate.Range(min=0))
+    fuel_price_per_gallon = fields.Decimal(required=True, validate=validate.Range(min=0))
+    additional_services = fields.List(
+        fields.Dict(keys=fields.Str(), values=fields.Raw()),
+        missing=[]
+    )
+    
+    @validates('additional_services')
+    def validate_additional_services(self, value):
+        """Validate additional services structure."""
+        _validate_additional_services(value)
+
+
+class BatchCalculateFeesSchema(Schema):
+    """Schema for a batch fee calculation request."""
+    transactions = fields.List(
+        fields.Nested(FeeCalculationRequestSchema),
+        required=True,
+        validate=validate.Length(min=1, max=1000)
+    )
 
 
 class ReceiptLineItemSchema(Schema):
@@ -118,6 +149,9 @@ class ReceiptListQuerySchema(Schema):
     )
     page = fields.Integer(validate=validate.Range(min=1), missing=1)
     per_page = fields.Integer(validate=validate.Range(min=1, max=100), missing=50)
+    pagination = fields.String(validate=validate.OneOf(['offset', 'cursor']), missing='offset')
+    cursor = fields.String(validate=validate.Length(max=200), allow_none=True)
+    include_total = fields.Boolean(missing=False)
     
     @validates('date_from')
     def validate_date_from(self, value):
@@ -149,8 +183,13 @@ class PaginationSchema(Schema):
     pages = fields.Integer(dump_only=True)
     per_page = fields.Integer(dump_only=True)
     total = fields.Integer(dump_only=True)
+    # Cursor mode reports its approximate total as total_items, like fuel orders
+    total_items = fields.Integer(dump_only=True)
     has_next = fields.Boolean(dump_only=True)
     has_prev = fields.Boolean(dump_only=True)
+    next_cursor = fields.String(dump_only=True, allow_none=True)
+    prev_cursor = fields.String(dump_only=True, allow_none=True)
+    total_is_approximate = fields.Boolean(dump_only=True)
 
 
 class ReceiptListResponseSchema(Schema):
@@ -204,6 +243,7 @@ class ErrorResponseSchema(Schema):
 # Schema instances for reuse
 create_draft_receipt_schema = CreateDraftReceiptSchema()
 update_draft_receipt_schema = UpdateDraftReceiptSchema()
+batch_calculate_fees_schema = BatchCalculateFeesSchema()
 receipt_schema = ReceiptSchema()
 receipt_line_item_schema = ReceiptLineItemSchema()
 receipt_list_query_schema = ReceiptListQuerySchema()
@@ -36,6 +36,8 @@ from ..schemas.admin_fee_config_schemas import (
 )
 from marshmallow import ValidationError as MarshmallowValidationError
 from .aircraft_service import AircraftService
+from .fee_schedule_cache import get_fee_schedule_cache
+from .fuel_price_cache import get_fuel_price_cache
 
 
 class AdminFeeConfigService:
@@ -109,6 +111,7 @@ class AdminFeeConfigService:
             aircraft_type.base_min_fuel_gallons_for_waiver = base_min_fuel_gallons
             
             db.session.commit()
+            get_fee_schedule_cache().invalidate()
             
             return {
                 'id': aircraft_type.id,
@@ -363,6 +366,7 @@ class AdminFeeConfigService:
             # Update the classification directly
             aircraft_type.classification_id = aircraft_classification_id
             db.session.commit()
+            get_fee_schedule_cache().invalidate()
             
             return {
                 'id': aircraft_type.id,
@@ -433,6 +437,7 @@ class AdminFeeConfigService:
                 rule_id = rule.id
             
             db.session.commit()
+            get_fee_schedule_cache().invalidate()
             
             result = AdminFeeConfigService.get_fee_rule(rule_id)
             if result is None:
@@ -499,6 +504,7 @@ class AdminFeeConfigService:
             
             AdminFeeConfigService._apply_rule_data(rule, rule_data)
             db.session.commit()
+            get_fee_schedule_cache().invalidate()
             return AdminFeeConfigService.get_fee_rule(rule.id)
         except IntegrityError as e:
             db.session.rollback()
@@ -518,6 +524,7 @@ class AdminFeeConfigService:
             if rule:
                 db.session.delete(rule)
                 db.session.commit()
+                get_fee_schedule_cache().invalidate()
                 return True
             return False
         except SQLAlchemyError as e:
@@ -584,6 +591,7 @@ class AdminFeeConfigService:
             tier.is_caa_specific_tier = tier_data.get('is_caa_specific_tier', False)
             db.session.add(tier)
             db.session.commit()
+            get_fee_schedule_cache().invalidate()
             
             result = AdminFeeConfigService.get_waiver_tier(tier.id)
             if result is None:
@@ -609,6 +617,7 @@ class AdminFeeConfigService:
                     setattr(tier, field, tier_data[field])
             
             db.session.commit()
+            get_fee_schedule_cache().invalidate()
             
             return AdminFeeConfigService.get_waiver_tier(tier.id)
         except SQLAlchemyError as e:
@@ -627,6 +636,7 @@ class AdminFeeConfigService:
 
             db.session.delete(tier)
             db.session.commit()
+            get_fee_schedule_cache().invalidate()
             return True
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -664,6 +674,7 @@ class AdminFeeConfigService:
                 ).update({'tier_priority': update['new_priority']})
             
             db.session.commit()
+            get_fee_schedule_cache().invalidate()
             
             return {
                 'success': True,
@@ -818,6 +829,7 @@ class AdminFeeConfigService:
                 db.session.add(override)
             
             db.session.commit()
+            get_fee_schedule_cache().invalidate()
             return override.to_dict()
         except IntegrityError:
             db.session.rollback()
@@ -858,6 +870,7 @@ class AdminFeeConfigService:
             if override:
                 db.session.delete(override)
                 db.session.commit()
+                get_fee_schedule_cache().invalidate()
                 return {"success": True}
             
             return {"success": False}
@@ -915,6 +928,7 @@ class AdminFeeConfigService:
                 db.session.add(override)
             
             db.session.commit()
+            get_fee_schedule_cache().invalidate()
 
             # Return objects and basic data for route processing
             result = {
@@ -978,17 +992,19 @@ class AdminFeeConfigService:
         This method returns an entry for ALL active fuel types.
         If a price has never been set for a specific fuel type, its price field 
         will be null. This ensures the frontend UI is always complete.
+        
+        Prices come from the fuel price cache: each entry is the most recently
+        dated price, including one that takes effect in the future.
         """
         try:
             # Get all active fuel types
             all_fuel_types = FuelType.query.filter_by(is_active=True).order_by(FuelType.name).all()
             
             # Get the latest price for each fuel type
+            fuel_price_cache = get_fuel_price_cache()
             result = []
             for fuel_type in all_fuel_types:
-                latest_price = FuelPrice.query.filter_by(
-                    fuel_type_id=fuel_type.id
-                ).order_by(FuelPrice.effective_date.desc()).first()
+                latest_price = fuel_price_cache.get_timeline(fuel_type.id).latest
                 
                 if latest_price:
                     result.append({
@@ -1073,6 +1089,7 @@ class AdminFeeConfigService:
                 updated_count += 1
             
             db.session.commit()
+            get_fuel_price_cache().invalidate()
             
             return {
                 'success': True,
@@ -1129,6 +1146,7 @@ class AdminFeeConfigService:
             # Update the aircraft type's classification
             aircraft_type.classification_id = classification_id
             db.session.commit()
+            get_fee_schedule_cache().invalidate()
             
             # Refresh to get updated relationships
             db.session.refresh(aircraft_type)
@@ -1661,6 +1679,8 @@ class AdminFeeConfigService:
                 current_app.logger.info(f"Starting atomic diff-and-apply restore operation for version {version_id}")
                 AdminFeeConfigService._apply_configuration_changeset(changeset)
                 current_app.logger.info(f"Successfully restored configuration from version {version_id} using diff-and-apply strategy")
+            
+            get_fee_schedule_cache().invalidate()
                 
         except SQLAlchemyError as e:
             current_app.logger.error(f"Database error during restore from version {version_id}: {str(e)}")
@@ -1731,6 +1751,8 @@ class AdminFeeConfigService:
                 current_app.logger.info("Starting atomic diff-and-apply import operation")
                 AdminFeeConfigService._apply_configuration_changeset(changeset)
                 current_app.logger.info("Successfully imported configuration from file using diff-and-apply strategy")
+            
+            get_fee_schedule_cache().invalidate()
                 
         except SQLAlchemyError as e:
             current_app.logger.error(f"Database error during import: {str(e)}")
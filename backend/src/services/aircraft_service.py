@@ -3,6 +3,7 @@ from ..models.aircraft import Aircraft
 from ..models.aircraft_type import AircraftType
 from ..models.fuel_type import FuelType
 from ..app import db
+from .fee_schedule_cache import get_fee_schedule_cache
 
 class AircraftService:
     @staticmethod
@@ -273,6 +274,7 @@ class AircraftService:
                 aircraft_type.classification_id = data['classification_id']
             
             db.session.commit()
+            get_fee_schedule_cache().invalidate()
             return aircraft_type, "Aircraft type updated successfully", 200
         except Exception as e:
             db.session.rollback()
@@ -295,6 +297,7 @@ class AircraftService:
             # Delete the aircraft type
             db.session.delete(aircraft_type)
             db.session.commit()
+            get_fee_schedule_cache().invalidate()
             return True, "Aircraft type deleted successfully", 200
         except Exception as e:
             db.session.rollback()
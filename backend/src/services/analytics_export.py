@@ -0,0 +1,270 @@
+"""
+Analytics Export
+
+The analytics warehouse used to load fuel orders and receipts by scraping the
+CSV export, which flattens every value to text. This module writes
+fuel_orders, receipts and receipt_line_items as typed Parquet files instead:
+
+- Each table gets its own directory of part files; columns keep their
+  database types (decimal128 with the column's precision and scale,
+  dictionary-encoded enums, timestamps, booleans, integers)
+- Rows are read in (updated_at, id) order with yield_per and written one
+  row group per batch, so memory is bounded by the batch size
+- Exports are incremental: _watermarks.json records the last exported
+  (updated_at, id) per table, and it only advances after a part file is
+  complete, so an interrupted run resumes from the last finished file
+- updated_at is stamped by the application when a row is flushed, not
+  when its transaction commits. Rows updated within the last minute are
+  left for the next run, which covers transactions that commit within a
+  minute of flushing; rows committed later than that can land behind a
+  watermark that has already passed them, and are only exported when they
+  change again or on a full export
+- A row changed after it was exported is exported again, so consumers
+  keep the version with the latest updated_at per id
+- Runs take an exclusive lock on the output directory
+"""
+
+import fcntl
+import json
+import logging
+import os
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Boolean, Date, DateTime, Enum, Float, Integer, Numeric, String, Text, select, tuple_
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    pa = None
+    pq = None
+
+from ..extensions import db
+from ..models.fuel_order import FuelOrder
+from ..models.receipt import Receipt
+from ..models.receipt_line_item import ReceiptLineItem
+
+logger = logging.getLogger(__name__)
+
+EXPORT_MODELS = {
+    'fuel_orders': FuelOrder,
+    'receipts': Receipt,
+    'receipt_line_items': ReceiptLineItem,
+}
+
+WATERMARK_FILE = '_watermarks.json'
+LOCK_FILE = '.export.lock'
+
+DEFAULT_BATCH_SIZE = 50000
+DEFAULT_ROWS_PER_FILE = 1000000
+DEFAULT_SETTLE_SECONDS = 60
+
+
+def _arrow_column(column) -> Tuple[Any, Callable[[List[Any]], Any]]:
+    """Arrow type for a table column and a function building an array from its values."""
+    column_type = column.type
+    if isinstance(column_type, Enum):
+        # A fixed dictionary keeps every row group's encoding identical
+        names = list(column_type.enums)
+        positions = {name: index for index, name in enumerate(names)}
+        arrow_type = pa.dictionary(pa.int16(), pa.string())
+        dictionary = pa.array(names, type=pa.string())
+
+        def build(values):
+            indices = pa.array(
+                [None if value is None else positions[getattr(value, 'name', value)] for value in values],
+                type=pa.int16()
+            )
+            return pa.DictionaryArray.from_arrays(indices, dictionary)
+        return arrow_type, build
+
+    if isinstance(column_type, Numeric) and not isinstance(column_type, Float):
+        arrow_type = pa.decimal128(column_type.precision or 38, column_type.scale or 0)
+    elif isinstance(column_type, Float):
+        arrow_type = pa.float64()
+    elif isinstance(column_type, Integer):
+        arrow_type = pa.int64()
+    elif isinstance(column_type, Boolean):
+        arrow_type = pa.bool_()
+    elif isinstance(column_type, DateTime):
+        arrow_type = pa.timestamp('us')
+    elif isinstance(column_type, Date):
+        arrow_type = pa.date32()
+    elif isinstance(column_type, (String, Text)):
+        arrow_type = pa.string()
+    else:
+        # JSON and anything else travel as their JSON text
+        arrow_type = pa.string()
+
+        def build(values):
+            return pa.array([None if value is None else json.dumps(value, default=str) for value in values],
+                            type=arrow_type)
+        return arrow_type, build
+
+    return arrow_type, lambda values: pa.array(values, type=arrow_type)
+
+
+class _TableLayout:
+    """Arrow schema for a model's table and the row-batch converter."""
+
+    def __init__(self, model):
+        self.columns = list(model.__table__.columns)
+        converted = [_arrow_column(column) for column in self.columns]
+        self.schema = pa.schema([
+            pa.field(column.name, arrow_type, nullable=column.nullable)
+            for column, (arrow_type, _) in zip(self.columns, converted)
+        ])
+        self._builders = [build for _, build in converted]
+
+    def record_batch(self, rows: List[Any]):
+        arrays = [build([row[index] for row in rows]) for index, build in enumerate(self._builders)]
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+
+def _read_watermarks(output_dir: str) -> Dict[str, Dict[str, Any]]:
+    path = os.path.join(output_dir, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_watermarks(output_dir: str, watermarks: Dict[str, Dict[str, Any]]):
+    path = os.path.join(output_dir, WATERMARK_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(watermarks, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def _export_lock(output_dir: str):
+    with open(os.path.join(output_dir, LOCK_FILE), 'w') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise RuntimeError(f"An analytics export is already running in {output_dir}")
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _row_batches(model, watermark: Optional[Dict[str, Any]], until: datetime,
+                 batch_size: int) -> Iterator[List[Any]]:
+    """Rows changed after the watermark and up to until, in (updated_at, id) order."""
+    table = model.__table__
+    key = tuple_(table.c.updated_at, table.c.id)
+    statement = select(*table.columns).where(table.c.updated_at <= until)
+    if watermark:
+        statement = statement.where(
+            key > tuple_(datetime.fromisoformat(watermark['updated_at']), watermark['id'])
+        )
+    statement = statement.order_by(table.c.updated_at, table.c.id)
+
+    result = db.session.execute(statement.execution_options(yield_per=batch_size))
+    try:
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
+
+
+def _export_table(name: str, output_dir: str, watermarks: Dict[str, Dict[str, Any]], until: datetime,
+                  batch_size: int, rows_per_file: int, run_id: str) -> Dict[str, Any]:
+    model = EXPORT_MODELS[name]
+    layout = _TableLayout(model)
+    table_dir = os.path.join(output_dir, name)
+    os.makedirs(table_dir, exist_ok=True)
+
+    files: List[str] = []
+    rows_exported = 0
+    writer = None
+    tmp_path = final_path = None
+    file_rows = 0
+    last_key = None
+
+    def finish_file():
+        nonlocal writer, file_rows
+        writer.close()
+        os.replace(tmp_path, final_path)
+        files.append(final_path)
+        # The file is complete, so the next run can start after its last row
+        watermarks[name] = {'updated_at': last_key[0].isoformat(), 'id': last_key[1]}
+        _write_watermarks(output_dir, watermarks)
+        writer, file_rows = None, 0
+
+    try:
+        for rows in _row_batches(model, watermarks.get(name), until, batch_size):
+            if writer is None:
+                final_path = os.path.join(table_dir, f"part-{run_id}-{len(files):05d}.parquet")
+                tmp_path = f"{final_path}.tmp"
+                writer = pq.ParquetWriter(tmp_path, layout.schema, compression='zstd')
+            writer.write_batch(layout.record_batch(rows))
+            last_row = rows[-1]
+            last_key = (last_row.updated_at, last_row.id)
+            file_rows += len(rows)
+            rows_exported += len(rows)
+            if file_rows >= rows_per_file:
+                finish_file()
+        if writer is not None:
+            finish_file()
+    except Exception:
+        if writer is not None:
+            writer.close()
+            os.remove(tmp_path)
+        raise
+
+    return {'rows': rows_exported, 'files': files, 'watermark': watermarks.get(name)}
+
+
+def export_analytics(output_dir: str, tables: Optional[Iterable[str]] = None, full: bool = False,
+                     batch_size: int = DEFAULT_BATCH_SIZE, rows_per_file: int = DEFAULT_ROWS_PER_FILE,
+                     settle_seconds: int = DEFAULT_SETTLE_SECONDS) -> Dict[str, Any]:
+    """
+    Write rows changed since the last export to Parquet files under output_dir.
+
+    Args:
+        output_dir: Directory holding one subdirectory per table and the watermarks
+        tables: Tables to export (default: all of EXPORT_MODELS)
+        full: Ignore the requested tables' watermarks and export all their rows again
+        batch_size: Rows fetched per query batch; each batch is one row group
+        rows_per_file: Rows per part file; the watermark advances after each file
+        settle_seconds: Leave rows updated this recently for the next run; bounds how
+            long after its flush a transaction may commit without its rows being skipped
+
+    Returns:
+        Dict with per-table 'rows', 'files' and 'watermark', and the run's 'until' bound
+
+    Raises:
+        ValueError: If an unknown table is requested
+        RuntimeError: If pyarrow is missing or another export holds the directory lock
+    """
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("Analytics export not available - pyarrow not installed")
+
+    tables = list(tables) if tables else list(EXPORT_MODELS)
+    unknown = [name for name in tables if name not in EXPORT_MODELS]
+    if unknown:
+        raise ValueError(f"Unknown tables requested: {', '.join(unknown)}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    now = datetime.utcnow()
+    until = now - timedelta(seconds=settle_seconds)
+    run_id = now.strftime('%Y%m%dT%H%M%S%f')
+
+    with _export_lock(output_dir):
+        watermarks = _read_watermarks(output_dir)
+        if full:
+            for name in tables:
+                watermarks.pop(name, None)
+        results = {}
+        for name in tables:
+            results[name] = _export_table(name, output_dir, watermarks, until, batch_size, rows_per_file, run_id)
+            logger.info(f"Exported {results[name]['rows']} {name} rows to {len(results[name]['files'])} files")
+
+    return {'until': until.isoformat(), 'tables': results}
@@ -9,11 +9,10 @@ for fuel order transactions. It is designed to be:
 - Unit Consistent: All fuel volume calculations use gallons
 """
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from decimal import Decimal
-from typing import List, Dict, Any, Optional, Set
+from typing import List, Dict, Any, Optional, FrozenSet
 from flask import current_app
-from sqlalchemy.orm import joinedload
 from ..extensions import db
 from sqlalchemy import and_
 
@@ -21,8 +20,13 @@ from ..extensions import db
 from ..models.customer import Customer
 from ..models.aircraft_type import AircraftType
 from ..models.aircraft_classification import AircraftClassification
-from ..models.fee_rule import FeeRule, WaiverStrategy, CalculationBasis
-from ..models.waiver_tier import WaiverTier
+from ..models.fee_rule import CalculationBasis
+from .fee_schedule_cache import (
+    FeeScheduleCache, CompiledFeeSchedule, ResolvedFeeRule, ScheduledFeeRuleOverride,
+    WaiverThresholdTable,
+    get_fee_schedule_cache
+)
+from .fee_quote_cache import FeeQuoteCache, get_fee_quote_cache
 
 
 @dataclass
@@ -46,6 +50,17 @@ class FeeCalculationResultLineItem:
     fee_code_applied: Optional[str] = None  # Fee code for fees and waivers
     is_taxable: bool = True
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'line_item_type': self.line_item_type,
+            'description': self.description,
+            'amount': str(self.amount),
+            'quantity': str(self.quantity),
+            'unit_price': str(self.unit_price) if self.unit_price is not None else None,
+            'fee_code_applied': self.fee_code_applied,
+            'is_taxable': self.is_taxable
+        }
+
 
 @dataclass
 class FeeCalculationResult:
@@ -58,6 +73,17 @@ class FeeCalculationResult:
     grand_total_amount: Decimal
     is_caa_applied: bool
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'line_items': [item.to_dict() for item in self.line_items],
+            'fuel_subtotal': str(self.fuel_subtotal),
+            'total_fees_amount': str(self.total_fees_amount),
+            'total_waivers_amount': str(self.total_waivers_amount),
+            'tax_amount': str(self.tax_amount),
+            'grand_total_amount': str(self.grand_total_amount),
+            'is_caa_applied': self.is_caa_applied
+        }
+
 
 class FeeCalculationService:
     """Service for calculating fees, taxes, and waivers for transactions."""
@@ -65,10 +91,28 @@ class FeeCalculationService:
     # Default tax rate - in a real system this would be configurable
     DEFAULT_TAX_RATE = Decimal('0.08')  # 8%
     
+    def __init__(
+        self,
+        schedule_cache: Optional[FeeScheduleCache] = None,
+        quote_cache: Optional[FeeQuoteCache] = None
+    ):
+        """
+        Initialize the service.
+        
+        Args:
+            schedule_cache: Compiled fee schedule cache (defaults to the process-wide cache)
+            quote_cache: Memo of calculation results (defaults to the process-wide cache)
+        """
+        self.schedule_cache = schedule_cache or get_fee_schedule_cache()
+        self.quote_cache = quote_cache or get_fee_quote_cache()
+    
     def calculate_for_transaction(self, context: FeeCalculationContext) -> FeeCalculationResult:
         """
         Main public method to calculate all fees, waivers, and taxes for a transaction.
         
+        Results are memoized per compiled fee schedule snapshot on the normalized inputs
+        (aircraft type, CAA status, gallons, price and additional services).
+        
         Args:
             context: Input context with transaction details
             
@@ -76,188 +120,262 @@ class FeeCalculationService:
             Complete calculation result with line items and totals
         """
         try:
-            # Fetch all necessary data from database
-            data = self._fetch_data(context)
-            
-            # Initialize result components
-            line_items = []
+            # Fee rules, overrides and waiver tiers come from the compiled schedule
+            schedule = self.schedule_cache.get_schedule()
             
-            # Determine if customer is CAA member
-            is_caa_member = data['customer'].is_caa_member if data['customer'] else False
+            # CAA status is part of the quote key, so the customer is always needed
+            customer = db.session.get(Customer, context.customer_id)
+            is_caa_member = customer.is_caa_member if customer else False
             
-            # 1. Calculate fuel line item
-            fuel_line_item = FeeCalculationResultLineItem(
-                line_item_type='FUEL',
-                description=f"Fuel ({context.fuel_uplift_gallons} gallons)",
-                amount=context.fuel_uplift_gallons * context.fuel_price_per_gallon,
-                quantity=context.fuel_uplift_gallons,
-                unit_price=context.fuel_price_per_gallon,
-                is_taxable=True
+            quote_key = FeeQuoteCache.make_key(
+                context.aircraft_type_id,
+                is_caa_member,
+                context.fuel_uplift_gallons,
+                context.fuel_price_per_gallon,
+                context.additional_services
             )
-            line_items.append(fuel_line_item)
+            cached_result = self.quote_cache.get(schedule.version, quote_key, schedule.compiled_at)
+            if cached_result is not None:
+                return self._copy_result(cached_result)
             
-            # 2. Determine applicable fee rules
-            # Store aircraft type ID for override lookups
-            self._current_aircraft_type_id = context.aircraft_type_id
+            aircraft_type = db.session.get(AircraftType, context.aircraft_type_id)
+            data = self._build_data(customer, aircraft_type, schedule)
+            result = self._calculate(context, data)
             
-            applicable_rules = self._determine_applicable_rules(
-                data['fee_rules'], 
-                data['aircraft_aircraft_classification_id'],
-                context.additional_services
-            )
+            self.quote_cache.set(schedule.version, quote_key, self._copy_result(result), schedule.compiled_at)
+            return result
+            
+        except Exception as e:
+            current_app.logger.error(f"Error in fee calculation: {str(e)}")
+            raise
+    
+    def calculate_for_transactions(self, contexts: List[FeeCalculationContext]) -> List[FeeCalculationResult]:
+        """
+        Calculate fees, waivers, and taxes for many transactions at once.
+        
+        All referenced customers and aircraft types are loaded with one query each,
+        and every transaction is priced against the same fee schedule snapshot.
+        
+        Args:
+            contexts: Input contexts with transaction details
             
-            # 3. Evaluate tiered waivers
-            # Get base minimum fuel gallons for waiver from aircraft type (single source of truth)
-            base_min_fuel_for_waiver = None
-            if data['aircraft_type']:
-                base_min_fuel_for_waiver = data['aircraft_type'].base_min_fuel_gallons_for_waiver
+        Returns:
+            Calculation results in the same order as the input contexts
+        """
+        if not contexts:
+            return []
+        
+        try:
+            schedule = self.schedule_cache.get_schedule()
             
-            waived_fee_codes = self._evaluate_waivers(
-                context.fuel_uplift_gallons,
-                base_min_fuel_for_waiver,
-                data['waiver_tiers'],
-                is_caa_member
-            )
+            customer_ids = {context.customer_id for context in contexts if context.customer_id}
+            aircraft_type_ids = {context.aircraft_type_id for context in contexts if context.aircraft_type_id}
             
-            # 4. Process each applicable fee rule
-            for rule in applicable_rules:
-                # Determine amounts and waiver settings based on CAA membership
-                if is_caa_member and rule.has_caa_override:
-                    fee_amount = rule.caa_override_amount
-                    waiver_strategy = rule.caa_waiver_strategy_override or rule.waiver_strategy
-                    simple_multiplier = rule.caa_simple_waiver_multiplier_override or rule.simple_waiver_multiplier
-                else:
-                    fee_amount = rule.amount
-                    waiver_strategy = rule.waiver_strategy
-                    simple_multiplier = rule.simple_waiver_multiplier
-                
-                # Get quantity for this service
-                service_quantity = self._get_service_quantity(rule.fee_code, context.additional_services)
-                total_amount = fee_amount * service_quantity
-                
-                # Add fee line item
-                fee_line_item = FeeCalculationResultLineItem(
-                    line_item_type='FEE',
-                    description=rule.fee_name,
-                    amount=total_amount,
-                    quantity=service_quantity,
-                    unit_price=fee_amount,
-                    fee_code_applied=rule.fee_code,
-                    is_taxable=rule.is_taxable
-                )
-                line_items.append(fee_line_item)
-                
-                # Check if fee should be waived
-                should_waive = False
-                
-                if rule.is_potentially_waivable_by_fuel_uplift and base_min_fuel_for_waiver:
-                    if waiver_strategy == WaiverStrategy.SIMPLE_MULTIPLIER:
-                        # Simple multiplier waiver
-                        threshold = base_min_fuel_for_waiver * simple_multiplier
-                        should_waive = context.fuel_uplift_gallons >= threshold
-                        
-                    elif waiver_strategy == WaiverStrategy.TIERED_MULTIPLIER:
-                        # Tiered multiplier waiver
-                        should_waive = rule.fee_code in waived_fee_codes
-                
-                if should_waive:
-                    # Add waiver line item (negative amount, matches the total fee amount)
-                    waiver_line_item = FeeCalculationResultLineItem(
-                        line_item_type='WAIVER',
-                        description=f"Fuel Uplift Waiver ({rule.fee_name})",
-                        amount=-total_amount,
-                        quantity=service_quantity,
-                        fee_code_applied=rule.fee_code,
-                        is_taxable=False
-                    )
-                    line_items.append(waiver_line_item)
+            customers = {}
+            if customer_ids:
+                customers = {
+                    customer.id: customer
+                    for customer in Customer.query.filter(Customer.id.in_(customer_ids)).all()
+                }
             
-            # 5. Calculate tax on all taxable line items
-            taxable_amount = sum(
-                item.amount for item in line_items 
-                if item.is_taxable and item.line_item_type in ['FUEL', 'FEE']
-            )
+            aircraft_types = {}
+            if aircraft_type_ids:
+                aircraft_types = {
+                    aircraft_type.id: aircraft_type
+                    for aircraft_type in AircraftType.query.filter(AircraftType.id.in_(aircraft_type_ids)).all()
+                }
             
-            tax_amount = self._calculate_taxes(taxable_amount) # type: ignore
-            if tax_amount > 0:
-                tax_line_item = FeeCalculationResultLineItem(
-                    line_item_type='TAX',
-                    description="Tax",
-                    amount=tax_amount,
-                    is_taxable=False
+            results = []
+            for context in contexts:
+                data = self._build_data(
+                    customers.get(context.customer_id),
+                    aircraft_types.get(context.aircraft_type_id),
+                    schedule
                 )
-                line_items.append(tax_line_item)
-            
-            # 6. Calculate totals
-            fuel_subtotal = fuel_line_item.amount
-            total_fees_amount = sum(
-                item.amount for item in line_items 
-                if item.line_item_type == 'FEE'
-            )
-            total_waivers_amount = abs(sum(
-                item.amount for item in line_items 
-                if item.line_item_type == 'WAIVER'
-            ))
-            grand_total_amount = sum(
-                item.amount for item in line_items 
-                if item.line_item_type in ['FUEL', 'FEE', 'WAIVER', 'TAX']
-            )
+                results.append(self._calculate(context, data))
             
-            return FeeCalculationResult(
-                line_items=line_items,
-                fuel_subtotal=fuel_subtotal,
-                total_fees_amount=total_fees_amount, # type: ignore
-                total_waivers_amount=total_waivers_amount, # type: ignore
-                tax_amount=tax_amount, # type: ignore
-                grand_total_amount=grand_total_amount, # type: ignore
-                is_caa_applied=is_caa_member
-            )
+            return results
             
         except Exception as e:
-            current_app.logger.error(f"Error in fee calculation: {str(e)}")
+            current_app.logger.error(f"Error in batch fee calculation: {str(e)}")
             raise
     
-    def _fetch_data(self, context: FeeCalculationContext) -> Dict[str, Any]:
+    def _calculate(self, context: FeeCalculationContext, data: Dict[str, Any]) -> FeeCalculationResult:
         """
-        Efficiently fetch all necessary data from the database.
+        Price a single transaction from already fetched data.
         
         Args:
-            context: Input context
+            context: Input context with transaction details
+            data: Data returned by _build_data
             
         Returns:
-            Dictionary containing all fetched data
+            Complete calculation result with line items and totals
+        """
+        # Initialize result components
+        line_items = []
+        
+        # Determine if customer is CAA member
+        is_caa_member = data['customer'].is_caa_member if data['customer'] else False
+        
+        # 1. Calculate fuel line item
+        fuel_line_item = FeeCalculationResultLineItem(
+            line_item_type='FUEL',
+            description=f"Fuel ({context.fuel_uplift_gallons} gallons)",
+            amount=context.fuel_uplift_gallons * context.fuel_price_per_gallon,
+            quantity=context.fuel_uplift_gallons,
+            unit_price=context.fuel_price_per_gallon,
+            is_taxable=True
+        )
+        line_items.append(fuel_line_item)
+        
+        # 2. Determine applicable fee rules
+        applicable_rules = self._determine_applicable_rules(
+            data['schedule'],
+            context.aircraft_type_id,
+            data['aircraft_aircraft_classification_id'],
+            context.additional_services
+        )
+        
+        # 3. Evaluate tiered and simple-multiplier waivers
+        # Get base minimum fuel gallons for waiver from aircraft type (single source of truth)
+        base_min_fuel_for_waiver = None
+        if data['aircraft_type']:
+            base_min_fuel_for_waiver = data['aircraft_type'].base_min_fuel_gallons_for_waiver
+        
+        waived_fee_codes = self._evaluate_waivers(
+            context.fuel_uplift_gallons,
+            data['schedule'].waiver_table(context.aircraft_type_id, base_min_fuel_for_waiver, is_caa_member)
+        )
+        
+        # 4. Process each applicable fee rule
+        for rule in applicable_rules:
+            # Determine amounts and waiver settings based on CAA membership
+            if is_caa_member and rule.has_caa_override:
+                fee_amount = rule.caa_override_amount
+            else:
+                fee_amount = rule.amount
+            
+            # Get quantity for this service
+            service_quantity = self._get_service_quantity(rule.fee_code, context.additional_services)
+            total_amount = fee_amount * service_quantity
+            
+            # Add fee line item
+            fee_line_item = FeeCalculationResultLineItem(
+                line_item_type='FEE',
+                description=rule.fee_name,
+                amount=total_amount,
+                quantity=service_quantity,
+                unit_price=fee_amount,
+                fee_code_applied=rule.fee_code,
+                is_taxable=rule.is_taxable
+            )
+            line_items.append(fee_line_item)
+            
+            # Waiver strategy, CAA overrides and waivability are folded into the waiver table
+            if rule.fee_code in waived_fee_codes:
+                # Add waiver line item (negative amount, matches the total fee amount)
+                waiver_line_item = FeeCalculationResultLineItem(
+                    line_item_type='WAIVER',
+                    description=f"Fuel Uplift Waiver ({rule.fee_name})",
+                    amount=-total_amount,
+                    quantity=service_quantity,
+                    fee_code_applied=rule.fee_code,
+                    is_taxable=False
+                )
+                line_items.append(waiver_line_item)
+        
+        # 5. Calculate tax on all taxable line items
+        taxable_amount = sum(
+            item.amount for item in line_items 
+            if item.is_taxable and item.line_item_type in ['FUEL', 'FEE']
+        )
+        
+        tax_amount = self._calculate_taxes(taxable_amount) # type: ignore
+        if tax_amount > 0:
+            tax_line_item = FeeCalculationResultLineItem(
+                line_item_type='TAX',
+                description="Tax",
+                amount=tax_amount,
+                is_taxable=False
+            )
+            line_items.append(tax_line_item)
+        
+        # 6. Calculate totals
+        fuel_subtotal = fuel_line_item.amount
+        total_fees_amount = sum(
+            item.amount for item in line_items 
+            if item.line_item_type == 'FEE'
+        )
+        total_waivers_amount = abs(sum(
+            item.amount for item in line_items 
+            if item.line_item_type == 'WAIVER'
+        ))
+        grand_total_amount = sum(
+            item.amount for item in line_items 
+            if item.line_item_type in ['FUEL', 'FEE', 'WAIVER', 'TAX']
+        )
+        
+        return FeeCalculationResult(
+            line_items=line_items,
+            fuel_subtotal=fuel_subtotal,
+            total_fees_amount=total_fees_amount, # type: ignore
+            total_waivers_amount=total_waivers_amount, # type: ignore
+            tax_amount=tax_amount, # type: ignore
+            grand_total_amount=grand_total_amount, # type: ignore
+            is_caa_applied=is_caa_member
+        )
+
+    def _build_data(
+        self,
+        customer: Optional[Customer],
+        aircraft_type: Optional[AircraftType],
+        schedule: CompiledFeeSchedule
+    ) -> Dict[str, Any]:
         """
-        # Fetch customer
-        customer = db.session.get(Customer, context.customer_id)
+        Assemble the calculation data for one transaction from loaded records.
         
-        # Fetch aircraft type
-        aircraft_type = db.session.get(AircraftType, context.aircraft_type_id)
+        Schedule data (fee rules, overrides, waiver tiers) comes from the compiled
+        fee schedule snapshot; only the customer and aircraft type hit the database.
         
+        Args:
+            customer: Customer for the transaction, if found
+            aircraft_type: Aircraft type for the transaction, if found
+            schedule: Compiled fee schedule snapshot
+            
+        Returns:
+            Dictionary containing all data needed by _calculate
+        """
         # Find aircraft's fee category (now global relationship)
         aircraft_aircraft_classification_id = None
         if aircraft_type:
             aircraft_aircraft_classification_id = aircraft_type.classification_id
         
-        # Fetch all fee rules
-        fee_rules = FeeRule.query.options(joinedload(FeeRule.aircraft_classification)).all()  # type: ignore
-        
-        # Fetch all waiver tiers
-        waiver_tiers = WaiverTier.query.all()
-        
         return {
             'customer': customer,
             'aircraft_type': aircraft_type,
             'aircraft_aircraft_classification_id': aircraft_aircraft_classification_id,
-            'fee_rules': fee_rules,
-            'waiver_tiers': waiver_tiers
+            'schedule': schedule
         }
     
+    def _copy_result(self, result: FeeCalculationResult) -> FeeCalculationResult:
+        """
+        Copy a calculation result so memoized results are never shared with callers.
+        
+        Args:
+            result: Result to copy
+            
+        Returns:
+            Copy with its own line item list and line item objects
+        """
+        return replace(result, line_items=[replace(item) for item in result.line_items])
+    
     def _determine_applicable_rules(
         self, 
-        all_rules: List[FeeRule], 
+        schedule: CompiledFeeSchedule,
+        aircraft_type_id: Optional[int],
         aircraft_aircraft_classification_id: Optional[int],
         additional_services: List[Dict[str, Any]]
-    ) -> List[FeeRule]:
+    ) -> List[ResolvedFeeRule]:
         """
         Filter fee rules using the simplified three-tier hierarchy to determine applicable rules.
         
@@ -266,160 +384,79 @@ class FeeCalculationService:
         2. Classification-specific override  
         3. Global base fee
         
+        Overrides are resolved with hash lookups against the compiled schedule's
+        (fee_code, aircraft_type_id) and (fee_code, classification_id) indexes, so
+        resolution is O(rules) regardless of how many overrides exist.
+        
         Args:
-            all_rules: All fee rules
+            schedule: Compiled fee schedule snapshot
+            aircraft_type_id: Aircraft type ID for aircraft-specific overrides
             aircraft_aircraft_classification_id: Classification ID for the aircraft
             additional_services: Additional services requested
             
         Returns:
             List of applicable fee rules with overrides applied
         """
-        from ..models.fee_rule_override import FeeRuleOverride
-        
-        # Get aircraft type ID from context for overrides
-        aircraft_type_id = getattr(self, '_current_aircraft_type_id', None)
-        
-        # Fetch all overrides efficiently
-        all_overrides = FeeRuleOverride.query.all()
-        
-        # Initialize dictionaries for single-pass algorithm
+        aircraft_overrides = schedule.aircraft_overrides
+        classification_overrides = schedule.classification_overrides
         resolved_rules = {}
-        overrides = {}
-        
-        # First, process all FeeRuleOverride records
-        for override in all_overrides:
-            fee_code = None
-            # Find the fee code for this override
-            for rule in all_rules:
-                if rule.id == override.fee_rule_id:
-                    fee_code = rule.fee_code
-                    break
-            
-            if fee_code:
-                if override.aircraft_type_id:
-                    # Aircraft-specific override
-                    key = (fee_code, 'aircraft')
-                    overrides[key] = override
-                elif override.classification_id:
-                    # Classification-specific override
-                    key = (fee_code, 'classification')
-                    overrides[key] = override
-        
-        # Next, process all FeeRule records (all rules are now global)
-        global_rules = all_rules
-        
-        for rule in global_rules:
+        
+        for rule in schedule.rules:
             fee_code = rule.fee_code
             
-            # For each fee_code, determine the final rule using the three-tier hierarchy:
             # 1. Check for aircraft-specific override
-            aircraft_override_key = (fee_code, 'aircraft')
-            if aircraft_type_id and aircraft_override_key in overrides:
-                override = overrides[aircraft_override_key]
-                if override.aircraft_type_id == aircraft_type_id:
-                    modified_rule = self._apply_override_to_rule(rule, override)
-                    resolved_rules[fee_code] = modified_rule
-                    continue
+            override = None
+            if aircraft_type_id:
+                override = aircraft_overrides.get((fee_code, aircraft_type_id))
             
             # 2. Check for classification-specific override
-            classification_override_key = (fee_code, 'classification')
-            if aircraft_aircraft_classification_id and classification_override_key in overrides:
-                override = overrides[classification_override_key]
-                if override.classification_id == aircraft_aircraft_classification_id:
-                    modified_rule = self._apply_override_to_rule(rule, override)
-                    resolved_rules[fee_code] = modified_rule
-                    continue
+            if override is None and aircraft_aircraft_classification_id:
+                override = classification_overrides.get((fee_code, aircraft_aircraft_classification_id))
             
             # 3. Use global base fee (if no overrides exist)
-            resolved_rules[fee_code] = rule
+            if override is not None:
+                resolved_rules[fee_code] = self._apply_override_to_rule(rule, override)
+            else:
+                resolved_rules[fee_code] = rule
         
         # Additional services override - explicit request always wins
-        additional_fee_codes = {service['fee_code'] for service in additional_services}
-        for fee_code in additional_fee_codes:
-            # Find the corresponding global rule from master list and unconditionally place it
-            for rule in global_rules:
-                if rule.fee_code == fee_code:
-                    resolved_rules[fee_code] = rule
-                    break
+        for service in additional_services:
+            fee_code = service['fee_code']
+            rule = schedule.rules_by_code.get(fee_code)
+            if rule is not None:
+                resolved_rules[fee_code] = rule
         
         return list(resolved_rules.values())
     
-    def _apply_override_to_rule(self, base_rule: FeeRule, override: 'FeeRuleOverride') -> FeeRule:
+    def _apply_override_to_rule(self, base_rule: ResolvedFeeRule, override: ScheduledFeeRuleOverride) -> ResolvedFeeRule:
         """
         Apply override values to a base rule, creating a modified copy.
         
         Args:
-            base_rule: The base FeeRule
-            override: The FeeRuleOverride to apply
+            base_rule: The base rule from the compiled schedule
+            override: The override to apply
             
         Returns:
-            Modified FeeRule with override values applied
+            New ResolvedFeeRule with override values applied
         """
-        # Create a copy of the rule to avoid modifying the original
-        modified_rule = FeeRule(
-            id=base_rule.id,
-            fee_name=base_rule.fee_name,
-            fee_code=base_rule.fee_code,
-            amount=override.override_amount if override.override_amount is not None else base_rule.amount,
-            currency=base_rule.currency,
-            is_taxable=base_rule.is_taxable,
-            is_potentially_waivable_by_fuel_uplift=base_rule.is_potentially_waivable_by_fuel_uplift,
-            calculation_basis=base_rule.calculation_basis,
-            waiver_strategy=base_rule.waiver_strategy,
-            simple_waiver_multiplier=base_rule.simple_waiver_multiplier,
-            has_caa_override=base_rule.has_caa_override,
-            caa_override_amount=override.override_caa_amount if override.override_caa_amount is not None else base_rule.caa_override_amount,
-            caa_waiver_strategy_override=base_rule.caa_waiver_strategy_override,
-            caa_simple_waiver_multiplier_override=base_rule.caa_simple_waiver_multiplier_override,
-            created_at=base_rule.created_at,
-            updated_at=base_rule.updated_at
-        )
-        
-        return modified_rule
+        return base_rule.with_override(override)
     
     def _evaluate_waivers(
         self,
         fuel_uplift_gallons: Decimal,
-        base_min_fuel_for_waiver: Optional[Decimal],
-        all_tiers: List[WaiverTier],
-        is_caa_member: bool
-    ) -> Set[str]:
+        waiver_table: WaiverThresholdTable
+    ) -> FrozenSet[str]:
         """
-        Evaluate tiered waivers and return set of fee codes that are waived.
+        Evaluate fuel uplift waivers and return set of fee codes that are waived.
         
         Args:
             fuel_uplift_gallons: Amount of fuel purchased
-            base_min_fuel_for_waiver: Aircraft's base minimum fuel for waivers
-            all_tiers: All waiver tiers
-            is_caa_member: Whether customer is a CAA member
+            waiver_table: Precomputed breakpoints for the aircraft type and CAA status
             
         Returns:
-            Set of fee codes that are waived by tiered system
+            Set of fee codes waived by tiered and simple-multiplier waivers
         """
-        waived_codes = set()
-        
-        if not base_min_fuel_for_waiver or fuel_uplift_gallons <= 0:
-            return waived_codes
-        
-        # Filter tiers based on CAA membership
-        relevant_tiers = [
-            tier for tier in all_tiers
-            if tier.is_caa_specific_tier == is_caa_member or not tier.is_caa_specific_tier
-        ]
-        
-        # Find highest priority tier that is met
-        met_tiers = []
-        for tier in relevant_tiers:
-            threshold = base_min_fuel_for_waiver * tier.fuel_uplift_multiplier
-            if fuel_uplift_gallons >= threshold:
-                met_tiers.append(tier)
-        
-        if met_tiers:
-            # Sort by priority (higher number = higher priority)
-            highest_priority_tier = max(met_tiers, key=lambda t: t.tier_priority)
-            waived_codes.update(highest_priority_tier.fees_waived_codes)
-        
-        return waived_codes
+        return waiver_table.lookup(fuel_uplift_gallons)
     
     def _calculate_taxes(self, taxable_amount: Decimal) -> Decimal:
         """
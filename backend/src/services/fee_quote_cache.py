@@ -0,0 +1,176 @@
+"""
+Fee Quote Cache
+
+Bounded LRU/TTL memo of fee calculation results, sitting in front of
+FeeCalculationService.calculate_for_transaction. CSRs recalculate the same
+draft repeatedly and the front end previews the same aircraft type, CAA
+status and fuel quantity all day, so identical inputs are priced once per
+fee schedule version.
+
+Entries are keyed on the normalized calculation inputs and the compiled
+schedule snapshot (its version and compile time); the whole cache is dropped
+as soon as a lookup sees a different snapshot. Without Redis the version is
+process-local and a TTL reload recompiles under the same version, so the
+compile time is what retires quotes priced from the old snapshot.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+@dataclass
+class FeeQuoteCacheStats:
+    """Fee quote cache statistics."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    version_resets: int = 0
+    last_reset: datetime = field(default_factory=datetime.utcnow)
+
+    @property
+    def total_requests(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        """Calculate cache hit rate."""
+        if self.total_requests == 0:
+            return 0.0
+        return (self.hits / self.total_requests) * 100
+
+
+class FeeQuoteCache:
+    """Thread-safe LRU cache of fee calculation results with a per-entry TTL."""
+
+    def __init__(self, max_size: int = 2048, ttl_seconds: int = 600):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self.stats = FeeQuoteCacheStats()
+        self._entries: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+        self._version: Optional[int] = None
+        self._compiled_at: Optional[float] = None
+
+    @staticmethod
+    def make_key(
+        aircraft_type_id: int,
+        is_caa_member: bool,
+        fuel_uplift_gallons: Decimal,
+        fuel_price_per_gallon: Decimal,
+        additional_services: List[Dict[str, Any]]
+    ) -> Tuple:
+        """
+        Build a cache key from normalized calculation inputs.
+
+        Additional services are reduced to (fee_code, quantity) pairs sorted by
+        fee code. Only the first entry per fee code is kept, matching how the
+        calculation picks a service's quantity.
+
+        Decimals are keyed on their exact representation: 100 and 100.00 are
+        equal, but the result prints "Fuel (100 gallons)" for one and carries
+        two more decimal places in its amounts for the other.
+        """
+        services = {}
+        for service in additional_services:
+            fee_code = service.get('fee_code')
+            if fee_code not in services:
+                services[fee_code] = str(Decimal(str(service.get('quantity', 1))))
+
+        return (
+            aircraft_type_id,
+            bool(is_caa_member),
+            str(Decimal(fuel_uplift_gallons)),
+            str(Decimal(fuel_price_per_gallon)),
+            tuple(sorted(services.items(), key=lambda item: str(item[0])))
+        )
+
+    def _check_version(self, version: int, compiled_at: Optional[float]):
+        """Drop every entry when the fee schedule snapshot changes. Caller holds the lock."""
+        if self._version != version or self._compiled_at != compiled_at:
+            if self._entries:
+                self.stats.version_resets += 1
+            self._entries.clear()
+            self._version = version
+            self._compiled_at = compiled_at
+
+    def get(self, version: int, key: Hashable, compiled_at: Optional[float] = None) -> Optional[Any]:
+        """Get a cached result for the given schedule snapshot, or None on a miss."""
+        with self.lock:
+            self._check_version(version, compiled_at)
+
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, version: int, key: Hashable, value: Any, compiled_at: Optional[float] = None):
+        """Store a result for the given schedule snapshot, evicting the least recently used entry if full."""
+        with self.lock:
+            self._check_version(version, compiled_at)
+
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self):
+        """Remove all entries."""
+        with self.lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache performance statistics."""
+        with self.lock:
+            return {
+                'hits': self.stats.hits,
+                'misses': self.stats.misses,
+                'evictions': self.stats.evictions,
+                'expirations': self.stats.expirations,
+                'version_resets': self.stats.version_resets,
+                'total_requests': self.stats.total_requests,
+                'hit_rate_percent': round(self.stats.hit_rate, 2),
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'schedule_version': self._version,
+                'last_reset': self.stats.last_reset.isoformat()
+            }
+
+    def reset_stats(self):
+        """Reset performance statistics."""
+        with self.lock:
+            self.stats = FeeQuoteCacheStats()
+
+
+# Create a lazy-initialized global instance
+_fee_quote_cache_instance = None
+_fee_quote_cache_lock = threading.Lock()
+
+def get_fee_quote_cache() -> FeeQuoteCache:
+    """Get the global fee quote cache instance (lazy initialization)."""
+    global _fee_quote_cache_instance
+
+    if _fee_quote_cache_instance is None:
+        with _fee_quote_cache_lock:
+            if _fee_quote_cache_instance is None:
+                _fee_quote_cache_instance = FeeQuoteCache()
+
+    return _fee_quote_cache_instance
@@ -0,0 +1,467 @@
+"""
+Fee Schedule Cache
+
+Keeps an immutable, compiled snapshot of the global fee schedule (fee rules,
+fee rule overrides, waiver tiers and per aircraft type waiver thresholds) in
+process memory so that
+FeeCalculationService can price transactions without reloading the schedule
+tables from the database on every call.
+
+Snapshots are keyed by a schedule version:
+- AdminFeeConfigService bumps the version after every fee configuration write
+- The version counter lives in Redis (REDIS_URL) so every worker notices the
+  bump on its next calculation and recompiles
+- When Redis is unavailable the version is process-local and snapshots are
+  additionally bounded by a TTL so other workers converge eventually
+"""
+
+import logging
+from bisect import bisect_right
+import threading
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Any, FrozenSet, Iterable, Mapping, Optional, Tuple
+
+from ..models.fee_rule import WaiverStrategy, CalculationBasis
+from .redis_version_counter import RedisVersionCounter
+
+logger = logging.getLogger(__name__)
+
+
+class ResolvedFeeRule:
+    """
+    Lightweight, read-only fee rule used by the calculation pipeline.
+
+    Compiled schedules store one per global FeeRule, and override resolution
+    derives a new one per matching FeeRuleOverride. Using __slots__ instead of
+    transient FeeRule models avoids SQLAlchemy instrumentation and session
+    bookkeeping for objects that are only read once. Instances are shared
+    between requests and must not be mutated.
+    """
+
+    __slots__ = (
+        'id', 'fee_name', 'fee_code', 'amount', 'currency', 'is_taxable',
+        'is_potentially_waivable_by_fuel_uplift', 'calculation_basis',
+        'waiver_strategy', 'simple_waiver_multiplier', 'has_caa_override',
+        'caa_override_amount', 'caa_waiver_strategy_override',
+        'caa_simple_waiver_multiplier_override'
+    )
+
+    def __init__(
+        self,
+        id: int,
+        fee_name: str,
+        fee_code: str,
+        amount: Decimal,
+        currency: str,
+        is_taxable: bool,
+        is_potentially_waivable_by_fuel_uplift: bool,
+        calculation_basis: Optional[CalculationBasis],
+        waiver_strategy: Optional[WaiverStrategy],
+        simple_waiver_multiplier: Optional[Decimal],
+        has_caa_override: bool,
+        caa_override_amount: Optional[Decimal],
+        caa_waiver_strategy_override: Optional[WaiverStrategy],
+        caa_simple_waiver_multiplier_override: Optional[Decimal]
+    ):
+        self.id = id
+        self.fee_name = fee_name
+        self.fee_code = fee_code
+        self.amount = amount
+        self.currency = currency
+        self.is_taxable = is_taxable
+        self.is_potentially_waivable_by_fuel_uplift = is_potentially_waivable_by_fuel_uplift
+        self.calculation_basis = calculation_basis
+        self.waiver_strategy = waiver_strategy
+        self.simple_waiver_multiplier = simple_waiver_multiplier
+        self.has_caa_override = has_caa_override
+        self.caa_override_amount = caa_override_amount
+        self.caa_waiver_strategy_override = caa_waiver_strategy_override
+        self.caa_simple_waiver_multiplier_override = caa_simple_waiver_multiplier_override
+
+    @classmethod
+    def from_model(cls, rule: Any) -> 'ResolvedFeeRule':
+        return cls(
+            rule.id,
+            rule.fee_name,
+            rule.fee_code,
+            rule.amount,
+            rule.currency,
+            rule.is_taxable,
+            rule.is_potentially_waivable_by_fuel_uplift,
+            rule.calculation_basis,
+            rule.waiver_strategy,
+            rule.simple_waiver_multiplier,
+            rule.has_caa_override,
+            rule.caa_override_amount,
+            rule.caa_waiver_strategy_override,
+            rule.caa_simple_waiver_multiplier_override
+        )
+
+    def with_override(self, override: 'ScheduledFeeRuleOverride') -> 'ResolvedFeeRule':
+        """Return a copy of this rule with the override's amounts applied (NULL keeps the base amount)."""
+        return ResolvedFeeRule(
+            self.id,
+            self.fee_name,
+            self.fee_code,
+            override.override_amount if override.override_amount is not None else self.amount,
+            self.currency,
+            self.is_taxable,
+            self.is_potentially_waivable_by_fuel_uplift,
+            self.calculation_basis,
+            self.waiver_strategy,
+            self.simple_waiver_multiplier,
+            self.has_caa_override,
+            override.override_caa_amount if override.override_caa_amount is not None else self.caa_override_amount,
+            self.caa_waiver_strategy_override,
+            self.caa_simple_waiver_multiplier_override
+        )
+
+    def __repr__(self):
+        return f'<ResolvedFeeRule {self.fee_code} - {self.amount}>'
+
+
+@dataclass(frozen=True)
+class ScheduledFeeRuleOverride:
+    """Read-only copy of a FeeRuleOverride, resolved to its fee code."""
+    id: Optional[int]
+    fee_rule_id: int
+    fee_code: str
+    aircraft_type_id: Optional[int]
+    classification_id: Optional[int]
+    override_amount: Optional[Decimal]
+    override_caa_amount: Optional[Decimal]
+
+    @classmethod
+    def from_model(cls, override: Any, fee_code: str) -> 'ScheduledFeeRuleOverride':
+        return cls(
+            id=getattr(override, 'id', None),
+            fee_rule_id=override.fee_rule_id,
+            fee_code=fee_code,
+            aircraft_type_id=override.aircraft_type_id,
+            classification_id=override.classification_id,
+            override_amount=override.override_amount,
+            override_caa_amount=override.override_caa_amount
+        )
+
+
+@dataclass(frozen=True)
+class ScheduledWaiverTier:
+    """Read-only copy of a WaiverTier as stored in a compiled schedule."""
+    id: int
+    name: str
+    fuel_uplift_multiplier: Decimal
+    fees_waived_codes: Tuple[str, ...]
+    tier_priority: int
+    is_caa_specific_tier: bool
+
+    @classmethod
+    def from_model(cls, tier: Any) -> 'ScheduledWaiverTier':
+        return cls(
+            id=tier.id,
+            name=tier.name,
+            fuel_uplift_multiplier=tier.fuel_uplift_multiplier,
+            fees_waived_codes=tuple(tier.fees_waived_codes or ()),
+            tier_priority=tier.tier_priority,
+            is_caa_specific_tier=tier.is_caa_specific_tier
+        )
+
+
+class WaiverThresholdTable:
+    """
+    Sorted fuel uplift breakpoints for one (aircraft type, CAA status) pair.
+
+    thresholds[i] is a gallon amount at which the set of waived fees changes
+    and waived_codes[i] is every fee code waived from that amount up to the
+    next breakpoint, combining the highest priority tier met with any
+    simple-multiplier waivers. Waiver evaluation is a single bisect.
+    """
+
+    __slots__ = ('base_min_fuel', 'thresholds', 'waived_codes', 'simple_waived_codes')
+
+    def __init__(
+        self,
+        base_min_fuel: Optional[Decimal],
+        thresholds: Tuple[Decimal, ...],
+        waived_codes: Tuple[FrozenSet[str], ...],
+        simple_waived_codes: Tuple[FrozenSet[str], ...]
+    ):
+        self.base_min_fuel = base_min_fuel
+        self.thresholds = thresholds
+        self.waived_codes = waived_codes
+        self.simple_waived_codes = simple_waived_codes
+
+    @classmethod
+    def build(
+        cls,
+        base_min_fuel: Optional[Decimal],
+        is_caa_member: bool,
+        rules: Iterable[ResolvedFeeRule],
+        tiers: Tuple[ScheduledWaiverTier, ...]
+    ) -> 'WaiverThresholdTable':
+        """
+        Build the table for an aircraft type's base minimum fuel.
+
+        Args:
+            base_min_fuel: Aircraft type's base minimum fuel gallons for waivers
+            is_caa_member: Whether the table is for CAA members
+            rules: Global fee rules (overrides never change waiver settings)
+            tiers: Waiver tiers sorted by priority, highest first
+        """
+        if not base_min_fuel:
+            return cls(base_min_fuel, (), (), ())
+
+        tiered_codes = set()
+        simple_thresholds = []
+        for rule in rules:
+            if not rule.is_potentially_waivable_by_fuel_uplift:
+                continue
+            if is_caa_member and rule.has_caa_override:
+                waiver_strategy = rule.caa_waiver_strategy_override or rule.waiver_strategy
+                simple_multiplier = rule.caa_simple_waiver_multiplier_override or rule.simple_waiver_multiplier
+            else:
+                waiver_strategy = rule.waiver_strategy
+                simple_multiplier = rule.simple_waiver_multiplier
+
+            if waiver_strategy == WaiverStrategy.SIMPLE_MULTIPLIER and simple_multiplier is not None:
+                simple_thresholds.append((base_min_fuel * simple_multiplier, rule.fee_code))
+            elif waiver_strategy == WaiverStrategy.TIERED_MULTIPLIER:
+                tiered_codes.add(rule.fee_code)
+
+        tier_thresholds = [
+            (base_min_fuel * tier.fuel_uplift_multiplier, tier)
+            for tier in tiers
+            if tier.is_caa_specific_tier == is_caa_member or not tier.is_caa_specific_tier
+        ]
+
+        thresholds = tuple(sorted(
+            {threshold for threshold, _ in simple_thresholds} |
+            {threshold for threshold, _ in tier_thresholds}
+        ))
+        waived_codes = []
+        simple_waived_codes = []
+        for gallons in thresholds:
+            simple = frozenset(code for threshold, code in simple_thresholds if threshold <= gallons)
+            # Tiers are in priority order, so the first tier met is the one that applies
+            tier = next((tier for threshold, tier in tier_thresholds if threshold <= gallons), None)
+            tiered = tiered_codes.intersection(tier.fees_waived_codes) if tier else ()
+            waived_codes.append(simple.union(tiered))
+            simple_waived_codes.append(simple)
+
+        return cls(base_min_fuel, thresholds, tuple(waived_codes), tuple(simple_waived_codes))
+
+    def lookup(self, fuel_uplift_gallons: Decimal) -> FrozenSet[str]:
+        """Return the fee codes waived for the given fuel uplift."""
+        index = bisect_right(self.thresholds, fuel_uplift_gallons)
+        if index == 0:
+            return frozenset()
+        # Tiered waivers never apply without a fuel uplift
+        if fuel_uplift_gallons <= 0:
+            return self.simple_waived_codes[index - 1]
+        return self.waived_codes[index - 1]
+
+    def __repr__(self):
+        return f'<WaiverThresholdTable {len(self.thresholds)} breakpoints>'
+
+
+@dataclass(frozen=True)
+class CompiledFeeSchedule:
+    """
+    Immutable, indexed view of the fee schedule at a given version.
+
+    - rules_by_code: fee_code -> rule
+    - aircraft_overrides: (fee_code, aircraft_type_id) -> override
+    - classification_overrides: (fee_code, classification_id) -> override
+    - waiver_tiers: sorted by tier_priority, highest priority first
+    - waiver_tables: (aircraft_type_id, is_caa_member) -> WaiverThresholdTable
+    """
+    version: int
+    rules: Tuple[ResolvedFeeRule, ...]
+    rules_by_code: Mapping[str, ResolvedFeeRule]
+    overrides: Tuple[ScheduledFeeRuleOverride, ...]
+    aircraft_overrides: Mapping[Tuple[str, int], ScheduledFeeRuleOverride]
+    classification_overrides: Mapping[Tuple[str, int], ScheduledFeeRuleOverride]
+    waiver_tiers: Tuple[ScheduledWaiverTier, ...]
+    waiver_tables: Mapping[Tuple[int, bool], WaiverThresholdTable]
+    compiled_at: float
+
+    @classmethod
+    def compile(
+        cls,
+        version: int,
+        fee_rules: Iterable[Any],
+        overrides: Iterable[Any],
+        waiver_tiers: Iterable[Any],
+        aircraft_types: Iterable[Any] = ()
+    ) -> 'CompiledFeeSchedule':
+        """
+        Build a compiled schedule from FeeRule, FeeRuleOverride, WaiverTier and
+        AircraftType rows.
+
+        Overrides that reference an unknown fee rule are dropped, matching the
+        behaviour of the calculation pipeline before schedules were compiled.
+        """
+        rules = tuple(ResolvedFeeRule.from_model(rule) for rule in fee_rules)
+        rules_by_id = {rule.id: rule for rule in rules}
+
+        scheduled_overrides = []
+        aircraft_overrides = {}
+        classification_overrides = {}
+        for override in overrides:
+            rule = rules_by_id.get(override.fee_rule_id)
+            if rule is None:
+                continue
+
+            scheduled = ScheduledFeeRuleOverride.from_model(override, rule.fee_code)
+            scheduled_overrides.append(scheduled)
+            if scheduled.aircraft_type_id:
+                aircraft_overrides[(rule.fee_code, scheduled.aircraft_type_id)] = scheduled
+            elif scheduled.classification_id:
+                classification_overrides[(rule.fee_code, scheduled.classification_id)] = scheduled
+
+        tiers = tuple(sorted(
+            (ScheduledWaiverTier.from_model(tier) for tier in waiver_tiers),
+            key=lambda tier: tier.tier_priority,
+            reverse=True
+        ))
+
+        waiver_tables = {}
+        for aircraft_type in aircraft_types:
+            for is_caa_member in (False, True):
+                waiver_tables[(aircraft_type.id, is_caa_member)] = WaiverThresholdTable.build(
+                    aircraft_type.base_min_fuel_gallons_for_waiver, is_caa_member, rules, tiers
+                )
+
+        return cls(
+            version=version,
+            rules=rules,
+            rules_by_code=MappingProxyType({rule.fee_code: rule for rule in rules}),
+            overrides=tuple(scheduled_overrides),
+            aircraft_overrides=MappingProxyType(aircraft_overrides),
+            classification_overrides=MappingProxyType(classification_overrides),
+            waiver_tiers=tiers,
+            waiver_tables=MappingProxyType(waiver_tables),
+            compiled_at=time.monotonic()
+        )
+
+    def waiver_table(
+        self,
+        aircraft_type_id: Optional[int],
+        base_min_fuel: Optional[Decimal],
+        is_caa_member: bool
+    ) -> WaiverThresholdTable:
+        """
+        Get the waiver threshold table for an aircraft type.
+
+        Falls back to building one when the aircraft type was not compiled into
+        this schedule or its base minimum fuel no longer matches.
+        """
+        table = self.waiver_tables.get((aircraft_type_id, bool(is_caa_member)))
+        if table is not None and table.base_min_fuel == base_min_fuel:
+            return table
+        return WaiverThresholdTable.build(base_min_fuel, is_caa_member, self.rules, self.waiver_tiers)
+
+
+class FeeScheduleCache:
+    """
+    Process-local holder for the current CompiledFeeSchedule.
+
+    The schedule version is read from Redis on every lookup (a single GET, no
+    database access). The schedule itself is only reloaded from the database
+    when the version changes, or when the TTL expires while Redis is down.
+    """
+
+    VERSION_KEY = "fbo:fee_schedule:version"
+
+    def __init__(self, ttl_seconds: int = 300):
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self._schedule: Optional[CompiledFeeSchedule] = None
+        self.versions = RedisVersionCounter(self.VERSION_KEY, 'fee schedule')
+
+    def current_version(self) -> Tuple[int, bool]:
+        """
+        Get the current schedule version.
+
+        Returns:
+            Tuple of (version, is_shared) where is_shared is False when the
+            version only reflects writes made by this process.
+        """
+        return self.versions.current()
+
+    def get_schedule(self) -> CompiledFeeSchedule:
+        """Get the compiled schedule for the current version, compiling it if needed."""
+        version, is_shared = self.current_version()
+
+        schedule = self._schedule
+        if schedule is not None and self._is_fresh(schedule, version, is_shared):
+            return schedule
+
+        with self.lock:
+            schedule = self._schedule
+            if schedule is not None and self._is_fresh(schedule, version, is_shared):
+                return schedule
+
+            schedule = self._load(version)
+            self._schedule = schedule
+            return schedule
+
+    def _is_fresh(self, schedule: CompiledFeeSchedule, version: int, is_shared: bool) -> bool:
+        if schedule.version != version:
+            return False
+        if not is_shared and time.monotonic() - schedule.compiled_at > self.ttl_seconds:
+            return False
+        return True
+
+    def _load(self, version: int) -> CompiledFeeSchedule:
+        """Load the schedule tables and compile them into a snapshot."""
+        from ..models.fee_rule import FeeRule
+        from ..models.fee_rule_override import FeeRuleOverride
+        from ..models.waiver_tier import WaiverTier
+        from ..models.aircraft_type import AircraftType
+
+        schedule = CompiledFeeSchedule.compile(
+            version=version,
+            fee_rules=FeeRule.query.all(),
+            overrides=FeeRuleOverride.query.all(),
+            waiver_tiers=WaiverTier.query.all(),
+            aircraft_types=AircraftType.query.all()
+        )
+        logger.info(
+            f"Compiled fee schedule version {version}: {len(schedule.rules)} rules, "
+            f"{len(schedule.overrides)} overrides, {len(schedule.waiver_tiers)} waiver tiers, "
+            f"{len(schedule.waiver_tables)} waiver tables"
+        )
+        return schedule
+
+    def invalidate(self) -> int:
+        """
+        Bump the schedule version after a fee configuration write.
+
+        Must be called after the write has been committed, otherwise another
+        worker may compile the old data under the new version.
+
+        Returns:
+            The new schedule version
+        """
+        with self.lock:
+            self._schedule = None
+        return self.versions.bump()
+
+
+# Create a lazy-initialized global instance
+_fee_schedule_cache_instance = None
+_fee_schedule_cache_lock = threading.Lock()
+
+def get_fee_schedule_cache() -> FeeScheduleCache:
+    """Get the global fee schedule cache instance (lazy initialization)."""
+    global _fee_schedule_cache_instance
+
+    if _fee_schedule_cache_instance is None:
+        with _fee_schedule_cache_lock:
+            if _fee_schedule_cache_instance is None:
+                _fee_schedule_cache_instance = FeeScheduleCache()
+
+    return _fee_schedule_cache_instance
@@ -0,0 +1,225 @@
+"""
+Fuel Order List Projection
+
+The fuel order list used to load whole FuelOrder entities, with four joined
+relationships plus a lazy fuel_type load per row, only to dump a couple of
+dozen fields. This module selects just the columns the list needs, joined
+in SQL into flat rows, and turns each row into the same JSON shape that
+FuelOrderBriefResponseSchema produces.
+
+- LIST_FIELDS maps every list field to the columns it reads and how to
+  convert them; fields= narrows the projection, and only the joins the
+  requested fields need are added
+- Fields read through a relationship are left out when the relationship is
+  empty, as the schema does
+- Row serializers are compiled once per field set and cached
+"""
+
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import aliased
+
+from ..models.customer import Customer
+from ..models.fuel_order import FuelOrder
+from ..models.fuel_truck import FuelTruck
+from ..models.fuel_type import FuelType
+from ..models.user import User
+
+AssignedLst = aliased(User, name='assigned_lst')
+
+_TWO_PLACES = Decimal('0.01')
+
+# Selectable columns by label, and the outer join each related column needs
+_COLUMNS = {
+    'id': FuelOrder.id,
+    'status': FuelOrder.status,
+    'priority': FuelOrder.priority,
+    'tail_number': FuelOrder.tail_number,
+    'customer_id': FuelOrder.customer_id,
+    'fuel_type_id': FuelOrder.fuel_type_id,
+    'service_type': FuelOrder.service_type,
+    'requested_amount': FuelOrder.requested_amount,
+    'assigned_lst_user_id': FuelOrder.assigned_lst_user_id,
+    'assigned_truck_id': FuelOrder.assigned_truck_id,
+    'lst_notes': FuelOrder.lst_notes,
+    'csr_notes': FuelOrder.csr_notes,
+    'start_meter_reading': FuelOrder.start_meter_reading,
+    'end_meter_reading': FuelOrder.end_meter_reading,
+    'gallons_dispensed': FuelOrder.gallons_dispensed,
+    'change_version': FuelOrder.change_version,
+    'acknowledged_change_version': FuelOrder.acknowledged_change_version,
+    'created_at': FuelOrder.created_at,
+    'updated_at': FuelOrder.updated_at,
+    'completion_timestamp': FuelOrder.completion_timestamp,
+    'customer_name': Customer.name,
+    'fuel_type_name': FuelType.name,
+    'fuel_type_code': FuelType.code,
+    'assigned_lst_username': AssignedLst.username,
+    'assigned_lst_name': AssignedLst.name,
+    'assigned_truck_number': FuelTruck.truck_number,
+}
+
+_JOINS = {
+    'customer': (Customer, FuelOrder.customer_id == Customer.id),
+    'fuel_type': (FuelType, FuelOrder.fuel_type_id == FuelType.id),
+    'assigned_lst': (AssignedLst, FuelOrder.assigned_lst_user_id == AssignedLst.id),
+    'assigned_truck': (FuelTruck, FuelOrder.assigned_truck_id == FuelTruck.id),
+}
+
+_COLUMN_JOINS = {
+    'customer_name': 'customer',
+    'fuel_type_name': 'fuel_type',
+    'fuel_type_code': 'fuel_type',
+    'assigned_lst_username': 'assigned_lst',
+    'assigned_lst_name': 'assigned_lst',
+    'assigned_truck_number': 'assigned_truck',
+}
+
+# Keyset pagination reads these from every row
+_ALWAYS_SELECTED = ('id', 'created_at')
+
+
+def _enum_value(value):
+    return value.value if value else None
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def _decimal_string(value):
+    if value is None:
+        return None
+    return format(Decimal(str(value)).quantize(_TWO_PLACES), 'f')
+
+
+def _gallons_requested(requested_amount):
+    return float(requested_amount) if requested_amount else None
+
+
+def _calculated_gallons(start_meter_reading, end_meter_reading):
+    if start_meter_reading is None or end_meter_reading is None:
+        return None
+    return _decimal_string(end_meter_reading - start_meter_reading)
+
+
+def _notes(lst_notes, csr_notes):
+    return lst_notes or csr_notes
+
+
+class ListField(NamedTuple):
+    """How one list field is read from a projected row."""
+    columns: Tuple[str, ...]
+    convert: Optional[Callable[..., Any]] = None
+    # Foreign key column; the field is omitted when it is null
+    present_if: Optional[str] = None
+
+
+LIST_FIELDS: Dict[str, ListField] = {
+    'id': ListField(('id',)),
+    'status': ListField(('status',), _enum_value),
+    'tail_number': ListField(('tail_number',)),
+    'aircraft_registration': ListField(('tail_number',)),
+    'customer_id': ListField(('customer_id',)),
+    'customer_name': ListField(('customer_name',), present_if='customer_id'),
+    'fuel_type': ListField(('fuel_type_name',), present_if='fuel_type_id'),
+    'fuel_type_id': ListField(('fuel_type_id',)),
+    'fuel_type_name': ListField(('fuel_type_name',), present_if='fuel_type_id'),
+    'fuel_type_code': ListField(('fuel_type_code',), present_if='fuel_type_id'),
+    'service_type': ListField(('service_type',)),
+    'gallons_requested': ListField(('requested_amount',), _gallons_requested),
+    'assigned_lst_user_id': ListField(('assigned_lst_user_id',)),
+    'assigned_to_id': ListField(('assigned_lst_user_id',)),
+    'assigned_truck_id': ListField(('assigned_truck_id',)),
+    'assigned_lst_username': ListField(('assigned_lst_username',), present_if='assigned_lst_user_id'),
+    'assigned_lst_fullName': ListField(('assigned_lst_name',), present_if='assigned_lst_user_id'),
+    'assigned_truck_number': ListField(('assigned_truck_number',), present_if='assigned_truck_id'),
+    'priority': ListField(('priority',), _enum_value),
+    'created_at': ListField(('created_at',), _isoformat),
+    'start_meter_reading': ListField(('start_meter_reading',), _decimal_string),
+    'end_meter_reading': ListField(('end_meter_reading',), _decimal_string),
+    'calculated_gallons_dispensed': ListField(('start_meter_reading', 'end_meter_reading'), _calculated_gallons),
+    'gallons_dispensed': ListField(('gallons_dispensed',), _decimal_string),
+    'completion_timestamp': ListField(('completion_timestamp',), _isoformat),
+    'completed_at': ListField(('completion_timestamp',), _isoformat),
+    'notes': ListField(('lst_notes', 'csr_notes'), _notes),
+    'change_version': ListField(('change_version',)),
+    'acknowledged_change_version': ListField(('acknowledged_change_version',)),
+    'updated_at': ListField(('updated_at',), _isoformat),
+}
+
+
+def parse_fields(fields_param: Optional[str]) -> Tuple[str, ...]:
+    """
+    Resolve a comma-separated fields= parameter to list field names.
+
+    No parameter means every list field; id is always included.
+
+    Raises:
+        ValueError: If an unknown field is requested
+    """
+    if not fields_param:
+        return tuple(LIST_FIELDS)
+    requested = [name.strip() for name in fields_param.split(',') if name.strip()]
+    unknown = [name for name in requested if name not in LIST_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields requested: {', '.join(unknown)}")
+    return tuple(dict.fromkeys(['id', *requested]))
+
+
+class _CompiledProjection(NamedTuple):
+    columns: List[Any]
+    joins: List[Tuple[Any, Any]]
+    serialize: Callable[[Any], Dict[str, Any]]
+
+
+@lru_cache(maxsize=64)
+def _compile(fields: Tuple[str, ...]) -> _CompiledProjection:
+    specs = [(name, LIST_FIELDS[name]) for name in fields]
+
+    column_names = list(_ALWAYS_SELECTED)
+    for _, spec in specs:
+        for column in spec.columns + ((spec.present_if,) if spec.present_if else ()):
+            if column not in column_names:
+                column_names.append(column)
+    index = {column: i for i, column in enumerate(column_names)}
+
+    join_names = dict.fromkeys(_COLUMN_JOINS[c] for c in column_names if c in _COLUMN_JOINS)
+    joins = [_JOINS[name] for name in join_names]
+
+    # Plan steps, resolved to row positions once so serializing a row is index lookups only
+    plan = [
+        (name, tuple(index[c] for c in spec.columns), spec.convert,
+         index[spec.present_if] if spec.present_if else None)
+        for name, spec in specs
+    ]
+
+    def serialize(row) -> Dict[str, Any]:
+        data = {}
+        for name, positions, convert, present_position in plan:
+            if present_position is not None and row[present_position] is None:
+                continue
+            if convert is None:
+                data[name] = row[positions[0]]
+            else:
+                data[name] = convert(*[row[position] for position in positions])
+        return data
+
+    columns = [_COLUMNS[column].label(column) for column in column_names]
+    return _CompiledProjection(columns, joins, serialize)
+
+
+def project_fuel_orders(query, fields: Iterable[str]):
+    """Turn a filtered FuelOrder query into a flat-row query for the given fields."""
+    projection = _compile(tuple(fields))
+    query = query.with_entities(*projection.columns)
+    for target, onclause in projection.joins:
+        query = query.outerjoin(target, onclause)
+    return query
+
+
+def get_row_serializer(fields: Iterable[str]) -> Callable[[Any], Dict[str, Any]]:
+    """Row-to-dict function for rows from project_fuel_orders with the same fields."""
+    return _compile(tuple(fields)).serialize
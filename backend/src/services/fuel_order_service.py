@@ -2,7 +2,8 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 import csv
 import io
-from typing import List, Dict, Any, Optional, Tuple, Union
+import itertools
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
 from sqlalchemy import and_, or_, desc, asc, func
 from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
@@ -34,6 +35,9 @@ from ..models.fuel_truck import FuelTruck
 from ..models.customer import Customer
 from ..models.fuel_type import FuelType
 from .aircraft_service import AircraftService
+from .fuel_order_projection import project_fuel_orders
+from .fuel_order_status_counters import get_order_status_counts
+from ..utils.keyset_pagination import keyset_paginate
 
 logger = logging.getLogger(__name__)
 
@@ -45,49 +49,10 @@ class FuelOrderService:
         PBAC: Permission-based, not role-based. Only users with 'VIEW_ORDER_STATS' permission should access this.
         Returns: (dict, message, status_code)
         """
-        from src.models import FuelOrderStatus, FuelOrder
-        from sqlalchemy import func, case, and_
-        from src.extensions import db
-        from datetime import datetime, date
         try:
             # PBAC: Permission check is handled by decorator, so no need to check here
-            pending_statuses = [FuelOrderStatus.DISPATCHED]
-            in_progress_statuses = [FuelOrderStatus.ACKNOWLEDGED, FuelOrderStatus.EN_ROUTE, FuelOrderStatus.FUELING]
-            completed_statuses = [FuelOrderStatus.COMPLETED, FuelOrderStatus.REVIEWED]
-            
-            # Get today's date for completed_today calculation
-            today = date.today()
-            
-            # Query for basic counts and completed today
-            counts = db.session.query(
-                func.count(case((FuelOrder.status.in_(pending_statuses), FuelOrder.id))).label('pending'),
-                func.count(case((FuelOrder.status.in_(in_progress_statuses), FuelOrder.id))).label('in_progress'),
-                func.count(case((FuelOrder.status.in_(completed_statuses), FuelOrder.id))).label('completed'),
-                func.count(case((
-                    and_(
-                        FuelOrder.status.in_(completed_statuses),
-                        func.date(FuelOrder.completion_timestamp) == today
-                    ), 
-                    FuelOrder.id
-                ))).label('completed_today'),
-                func.count(FuelOrder.id).label('total')
-            ).one_or_none()
-            
-            result_counts = {
-                'pending_count': counts[0] if counts else 0,
-                'active_count': counts[1] if counts else 0,  # in_progress becomes active_count
-                'completed_count': counts[2] if counts else 0,
-                'completed_today': counts[3] if counts else 0,
-                'total_orders': counts[4] if counts else 0,
-                'in_progress_count': counts[1] if counts else 0,  # Keep for backward compatibility
-                'avg_completion_time': 0,  # Placeholder for future implementation
-                'status_distribution': {
-                    'pending': counts[0] if counts else 0,
-                    'in_progress': counts[1] if counts else 0,
-                    'completed': counts[2] if counts else 0,
-                }
-            }
-            return result_counts, "Status counts retrieved successfully.", 200
+            # Counts are materialized by the fuel order flush hooks
+            return get_order_status_counts(), "Status counts retrieved successfully.", 200
         except Exception as e:
             db.session.rollback()
             import logging
@@ -343,24 +308,29 @@ class FuelOrderService:
     def get_fuel_orders(
         cls,
         current_user: User,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        fields: Optional[Tuple[str, ...]] = None
     ) -> Tuple[Optional[Any], str]:
         """
         Retrieve paginated fuel orders based on user PBAC and optional filters.
         PBAC: If user lacks 'view_all_orders', only show orders assigned to them.
         Optimized with eager loading for denormalized fields.
+        With fields (list field names, see fuel_order_projection), pages hold flat
+        rows of just those columns instead of FuelOrder entities.
         """
         logger = logging.getLogger(__name__)
         try:
             logger.info(f"[FuelOrderService.get_fuel_orders] User: {getattr(current_user, 'id', None)} | Filters: {filters}")
             
-            # Use eager loading for optimization of denormalized fields
-            query = FuelOrder.query.options(
-                joinedload(FuelOrder.assigned_lst),  # type: ignore
-                joinedload(FuelOrder.assigned_truck),  # type: ignore
-                joinedload(FuelOrder.customer),  # type: ignore
-                joinedload(FuelOrder.aircraft)  # type: ignore
-            )
+            query = FuelOrder.query
+            if fields is None:
+                # Use eager loading for optimization of denormalized fields
+                query = query.options(
+                    joinedload(FuelOrder.assigned_lst),  # type: ignore
+                    joinedload(FuelOrder.assigned_truck),  # type: ignore
+                    joinedload(FuelOrder.customer),  # type: ignore
+                    joinedload(FuelOrder.aircraft)  # type: ignore
+                )
 
             # PBAC: Only show all orders if user has permission
             if not current_user.has_permission('view_all_orders'):
@@ -451,6 +421,22 @@ class FuelOrderService:
                 page = 1
                 per_page = 20
 
+            if fields is not None:
+                query = project_fuel_orders(query, fields)
+
+            # Cursor mode: opted into with pagination=cursor, implied by a cursor token
+            cursor = filters.get('cursor') if filters else None
+            if cursor or (filters and filters.get('pagination') == 'cursor'):
+                include_total = str(filters.get('include_total', '')).lower() in ('1', 'true', 'yes')
+                try:
+                    keyset_page = keyset_paginate(query, FuelOrder, per_page, cursor=cursor, include_total=include_total)
+                    return keyset_page, "Orders retrieved successfully"
+                except ValueError:
+                    return None, f"Invalid cursor provided: {cursor}"
+                except Exception as e:
+                    current_app.logger.error(f"Error retrieving fuel orders: {str(e)}")
+                    return None, f"Database error while retrieving orders: {str(e)}"
+
             try:
                 paginated_orders = query.order_by(FuelOrder.created_at.desc()).paginate(
                     page=page,
@@ -686,21 +672,28 @@ class FuelOrderService:
     def export_fuel_orders_to_csv(
         cls,
         current_user: User,
-        filters: Optional[Dict[str, Any]] = None
-    ) -> Tuple[Optional[str], str, int]:
+        filters: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1000
+    ) -> Tuple[Optional[Iterator[str]], str, int]:
         """
-        Fetch fuel orders for CSV export based on filters and format them into a CSV string.
+        Stream fuel orders matching the export filters as CSV.
+        
+        Only the exported columns are selected, and rows are fetched batch_size
+        at a time (a server-side cursor on PostgreSQL) and written out in chunks,
+        so memory use does not grow with the number of orders exported.
         
         Args:
             current_user (User): The authenticated user requesting the export
             filters (Optional[Dict[str, Any]]): Optional dictionary containing filter parameters
                 - status (str): Override default REVIEWED status filter
-                - date_from (str): Filter orders from this date (TODO)
-                - date_to (str): Filter orders until this date (TODO)
+                - date_from (str): ISO date/datetime; orders created at or after it
+                - date_to (str): ISO date/datetime; orders created at or before it
+                  (a bare date includes that whole day)
+            batch_size (int): Rows fetched from the database and written per chunk
                 
         Returns:
-            Tuple[Optional[str], str, int]: A tuple containing:
-                - CSV data string if successful, None if failed
+            Tuple[Optional[Iterator[str]], str, int]: A tuple containing:
+                - Iterator of CSV text chunks if successful, None if failed or empty
                 - A success/error message
                 - HTTP status code (200, 400, 500)
         """
@@ -708,10 +701,7 @@ class FuelOrderService:
         if not current_user.has_permission('export_order_data'):
             return None, "Forbidden: You do not have permission to export fuel orders.", 403
 
-        # Initialize base query
-        query = FuelOrder.query
-
-        # Apply default status filter (REVIEWED) or override from filters
+        # Validate the filters before touching the database
         target_status = FuelOrderStatus.REVIEWED  # Default export status
         if filters and filters.get('status'):
             try:
@@ -720,54 +710,104 @@ class FuelOrderService:
             except KeyError:
                 return None, f"Invalid status value provided for export: {filters['status']}", 400
 
+        start_datetime = None
+        date_from = filters.get('date_from') if filters else None
+        if date_from:
+            try:
+                start_datetime = datetime.fromisoformat(date_from.replace('Z', '+00:00'))
+            except ValueError:
+                return None, f"Invalid date_from format provided: {date_from}", 400
+
+        end_datetime = None
+        date_to = filters.get('date_to') if filters else None
+        if date_to:
+            try:
+                end_datetime = datetime.fromisoformat(date_to.replace('Z', '+00:00'))
+            except ValueError:
+                return None, f"Invalid date_to format provided: {date_to}", 400
+
+        # Initialize base query with just the exported columns
+        query = db.session.query(
+            FuelOrder.id, FuelOrder.status, FuelOrder.tail_number, FuelOrder.customer_id,
+            FuelType.name.label('fuel_type_name'), FuelOrder.additive_requested, FuelOrder.requested_amount,
+            FuelOrder.assigned_lst_user_id, FuelOrder.assigned_truck_id, FuelOrder.location_on_ramp,
+            FuelOrder.csr_notes, FuelOrder.start_meter_reading, FuelOrder.end_meter_reading,
+            FuelOrder.lst_notes, FuelOrder.created_at, FuelOrder.dispatch_timestamp,
+            FuelOrder.acknowledge_timestamp, FuelOrder.en_route_timestamp,
+            FuelOrder.fueling_start_timestamp, FuelOrder.completion_timestamp,
+            FuelOrder.reviewed_timestamp, FuelOrder.reviewed_by_csr_user_id
+        ).outerjoin(FuelType, FuelOrder.fuel_type_id == FuelType.id)
+
         query = query.filter(FuelOrder.status == target_status)
+        if start_datetime is not None:
+            query = query.filter(FuelOrder.created_at >= start_datetime)
+        if end_datetime is not None:
+            if len(date_to) == 10:
+                # A bare date means up to the end of that day
+                query = query.filter(FuelOrder.created_at < end_datetime + timedelta(days=1))
+            else:
+                query = query.filter(FuelOrder.created_at <= end_datetime)
 
         try:
-            # Fetch all orders matching the criteria, ordered by review timestamp
-            orders_to_export = query.order_by(FuelOrder.reviewed_timestamp.desc()).all()
-
-            if not orders_to_export:
-                return None, "No orders found matching the criteria for export.", 200
-
-            # Create in-memory text stream for CSV writing
-            output = io.StringIO()
-            writer = csv.writer(output)
-
-            # Define and write the header row
-            header = [
-                'Order ID', 'Status', 'Tail Number', 'Customer ID',
-                'Fuel Type', 'Additive Requested', 'Requested Amount',
-                'Assigned LST ID', 'Assigned Truck ID',
-                'Location on Ramp', 'CSR Notes',
-                'Start Meter', 'End Meter', 'Gallons Dispensed', 'LST Notes',
-                'Created At (UTC)', 'Dispatch Timestamp (UTC)', 'Acknowledge Timestamp (UTC)',
-                'En Route Timestamp (UTC)', 'Fueling Start Timestamp (UTC)',
-                'Completion Timestamp (UTC)', 'Reviewed Timestamp (UTC)', 'Reviewed By CSR ID'
-            ]
-            writer.writerow(header)
-
-            # Helper function to format values safely
-            def format_value(value):
-                if value is None:
-                    return ''
-                if isinstance(value, datetime):
-                    return value.strftime('%Y-%m-%d %H:%M:%S')  # Consistent UTC format
-                if isinstance(value, Decimal):
-                    return str(value)  # Convert Decimal to string
-                if isinstance(value, bool):
-                    return 'Yes' if value else 'No'
-                if isinstance(value, FuelOrderStatus):
-                    return value.value  # Get enum string value
-                return str(value)
+            # Ordered by review timestamp; id keeps the order stable between exports
+            rows = iter(query.order_by(FuelOrder.reviewed_timestamp.desc(), FuelOrder.id.desc())
+                        .yield_per(batch_size))
+            first_row = next(rows, None)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error generating CSV export: {str(e)}")
+            return None, f"Error generating CSV export: {str(e)}", 500
+
+        if first_row is None:
+            return None, "No orders found matching the criteria for export.", 200
+
+        return cls._stream_csv(itertools.chain([first_row], rows), batch_size), "CSV data generated successfully.", 200
+
+    @staticmethod
+    def _stream_csv(rows: Iterator[Any], chunk_rows: int) -> Iterator[str]:
+        """Write export rows as CSV, yielding the text every chunk_rows rows."""
+        # Create a small text buffer that is emptied after every chunk
+        output = io.StringIO()
+        writer = csv.writer(output)
+
+        # Define and write the header row
+        writer.writerow([
+            'Order ID', 'Status', 'Tail Number', 'Customer ID',
+            'Fuel Type', 'Additive Requested', 'Requested Amount',
+            'Assigned LST ID', 'Assigned Truck ID',
+            'Location on Ramp', 'CSR Notes',
+            'Start Meter', 'End Meter', 'Gallons Dispensed', 'LST Notes',
+            'Created At (UTC)', 'Dispatch Timestamp (UTC)', 'Acknowledge Timestamp (UTC)',
+            'En Route Timestamp (UTC)', 'Fueling Start Timestamp (UTC)',
+            'Completion Timestamp (UTC)', 'Reviewed Timestamp (UTC)', 'Reviewed By CSR ID'
+        ])
+
+        # Helper function to format values safely
+        def format_value(value):
+            if value is None:
+                return ''
+            if isinstance(value, datetime):
+                return value.strftime('%Y-%m-%d %H:%M:%S')  # Consistent UTC format
+            if isinstance(value, Decimal):
+                return str(value)  # Convert Decimal to string
+            if isinstance(value, bool):
+                return 'Yes' if value else 'No'
+            if isinstance(value, FuelOrderStatus):
+                return value.value  # Get enum string value
+            return str(value)
 
+        try:
             # Write each order as a row in the CSV
-            for order in orders_to_export:
-                row = [
+            for count, order in enumerate(rows, 1):
+                gallons_dispensed = None
+                if order.start_meter_reading is not None and order.end_meter_reading is not None:
+                    gallons_dispensed = float(order.end_meter_reading - order.start_meter_reading)
+                writer.writerow([
                     order.id,
                     format_value(order.status),
                     order.tail_number,
                     format_value(order.customer_id),
-                    order.fuel_type,
+                    order.fuel_type_name or '',
                     format_value(order.additive_requested),
                     format_value(order.requested_amount),
                     format_value(order.assigned_lst_user_id),
@@ -776,7 +816,7 @@ class FuelOrderService:
                     order.csr_notes or '',
                     format_value(order.start_meter_reading),
                     format_value(order.end_meter_reading),
-                    format_value(order.calculated_gallons_dispensed),
+                    format_value(gallons_dispensed),
                     order.lst_notes or '',
                     format_value(order.created_at),
                     format_value(order.dispatch_timestamp),
@@ -786,18 +826,20 @@ class FuelOrderService:
                     format_value(order.completion_timestamp),
                     format_value(order.reviewed_timestamp),
                     format_value(order.reviewed_by_csr_user_id)
-                ]
-                writer.writerow(row)
+                ])
 
-            # Get the CSV string and close the stream
-            csv_data = output.getvalue()
-            output.close()
-
-            return csv_data, "CSV data generated successfully.", 200
+                if count % chunk_rows == 0:
+                    yield output.getvalue()
+                    output.seek(0)
+                    output.truncate(0)
 
+            yield output.getvalue()
         except Exception as e:
-            current_app.logger.error(f"Error generating CSV export: {str(e)}")
-            return None, f"Error generating CSV export: {str(e)}", 500 
+            # Headers are already sent; the client sees a truncated file
+            current_app.logger.error(f"Error streaming CSV export: {str(e)}")
+            raise
+        finally:
+            output.close()
 
     @staticmethod
     def validate_lst_assignment(assigned_lst_user_id: int) -> Tuple[Optional[User], Optional[str]]:
@@ -0,0 +1,292 @@
+"""
+Fuel Order Status Counters
+
+The CSR dashboard cards used to run five COUNT(CASE ...) aggregates over the
+whole fuel_orders table on every poll. The counts are now materialized:
+
+- fuel_order_status_counts holds one row per status and
+  fuel_order_completion_counts one row per completion day
+- FuelOrder insert/update/delete hooks apply +1/-1 deltas on the flush's own
+  connection, so counters change in the same transaction as the order, no
+  matter which service or route changed it
+- Reading the dashboard counts is two primary-key lookups
+- After a commit that moved any counter, the new counts are pushed to
+  csr_room over Socket.IO, so dashboards do not need to poll
+- Bulk Query.update()/delete() bypass the hooks; reconcile_order_status_counts
+  (flask maintenance reconcile-order-counts, run nightly) locks the counter
+  tables and rebuilds them from fuel_orders
+"""
+
+import logging
+import threading
+from collections import Counter
+from datetime import date, datetime
+from typing import Any, Dict, Optional, Tuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import delete, event, false, func, inspect, select, text, update
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..models.fuel_order import FuelOrder, FuelOrderStatus
+from ..models.fuel_order_status_count import FuelOrderCompletionCount, FuelOrderStatusCount
+from ..utils.socketio_auth import emit_to_csr_room
+
+logger = logging.getLogger(__name__)
+
+PENDING_STATUSES = (FuelOrderStatus.DISPATCHED,)
+IN_PROGRESS_STATUSES = (FuelOrderStatus.ACKNOWLEDGED, FuelOrderStatus.EN_ROUTE, FuelOrderStatus.FUELING)
+COMPLETED_STATUSES = (FuelOrderStatus.COMPLETED, FuelOrderStatus.REVIEWED)
+
+COUNTS_UPDATED_EVENT = 'order_status_counts_updated'
+
+# Session.info flag: this transaction moved a counter
+_COUNTS_CHANGED = 'fuel_order_counts_changed'
+
+_registered = False
+_register_lock = threading.Lock()
+
+
+def _completion_date(status: Optional[FuelOrderStatus], completion_timestamp: Optional[datetime]) -> Optional[date]:
+    """Day an order counts towards completed-on-day, if it is completed."""
+    if status in COMPLETED_STATUSES and completion_timestamp is not None:
+        return completion_timestamp.date()
+    return None
+
+
+def _add(status_deltas: Counter, completion_deltas: Counter, status: Optional[FuelOrderStatus],
+         completion_timestamp: Optional[datetime], delta: int):
+    if status is not None:
+        status_deltas[status.name] += delta
+    completion_date = _completion_date(status, completion_timestamp)
+    if completion_date is not None:
+        completion_deltas[completion_date] += delta
+
+
+def _old_value(state, key: str):
+    """Value of an attribute as last flushed to the database."""
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return None
+
+
+def _upsert(connection, model, key_column: str, deltas: Counter):
+    """Add deltas to counter rows, creating missing rows."""
+    if connection.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    table = model.__table__
+    for key, delta in deltas.items():
+        if not delta:
+            continue
+        statement = (insert(table)
+                     .values({key_column: key, 'order_count': delta})
+                     .on_conflict_do_update(
+                         index_elements=[table.c[key_column]],
+                         set_={'order_count': table.c.order_count + delta}
+                     ))
+        connection.execute(statement)
+
+
+def _apply(connection, target, status_deltas: Counter, completion_deltas: Counter):
+    if not any(status_deltas.values()) and not any(completion_deltas.values()):
+        return
+    _upsert(connection, FuelOrderStatusCount, 'status', status_deltas)
+    _upsert(connection, FuelOrderCompletionCount, 'completion_date', completion_deltas)
+    session = inspect(target).session
+    if session is not None:
+        session.info[_COUNTS_CHANGED] = True
+
+
+def _after_insert(mapper, connection, target):
+    status_deltas, completion_deltas = Counter(), Counter()
+    _add(status_deltas, completion_deltas, target.status, target.completion_timestamp, 1)
+    _apply(connection, target, status_deltas, completion_deltas)
+
+
+def _after_update(mapper, connection, target):
+    state = inspect(target)
+    if not (state.attrs.status.history.has_changes()
+            or state.attrs.completion_timestamp.history.has_changes()):
+        return
+    status_deltas, completion_deltas = Counter(), Counter()
+    _add(status_deltas, completion_deltas,
+         _old_value(state, 'status'), _old_value(state, 'completion_timestamp'), -1)
+    _add(status_deltas, completion_deltas, target.status, target.completion_timestamp, 1)
+    _apply(connection, target, status_deltas, completion_deltas)
+
+
+def _after_delete(mapper, connection, target):
+    state = inspect(target)
+    status_deltas, completion_deltas = Counter(), Counter()
+    _add(status_deltas, completion_deltas,
+         _old_value(state, 'status'), _old_value(state, 'completion_timestamp'), -1)
+    _apply(connection, target, status_deltas, completion_deltas)
+
+
+def _load_old_value_on_set(target, value, oldvalue, initiator):
+    """No-op; registered with active_history so updates know what they replace."""
+
+
+def _after_commit(session):
+    if session.info.pop(_COUNTS_CHANGED, False):
+        publish_order_status_counts()
+
+
+def _after_rollback(session):
+    session.info.pop(_COUNTS_CHANGED, None)
+
+
+def register_order_status_counters():
+    """Install the FuelOrder hooks that maintain the counters (idempotent)."""
+    global _registered
+    with _register_lock:
+        if _registered:
+            return
+        # Assigning status/completion_timestamp loads the previous value, even on
+        # expired instances, so the update hook knows which counters to decrement
+        event.listen(FuelOrder.status, 'set', _load_old_value_on_set, active_history=True)
+        event.listen(FuelOrder.completion_timestamp, 'set', _load_old_value_on_set, active_history=True)
+        event.listen(FuelOrder, 'after_insert', _after_insert)
+        event.listen(FuelOrder, 'after_update', _after_update)
+        event.listen(FuelOrder, 'after_delete', _after_delete)
+        event.listen(Session, 'after_commit', _after_commit)
+        event.listen(Session, 'after_rollback', _after_rollback)
+        _registered = True
+
+
+def _read_counts(connection, today: date) -> Tuple[Dict[str, int], int]:
+    status_counts = dict(connection.execute(
+        select(FuelOrderStatusCount.status, FuelOrderStatusCount.order_count)
+    ).all())
+    completed_today = connection.execute(
+        select(FuelOrderCompletionCount.order_count)
+        .where(FuelOrderCompletionCount.completion_date == today)
+    ).scalar() or 0
+    return status_counts, completed_today
+
+
+def _format_counts(status_counts: Dict[str, int], completed_today: int) -> Dict[str, Any]:
+    def total(statuses):
+        return sum(status_counts.get(status.name, 0) for status in statuses)
+
+    pending = total(PENDING_STATUSES)
+    in_progress = total(IN_PROGRESS_STATUSES)
+    completed = total(COMPLETED_STATUSES)
+    return {
+        'pending_count': pending,
+        'active_count': in_progress,  # in_progress becomes active_count
+        'completed_count': completed,
+        'completed_today': completed_today,
+        'total_orders': sum(status_counts.values()),
+        'in_progress_count': in_progress,  # Keep for backward compatibility
+        'avg_completion_time': 0,  # Placeholder for future implementation
+        'status_distribution': {
+            'pending': pending,
+            'in_progress': in_progress,
+            'completed': completed,
+        }
+    }
+
+
+def get_order_status_counts() -> Dict[str, Any]:
+    """Dashboard status counts from the counter tables."""
+    status_counts, completed_today = _read_counts(db.session.connection(), date.today())
+    return _format_counts(status_counts, completed_today)
+
+
+def publish_order_status_counts():
+    """Push the current counts to csr_room."""
+    if not has_app_context() or not current_app.config.get('ORDER_STATUS_COUNTS_PUSH_ENABLED', True):
+        return
+    try:
+        # The committing session cannot run SQL inside after_commit
+        with db.engine.connect() as connection:
+            status_counts, completed_today = _read_counts(connection, date.today())
+        emit_to_csr_room(COUNTS_UPDATED_EVENT, _format_counts(status_counts, completed_today))
+    except Exception as e:
+        logger.error(f"Failed to publish order status counts: {e}")
+
+
+def _lock_counters():
+    """
+    Block counter updates from other transactions until this one ends.
+
+    PostgreSQL takes an EXCLUSIVE table lock, which still lets dashboards read
+    the counters. SQLite has no table locks; any write statement takes its
+    database-wide write lock, so an update that matches no rows does the same.
+    """
+    if db.session.get_bind().dialect.name == 'postgresql':
+        db.session.execute(text(
+            f'LOCK TABLE {FuelOrderStatusCount.__tablename__}, {FuelOrderCompletionCount.__tablename__} '
+            'IN EXCLUSIVE MODE'
+        ))
+    else:
+        db.session.execute(update(FuelOrderStatusCount).where(false()).values(order_count=0))
+
+
+def _count_orders() -> Tuple[Dict[str, int], Counter]:
+    """Per-status and per-completion-day counts straight from fuel_orders."""
+    status_rows = db.session.execute(
+        select(FuelOrder.status, func.count(FuelOrder.id)).group_by(FuelOrder.status)
+    ).all()
+    actual_status = {status.name: count for status, count in status_rows}
+    actual_status.update({status.name: actual_status.get(status.name, 0) for status in FuelOrderStatus})
+
+    completion_rows = db.session.execute(
+        select(FuelOrder.completion_timestamp)
+        .where(FuelOrder.status.in_(COMPLETED_STATUSES), FuelOrder.completion_timestamp.isnot(None))
+    ).scalars()
+    return actual_status, Counter(timestamp.date() for timestamp in completion_rows)
+
+
+def reconcile_order_status_counts() -> Dict[str, Any]:
+    """
+    Rebuild the counters from fuel_orders.
+
+    The counter tables are locked before fuel_orders is counted, so a status
+    change cannot commit its deltas between the count and the rebuild (and be
+    overwritten), and no hook can insert a counter row the rebuild then
+    collides with. Status changes that flush meanwhile wait for the commit.
+
+    Returns:
+        Dict with 'corrected' (status/day keys whose count drifted) and
+        'status_counts' (the rebuilt per-status counts)
+    """
+    try:
+        _lock_counters()
+        actual_status, actual_completion = _count_orders()
+
+        current_status = dict(db.session.execute(
+            select(FuelOrderStatusCount.status, FuelOrderStatusCount.order_count)
+        ).all())
+        current_completion = dict(db.session.execute(
+            select(FuelOrderCompletionCount.completion_date, FuelOrderCompletionCount.order_count)
+        ).all())
+
+        corrected = sorted(
+            [key for key, count in actual_status.items() if current_status.get(key) != count]
+            + [key.isoformat() for key in set(actual_completion) | set(current_completion)
+               if current_completion.get(key, 0) != actual_completion.get(key, 0)]
+        )
+
+        db.session.execute(delete(FuelOrderStatusCount))
+        db.session.execute(delete(FuelOrderCompletionCount))
+        db.session.add_all(FuelOrderStatusCount(status=key, order_count=count) for key, count in actual_status.items())
+        db.session.add_all(FuelOrderCompletionCount(completion_date=key, order_count=count)
+                           for key, count in actual_completion.items())
+        if corrected:
+            db.session.info[_COUNTS_CHANGED] = True
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    if corrected:
+        logger.warning(f"Reconciled drifted fuel order counters: {', '.join(corrected)}")
+    return {'corrected': corrected, 'status_counts': actual_status}
@@ -0,0 +1,189 @@
+"""
+Fuel Price Cache
+
+Process-local cache of the fuel price history, keyed by fuel type. Each fuel
+type holds its effective-dated prices as a sorted timeline, so the price in
+effect at any moment is a bisect on in-memory data instead of an ORDER BY
+query against fuel_prices.
+
+Prices change a few times a day through AdminFeeConfigService and
+FuelTypeAdminService, which invalidate the cache after every write:
+- Invalidation bumps a price version kept in Redis (REDIS_URL), which every
+  worker reads on each lookup, so all workers reload before pricing again
+- When Redis is unavailable the version is process-local and other workers
+  converge when their copy expires after the TTL
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional, Tuple
+
+from .redis_version_counter import RedisVersionCounter
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class FuelPriceSnapshot:
+    """Read-only copy of a FuelPrice row."""
+    id: int
+    fuel_type_id: int
+    price: Decimal
+    currency: str
+    effective_date: datetime
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def from_model(cls, fuel_price: Any) -> 'FuelPriceSnapshot':
+        return cls(
+            id=fuel_price.id,
+            fuel_type_id=fuel_price.fuel_type_id,
+            price=fuel_price.price,
+            currency=fuel_price.currency,
+            effective_date=fuel_price.effective_date,
+            created_at=fuel_price.created_at,
+            updated_at=fuel_price.updated_at
+        )
+
+
+class FuelPriceTimeline:
+    """Price history for one fuel type, sorted by effective date (oldest first)."""
+
+    __slots__ = ('effective_dates', 'prices')
+
+    def __init__(self, prices: Tuple[FuelPriceSnapshot, ...]):
+        self.prices = prices
+        self.effective_dates = tuple(price.effective_date for price in prices)
+
+    def price_at(self, when: datetime) -> Optional[FuelPriceSnapshot]:
+        """Return the price in effect at the given moment, or None if none was effective yet."""
+        index = bisect_right(self.effective_dates, when)
+        if index == 0:
+            return None
+        return self.prices[index - 1]
+
+    @property
+    def latest(self) -> Optional[FuelPriceSnapshot]:
+        """Most recently dated price, including prices effective in the future."""
+        return self.prices[-1] if self.prices else None
+
+    def __len__(self):
+        return len(self.prices)
+
+
+class FuelPriceCache:
+    """
+    Thread-safe holder for fuel price timelines and the fuel type code index.
+
+    The price version is read from Redis on every lookup (a single GET); the
+    timelines are only reloaded from the database when the version changes,
+    or when the TTL expires while Redis is down.
+    """
+
+    VERSION_KEY = "fbo:fuel_prices:version"
+
+    def __init__(self, ttl_seconds: int = 300):
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        # (timelines by fuel type ID, fuel type IDs by code), swapped as one unit
+        self._snapshot: Optional[Tuple[Dict[int, FuelPriceTimeline], Dict[str, int]]] = None
+        self._snapshot_version = 0
+        self._loaded_at = 0.0
+        self.versions = RedisVersionCounter(self.VERSION_KEY, 'fuel price')
+
+    def current_version(self) -> Tuple[int, bool]:
+        """
+        Get the current price version.
+
+        Returns:
+            Tuple of (version, is_shared) where is_shared is False when the
+            version only reflects writes made by this process.
+        """
+        return self.versions.current()
+
+    def _is_fresh(self, version: int, is_shared: bool) -> bool:
+        if self._snapshot is None or self._snapshot_version != version:
+            return False
+        return is_shared or time.monotonic() - self._loaded_at <= self.ttl_seconds
+
+    def _ensure_loaded(self) -> Tuple[Dict[int, FuelPriceTimeline], Dict[str, int]]:
+        version, is_shared = self.current_version()
+        snapshot = self._snapshot
+        if snapshot is not None and self._is_fresh(version, is_shared):
+            return snapshot
+
+        with self.lock:
+            if self._is_fresh(version, is_shared):
+                return self._snapshot
+            return self._load(version)
+
+    def _load(self, version: int) -> Tuple[Dict[int, FuelPriceTimeline], Dict[str, int]]:
+        """Load every fuel type and price into fresh timelines. Caller holds the lock."""
+        from ..models.fuel_price import FuelPrice
+        from ..models.fuel_type import FuelType
+
+        history: Dict[int, list] = {}
+        for fuel_price in FuelPrice.query.order_by(FuelPrice.fuel_type_id, FuelPrice.effective_date).all():
+            history.setdefault(fuel_price.fuel_type_id, []).append(FuelPriceSnapshot.from_model(fuel_price))
+
+        timelines = {
+            fuel_type_id: FuelPriceTimeline(tuple(prices))
+            for fuel_type_id, prices in history.items()
+        }
+        fuel_type_ids_by_code = {fuel_type.code: fuel_type.id for fuel_type in FuelType.query.all()}
+
+        self._snapshot = (timelines, fuel_type_ids_by_code)
+        self._snapshot_version = version
+        self._loaded_at = time.monotonic()
+
+        logger.debug(f"Loaded fuel price cache version {version}: {len(timelines)} fuel types, "
+                     f"{sum(len(timeline) for timeline in timelines.values())} prices")
+        return self._snapshot
+
+    def get_timeline(self, fuel_type_id: int) -> FuelPriceTimeline:
+        """Get the price timeline for a fuel type (empty if it has no prices)."""
+        return self._ensure_loaded()[0].get(fuel_type_id) or FuelPriceTimeline(())
+
+    def get_fuel_type_id(self, code: str) -> Optional[int]:
+        """Get a fuel type ID from its code."""
+        return self._ensure_loaded()[1].get(code)
+
+    def current_price(self, fuel_type_id: int, as_of: Optional[datetime] = None) -> Optional[FuelPriceSnapshot]:
+        """Get the price in effect for a fuel type, as of now unless given."""
+        return self.get_timeline(fuel_type_id).price_at(as_of or datetime.utcnow())
+
+    def invalidate(self) -> int:
+        """
+        Bump the price version after a fuel price or fuel type write.
+
+        Must be called after the write has been committed, otherwise another
+        worker may load the old prices under the new version.
+
+        Returns:
+            The new price version
+        """
+        with self.lock:
+            self._snapshot = None
+        return self.versions.bump()
+
+
+# Create a lazy-initialized global instance
+_fuel_price_cache_instance = None
+_fuel_price_cache_lock = threading.Lock()
+
+def get_fuel_price_cache() -> FuelPriceCache:
+    """Get the global fuel price cache instance (lazy initialization)."""
+    global _fuel_price_cache_instance
+
+    if _fuel_price_cache_instance is None:
+        with _fuel_price_cache_lock:
+            if _fuel_price_cache_instance is None:
+                _fuel_price_cache_instance = FuelPriceCache()
+
+    return _fuel_price_cache_instance
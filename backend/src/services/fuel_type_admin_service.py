@@ -13,6 +13,7 @@ from ..models.fuel_type import FuelType
 from ..models.fuel_order import FuelOrder
 from ..models.fuel_price import FuelPrice
 from ..extensions import db
+from .fuel_price_cache import get_fuel_price_cache
 
 
 class FuelTypeAdminService:
@@ -103,6 +104,7 @@ class FuelTypeAdminService:
             
             db.session.add(fuel_type)
             db.session.commit()
+            get_fuel_price_cache().invalidate()
             
             current_app.logger.info(f"Created fuel type: {fuel_type.name} ({fuel_type.code})")
             return fuel_type, f"Fuel type '{fuel_type.name}' created successfully", 201
@@ -160,6 +162,7 @@ class FuelTypeAdminService:
                 fuel_type.is_active = data['is_active']
             
             db.session.commit()
+            get_fuel_price_cache().invalidate()
             
             current_app.logger.info(f"Updated fuel type: {fuel_type.name} ({fuel_type.code})")
             return fuel_type, f"Fuel type '{fuel_type.name}' updated successfully", 200
@@ -202,6 +205,7 @@ class FuelTypeAdminService:
                 # Soft delete by setting is_active to False
                 fuel_type.is_active = False
                 db.session.commit()
+                get_fuel_price_cache().invalidate()
                 current_app.logger.info(f"Soft deleted fuel type: {fuel_type.name} (used in {fuel_orders_count} orders)")
                 return True, f"Fuel type '{fuel_type.name}' deactivated successfully (used in {fuel_orders_count} orders)", 200
             
@@ -211,12 +215,14 @@ class FuelTypeAdminService:
                 # Soft delete by setting is_active to False
                 fuel_type.is_active = False
                 db.session.commit()
+                get_fuel_price_cache().invalidate()
                 current_app.logger.info(f"Soft deleted fuel type: {fuel_type.name} (has {fuel_prices_count} price records)")
                 return True, f"Fuel type '{fuel_type.name}' deactivated successfully (has price history)", 200
             
             # If no references exist, perform hard delete
             db.session.delete(fuel_type)
             db.session.commit()
+            get_fuel_price_cache().invalidate()
             
             current_app.logger.info(f"Hard deleted fuel type: {fuel_type.name}")
             return True, f"Fuel type '{fuel_type.name}' deleted successfully", 200
@@ -249,13 +255,10 @@ class FuelTypeAdminService:
             # Count fuel orders using this fuel type
             fuel_orders_count = FuelOrder.query.filter_by(fuel_type_id=fuel_type_id).count()
             
-            # Count fuel prices for this fuel type
-            fuel_prices_count = FuelPrice.query.filter_by(fuel_type_id=fuel_type_id).count()
-            
-            # Get latest fuel price
-            latest_price = FuelPrice.query.filter_by(fuel_type_id=fuel_type_id).order_by(
-                FuelPrice.effective_date.desc()
-            ).first()
+            # Count fuel prices and get the latest one from the cached price history
+            price_timeline = get_fuel_price_cache().get_timeline(fuel_type_id)
+            fuel_prices_count = len(price_timeline)
+            latest_price = price_timeline.latest
             
             stats = {
                 'fuel_type_id': fuel_type_id,
@@ -0,0 +1,198 @@
+"""
+Permission Bitsets
+
+Each user's effective permissions are materialized as integer bitsets where
+bit N is set when the user holds the permission with id N. Permission ids
+never change, so the same bitset means the same thing in every process and
+can be shared through Redis.
+
+Bitsets are computed with one set-based query: a recursive CTE expands every
+permission group into itself plus its ancestors (groups inherit their
+parents' permissions), which is then joined through user_roles and
+role_permission_groups to the group memberships. Direct UserPermission rows
+are kept in a separate bitset because permission checks follow the golden
+path (User -> Role -> PermissionGroup -> Permission) only, while permission
+listings include direct grants as well.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+
+from sqlalchemy import and_, literal, select, union_all
+from sqlalchemy.orm import aliased
+
+from ..extensions import db
+from ..models.permission import Permission
+from ..models.permission_group import PermissionGroup, PermissionGroupMembership, RolePermissionGroup
+from ..models.role_permission import user_roles
+from ..models.user_permission import UserPermission
+
+logger = logging.getLogger(__name__)
+
+
+class UserPermissionBits(NamedTuple):
+    """Effective permission bitsets for one user."""
+    group_bits: int = 0
+    direct_bits: int = 0
+
+    @property
+    def all_bits(self) -> int:
+        return self.group_bits | self.direct_bits
+
+    def to_cache(self) -> Dict[str, str]:
+        """JSON-safe form for the Redis cache."""
+        return {'group': format(self.group_bits, 'x'), 'direct': format(self.direct_bits, 'x')}
+
+    @classmethod
+    def from_cache(cls, value: Dict[str, str]) -> 'UserPermissionBits':
+        return cls(int(value['group'], 16), int(value['direct'], 16))
+
+
+class PermissionRegistry:
+    """
+    Process-local map between permission names and their bit positions (permission ids).
+
+    Permissions are only added by seeds and migrations, so the map is loaded
+    once and reloaded when an unknown name is looked up, at most once per
+    reload interval.
+    """
+
+    def __init__(self, reload_interval: int = 60):
+        self.reload_interval = reload_interval
+        self.lock = threading.Lock()
+        # (bit by name, name by bit), swapped as one unit
+        self._maps: Optional[tuple] = None
+        self._loaded_at = 0.0
+
+    def _load(self) -> tuple:
+        with self.lock:
+            rows = db.session.execute(select(Permission.id, Permission.name)).all()
+            bits_by_name = {name: permission_id for permission_id, name in rows}
+            names_by_bit = {permission_id: name for permission_id, name in rows}
+            self._maps = (bits_by_name, names_by_bit)
+            self._loaded_at = time.monotonic()
+            return self._maps
+
+    def _get_maps(self) -> tuple:
+        return self._maps or self._load()
+
+    def bit_for(self, name: str) -> Optional[int]:
+        """Bit position of a permission, or None if no such permission exists."""
+        bit = self._get_maps()[0].get(name)
+        if bit is None and time.monotonic() - self._loaded_at > self.reload_interval:
+            bit = self._load()[0].get(name)
+        return bit
+
+    def has(self, bits: int, name: str) -> bool:
+        """Single bit test for a permission name."""
+        bit = self.bit_for(name)
+        return bit is not None and bool(bits >> bit & 1)
+
+    def names_for(self, bits: int) -> List[str]:
+        """Sorted permission names for the set bits."""
+        names_by_bit = self._get_maps()[1]
+        if any(bit not in names_by_bit for bit in _iter_bits(bits)):
+            names_by_bit = self._load()[1]
+        return sorted(names_by_bit[bit] for bit in _iter_bits(bits) if bit in names_by_bit)
+
+    def invalidate(self):
+        """Forget the loaded map so the next lookup reloads it."""
+        with self.lock:
+            self._maps = None
+
+
+def _iter_bits(bits: int) -> Iterable[int]:
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
+
+
+def _group_ancestry_cte():
+    """(group_id, source_group_id) for every group and each of its ancestors, itself included."""
+    ancestry = select(
+        PermissionGroup.id.label('group_id'),
+        PermissionGroup.id.label('source_group_id'),
+        PermissionGroup.parent_id.label('next_id')
+    ).cte('group_ancestry', recursive=True)
+
+    parent = aliased(PermissionGroup)
+    return ancestry.union(
+        select(ancestry.c.group_id, parent.id, parent.parent_id)
+        .join(parent, parent.id == ancestry.c.next_id)
+    )
+
+
+def compute_user_permission_bits(user_ids: Optional[Iterable[int]] = None) -> Dict[int, UserPermissionBits]:
+    """
+    Compute permission bitsets for the given users (or every user) in one query.
+
+    Users without any permission are included with empty bitsets when
+    user_ids is given, so callers can cache the negative result as well.
+    """
+    user_ids = None if user_ids is None else list(user_ids)
+    ancestry = _group_ancestry_cte()
+    root_group = aliased(PermissionGroup)
+
+    group_grants = (
+        select(user_roles.c.user_id, PermissionGroupMembership.permission_id, literal('group').label('source'))
+        .select_from(user_roles)
+        .join(RolePermissionGroup, and_(RolePermissionGroup.role_id == user_roles.c.role_id,
+                                        RolePermissionGroup.is_active.is_(True)))
+        .join(root_group, and_(root_group.id == RolePermissionGroup.group_id, root_group.is_active.is_(True)))
+        .join(ancestry, ancestry.c.group_id == root_group.id)
+        .join(PermissionGroupMembership, and_(PermissionGroupMembership.group_id == ancestry.c.source_group_id,
+                                              PermissionGroupMembership.is_active.is_(True)))
+    )
+    direct_grants = (
+        select(UserPermission.user_id, UserPermission.permission_id, literal('direct').label('source'))
+        .where(UserPermission.is_active.is_(True))
+    )
+    if user_ids is not None:
+        group_grants = group_grants.where(user_roles.c.user_id.in_(user_ids))
+        direct_grants = direct_grants.where(UserPermission.user_id.in_(user_ids))
+
+    group_bits: Dict[int, int] = {}
+    direct_bits: Dict[int, int] = {}
+    for user_id, permission_id, source in db.session.execute(union_all(group_grants, direct_grants)):
+        target = group_bits if source == 'group' else direct_bits
+        target[user_id] = target.get(user_id, 0) | (1 << permission_id)
+
+    result_ids = set(user_ids) if user_ids is not None else set(group_bits) | set(direct_bits)
+    return {
+        user_id: UserPermissionBits(group_bits.get(user_id, 0), direct_bits.get(user_id, 0))
+        for user_id in result_ids
+    }
+
+
+def affected_user_ids(role_id: Optional[int] = None, group_id: Optional[int] = None) -> Set[int]:
+    """Users whose bitsets depend on a role, or on a group (directly or through a child group)."""
+    query = select(user_roles.c.user_id).distinct()
+    if role_id is not None:
+        return set(db.session.scalars(query.where(user_roles.c.role_id == role_id)))
+
+    # Child groups inherit from this group, so roles assigned to any descendant are affected too
+    ancestry = _group_ancestry_cte()
+    dependent_groups = select(ancestry.c.group_id).where(ancestry.c.source_group_id == group_id)
+    return set(db.session.scalars(
+        query.join(RolePermissionGroup, RolePermissionGroup.role_id == user_roles.c.role_id)
+        .where(RolePermissionGroup.group_id.in_(dependent_groups))
+    ))
+
+
+# Create a lazy-initialized global instance
+_permission_registry_instance = None
+_permission_registry_lock = threading.Lock()
+
+def get_permission_registry() -> PermissionRegistry:
+    """Get the global permission registry instance (lazy initialization)."""
+    global _permission_registry_instance
+
+    if _permission_registry_instance is None:
+        with _permission_registry_lock:
+            if _permission_registry_instance is None:
+                _permission_registry_instance = PermissionRegistry()
+
+    return _permission_registry_instance
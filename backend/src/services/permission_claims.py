@@ -0,0 +1,114 @@
+"""
+Permission Claims
+
+Opt-in (PERMISSION_JWT_CLAIMS_ENABLED) stateless authorization: access tokens
+carry the user's permission bitset and the permission versions it was
+computed at, so decorators can authorize from the token alone.
+
+- Versions are opaque stamps kept in Redis, one per user plus a global one;
+  every cache invalidation replaces the affected stamps
+- A token is trusted only while both its stamps still match Redis (one MGET);
+  otherwise, or without Redis, callers fall back to the database-backed path
+- Stamps are random rather than counters, so a flushed and rebuilt Redis can
+  never make an old token look current again
+"""
+
+import logging
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .permission_bitset import UserPermissionBits
+
+logger = logging.getLogger(__name__)
+
+BITS_CLAIM = 'perm_bits'
+VERSION_CLAIM = 'perm_ver'
+
+
+def _new_stamp() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+class PermissionVersionStore:
+    """Per-user and global permission version stamps in Redis."""
+
+    def __init__(self, get_redis_client: Callable[[], Any], key_prefix: str = "fbo:perm:version:",
+                 ttl_seconds: int = 7200):
+        self.get_redis_client = get_redis_client
+        self.key_prefix = key_prefix
+        # Outlives any access token; an expired stamp only sends its tokens down the database path
+        self.ttl_seconds = ttl_seconds
+
+    def _keys(self, user_id: int) -> List[str]:
+        return [f"{self.key_prefix}global", f"{self.key_prefix}user:{user_id}"]
+
+    def current(self, user_id: int, create: bool = False) -> Optional[List[str]]:
+        """[global stamp, user stamp], creating missing stamps if asked; None if unavailable."""
+        redis_client = self.get_redis_client()
+        if redis_client is None:
+            return None
+        try:
+            keys = self._keys(user_id)
+            pipe = redis_client.pipeline(transaction=False)
+            if create:
+                for key in keys:
+                    pipe.set(key, _new_stamp(), nx=True, ex=self.ttl_seconds)
+            pipe.mget(keys)
+            stamps = pipe.execute()[-1]
+        except Exception as e:
+            logger.warning(f"Permission version lookup failed for user {user_id}: {e}")
+            return None
+        return stamps if all(stamps) else None
+
+    def current_many(self, user_ids: Iterable[int]) -> Dict[int, List[Optional[str]]]:
+        """[global stamp, user stamp] for several users in one MGET; {} if unavailable."""
+        user_ids = list(user_ids)
+        redis_client = self.get_redis_client()
+        if redis_client is None or not user_ids:
+            return {}
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.mget([f"{self.key_prefix}global"] + [self._keys(user_id)[1] for user_id in user_ids])
+            stamps = pipe.execute()[-1]
+        except Exception as e:
+            logger.warning(f"Permission version lookup failed for {len(user_ids)} users: {e}")
+            return {}
+        return {user_id: [stamps[0], stamp] for user_id, stamp in zip(user_ids, stamps[1:])}
+
+    def bump_users(self, user_ids: Iterable[int]):
+        """Invalidate the permission claims of these users' tokens."""
+        self._bump([self._keys(user_id)[1] for user_id in user_ids])
+
+    def bump_all(self):
+        """Invalidate the permission claims of every token."""
+        self._bump([f"{self.key_prefix}global"])
+
+    def _bump(self, keys: List[str]):
+        redis_client = self.get_redis_client()
+        if redis_client is None or not keys:
+            return
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for key in keys:
+                pipe.set(key, _new_stamp(), ex=self.ttl_seconds)
+            pipe.execute()
+        except Exception as e:
+            # Tokens stay trusted until their stamps expire; make that window visible
+            logger.error(f"Failed to bump permission versions for {len(keys)} keys: {e}")
+
+
+def build_permission_claims(bits: UserPermissionBits, stamps: List[str]) -> Dict[str, Any]:
+    """Claims to embed in an access token."""
+    return {BITS_CLAIM: format(bits.group_bits, 'x'), VERSION_CLAIM: stamps}
+
+
+def claims_bits(claims: Dict[str, Any], current_stamps: Optional[List[str]]) -> Optional[int]:
+    """The token's group bitset if its stamps are still current, else None."""
+    if BITS_CLAIM not in claims or VERSION_CLAIM not in claims or current_stamps is None:
+        return None
+    if list(claims[VERSION_CLAIM]) != list(current_stamps):
+        return None
+    try:
+        return int(claims[BITS_CLAIM], 16)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,191 @@
+"""
+Permission Invalidation Bus
+
+Every worker process keeps its own L1 PermissionMemoryCache, so an
+invalidation handled by one worker has to reach the others. The bus
+broadcasts invalidations over Redis pub/sub on REDIS_URL:
+
+- PermissionService publishes the affected user ids (or "all") after
+  clearing its own caches
+- Each worker runs one listener thread (a green thread under eventlet) that
+  applies messages from other workers to its L1 cache
+- Messages carry the publishing process' origin id, so a worker never
+  re-applies its own invalidations
+- Pub/sub is fire-and-forget: whenever the listener (re)connects it clears
+  the whole L1 cache, since messages sent while it was away are lost
+"""
+
+import json
+import logging
+import os
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANNEL = 'fbo:perm:invalidate'
+
+
+@dataclass
+class InvalidationBusStats:
+    """Invalidation bus statistics."""
+    published: int = 0
+    received: int = 0
+    applied: int = 0
+    reconnects: int = 0
+    errors: int = 0
+
+
+class PermissionInvalidationBus:
+    """Redis pub/sub fan-out of permission cache invalidations between workers."""
+
+    def __init__(self, channel: str = DEFAULT_CHANNEL, reconnect_delay: float = 1.0,
+                 max_reconnect_delay: float = 30.0):
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.origin = uuid.uuid4().hex
+        self.stats = InvalidationBusStats()
+        self.lock = threading.Lock()
+        self.redis_client = None
+        self._handler: Optional[Callable[[Dict[str, Any]], None]] = None
+        self._on_reconnect: Optional[Callable[[], None]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, redis_client, handler: Callable[[Dict[str, Any]], None],
+              on_reconnect: Callable[[], None]) -> bool:
+        """Start the listener thread; returns False if it is already running."""
+        with self.lock:
+            if self.running:
+                return False
+            self.redis_client = redis_client
+            self._handler = handler
+            self._on_reconnect = on_reconnect
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._listen, name='permission-invalidation-bus', daemon=True)
+            self._thread.start()
+        logger.info(f"Permission invalidation bus listening on '{self.channel}' (origin {self.origin})")
+        return True
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the listener thread."""
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout)
+
+    def publish_users(self, user_ids: Iterable[int]):
+        """Tell the other workers to drop these users' cached permissions."""
+        user_ids = sorted(set(user_ids))
+        if user_ids:
+            self._publish({'users': user_ids})
+
+    def publish_all(self):
+        """Tell the other workers to drop every cached permission."""
+        self._publish({'all': True})
+
+    def _publish(self, message: Dict[str, Any]):
+        if not self.redis_client:
+            return
+        try:
+            self.redis_client.publish(self.channel, json.dumps({'origin': self.origin, **message}))
+            self.stats.published += 1
+        except Exception as e:
+            # Other workers fall back to their L1 TTL
+            self.stats.errors += 1
+            logger.warning(f"Failed to publish permission invalidation: {e}")
+
+    def _listen(self):
+        delay = self.reconnect_delay
+        while not self._stop.is_set():
+            pubsub = None
+            try:
+                pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Anything published before the subscription took effect is lost
+                self._on_reconnect()
+                self.stats.reconnects += 1
+                delay = self.reconnect_delay
+
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self._dispatch(message)
+
+            except Exception as e:
+                self.stats.errors += 1
+                logger.warning(f"Permission invalidation bus disconnected, retrying in {delay}s: {e}")
+                self._stop.wait(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+    def _dispatch(self, raw_message: Dict[str, Any]):
+        """Apply one pub/sub message unless this process published it."""
+        if raw_message.get('type') != 'message':
+            return
+        self.stats.received += 1
+        try:
+            message = json.loads(raw_message['data'])
+            if message.get('origin') == self.origin:
+                return
+            self._handler(message)
+            self.stats.applied += 1
+        except Exception as e:
+            self.stats.errors += 1
+            logger.error(f"Failed to apply permission invalidation {raw_message.get('data')!r}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get bus statistics."""
+        return {
+            'running': self.running,
+            'channel': self.channel,
+            'origin': self.origin,
+            'published': self.stats.published,
+            'received': self.stats.received,
+            'applied': self.stats.applied,
+            'reconnects': self.stats.reconnects,
+            'errors': self.stats.errors
+        }
+
+
+def create_bus_redis_client(app):
+    """Redis client for the bus, on the same REDIS_URL as the Socket.IO message queue."""
+    if not REDIS_AVAILABLE:
+        return None
+    redis_url = app.config.get('REDIS_URL') or os.getenv('REDIS_URL', 'redis://redis:6379/0')
+    return redis.Redis.from_url(redis_url, decode_responses=True, socket_connect_timeout=5, health_check_interval=30)
+
+
+# Create a lazy-initialized global instance
+_permission_invalidation_bus_instance = None
+_permission_invalidation_bus_lock = threading.Lock()
+
+def get_permission_invalidation_bus() -> PermissionInvalidationBus:
+    """Get the global permission invalidation bus instance (lazy initialization)."""
+    global _permission_invalidation_bus_instance
+
+    if _permission_invalidation_bus_instance is None:
+        with _permission_invalidation_bus_lock:
+            if _permission_invalidation_bus_instance is None:
+                _permission_invalidation_bus_instance = PermissionInvalidationBus()
+
+    return _permission_invalidation_bus_instance
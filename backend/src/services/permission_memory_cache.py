@@ -0,0 +1,162 @@
+"""
+Permission Memory Cache
+
+L1 cache for PermissionService: a bounded LRU with a per-entry TTL and a
+secondary index from user id to that user's keys.
+
+- get/set/delete are O(1); the least recently used entry is evicted once
+  max_size is reached
+- Every entry gets the same TTL, so entries expire in the order they were
+  written; each operation drops the expired entries at the head of that
+  order, keeping expiry amortized O(1) without a sweeper thread
+- invalidate_user removes one user's keys through the index instead of
+  scanning the whole cache
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Hashable, Optional, Set
+
+# Permission cache keys are "perm:<user_id>:..."
+_USER_KEY_PATTERN = re.compile(r'^perm:(\d+):')
+
+
+@dataclass
+class PermissionMemoryCacheStats:
+    """Permission memory cache statistics."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    last_reset: datetime = field(default_factory=datetime.utcnow)
+
+    @property
+    def total_requests(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        """Calculate cache hit rate."""
+        if self.total_requests == 0:
+            return 0.0
+        return (self.hits / self.total_requests) * 100
+
+
+class PermissionMemoryCache:
+    """Thread-safe LRU/TTL cache with a user id index."""
+
+    def __init__(self, max_size: int = 1000, ttl_seconds: int = 300):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self.stats = PermissionMemoryCacheStats()
+        # key -> (expires_at, value), in LRU order
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        # key -> None, in write order (== expiry order, since the TTL is uniform)
+        self._write_order: 'OrderedDict[Hashable, None]' = OrderedDict()
+        self._keys_by_user: Dict[int, Set[Hashable]] = {}
+
+    @staticmethod
+    def user_id_for(key: Hashable) -> Optional[int]:
+        """User id a key belongs to, or None for keys that are not per-user."""
+        match = _USER_KEY_PATTERN.match(key) if isinstance(key, str) else None
+        return int(match.group(1)) if match else None
+
+    def _remove(self, key: Hashable):
+        """Drop a key from every structure. Caller holds the lock."""
+        self._entries.pop(key, None)
+        self._write_order.pop(key, None)
+        user_id = self.user_id_for(key)
+        if user_id is not None:
+            keys = self._keys_by_user.get(user_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_user[user_id]
+
+    def _expire(self, now: float):
+        """Drop expired entries from the head of the write order. Caller holds the lock."""
+        while self._write_order:
+            key = next(iter(self._write_order))
+            if self._entries[key][0] > now:
+                break
+            self._remove(key)
+            self.stats.expirations += 1
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a cached value, or None on a miss."""
+        with self.lock:
+            self._expire(time.monotonic())
+
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry if full."""
+        with self.lock:
+            now = time.monotonic()
+            self._expire(now)
+
+            self._entries[key] = (now + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            self._write_order[key] = None
+            self._write_order.move_to_end(key)
+
+            user_id = self.user_id_for(key)
+            if user_id is not None:
+                self._keys_by_user.setdefault(user_id, set()).add(key)
+
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.stats.evictions += 1
+
+    def delete(self, key: Hashable):
+        """Remove one key."""
+        with self.lock:
+            self._remove(key)
+
+    def invalidate_user(self, user_id: int) -> int:
+        """Remove every key belonging to a user; returns the number removed."""
+        with self.lock:
+            keys = self._keys_by_user.pop(user_id, set())
+            for key in keys:
+                self._entries.pop(key, None)
+                self._write_order.pop(key, None)
+            return len(keys)
+
+    def clear(self):
+        """Remove all entries."""
+        with self.lock:
+            self._entries.clear()
+            self._write_order.clear()
+            self._keys_by_user.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache performance statistics."""
+        with self.lock:
+            return {
+                'entries': len(self._entries),
+                'max_size': self.max_size,
+                'usage_percent': round((len(self._entries) / self.max_size) * 100, 2),
+                'ttl_seconds': self.ttl_seconds,
+                'users_indexed': len(self._keys_by_user),
+                'hits': self.stats.hits,
+                'misses': self.stats.misses,
+                'evictions': self.stats.evictions,
+                'expirations': self.stats.expirations,
+                'hit_rate_percent': round(self.stats.hit_rate, 2),
+                'last_reset': self.stats.last_reset.isoformat()
+            }
@@ -0,0 +1,267 @@
+"""
+Permission Metrics Storage
+
+Low-overhead storage behind PermissionPerformanceMonitor. Recording a
+permission check must cost next to nothing because it happens on every
+check, so all aggregation is deferred to read time.
+
+- MetricsRingBuffer keeps the most recent checks as fixed-width numeric
+  records in parallel arrays; slots are claimed with itertools.count, whose
+  next() is atomic, so writers never take a lock
+- LatencyHistogram is a DDSketch-style log-bucketed histogram (2% relative
+  accuracy) for p50/p95/p99 over any number of samples in fixed memory
+- HourlyWindows keeps one histogram plus counters per hour for the last
+  7 days, for day-long stats and trends beyond the ring buffer's reach
+- Strings (permission names, resource types, sources) are interned to small
+  ints; only a name's first sighting takes a lock
+"""
+
+import itertools
+import math
+import threading
+import time
+from array import array
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+# Latency histogram buckets: relative accuracy 2% from 1 microsecond to 100 seconds
+_RELATIVE_ACCURACY = 0.02
+_GAMMA = (1 + _RELATIVE_ACCURACY) / (1 - _RELATIVE_ACCURACY)
+_INV_LOG_GAMMA = 1 / math.log(_GAMMA)
+_BUCKET_COUNT = int(math.ceil(math.log(100_000_000) * _INV_LOG_GAMMA)) + 1
+
+_RESULT_FLAG = 1
+_CACHE_HIT_FLAG = 2
+
+
+class NameTable:
+    """Interns strings to small ints for array storage."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._ids: Dict[Optional[str], int] = {None: 0}
+        self._names: List[Optional[str]] = [None]
+
+    def intern(self, name: Optional[str]) -> int:
+        name_id = self._ids.get(name)
+        if name_id is None:
+            with self.lock:
+                name_id = self._ids.get(name)
+                if name_id is None:
+                    name_id = len(self._names)
+                    self._names.append(name)
+                    self._ids[name] = name_id
+        return name_id
+
+    def lookup(self, name: Optional[str]) -> Optional[int]:
+        """Id of an already interned name, or None if never seen."""
+        return self._ids.get(name)
+
+    def name(self, name_id: int) -> Optional[str]:
+        return self._names[name_id]
+
+
+class MetricRecord(NamedTuple):
+    """One recorded permission check, as read back from the ring buffer."""
+    timestamp: float
+    user_id: int
+    permission: str
+    resource_type: Optional[str]
+    resource_id: Optional[str]
+    result: bool
+    response_time_ms: float
+    cache_hit: bool
+    source: Optional[str]
+
+
+class MetricsRingBuffer:
+    """Fixed-capacity ring of permission check records in parallel arrays."""
+
+    def __init__(self, capacity: int = 10000):
+        self.capacity = capacity
+        self.names = NameTable()
+        self._slots = itertools.count()
+        self._timestamps = array('d', bytes(8 * capacity))
+        self._response_ms = array('d', bytes(8 * capacity))
+        self._user_ids = array('q', bytes(8 * capacity))
+        self._permission_ids = array('i', bytes(4 * capacity))
+        self._resource_type_ids = array('i', bytes(4 * capacity))
+        self._source_ids = array('i', bytes(4 * capacity))
+        self._flags = array('B', bytes(capacity))
+        # Resource ids are free-form and usually None, so they stay Python objects
+        self._resource_ids: List[Optional[str]] = [None] * capacity
+
+    def append(self, timestamp: float, user_id: int, permission: str, resource_type: Optional[str],
+               resource_id: Optional[str], result: bool, response_time_ms: float, cache_hit: bool,
+               source: Optional[str]):
+        i = next(self._slots) % self.capacity
+        # A zero timestamp marks the slot as being written; readers skip it
+        self._timestamps[i] = 0.0
+        self._response_ms[i] = response_time_ms
+        self._user_ids[i] = user_id
+        self._permission_ids[i] = self.names.intern(permission)
+        self._resource_type_ids[i] = self.names.intern(resource_type)
+        self._source_ids[i] = self.names.intern(source)
+        self._flags[i] = (_RESULT_FLAG if result else 0) | (_CACHE_HIT_FLAG if cache_hit else 0)
+        self._resource_ids[i] = resource_id
+        self._timestamps[i] = timestamp
+
+    def records(self, since: Optional[float] = None, until: Optional[float] = None,
+                user_id: Optional[int] = None, permission: Optional[str] = None) -> List[MetricRecord]:
+        """Matching records, oldest first."""
+        permission_id = None
+        if permission is not None:
+            permission_id = self.names.lookup(permission)
+            if permission_id is None:
+                return []
+
+        timestamps = self._timestamps
+        indexes = [
+            i for i in range(self.capacity)
+            if timestamps[i] > 0.0
+            and (since is None or timestamps[i] > since)
+            and (until is None or timestamps[i] < until)
+            and (user_id is None or self._user_ids[i] == user_id)
+            and (permission_id is None or self._permission_ids[i] == permission_id)
+        ]
+        indexes.sort(key=timestamps.__getitem__)
+
+        name = self.names.name
+        return [
+            MetricRecord(
+                timestamp=timestamps[i],
+                user_id=self._user_ids[i],
+                permission=name(self._permission_ids[i]),
+                resource_type=name(self._resource_type_ids[i]),
+                resource_id=self._resource_ids[i],
+                result=bool(self._flags[i] & _RESULT_FLAG),
+                response_time_ms=self._response_ms[i],
+                cache_hit=bool(self._flags[i] & _CACHE_HIT_FLAG),
+                source=name(self._source_ids[i])
+            )
+            for i in indexes
+        ]
+
+
+def _bucket_index(response_time_ms: float) -> int:
+    microseconds = response_time_ms * 1000
+    if microseconds <= 1.0:
+        return 0
+    return min(int(math.ceil(math.log(microseconds) * _INV_LOG_GAMMA)), _BUCKET_COUNT - 1)
+
+
+def _bucket_value_ms(index: int) -> float:
+    if index == 0:
+        return 0.001
+    return 2 * _GAMMA ** index / (_GAMMA + 1) / 1000
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram with bounded relative error on quantiles."""
+
+    def __init__(self):
+        self.counts = array('Q', bytes(8 * _BUCKET_COUNT))
+
+    def add(self, response_time_ms: float):
+        self.counts[_bucket_index(response_time_ms)] += 1
+
+    def merge(self, other: 'LatencyHistogram'):
+        counts = self.counts
+        for i, count in enumerate(other.counts):
+            if count:
+                counts[i] += count
+
+    def quantile(self, q: float) -> float:
+        """Approximate q-quantile in milliseconds (0.0 when empty)."""
+        total = sum(self.counts)
+        if total == 0:
+            return 0.0
+        rank = q * (total - 1)
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen > rank:
+                return _bucket_value_ms(i)
+        return _bucket_value_ms(_BUCKET_COUNT - 1)
+
+
+# HourWindow.totals layout
+TOTAL_CHECKS, SUCCESSFUL, CACHE_HITS, SUM_MS, MIN_MS, MAX_MS, FIRST_TS, LAST_TS = range(8)
+
+
+class HourWindow:
+    """Counters and a latency histogram for one hour."""
+
+    def __init__(self, hour: int):
+        self.hour = hour
+        self.histogram = LatencyHistogram()
+        self.totals = array('d', [0.0, 0.0, 0.0, 0.0, math.inf, 0.0, math.inf, 0.0])
+
+    @property
+    def start(self) -> float:
+        return self.hour * 3600.0
+
+    def add(self, timestamp: float, result: bool, response_time_ms: float, cache_hit: bool):
+        totals = self.totals
+        totals[TOTAL_CHECKS] += 1
+        if result:
+            totals[SUCCESSFUL] += 1
+        if cache_hit:
+            totals[CACHE_HITS] += 1
+        totals[SUM_MS] += response_time_ms
+        if response_time_ms < totals[MIN_MS]:
+            totals[MIN_MS] = response_time_ms
+        if response_time_ms > totals[MAX_MS]:
+            totals[MAX_MS] = response_time_ms
+        if timestamp < totals[FIRST_TS]:
+            totals[FIRST_TS] = timestamp
+        if timestamp > totals[LAST_TS]:
+            totals[LAST_TS] = timestamp
+        self.histogram.add(response_time_ms)
+
+    def merge(self, other: 'HourWindow'):
+        totals, others = self.totals, other.totals
+        for i in (TOTAL_CHECKS, SUCCESSFUL, CACHE_HITS, SUM_MS):
+            totals[i] += others[i]
+        for i in (MIN_MS, FIRST_TS):
+            totals[i] = min(totals[i], others[i])
+        for i in (MAX_MS, LAST_TS):
+            totals[i] = max(totals[i], others[i])
+        self.histogram.merge(other.histogram)
+
+
+class HourlyWindows:
+    """Ring of per-hour windows covering the last `hours` hours."""
+
+    def __init__(self, hours: int = 24 * 7):
+        self.hours = hours
+        self._windows: List[Optional[HourWindow]] = [None] * hours
+
+    def add(self, timestamp: float, result: bool, response_time_ms: float, cache_hit: bool):
+        hour = int(timestamp // 3600)
+        slot = hour % self.hours
+        window = self._windows[slot]
+        if window is not None and window.hour > hour:
+            # Older than the retention period
+            return
+        if window is None or window.hour != hour:
+            # Replaced, not cleared: a writer still holding the old window cannot corrupt the new one
+            window = self._windows[slot] = HourWindow(hour)
+        window.add(timestamp, result, response_time_ms, cache_hit)
+
+    def windows(self, since: float, until: Optional[float] = None) -> Iterator[HourWindow]:
+        """Non-empty windows overlapping [since, until), oldest first."""
+        until = time.time() if until is None else until
+        first_hour, last_hour = int(since // 3600), int(until // 3600)
+        for hour in range(max(first_hour, last_hour - self.hours + 1), last_hour + 1):
+            window = self._windows[hour % self.hours]
+            if window is not None and window.hour == hour:
+                yield window
+
+    def merged(self, since: float, until: Optional[float] = None) -> Optional[HourWindow]:
+        """All windows in the range folded into one, or None if there were no checks."""
+        merged = None
+        for window in self.windows(since, until):
+            if merged is None:
+                merged = HourWindow(window.hour)
+            merged.merge(window)
+        return merged
@@ -10,15 +10,19 @@ import time
 import json
 import logging
 from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass, field
-from datetime import datetime, timedelta
-from collections import defaultdict, deque
+from datetime import datetime
+from collections import defaultdict
 from functools import wraps
 import statistics
 import threading
 import csv
 import io
 
+from .permission_metrics import (
+    CACHE_HITS, FIRST_TS, LAST_TS, MAX_MS, MIN_MS, SUCCESSFUL, SUM_MS, TOTAL_CHECKS,
+    HourlyWindows, HourWindow, MetricRecord, MetricsRingBuffer
+)
+
 try:
     from flask import current_app
     FLASK_AVAILABLE = True
@@ -27,36 +31,6 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
-@dataclass
-class PermissionMetric:
-    """Individual permission check metric."""
-    user_id: int
-    permission: str
-    resource_type: Optional[str]
-    resource_id: Optional[str]
-    result: bool
-    response_time_ms: float
-    cache_hit: bool
-    timestamp: datetime
-    source: str = "unknown"  # API, background, etc.
-
-@dataclass
-class PerformanceStats:
-    """Aggregated performance statistics."""
-    total_checks: int = 0
-    successful_checks: int = 0
-    failed_checks: int = 0
-    cache_hits: int = 0
-    cache_misses: int = 0
-    average_response_time_ms: float = 0.0
-    min_response_time_ms: float = float('inf')
-    max_response_time_ms: float = 0.0
-    p95_response_time_ms: float = 0.0
-    p99_response_time_ms: float = 0.0
-    checks_per_second: float = 0.0
-    error_rate_percent: float = 0.0
-    cache_hit_rate_percent: float = 0.0
-
 class PermissionPerformanceMonitor:
     """
     Performance monitoring for permission checking system.
@@ -67,11 +41,17 @@ class PermissionPerformanceMonitor:
     - Performance alerting
     - Trend analysis
     - User-specific performance tracking
+    
+    Recording appends one fixed-width record to a lock-free ring buffer and
+    one sample to the current hour's histogram; every statistic is
+    aggregated when it is read.
     """
     
-    def __init__(self):
+    def __init__(self, capacity: int = 10000):
         """Initialize the performance monitor."""
-        self.metrics: deque = deque(maxlen=10000)  # Keep last 10k metrics
+        self.capacity = capacity
+        self.metrics = MetricsRingBuffer(capacity)  # Keep last 10k metrics
+        self.hourly_windows = HourlyWindows()  # Histograms for the last 7 days
         self.lock = threading.Lock()
         
         # Initialize settings with defaults
@@ -85,16 +65,6 @@ class PermissionPerformanceMonitor:
         # Performance tracking
         self.start_time = datetime.utcnow()
         self.last_reset = datetime.utcnow()
-        
-        # Statistics cache
-        self._stats_cache = {}
-        self._stats_cache_expiry = datetime.utcnow()
-        self._stats_cache_ttl = 60  # 1 minute cache
-        
-        self.user_metrics = defaultdict(lambda: deque(maxlen=100))
-        self.permission_metrics = defaultdict(lambda: deque(maxlen=100))
-        self.hourly_stats = defaultdict(lambda: PerformanceStats())
-        self.daily_stats = defaultdict(lambda: PerformanceStats())
     
     def _get_flask_config(self, key: str, default: Any = None) -> Any:
         """Safely get Flask configuration value."""
@@ -115,108 +85,27 @@ class PermissionPerformanceMonitor:
                               resource_id: Optional[str] = None,
                               result: bool = True, response_time_ms: float = 0.0,
                               cache_hit: bool = False, source: str = "api") -> None:
-        """Record a permission check metric."""
+        """Record a permission check metric (hot path: no locks, no allocation beyond interning)."""
         if not self.enabled:
             return
         
         try:
-            with self.lock:
-                metric = PermissionMetric(
-                    user_id=user_id,
-                    permission=permission,
-                    resource_type=resource_type,
-                    resource_id=resource_id,
-                    result=result,
-                    response_time_ms=response_time_ms,
-                    cache_hit=cache_hit,
-                    timestamp=datetime.now(),
-                    source=source
-                )
-                
-                # Store in main metrics
-                self.metrics.append(metric)
-                
-                # Store in user-specific metrics
-                self.user_metrics[user_id].append(metric)
-                
-                # Store in permission-specific metrics
-                self.permission_metrics[permission].append(metric)
-                
-                # Update aggregated stats
-                self._update_aggregated_stats(metric)
-                
-                # Check for performance alerts
-                self._check_performance_alerts(metric)
+            timestamp = time.time()
+            self.metrics.append(timestamp, user_id or 0, permission, resource_type, resource_id,
+                                result, response_time_ms, cache_hit, source)
+            self.hourly_windows.add(timestamp, result, response_time_ms, cache_hit)
+            
+            # Check for performance alerts
+            if response_time_ms > self.alert_thresholds['max_response_time_ms']:
+                self._process_alert({
+                    'type': 'high_response_time',
+                    'message': f"High response time: {response_time_ms:.2f}ms for user {user_id}, permission {permission}",
+                    'severity': 'warning'
+                })
                 
         except Exception as e:
             logger.error(f"Error recording permission check metric: {e}")
     
-    def _update_aggregated_stats(self, metric: PermissionMetric):
-        """Update hourly and daily aggregated statistics."""
-        now = datetime.now()
-        hour_key = now.strftime('%Y-%m-%d %H:00')
-        day_key = now.strftime('%Y-%m-%d')
-        
-        # Update hourly stats
-        hourly_stat = self.hourly_stats[hour_key]
-        self._update_stat(hourly_stat, metric)
-        
-        # Update daily stats
-        daily_stat = self.daily_stats[day_key]
-        self._update_stat(daily_stat, metric)
-    
-    def _update_stat(self, stat: PerformanceStats, metric: PermissionMetric):
-        """Update a single performance stat with new metric."""
-        stat.total_checks += 1
-        
-        if metric.result:
-            stat.successful_checks += 1
-        else:
-            stat.failed_checks += 1
-        
-        if metric.cache_hit:
-            stat.cache_hits += 1
-        else:
-            stat.cache_misses += 1
-        
-        # Update response time stats
-        if stat.total_checks == 1:
-            stat.average_response_time_ms = metric.response_time_ms
-            stat.min_response_time_ms = metric.response_time_ms
-            stat.max_response_time_ms = metric.response_time_ms
-        else:
-            # Update average using exponential moving average
-            alpha = 0.1
-            stat.average_response_time_ms = (
-                alpha * metric.response_time_ms + 
-                (1 - alpha) * stat.average_response_time_ms
-            )
-            
-            stat.min_response_time_ms = min(stat.min_response_time_ms, metric.response_time_ms)
-            stat.max_response_time_ms = max(stat.max_response_time_ms, metric.response_time_ms)
-        
-        # Calculate rates
-        if stat.total_checks > 0:
-            stat.error_rate_percent = (stat.failed_checks / stat.total_checks) * 100
-            stat.cache_hit_rate_percent = (stat.cache_hits / stat.total_checks) * 100
-    
-    def _check_performance_alerts(self, metric: PermissionMetric):
-        """Check if metric triggers any performance alerts."""
-        alerts = []
-        
-        # High response time alert
-        if metric.response_time_ms > self.alert_thresholds['max_response_time_ms']:
-            alerts.append({
-                'type': 'high_response_time',
-                'message': f"High response time: {metric.response_time_ms:.2f}ms for user {metric.user_id}, permission {metric.permission}",
-                'severity': 'warning',
-                'metric': metric
-            })
-        
-        # Process alerts
-        for alert in alerts:
-            self._process_alert(alert)
-    
     def _process_alert(self, alert: Dict[str, Any]):
         """Process a performance alert."""
         logger.warning(f"Performance Alert: {alert['message']}")
@@ -227,29 +116,34 @@ class PermissionPerformanceMonitor:
         # - Trigger automated responses
         # - Update monitoring dashboards
     
+    def _records_for(self, timeframe: str) -> List[MetricRecord]:
+        """Raw records in the ring buffer for a timeframe."""
+        if timeframe == "last_hour":
+            return self.metrics.records(since=time.time() - 3600)
+        elif timeframe == "last_day":
+            return self.metrics.records(since=time.time() - 86400)
+        return self.metrics.records()
+    
     def get_current_stats(self, timeframe: str = "last_hour") -> Dict[str, Any]:
-        """Get current performance statistics."""
+        """
+        Get current performance statistics.
+        
+        The last hour is computed exactly from the ring buffer; longer
+        timeframes merge the hourly histograms so they are not limited to
+        the most recent 10k checks.
+        """
         try:
-            with self.lock:
-                if timeframe == "last_hour":
-                    metrics = [m for m in self.metrics 
-                             if m.timestamp > datetime.now() - timedelta(hours=1)]
-                elif timeframe == "last_day":
-                    metrics = [m for m in self.metrics 
-                             if m.timestamp > datetime.now() - timedelta(days=1)]
-                else:
-                    metrics = list(self.metrics)
-                
-                if not metrics:
-                    return self._empty_stats()
-                
-                return self._calculate_stats(metrics)
+            if timeframe == "last_hour":
+                return self._calculate_stats(self._records_for(timeframe))
+            
+            since = time.time() - 86400 if timeframe == "last_day" else 0.0
+            return self._window_stats(self.hourly_windows.merged(since))
                 
         except Exception as e:
             logger.error(f"Error getting current stats: {e}")
             return self._empty_stats()
     
-    def _calculate_stats(self, metrics: List[PermissionMetric]) -> Dict[str, Any]:
+    def _calculate_stats(self, metrics: List[MetricRecord]) -> Dict[str, Any]:
         """Calculate statistics for a list of metrics."""
         if not metrics:
             return self._empty_stats()
@@ -268,7 +162,7 @@ class PermissionPerformanceMonitor:
         p99_index = int(0.99 * len(sorted_times))
         
         # Calculate time-based metrics
-        time_span = (metrics[-1].timestamp - metrics[0].timestamp).total_seconds()
+        time_span = metrics[-1].timestamp - metrics[0].timestamp
         checks_per_second = total_checks / time_span if time_span > 0 else 0
         
         return {
@@ -288,8 +182,40 @@ class PermissionPerformanceMonitor:
             'p99_response_time_ms': sorted_times[p99_index] if p99_index < len(sorted_times) else 0,
             'checks_per_second': checks_per_second,
             'time_span_seconds': time_span,
-            'start_time': metrics[0].timestamp.isoformat(),
-            'end_time': metrics[-1].timestamp.isoformat()
+            'start_time': datetime.fromtimestamp(metrics[0].timestamp).isoformat(),
+            'end_time': datetime.fromtimestamp(metrics[-1].timestamp).isoformat()
+        }
+    
+    def _window_stats(self, window: Optional[HourWindow]) -> Dict[str, Any]:
+        """Statistics for merged hourly windows; percentiles come from the histogram."""
+        if window is None or not window.totals[TOTAL_CHECKS]:
+            return self._empty_stats()
+        
+        totals = window.totals
+        total_checks = int(totals[TOTAL_CHECKS])
+        successful_checks = int(totals[SUCCESSFUL])
+        cache_hits = int(totals[CACHE_HITS])
+        time_span = totals[LAST_TS] - totals[FIRST_TS]
+        
+        return {
+            'total_checks': total_checks,
+            'successful_checks': successful_checks,
+            'failed_checks': total_checks - successful_checks,
+            'cache_hits': cache_hits,
+            'cache_misses': total_checks - cache_hits,
+            'success_rate_percent': (successful_checks / total_checks) * 100,
+            'error_rate_percent': ((total_checks - successful_checks) / total_checks) * 100,
+            'cache_hit_rate_percent': (cache_hits / total_checks) * 100,
+            'average_response_time_ms': totals[SUM_MS] / total_checks,
+            'median_response_time_ms': window.histogram.quantile(0.5),
+            'min_response_time_ms': totals[MIN_MS],
+            'max_response_time_ms': totals[MAX_MS],
+            'p95_response_time_ms': window.histogram.quantile(0.95),
+            'p99_response_time_ms': window.histogram.quantile(0.99),
+            'checks_per_second': total_checks / time_span if time_span > 0 else 0,
+            'time_span_seconds': time_span,
+            'start_time': datetime.fromtimestamp(totals[FIRST_TS]).isoformat(),
+            'end_time': datetime.fromtimestamp(totals[LAST_TS]).isoformat()
         }
     
     def _empty_stats(self) -> Dict[str, Any]:
@@ -316,19 +242,18 @@ class PermissionPerformanceMonitor:
     def get_user_stats(self, user_id: int) -> Dict[str, Any]:
         """Get performance statistics for a specific user."""
         try:
-            with self.lock:
-                user_metrics = list(self.user_metrics.get(user_id, []))
-                if not user_metrics:
-                    return self._empty_stats()
-                
-                stats = self._calculate_stats(user_metrics)
-                stats['user_id'] = user_id
-                
-                # Add user-specific insights
-                stats['most_checked_permissions'] = self._get_top_permissions(user_metrics)
-                stats['resource_type_breakdown'] = self._get_resource_breakdown(user_metrics)
-                
-                return stats
+            user_metrics = self.metrics.records(user_id=user_id)
+            if not user_metrics:
+                return self._empty_stats()
+            
+            stats = self._calculate_stats(user_metrics)
+            stats['user_id'] = user_id
+            
+            # Add user-specific insights
+            stats['most_checked_permissions'] = self._get_top_permissions(user_metrics)
+            stats['resource_type_breakdown'] = self._get_resource_breakdown(user_metrics)
+            
+            return stats
                 
         except Exception as e:
             logger.error(f"Error getting user stats for {user_id}: {e}")
@@ -337,25 +262,24 @@ class PermissionPerformanceMonitor:
     def get_permission_stats(self, permission: str) -> Dict[str, Any]:
         """Get performance statistics for a specific permission."""
         try:
-            with self.lock:
-                perm_metrics = list(self.permission_metrics.get(permission, []))
-                if not perm_metrics:
-                    return self._empty_stats()
-                
-                stats = self._calculate_stats(perm_metrics)
-                stats['permission'] = permission
-                
-                # Add permission-specific insights
-                stats['user_count'] = len(set(m.user_id for m in perm_metrics))
-                stats['resource_type_breakdown'] = self._get_resource_breakdown(perm_metrics)
-                
-                return stats
+            perm_metrics = self.metrics.records(permission=permission)
+            if not perm_metrics:
+                return self._empty_stats()
+            
+            stats = self._calculate_stats(perm_metrics)
+            stats['permission'] = permission
+            
+            # Add permission-specific insights
+            stats['user_count'] = len(set(m.user_id for m in perm_metrics))
+            stats['resource_type_breakdown'] = self._get_resource_breakdown(perm_metrics)
+            
+            return stats
                 
         except Exception as e:
             logger.error(f"Error getting permission stats for {permission}: {e}")
             return self._empty_stats()
     
-    def _get_top_permissions(self, metrics: List[PermissionMetric], limit: int = 5) -> List[Dict[str, Any]]:
+    def _get_top_permissions(self, metrics: List[MetricRecord], limit: int = 5) -> List[Dict[str, Any]]:
         """Get most frequently checked permissions."""
         permission_counts = defaultdict(int)
         for metric in metrics:
@@ -368,7 +292,7 @@ class PermissionPerformanceMonitor:
             for perm, count in sorted_permissions[:limit]
         ]
     
-    def _get_resource_breakdown(self, metrics: List[PermissionMetric]) -> Dict[str, int]:
+    def _get_resource_breakdown(self, metrics: List[MetricRecord]) -> Dict[str, int]:
         """Get breakdown of checks by resource type."""
         resource_counts = defaultdict(int)
         for metric in metrics:
@@ -378,45 +302,35 @@ class PermissionPerformanceMonitor:
         return dict(resource_counts)
     
     def get_performance_trends(self, timeframe: str = "last_24_hours") -> Dict[str, Any]:
-        """Get performance trends over time."""
+        """Get performance trends over time, merged from the hourly windows."""
         try:
-            with self.lock:
-                now = datetime.now()
-                
-                if timeframe == "last_24_hours":
-                    start_time = now - timedelta(hours=24)
-                    interval = timedelta(hours=1)
-                elif timeframe == "last_7_days":
-                    start_time = now - timedelta(days=7)
-                    interval = timedelta(days=1)
-                else:
-                    start_time = now - timedelta(hours=24)
-                    interval = timedelta(hours=1)
-                
-                # Group metrics by time intervals
-                trends = []
-                current_time = start_time
-                
-                while current_time < now:
-                    interval_end = current_time + interval
-                    interval_metrics = [
-                        m for m in self.metrics
-                        if current_time <= m.timestamp < interval_end
-                    ]
-                    
-                    if interval_metrics:
-                        stats = self._calculate_stats(interval_metrics)
-                        stats['interval_start'] = current_time.isoformat()
-                        stats['interval_end'] = interval_end.isoformat()
-                        trends.append(stats)
-                    
-                    current_time = interval_end
-                
-                return {
-                    'timeframe': timeframe,
-                    'interval_count': len(trends),
-                    'trends': trends
-                }
+            hour = int(time.time() // 3600)
+            
+            if timeframe == "last_7_days":
+                hours_per_interval, interval_count = 24, 7
+            else:
+                hours_per_interval, interval_count = 1, 24
+            
+            # Intervals are whole hours ending with the current one, so each hourly
+            # window lands in exactly one interval
+            trends = []
+            for index in range(interval_count):
+                last_hour = hour - (interval_count - index - 1) * hours_per_interval
+                first_hour = last_hour - hours_per_interval + 1
+                window = self.hourly_windows.merged(first_hour * 3600, last_hour * 3600)
+                if window is None:
+                    continue
+                
+                stats = self._window_stats(window)
+                stats['interval_start'] = datetime.fromtimestamp(first_hour * 3600).isoformat()
+                stats['interval_end'] = datetime.fromtimestamp((last_hour + 1) * 3600).isoformat()
+                trends.append(stats)
+            
+            return {
+                'timeframe': timeframe,
+                'interval_count': len(trends),
+                'trends': trends
+            }
                 
         except Exception as e:
             logger.error(f"Error getting performance trends: {e}")
@@ -425,28 +339,27 @@ class PermissionPerformanceMonitor:
     def get_slow_queries(self, threshold_ms: float = 500, limit: int = 10) -> List[Dict[str, Any]]:
         """Get slowest permission checks."""
         try:
-            with self.lock:
-                slow_metrics = [
-                    m for m in self.metrics
-                    if m.response_time_ms > threshold_ms
-                ]
-                
-                # Sort by response time (slowest first)
-                slow_metrics.sort(key=lambda x: x.response_time_ms, reverse=True)
-                
-                return [
-                    {
-                        'user_id': m.user_id,
-                        'permission': m.permission,
-                        'resource_type': m.resource_type,
-                        'resource_id': m.resource_id,
-                        'response_time_ms': m.response_time_ms,
-                        'cache_hit': m.cache_hit,
-                        'timestamp': m.timestamp.isoformat(),
-                        'source': m.source
-                    }
-                    for m in slow_metrics[:limit]
-                ]
+            slow_metrics = [
+                m for m in self.metrics.records()
+                if m.response_time_ms > threshold_ms
+            ]
+            
+            # Sort by response time (slowest first)
+            slow_metrics.sort(key=lambda x: x.response_time_ms, reverse=True)
+            
+            return [
+                {
+                    'user_id': m.user_id,
+                    'permission': m.permission,
+                    'resource_type': m.resource_type,
+                    'resource_id': m.resource_id,
+                    'response_time_ms': m.response_time_ms,
+                    'cache_hit': m.cache_hit,
+                    'timestamp': datetime.fromtimestamp(m.timestamp).isoformat(),
+                    'source': m.source
+                }
+                for m in slow_metrics[:limit]
+            ]
                 
         except Exception as e:
             logger.error(f"Error getting slow queries: {e}")
@@ -456,11 +369,10 @@ class PermissionPerformanceMonitor:
         """Reset all collected metrics."""
         try:
             with self.lock:
-                self.metrics.clear()
-                self.user_metrics.clear()
-                self.permission_metrics.clear()
-                self.hourly_stats.clear()
-                self.daily_stats.clear()
+                # Swapped, not cleared, so concurrent recorders never need the lock
+                self.metrics = MetricsRingBuffer(self.capacity)
+                self.hourly_windows = HourlyWindows()
+                self.last_reset = datetime.utcnow()
                 logger.info("Performance metrics reset")
                 
         except Exception as e:
@@ -469,30 +381,20 @@ class PermissionPerformanceMonitor:
     def export_metrics(self, timeframe: str = "last_hour") -> List[Dict[str, Any]]:
         """Export metrics for external analysis."""
         try:
-            with self.lock:
-                if timeframe == "last_hour":
-                    metrics = [m for m in self.metrics 
-                             if m.timestamp > datetime.now() - timedelta(hours=1)]
-                elif timeframe == "last_day":
-                    metrics = [m for m in self.metrics 
-                             if m.timestamp > datetime.now() - timedelta(days=1)]
-                else:
-                    metrics = list(self.metrics)
-                
-                return [
-                    {
-                        'user_id': m.user_id,
-                        'permission': m.permission,
-                        'resource_type': m.resource_type,
-                        'resource_id': m.resource_id,
-                        'result': m.result,
-                        'response_time_ms': m.response_time_ms,
-                        'cache_hit': m.cache_hit,
-                        'timestamp': m.timestamp.isoformat(),
-                        'source': m.source
-                    }
-                    for m in metrics
-                ]
+            return [
+                {
+                    'user_id': m.user_id,
+                    'permission': m.permission,
+                    'resource_type': m.resource_type,
+                    'resource_id': m.resource_id,
+                    'result': m.result,
+                    'response_time_ms': m.response_time_ms,
+                    'cache_hit': m.cache_hit,
+                    'timestamp': datetime.fromtimestamp(m.timestamp).isoformat(),
+                    'source': m.source
+                }
+                for m in self._records_for(timeframe)
+            ]
                 
         except Exception as e:
             logger.error(f"Error exporting metrics: {e}")
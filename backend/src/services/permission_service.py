@@ -7,10 +7,13 @@ permission groups, and caching.
 
 import time
 import logging
-from datetime import datetime, timedelta
+import threading
+from datetime import datetime
 from typing import Dict, List, Optional, Tuple, Any, Set, Union
 from dataclasses import dataclass, field
 from enum import Enum
+from flask import current_app, g, has_app_context, has_request_context
+from sqlalchemy import select
 try:
     import redis
     REDIS_AVAILABLE = True
@@ -22,8 +25,14 @@ from ..models.user import User
 from ..models.role import Role
 from ..models.permission import Permission
 from ..models.permission_group import PermissionGroup, PermissionGroupMembership, RolePermissionGroup
-from ..models.user_permission import UserPermission
 from ..extensions import db
+from .permission_memory_cache import PermissionMemoryCache
+from .permission_invalidation_bus import create_bus_redis_client, get_permission_invalidation_bus
+from .single_flight import SingleFlight
+from .permission_claims import PermissionVersionStore, build_permission_claims, claims_bits
+from .permission_bitset import (
+    UserPermissionBits, affected_user_ids, compute_user_permission_bits, get_permission_registry
+)
 
 # Performance monitor imports - make optional too
 try:
@@ -76,10 +85,23 @@ class PermissionService:
     
     def __init__(self):
         """Initialize the Enhanced Permission Service."""
-        self.memory_cache = {}
-        self.cache_timestamps = {}
         self.memory_cache_size = 1000
         self.memory_cache_ttl = 300  # 5 minutes
+        self.memory_cache = PermissionMemoryCache(
+            max_size=self.memory_cache_size,
+            ttl_seconds=self.memory_cache_ttl
+        )
+        
+        self.permission_registry = get_permission_registry()
+        self.invalidation_bus = get_permission_invalidation_bus()
+        self.single_flight = SingleFlight()
+        self.permission_versions = PermissionVersionStore(self._get_version_redis_client)
+        
+        # Local invalidation counters; with the shared version stamps they tell whether
+        # bitsets computed before an invalidation may still be cached
+        self.generation_lock = threading.Lock()
+        self.global_generation = 0
+        self.user_generations: Dict[int, int] = {}
         
         # Initialize Redis cache if available
         self.redis_cache = None
@@ -152,6 +174,11 @@ class PermissionService:
         """
         Enhanced permission checking with resource context support and performance monitoring.
         
+        This is the single check path used by the v2 decorators, User.has_permission
+        and the legacy classmethod. Role/group grants are cached in L1 (memory) and
+        L2 (Redis); resource context checks depend on live resource state, so they are
+        evaluated against the database and only memoized for the current request.
+        
         Args:
             user_id: ID of the user to check
             permission: Permission name to check
@@ -160,49 +187,25 @@ class PermissionService:
         Returns:
             bool: True if user has permission, False otherwise
         """
+        request_memo = self._get_request_memo()
+        memo_key = (user_id, permission, self._resource_context_key(resource_context))
+        if request_memo is not None and memo_key in request_memo:
+            return request_memo[memo_key]
+        
         start_time = time.time()
         result = False
         cache_hit = False
         
         try:
-            # Step 1: Check cache layers
-            cache_key = self._generate_cache_key(user_id, permission, resource_context)
+            # Step 1: Role/group grant through the cache layers
+            result, cache_hit = self._get_cached_basic_permission(user_id, permission)
             
-            # L1 Cache: Memory
-            cached_result = self._get_from_memory_cache(cache_key)
-            if cached_result is not None:
-                logger.debug(f"Permission check cache hit (L1) for user {user_id}, permission {permission}")
-                result = cached_result
-                cache_hit = True
-            else:
-                # L2 Cache: Redis (only if available)
-                if REDIS_CACHE_AVAILABLE and get_redis_permission_cache:
-                    try:
-                        redis_cache = get_redis_permission_cache()
-                        cached_result = redis_cache.get(cache_key)
-                        if cached_result is not None:
-                            logger.debug(f"Permission check cache hit (L2) for user {user_id}, permission {permission}")
-                            result = cached_result
-                            cache_hit = True
-                            # Store in L1 cache
-                            self._store_in_memory_cache(cache_key, cached_result)
-                    except Exception as e:
-                        logger.warning(f"Redis cache error, falling back to database: {e}")
-                
-                # Step 2: Perform permission check if not cached
-                if not cache_hit:
-                    result = self._check_permission_with_context(user_id, permission, resource_context)
-                    
-                    # Step 3: Cache the result
-                    self._store_in_memory_cache(cache_key, result)
-                    if REDIS_CACHE_AVAILABLE and get_redis_permission_cache:
-                        try:
-                            redis_cache = get_redis_permission_cache()
-                            redis_cache.set(cache_key, result, ttl=1800)  # 30 minutes
-                        except Exception as e:
-                            logger.warning(f"Failed to store in Redis cache: {e}")
+            # Step 2: Apply resource context against the live resource
+            if result and resource_context:
+                user = self._get_user(user_id)
+                result = bool(user) and self._check_resource_context(user, permission, resource_context)
             
-            # Step 4: Record performance metrics (only if available)
+            # Step 3: Record performance metrics (only if available)
             if PERFORMANCE_MONITOR_AVAILABLE and get_permission_performance_monitor:
                 try:
                     monitor = get_permission_performance_monitor()
@@ -217,8 +220,6 @@ class PermissionService:
                 except Exception as e:
                     logger.warning(f"Failed to record performance metrics: {e}")
             
-            return result
-            
         except Exception as e:
             logger.error(f"Error checking permission {permission} for user {user_id}: {e}")
             
@@ -238,41 +239,369 @@ class PermissionService:
                     logger.warning(f"Failed to record error metrics: {e}")
             
             # Fallback to basic permission check
-            return self._basic_permission_check(user_id, permission)
+            result = self._basic_permission_check(user_id, permission)
+        
+        if request_memo is not None:
+            request_memo[memo_key] = result
+        return result
     
-    def _check_permission_with_context(self, user_id: int, permission: str,
-                                     resource_context: Optional[ResourceContext]) -> bool:
-        """Perform detailed permission check with resource context."""
+    def _get_cached_basic_permission(self, user_id: int, permission: str) -> Tuple[bool, bool]:
+        """
+        Check a role/group grant with a single bit test on the user's cached bitset.
         
-        # Get user and roles
-        user = User.query.get(user_id)
-        if not user:
-            return False
-            
-        # Step 1: Check basic permission
-        if not self._user_has_basic_permission(user, permission):
-            return False
-            
-        # Step 2: Apply resource context if provided
-        if resource_context:
-            return self._check_resource_context(user, permission, resource_context)
-            
-        return True
+        Returns:
+            Tuple of (has_permission, cache_hit)
+        """
+        bits, cache_hit = self._get_user_permission_bits(user_id)
+        return self.permission_registry.has(bits.group_bits, permission), cache_hit
+    
+    def _get_user_permission_bits(self, user_id: int) -> Tuple[UserPermissionBits, bool]:
+        """
+        Get a user's permission bitsets through L1 and L2, computing them on a miss.
+        
+        Returns:
+            Tuple of (bitsets, cache_hit)
+        """
+        cache_key = f"perm:{user_id}:bits"
+        
+        # L1 Cache: Memory
+        cached_bits = self._get_from_memory_cache(cache_key)
+        if cached_bits is not None:
+            return cached_bits, True
+        
+        # L2 Cache: Redis (only if available)
+        cached_bits = self._get_bits_from_redis(cache_key)
+        if cached_bits is not None:
+            return cached_bits, True
+        
+        # L3: Database, one recursive query shared by concurrent misses for this user
+        # (invalidating the user detaches the query, so nobody new waits on stale bitsets)
+        bits = self.single_flight.do(
+            cache_key,
+            lambda: self._compute_user_permission_bits(user_id),
+            recheck=lambda: self._get_bits_from_redis(cache_key),
+            redis_client=self._get_single_flight_redis_client()
+        )
+        
+        return bits, False
+    
+    def check_many(self, user_ids: List[int], permissions: List[str]) -> Dict[int, Dict[str, bool]]:
+        """
+        Check several permissions for several users at once.
+        
+        Follows the same golden path as user_has_permission, without resource
+        context. Bitsets come from L1, then from Redis in a single MGET, and any
+        remaining users are computed together in one query per batch.
+        
+        Returns:
+            Dict of user_id -> permission name -> has_permission
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        permissions = list(dict.fromkeys(permissions))
+        bits_by_user = self._get_many_user_permission_bits(user_ids)
+        
+        results = {
+            user_id: {
+                permission: self.permission_registry.has(bits_by_user[user_id].group_bits, permission)
+                for permission in permissions
+            }
+            for user_id in user_ids
+        }
+        
+        request_memo = self._get_request_memo()
+        if request_memo is not None:
+            for user_id, checks in results.items():
+                for permission, granted in checks.items():
+                    request_memo[(user_id, permission, None)] = granted
+        
+        return results
+    
+    def _get_many_user_permission_bits(self, user_ids: List[int], batch_size: int = 500) -> Dict[int, UserPermissionBits]:
+        """Bitsets for many users through L1, one Redis MGET and bulk computation of the rest."""
+        bits_by_user = {}
+        missing = []
+        for user_id in user_ids:
+            cached_bits = self._get_from_memory_cache(f"perm:{user_id}:bits")
+            if cached_bits is not None:
+                bits_by_user[user_id] = cached_bits
+            else:
+                missing.append(user_id)
+        
+        if missing and REDIS_CACHE_AVAILABLE and get_redis_permission_cache:
+            try:
+                cached_values = get_redis_permission_cache().batch_get([f"perm:{user_id}:bits" for user_id in missing])
+                for user_id in missing:
+                    cached_value = cached_values.get(f"perm:{user_id}:bits")
+                    if cached_value is not None:
+                        bits_by_user[user_id] = UserPermissionBits.from_cache(cached_value)
+                        self._store_in_memory_cache(f"perm:{user_id}:bits", bits_by_user[user_id])
+                missing = [user_id for user_id in missing if user_id not in bits_by_user]
+            except Exception as e:
+                logger.warning(f"Redis cache error, falling back to database: {e}")
         
-    def _user_has_basic_permission(self, user: User, permission: str) -> bool:
-        """Check if user has basic permission through roles and groups (Golden Path only)."""
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            generations = self._permission_generations(batch)
+            computed = compute_user_permission_bits(batch)
+            self._store_user_permission_bits(computed, generations)
+            bits_by_user.update(computed)
+        
+        return bits_by_user
+    
+    def issue_permission_claims(self, user_id: int) -> Dict[str, Any]:
+        """
+        Permission claims for a new access token, or {} when Redis is unavailable.
+        
+        The version stamps are read before the bitset is computed, so an
+        invalidation racing with issuance leaves the token stale, never wrong.
+        """
+        stamps = self.permission_versions.current(user_id, create=True)
+        if stamps is None:
+            return {}
+        
+        # Straight from the database: another worker's L1 may not have seen a just-published invalidation
+        generations = self._permission_generations([user_id])
+        bits = compute_user_permission_bits([user_id])[user_id]
+        self._store_user_permission_bits({user_id: bits}, generations)
+        return build_permission_claims(bits, stamps)
+    
+    def check_token_permissions(self, user_id: int, claims: Dict[str, Any],
+                                permissions) -> Optional[Dict[str, bool]]:
+        """
+        Authorize from an access token's permission claims.
+        
+        Returns None when the token has no claims or they are stale, in which
+        case callers use the database-backed path.
+        """
+        request_memo = self._get_request_memo()
+        memo_key = (user_id, '__token_stamps__', None)
+        if request_memo is not None and memo_key in request_memo:
+            stamps = request_memo[memo_key]
+        else:
+            stamps = self.permission_versions.current(user_id)
+            if request_memo is not None:
+                request_memo[memo_key] = stamps
+        
+        bits = claims_bits(claims, stamps)
+        if bits is None:
+            return None
+        return {permission: self.permission_registry.has(bits, permission) for permission in permissions}
+    
+    def _get_version_redis_client(self):
+        return self.redis_cache.redis_client if self.redis_cache else None
+    
+    def _get_bits_from_redis(self, cache_key: str) -> Optional[UserPermissionBits]:
+        """Read bitsets from L2, promoting them to L1."""
+        if not (REDIS_CACHE_AVAILABLE and get_redis_permission_cache):
+            return None
         try:
-            # GOLDEN PATH ENFORCEMENT: User → Role → PermissionGroup → Permission
-            # Check permissions ONLY through permission groups, no direct role permissions
-            for role in user.roles:
-                if self._role_has_permission_through_groups(role, permission):
-                    return True
-                    
-            return False
-            
+            cached_value = get_redis_permission_cache().get(cache_key)
+            if cached_value is not None:
+                cached_bits = UserPermissionBits.from_cache(cached_value)
+                self._store_in_memory_cache(cache_key, cached_bits)
+                return cached_bits
         except Exception as e:
-            logger.error(f"Error checking basic permission {permission} for user {user.id}: {e}")
-            return False
+            logger.warning(f"Redis cache error, falling back to database: {e}")
+        return None
+    
+    def _compute_user_permission_bits(self, user_id: int) -> UserPermissionBits:
+        generations = self._permission_generations([user_id])
+        bits = compute_user_permission_bits([user_id])[user_id]
+        self._store_user_permission_bits({user_id: bits}, generations)
+        return bits
+    
+    def _permission_generations(self, user_ids: List[int]) -> Dict[int, tuple]:
+        """
+        Each user's current permission generation, to read before computing bitsets.
+        
+        Combines this worker's invalidation counters with the shared version
+        stamps, so invalidations on other workers count even before their bus
+        message arrives.
+        """
+        stamps = self.permission_versions.current_many(user_ids)
+        with self.generation_lock:
+            return {
+                user_id: (self.global_generation, self.user_generations.get(user_id, 0), stamps.get(user_id))
+                for user_id in user_ids
+            }
+    
+    def _bump_generations(self, user_ids: Optional[List[int]] = None):
+        """Retire bitsets being computed for these users (or everyone); call before clearing caches."""
+        with self.generation_lock:
+            if user_ids is None:
+                self.global_generation += 1
+            else:
+                for user_id in user_ids:
+                    self.user_generations[user_id] = self.user_generations.get(user_id, 0) + 1
+        if user_ids is None:
+            self.single_flight.forget_all()
+        else:
+            for user_id in user_ids:
+                self.single_flight.forget(f"perm:{user_id}:bits")
+    
+    def _get_single_flight_redis_client(self):
+        """Redis client for cross-worker coalescing, if enabled and connected."""
+        if not (has_app_context() and current_app.config.get('PERMISSION_SINGLE_FLIGHT_REDIS_LOCK')):
+            return None
+        if not (REDIS_CACHE_AVAILABLE and get_redis_permission_cache):
+            return None
+        return get_redis_permission_cache().redis_client
+    
+    def _store_user_permission_bits(self, bits_by_user: Dict[int, UserPermissionBits],
+                                    generations: Optional[Dict[int, tuple]] = None) -> bool:
+        """
+        Write computed bitsets to L1 and L2; several users go to Redis in one pipeline.
+        
+        With generations (from _permission_generations, read before computing),
+        users invalidated while their bitsets were computed are not cached.
+        
+        Returns:
+            False if the Redis write failed (L1 still holds the bitsets)
+        """
+        if generations is not None:
+            stamps = self.permission_versions.current_many(list(bits_by_user))
+            # Invalidations bump the local counters before clearing L1, so checking and
+            # writing under the lock cannot put back an entry they already cleared
+            with self.generation_lock:
+                bits_by_user = {
+                    user_id: bits for user_id, bits in bits_by_user.items()
+                    if generations[user_id] == (
+                        self.global_generation, self.user_generations.get(user_id, 0), stamps.get(user_id)
+                    )
+                }
+                for user_id, bits in bits_by_user.items():
+                    self._store_in_memory_cache(f"perm:{user_id}:bits", bits)
+            if not bits_by_user:
+                return True
+        else:
+            for user_id, bits in bits_by_user.items():
+                self._store_in_memory_cache(f"perm:{user_id}:bits", bits)
+        
+        if REDIS_CACHE_AVAILABLE and get_redis_permission_cache:
+            try:
+                redis_cache = get_redis_permission_cache()
+                if len(bits_by_user) == 1:
+                    (user_id, bits), = bits_by_user.items()
+                    redis_cache.set(f"perm:{user_id}:bits", bits.to_cache(), ttl=1800)  # 30 minutes
+                else:
+                    redis_cache.batch_set({
+                        f"perm:{user_id}:bits": bits.to_cache() for user_id, bits in bits_by_user.items()
+                    }, ttl=1800)
+            except Exception as e:
+                logger.warning(f"Failed to store in Redis cache: {e}")
+                return False
+        return True
+    
+    def warm_permission_cache(self, user_ids: Optional[List[int]] = None, batch_size: int = 500,
+                              limit: Optional[int] = None) -> Dict[str, int]:
+        """
+        Precompute permission bitsets for active users (or the given users).
+        
+        Each batch costs one SQL query and one Redis pipeline, so a deploy can
+        warm every user before traffic arrives instead of each first request
+        missing on its own. A batch whose query or Redis write fails is counted
+        in failed_batches and the remaining batches still run.
+        
+        Returns:
+            Dict with users_processed, users_warmed (one bitset entry per user),
+            batches and failed_batches
+        """
+        if user_ids is None:
+            query = select(User.id).where(User.is_active.is_(True)).order_by(User.id)
+            if limit is not None:
+                query = query.limit(limit)
+            user_ids = list(db.session.scalars(query))
+        
+        warmed = 0
+        batches = 0
+        failed_batches = 0
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            batches += 1
+            try:
+                generations = self._permission_generations(batch)
+                bits_by_user = compute_user_permission_bits(batch)
+                stored = self._store_user_permission_bits(bits_by_user, generations)
+            except Exception as e:
+                logger.warning(f"Permission cache warm-up failed for {len(batch)} users from user {batch[0]}: {e}")
+                db.session.rollback()
+                stored = False
+            if stored:
+                warmed += len(bits_by_user)
+            else:
+                failed_batches += 1
+        
+        logger.info(f"Permission cache warmed for {warmed} users in {batches} batches ({failed_batches} failed)")
+        return {
+            'users_processed': len(user_ids),
+            'users_warmed': warmed,
+            'batches': batches,
+            'failed_batches': failed_batches
+        }
+    
+    def start_warm_up(self, app) -> threading.Thread:
+        """Run warm_permission_cache in the background, e.g. at worker boot."""
+        thread = threading.Thread(target=self._warm_up, args=(app,), name='permission-warm-up', daemon=True)
+        thread.start()
+        return thread
+    
+    def _warm_up(self, app):
+        with app.app_context():
+            try:
+                self.warm_permission_cache()
+            except Exception as e:
+                logger.warning(f"Permission cache warm-up failed: {e}")
+    
+    def prefetch_user_permissions(self, app, user_id: int):
+        """Compute a user's bitsets in the background (e.g. right after login) unless already cached."""
+        if self._get_from_memory_cache(f"perm:{user_id}:bits") is not None:
+            return None
+        
+        thread = threading.Thread(
+            target=self._prefetch_user_permissions, args=(app, user_id),
+            name=f'permission-prefetch-{user_id}', daemon=True
+        )
+        thread.start()
+        return thread
+    
+    def _prefetch_user_permissions(self, app, user_id: int):
+        with app.app_context():
+            try:
+                self._get_user_permission_bits(user_id)
+            except Exception as e:
+                logger.warning(f"Permission prefetch failed for user {user_id}: {e}")
+    
+    def _get_request_memo(self) -> Optional[Dict[tuple, bool]]:
+        """Per-request memo of permission check results, or None outside a request."""
+        if not has_request_context():
+            return None
+        if not hasattr(g, '_permission_checks'):
+            g._permission_checks = {}
+        return g._permission_checks
+    
+    def _clear_request_memo(self, user_id: Optional[int] = None):
+        """Drop memoized checks for a user (or everyone) in the current request."""
+        if not has_request_context() or not hasattr(g, '_permission_checks'):
+            return
+        if user_id is None:
+            g._permission_checks.clear()
+        else:
+            for key in [key for key in g._permission_checks if key[0] == user_id]:
+                del g._permission_checks[key]
+    
+    @staticmethod
+    def _resource_context_key(resource_context: Optional[ResourceContext]) -> Optional[tuple]:
+        """Hashable identity of a resource context for request memoization."""
+        if resource_context is None:
+            return None
+        return (
+            resource_context.resource_type,
+            resource_context.resource_id,
+            resource_context.ownership_check,
+            resource_context.department_scope,
+            tuple(resource_context.cascade_permissions),
+            tuple(resource_context.custom_validators)
+        )
     
     def _role_has_permission_through_groups(self, role: Role, permission: str) -> bool:
         """Check if role has permission through permission groups."""
@@ -320,7 +649,7 @@ class PermissionService:
             # Step 4: Cascade permissions
             if context.cascade_permissions:
                 for cascade_perm in context.cascade_permissions:
-                    if not self._user_has_basic_permission(user, cascade_perm):
+                    if not self._get_cached_basic_permission(user.id, cascade_perm)[0]:
                         logger.debug(f"Cascade permission {cascade_perm} failed for user {user.id}")
                         return False
                         
@@ -406,54 +735,106 @@ class PermissionService:
                 base_key += f":{context_hash}"
             return base_key
     
-    def _get_from_memory_cache(self, key: str) -> Optional[bool]:
+    def _clear_memory_cache(self):
+        """Drop every L1 entry and the permission name map."""
+        self._bump_generations()
+        self.memory_cache.clear()
+        self.permission_registry.invalidate()
+    
+    def start_invalidation_listener(self, app) -> bool:
+        """
+        Subscribe this worker to invalidations published by the other workers.
+        
+        Once the listener runs, L1 entries no longer need a short TTL to bound
+        staleness, so the TTL is raised to PERMISSION_MEMORY_CACHE_TTL. That is
+        only safe because bitsets computed across an invalidation are never
+        stored (see _store_user_permission_bits); otherwise such an entry would
+        outlive the invalidation by the whole TTL.
+        """
+        try:
+            redis_client = create_bus_redis_client(app)
+            if redis_client is None:
+                return False
+            redis_client.ping()
+        except Exception as e:
+            logger.warning(f"Permission invalidation bus unavailable, L1 TTL stays {self.memory_cache_ttl}s: {e}")
+            return False
+        
+        started = self.invalidation_bus.start(redis_client, self._apply_remote_invalidation, self._clear_memory_cache)
+        if started:
+            self.memory_cache_ttl = app.config.get('PERMISSION_MEMORY_CACHE_TTL', self.memory_cache_ttl)
+            self.memory_cache.ttl_seconds = self.memory_cache_ttl
+        return started
+    
+    def _apply_remote_invalidation(self, message: Dict[str, Any]):
+        """Apply an invalidation published by another worker to the memory cache."""
+        if message.get('all'):
+            self._clear_memory_cache()
+            return
+        user_ids = [int(user_id) for user_id in message.get('users', [])]
+        self._bump_generations(user_ids)
+        for user_id in user_ids:
+            self.memory_cache.invalidate_user(user_id)
+    
+    def _get_from_memory_cache(self, key: str) -> Optional[Any]:
         """Get permission result from memory cache."""
         try:
-            cache_entry = self.memory_cache.get(key)
-            if cache_entry and cache_entry['expires'] > datetime.now():
-                return cache_entry['value']
+            return self.memory_cache.get(key)
         except Exception as e:
             logger.warning(f"Memory cache read error for key {key}: {e}")
         return None
     
-    def _store_in_memory_cache(self, key: str, value: bool):
+    def _store_in_memory_cache(self, key: str, value: Any):
         """Store permission result in memory cache."""
         try:
-            expires = datetime.now() + timedelta(seconds=self.memory_cache_ttl)
-            self.memory_cache[key] = {'value': value, 'expires': expires}
+            self.memory_cache.set(key, value)
         except Exception as e:
             logger.warning(f"Memory cache write error for key {key}: {e}")
     
     def invalidate_user_cache(self, user_id: int):
         """Invalidate all cached permissions for a user."""
         try:
+            self._clear_request_memo(user_id)
+            
+            # Retire bitsets still being computed and permission claims in issued tokens
+            self._bump_generations([user_id])
+            self.permission_versions.bump_users([user_id])
+            
             # Clear memory cache
-            keys_to_remove = [k for k in self.memory_cache.keys() if f":{user_id}:" in k]
-            for key in keys_to_remove:
-                del self.memory_cache[key]
+            self.memory_cache.invalidate_user(user_id)
                 
             # Clear Redis cache
             if self.redis_cache:
                 self.redis_cache.invalidate_user_permissions(user_id)
+            
+            # Clear the other workers' memory caches
+            self.invalidation_bus.publish_users([user_id])
                     
             logger.info(f"Cache invalidated for user {user_id}")
             
         except Exception as e:
             logger.error(f"Error invalidating cache for user {user_id}: {e}")
     
+    def _invalidate_users(self, user_ids):
+        """Drop several users' cached permissions, with a single Redis round-trip."""
+        self._bump_generations(user_ids)
+        self.permission_versions.bump_users(user_ids)
+        for user_id in user_ids:
+            self.memory_cache.invalidate_user(user_id)
+        if self.redis_cache:
+            self.redis_cache.invalidate_users(user_ids)
+        self.invalidation_bus.publish_users(user_ids)
+    
     def invalidate_role_cache(self, role_id: int):
         """Invalidate cache for all users with a specific role."""
         try:
-            if self.redis_cache:
-                self.redis_cache.invalidate_role_permissions(role_id)
-            else:
-                # Fallback: invalidate all memory cache entries
-                role = Role.query.get(role_id)
-                if role:
-                    for user in role.users:
-                        self.invalidate_user_cache(user.id)
+            self._clear_request_memo()
+            
+            # Only the affected users' bitsets are dropped; each is rebuilt on its next check
+            user_ids = affected_user_ids(role_id=role_id)
+            self._invalidate_users(user_ids)
                         
-            logger.info(f"Cache invalidated for role {role_id}")
+            logger.info(f"Cache invalidated for role {role_id} ({len(user_ids)} users)")
             
         except Exception as e:
             logger.error(f"Error invalidating cache for role {role_id}: {e}")
@@ -461,99 +842,26 @@ class PermissionService:
     def invalidate_group_cache(self, group_id: int):
         """Invalidate cache for all users affected by a permission group change."""
         try:
-            if self.redis_cache:
-                self.redis_cache.invalidate_permission_group(group_id)
-            else:
-                # Fallback: manual invalidation
-                group = PermissionGroup.query.get(group_id)
-                if group:
-                    affected_users = set()
-                    
-                    # Get all roles assigned to this group
-                    role_groups = RolePermissionGroup.query.filter_by(group_id=group_id).all()
-                    for role_group in role_groups:
-                        for user in role_group.role.users:
-                            affected_users.add(user.id)
-                    
-                    # Invalidate cache for each affected user
-                    for user_id in affected_users:
-                        self.invalidate_user_cache(user_id)
+            self._clear_request_memo()
+            
+            # Includes users whose roles hold a child group, which inherits this group's permissions
+            user_ids = affected_user_ids(group_id=group_id)
+            self._invalidate_users(user_ids)
                         
-            logger.info(f"Cache invalidated for group {group_id}")
+            logger.info(f"Cache invalidated for group {group_id} ({len(user_ids)} users)")
             
         except Exception as e:
             logger.error(f"Error invalidating cache for group {group_id}: {e}")
     
     def get_user_permissions(self, user_id: int, include_groups=True) -> List[str]:
-        """Get all permissions for a user (cached)."""
-        cache_key = f"user_perms:{user_id}:{include_groups}"
-        
-        # L1 Cache Check
-        cached_perms = self._get_from_memory_cache(cache_key)
-        if cached_perms is not None:
-            return cached_perms
-
-        # L2 Redis Cache Check
-        if self.redis_cache:
-            cached_perms = self.redis_cache.get(cache_key)
-            if cached_perms is not None:
-                self._store_in_memory_cache(cache_key, cached_perms)
-                return cached_perms
-
-        user = self._get_user(user_id)
-        if not user:
-            logger.warning(f"get_user_permissions: User ID {user_id} not found during permission fetch.")
-            return []
-
-        logger.info(f"get_user_permissions: Starting permission fetch for user ID {user_id} ({user.email})")
-        permissions = set()
-
-        # Part 1: Legacy role_permissions table has been removed - Golden Path architecture only
-        logger.info(f"get_user_permissions: Legacy role.permissions have been removed - using permission groups only.")
-
-
-        # Part 2: Permissions from Permission Groups
-        if include_groups:
-            logger.info(f"get_user_permissions: Fetching permission groups for user {user_id}...")
-            user_groups = self.get_user_permission_groups(user_id) # This now has logging
-            
-            if not user_groups:
-                logger.warning(f"get_user_permissions: No active permission groups found for user {user_id}.")
-            else:
-                logger.info(f"get_user_permissions: User {user_id} is in groups: {[g.name for g in user_groups]}. Processing permissions for these groups.")
-                for group in user_groups:
-                    logger.info(f"get_user_permissions: Getting all permissions for group '{group.name}' (ID: {group.id})")
-                    # group.get_all_permissions() returns a set of permission NAMES (strings)
-                    group_permission_names = group.get_all_permissions() 
-                    if group_permission_names:
-                        logger.info(f"get_user_permissions: Group '{group.name}' provides permissions: {list(group_permission_names)}")
-                        permissions.update(group_permission_names)
-                    else:
-                        logger.info(f"get_user_permissions: Group '{group.name}' provides no permissions directly or via hierarchy.")
-        else:
-            logger.info(f"get_user_permissions: Skipping group permissions fetch as include_groups is False.")
-
-        # Part 3: Direct UserPermission assignments (UserPermission model)
-        logger.info(f"get_user_permissions: Checking direct UserPermission assignments for user {user_id}...")
-        direct_assignments = UserPermission.query.filter_by(user_id=user_id, is_active=True).all()
-        if direct_assignments:
-            for assignment in direct_assignments:
-                if assignment.permission:
-                    logger.info(f"get_user_permissions: User {user_id} has direct permission '{assignment.permission.name}'")
-                    permissions.add(assignment.permission.name)
-        else:
-            logger.info(f"get_user_permissions: No active direct UserPermission assignments found for user {user_id}.")
-
-
-        perm_list = sorted(list(permissions))
-        logger.info(f"get_user_permissions: Final aggregated permissions for user {user_id}: {perm_list}")
+        """
+        Get all permissions for a user (cached).
         
-        # Cache the result
-        self._store_in_memory_cache(cache_key, perm_list)
-        if self.redis_cache:
-            self.redis_cache.set(cache_key, perm_list, ttl=1800)  # 30 minutes
-
-        return perm_list
+        Combines permission group grants (including inherited group permissions)
+        with direct UserPermission assignments, read from the user's bitsets.
+        """
+        bits, _ = self._get_user_permission_bits(user_id)
+        return self.permission_registry.names_for(bits.all_bits if include_groups else bits.direct_bits)
     
     def get_user_permission_summary(self, user_id: int) -> Dict[str, Any]:
         """Get comprehensive permission summary for a user."""
@@ -599,11 +907,9 @@ class PermissionService:
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics from both memory and Redis caches."""
         stats = {
-            'memory_cache': {
-                'entries': len(self.memory_cache),
-                'max_size': self.memory_cache_size,
-                'usage_percent': round((len(self.memory_cache) / self.memory_cache_size) * 100, 2)
-            },
+            'memory_cache': self.memory_cache.get_stats(),
+            'invalidation_bus': self.invalidation_bus.get_stats(),
+            'single_flight': self.single_flight.get_stats(),
             'redis_cache': {
                 'available': REDIS_CACHE_AVAILABLE,
                 'entries': 0,
@@ -641,25 +947,30 @@ class PermissionService:
                         permission_group_id: Optional[int] = None) -> bool:
         """Invalidate cache entries."""
         try:
-            # Always clear memory cache
+            self._clear_request_memo(user_id)
+            
+            # Always clear memory cache, here and in the other workers
             if user_id:
                 # Clear specific user caches
-                keys_to_remove = [key for key in self.memory_cache.keys() if f"user_{user_id}" in key]
-                for key in keys_to_remove:
-                    del self.memory_cache[key]
+                self._bump_generations([user_id])
+                self.permission_versions.bump_users([user_id])
+                self.memory_cache.invalidate_user(user_id)
+                self.invalidation_bus.publish_users([user_id])
             else:
                 # Clear all memory cache
-                self.memory_cache.clear()
+                self.permission_versions.bump_all()
+                self._clear_memory_cache()
+                self.invalidation_bus.publish_all()
             
             # Clear Redis cache if available
             if REDIS_CACHE_AVAILABLE and get_redis_permission_cache:
                 try:
                     if user_id:
-                        get_redis_permission_cache().invalidate_user_cache(user_id)
+                        get_redis_permission_cache().invalidate_user_permissions(user_id)
                     elif role_id:
-                        get_redis_permission_cache().invalidate_role_cache(role_id)
+                        get_redis_permission_cache().invalidate_role_permissions(role_id)
                     elif permission_group_id:
-                        get_redis_permission_cache().invalidate_group_cache(permission_group_id)
+                        get_redis_permission_cache().invalidate_permission_group(permission_group_id)
                     else:
                         get_redis_permission_cache().clear_all()
                 except Exception as e:
@@ -690,7 +1001,8 @@ class PermissionService:
                           resource_type: str = None, resource_id: str = None) -> bool:
         """
         Legacy compatibility classmethod for user_has_permission.
-        Maps to the new instance method user_has_permission.
+        Maps to the new instance method user_has_permission, so legacy callers
+        share its caches and request memoization.
         """
         # Get the global service instance
         service = enhanced_permission_service
@@ -704,8 +1016,7 @@ class PermissionService:
                 ownership_check=True if resource_id else False
             )
         
-        # Call the instance method directly - bypass name collision by calling the core logic
-        return service._check_permission_with_context(user_id, permission_name, resource_context)
+        return service.user_has_permission(user_id, permission_name, resource_context)
     
     @classmethod
     def get_all_permissions(cls) -> Tuple[List[Permission], str, int]:
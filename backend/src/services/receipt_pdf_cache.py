@@ -0,0 +1,332 @@
+"""
+Receipt PDF Cache
+
+Finalized receipts (GENERATED, PAID, VOID) rarely change, so their PDFs are
+rendered once in a worker process and kept on disk. Files are addressed by a
+hash of everything printed on the PDF (the ReceiptPdfData snapshot), so any
+change that would alter the document, including a renamed customer or a
+corrected tail number, yields a new file and stale PDFs are never served.
+
+- ReceiptService schedules a background render whenever a receipt is finalized
+- Downloads stream the cached file; on a miss the PDF is rendered on demand
+- Concurrent requests for the same PDF share one in-flight render
+- Once a newer PDF of a receipt is written, older ones are deleted after
+  they have gone unused for a grace period
+- Bulk exports stream batches of receipts through the same pool
+- Under eventlet, waiting for a render yields to other green threads
+  instead of blocking the hub
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import astuple
+from itertools import islice
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from flask import current_app
+
+try:
+    import eventlet
+    from eventlet import patcher as eventlet_patcher, tpool
+    EVENTLET_AVAILABLE = True
+except ImportError:
+    EVENTLET_AVAILABLE = False
+    eventlet = None
+
+from .receipt_pdf_renderer import ReceiptPdfData, render_receipt_pdf
+
+logger = logging.getLogger(__name__)
+
+FINALIZED_STATUSES = ('GENERATED', 'PAID', 'VOID')
+
+# Poll interval while a green thread waits for a render
+GREEN_WAIT_INTERVAL_SECONDS = 0.02
+
+# Superseded PDFs stay this long after their last use, so a download that
+# just looked one up can still open it
+SUPERSEDED_PDF_GRACE_SECONDS = 300
+
+
+def _is_green() -> bool:
+    """Whether threads are monkey patched into eventlet green threads."""
+    return EVENTLET_AVAILABLE and eventlet_patcher.is_monkey_patched('thread')
+
+
+def wait_for_render(future: Future, timeout: float):
+    """
+    Result of a render future without blocking the eventlet hub.
+
+    Future.result() parks the caller on a lock that the pool's result thread
+    releases; under eventlet that stalls every request in the worker, so green
+    callers poll with eventlet.sleep instead.
+    """
+    if _is_green():
+        deadline = time.monotonic() + timeout
+        while not future.done():
+            if time.monotonic() >= deadline:
+                raise FutureTimeoutError()
+            eventlet.sleep(GREEN_WAIT_INTERVAL_SECONDS)
+        return future.result(timeout=0)
+    return future.result(timeout=timeout)
+
+
+def render_receipt_pdf_to_file(data: ReceiptPdfData, path: str) -> str:
+    """
+    Render a receipt PDF and atomically write it to path.
+
+    Runs inside pool worker processes, so it must stay a module-level function.
+    """
+    pdf_data = render_receipt_pdf(data)
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(pdf_data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    return path
+
+
+def render_receipt_pdf_batch(batch: List[Tuple[ReceiptPdfData, Optional[str]]]) -> List[Tuple[Optional[bytes], Optional[str]]]:
+    """
+    Produce PDF bytes for a batch of receipts, reading cached files where given.
+
+    Runs inside pool worker processes. Failures are reported per receipt as
+    (None, error) so one bad receipt does not sink the rest of the batch.
+    """
+    results = []
+    for data, cached_path in batch:
+        try:
+            pdf_bytes = _read_pdf(cached_path) if cached_path else None
+            results.append((pdf_bytes if pdf_bytes is not None else render_receipt_pdf(data), None))
+        except Exception as e:
+            results.append((None, str(e)))
+    return results
+
+
+def _read_pdf(path: str) -> Optional[bytes]:
+    """Bytes of a cached PDF, or None if it is missing (never rendered, or pruned)."""
+    try:
+        with open(path, 'rb') as pdf_file:
+            return pdf_file.read()
+    except FileNotFoundError:
+        return None
+
+
+class ReceiptPdfCache:
+    """Content-addressed on-disk PDF cache with a process pool renderer."""
+
+    DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'fbo_receipt_pdfs')
+
+    def __init__(self, cache_dir: Optional[str] = None, max_workers: Optional[int] = None,
+                 render_timeout: int = 60):
+        self._cache_dir = cache_dir
+        self._max_workers = max_workers
+        self.render_timeout = render_timeout
+        self.lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight: Dict[str, Future] = {}
+
+    @property
+    def cache_dir(self) -> str:
+        if self._cache_dir is None:
+            self._cache_dir = current_app.config.get('RECEIPT_PDF_CACHE_DIR') or self.DEFAULT_CACHE_DIR
+        return self._cache_dir
+
+    @property
+    def max_workers(self) -> int:
+        if self._max_workers is None:
+            self._max_workers = int(current_app.config.get('RECEIPT_PDF_WORKERS', 2))
+        return self._max_workers
+
+    @staticmethod
+    def cache_key(data: ReceiptPdfData) -> str:
+        """Content address for everything printed on a receipt PDF."""
+        return hashlib.sha256(repr(astuple(data)).encode()).hexdigest()
+
+    def path_for(self, data: ReceiptPdfData) -> str:
+        return os.path.join(self.cache_dir, str(data.receipt_id), f"{self.cache_key(data)}.pdf")
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        """Lazily start the render pool; None renders in the calling thread."""
+        if self.max_workers <= 0:
+            return None
+        if self._executor is None:
+            # spawn keeps the eventlet hub and pooled DB connections out of the workers
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def _submit(self, path: str, data: ReceiptPdfData) -> Future:
+        """Start rendering path unless a render for it is already in flight."""
+        with self.lock:
+            future = self._in_flight.get(path)
+            if future is not None:
+                return future
+
+            executor = self._get_executor()
+            if executor is not None:
+                future = executor.submit(render_receipt_pdf_to_file, data, path)
+            else:
+                future = Future()
+            self._in_flight[path] = future
+
+        future.add_done_callback(lambda done: self._finish(path, done))
+
+        if executor is None:
+            # Render outside the lock; concurrent callers wait on the same future.
+            # Green callers render in a native thread so the hub keeps running.
+            try:
+                if _is_green():
+                    future.set_result(tpool.execute(render_receipt_pdf_to_file, data, path))
+                else:
+                    future.set_result(render_receipt_pdf_to_file(data, path))
+            except Exception as e:
+                future.set_exception(e)
+
+        return future
+
+    def _finish(self, path: str, future: Future):
+        with self.lock:
+            if self._in_flight.get(path) is future:
+                del self._in_flight[path]
+        if future.exception() is not None:
+            logger.error(f"Receipt PDF render failed for {path}: {future.exception()}")
+        else:
+            self._prune_superseded(path)
+
+    def _prune_superseded(self, path: str):
+        """
+        Delete the receipt's other PDFs that have gone unused for the grace period.
+
+        Runs here rather than in the render so that a render never deletes a
+        file another request was just handed; downloads refresh a file's mtime
+        on every hit, and a download that still loses the race re-renders.
+        """
+        directory = os.path.dirname(path)
+        cutoff = time.time() - SUPERSEDED_PDF_GRACE_SECONDS
+        with self.lock:
+            in_flight = set(self._in_flight)
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return
+        for name in names:
+            sibling = os.path.join(directory, name)
+            if sibling == path or sibling in in_flight or not name.endswith('.pdf'):
+                continue
+            try:
+                if os.path.getmtime(sibling) < cutoff:
+                    os.unlink(sibling)
+            except OSError:
+                pass
+
+    def get_cached_path(self, data: ReceiptPdfData) -> Optional[str]:
+        """Path of an already rendered PDF, or None."""
+        path = self.path_for(data)
+        return path if os.path.exists(path) else None
+
+    def schedule(self, load_data: Callable[[], ReceiptPdfData]):
+        """Render a finalized receipt in the background if it is not cached yet."""
+        # Without a pool the render would block the caller; leave it to the first download
+        if self.max_workers <= 0:
+            return
+        data = load_data()
+        path = self.path_for(data)
+        if not os.path.exists(path):
+            self._submit(path, data)
+
+    def get_pdf_path(self, data: ReceiptPdfData) -> str:
+        """Path of the rendered PDF, rendering (or joining an in-flight render) on a miss."""
+        path = self.path_for(data)
+        try:
+            # Marks the file as in use so it outlives being superseded by the grace period
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            return wait_for_render(self._submit(path, data), self.render_timeout)
+
+    def render_many(self, items: Iterable[ReceiptPdfData], batch_size: int = 25
+                    ) -> Iterator[Tuple[ReceiptPdfData, Optional[bytes], Optional[str]]]:
+        """
+        Render receipts across the pool, yielding (data, pdf_bytes, error) in input order.
+
+        Items are consumed lazily and at most two batches per worker are in
+        flight, so memory stays flat however many receipts are exported.
+        Finalized receipts that are already cached are read from disk.
+        """
+        batches = self._batches(items, batch_size)
+        executor = self._get_executor()
+
+        if executor is None:
+            for batch in batches:
+                for data, (pdf_bytes, error) in zip((data for data, _ in batch), render_receipt_pdf_batch(batch)):
+                    yield data, pdf_bytes, error
+            return
+
+        pending: Deque[Tuple[List[Tuple[ReceiptPdfData, Optional[str]]], Future]] = deque()
+        for batch in batches:
+            pending.append((batch, executor.submit(render_receipt_pdf_batch, batch)))
+            if len(pending) >= self.max_workers * 2:
+                yield from self._collect(*pending.popleft())
+        while pending:
+            yield from self._collect(*pending.popleft())
+
+    def _batches(self, items: Iterable[ReceiptPdfData], batch_size: int
+                 ) -> Iterator[List[Tuple[ReceiptPdfData, Optional[str]]]]:
+        iterator = iter(items)
+        while True:
+            batch = [
+                (data, self.path_for(data) if data.status in FINALIZED_STATUSES else None)
+                for data in islice(iterator, batch_size)
+            ]
+            if not batch:
+                return
+            yield batch
+
+    def _collect(self, batch: List[Tuple[ReceiptPdfData, Optional[str]]], future: Future
+                 ) -> Iterator[Tuple[ReceiptPdfData, Optional[bytes], Optional[str]]]:
+        try:
+            results = wait_for_render(future, self.render_timeout * len(batch))
+        except Exception as e:
+            results = [(None, str(e))] * len(batch)
+        for (data, _), (pdf_bytes, error) in zip(batch, results):
+            yield data, pdf_bytes, error
+
+    def shutdown(self):
+        """Stop the render pool."""
+        with self.lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+# Create a lazy-initialized global instance
+_receipt_pdf_cache_instance = None
+_receipt_pdf_cache_lock = threading.Lock()
+
+def get_receipt_pdf_cache() -> ReceiptPdfCache:
+    """Get the global receipt PDF cache instance (lazy initialization)."""
+    global _receipt_pdf_cache_instance
+
+    if _receipt_pdf_cache_instance is None:
+        with _receipt_pdf_cache_lock:
+            if _receipt_pdf_cache_instance is None:
+                _receipt_pdf_cache_instance = ReceiptPdfCache()
+
+    return _receipt_pdf_cache_instance
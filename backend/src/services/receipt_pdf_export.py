@@ -0,0 +1,84 @@
+"""
+Receipt PDF Export
+
+Streams a ZIP of receipt PDFs for bulk downloads (month-end bundles and the
+like). Receipts are read in batches, rendered through the ReceiptPdfCache
+worker pool, and each PDF is written into the archive as soon as it comes
+back, so only a few batches are ever held in memory.
+"""
+
+import io
+import logging
+import zipfile
+from typing import Iterable, Iterator, List, Tuple
+
+from .receipt_pdf_cache import ReceiptPdfCache
+from .receipt_pdf_renderer import ReceiptPdfData
+
+logger = logging.getLogger(__name__)
+
+
+class ZipChunkStream(io.RawIOBase):
+    """
+    Write-only, unseekable sink for zipfile that hands written bytes back as chunks.
+
+    zipfile falls back to data descriptors when the output cannot seek, so
+    entries are emitted front to back and never need rewriting.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        """Return everything written since the last drain."""
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def receipt_pdf_filename(data: ReceiptPdfData) -> str:
+    """Archive member name, matching the single receipt download."""
+    return f"Receipt_{data.receipt_number or data.receipt_id}.pdf"
+
+
+def stream_receipt_pdf_zip(items: Iterable[ReceiptPdfData], pdf_cache: ReceiptPdfCache) -> Iterator[bytes]:
+    """
+    Render receipts and yield a ZIP archive of their PDFs chunk by chunk.
+
+    Receipts that fail to render are skipped and listed in export_errors.txt
+    at the end of the archive rather than aborting a half-sent download.
+    """
+    sink = ZipChunkStream()
+    errors: List[Tuple[ReceiptPdfData, str]] = []
+    exported = 0
+
+    # PDFs are already compressed; deflating them again only costs CPU
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_STORED) as archive:
+        for data, pdf_bytes, error in pdf_cache.render_many(items):
+            if pdf_bytes is None:
+                logger.error(f"Failed to render PDF for receipt {data.receipt_id} during export: {error}")
+                errors.append((data, error))
+                continue
+
+            archive.writestr(receipt_pdf_filename(data), pdf_bytes)
+            exported += 1
+
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+
+        if errors:
+            archive.writestr('export_errors.txt', '\n'.join(
+                f"{data.receipt_number or data.receipt_id}: {error}" for data, error in errors
+            ) + '\n')
+
+    logger.info(f"Exported {exported} receipt PDFs ({len(errors)} failed)")
+    yield sink.drain()
@@ -0,0 +1,342 @@
+"""
+Receipt PDF Renderer
+
+ReportLab rendering for receipt PDFs, split from ReceiptService so it can run
+in a worker process. The renderer only sees a ReceiptPdfData snapshot (plain,
+picklable values) and never touches the database or the Flask app.
+
+Paragraph and table styles are built once per process and shared by every
+render, which matters when a worker renders a whole export batch.
+"""
+
+import io
+from dataclasses import dataclass
+from functools import lru_cache
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Iterable, NamedTuple, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class ReceiptPdfLineItem:
+    """Line item values printed on a receipt PDF."""
+    description: str
+    line_item_type: str
+    quantity: Optional[Decimal]
+    unit_price: Optional[Decimal]
+    amount: Optional[Decimal]
+
+
+@dataclass(frozen=True)
+class ReceiptPdfData:
+    """Everything needed to render one receipt PDF."""
+    receipt_id: int
+    receipt_number: Optional[str]
+    status: Optional[str]
+    generated_at: Optional[datetime]
+    paid_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    fuel_order_id: Optional[int]
+    tail_number: str
+    customer_name: str
+    aircraft_type: Optional[str]
+    is_caa_applied: bool
+    fuel_type: Optional[str]
+    fuel_quantity_gallons: Optional[Decimal]
+    fuel_unit_price: Optional[Decimal]
+    fuel_subtotal: Optional[Decimal]
+    total_fees_amount: Optional[Decimal]
+    total_waivers_amount: Optional[Decimal]
+    tax_amount: Optional[Decimal]
+    grand_total_amount: Optional[Decimal]
+    line_items: Tuple[ReceiptPdfLineItem, ...]
+
+    @classmethod
+    def from_receipt(cls, receipt: Any, line_items: Iterable[Any]) -> 'ReceiptPdfData':
+        """Snapshot a Receipt and its ReceiptLineItem rows."""
+        status = receipt.status.value if hasattr(receipt.status, 'value') else receipt.status
+        return cls(
+            receipt_id=receipt.id,
+            receipt_number=receipt.receipt_number,
+            status=status,
+            generated_at=receipt.generated_at,
+            paid_at=receipt.paid_at,
+            updated_at=receipt.updated_at,
+            fuel_order_id=receipt.fuel_order_id,
+            tail_number=getattr(receipt.fuel_order, 'tail_number', 'N/A') if receipt.fuel_order else 'N/A',
+            customer_name=receipt.customer.name if receipt.customer else 'N/A',
+            aircraft_type=receipt.aircraft_type_at_receipt_time,
+            is_caa_applied=bool(receipt.is_caa_applied),
+            fuel_type=receipt.fuel_type_at_receipt_time,
+            fuel_quantity_gallons=receipt.fuel_quantity_gallons_at_receipt_time,
+            fuel_unit_price=receipt.fuel_unit_price_at_receipt_time,
+            fuel_subtotal=receipt.fuel_subtotal,
+            total_fees_amount=receipt.total_fees_amount,
+            total_waivers_amount=receipt.total_waivers_amount,
+            tax_amount=receipt.tax_amount,
+            grand_total_amount=receipt.grand_total_amount,
+            line_items=tuple(
+                ReceiptPdfLineItem(
+                    description=item.description or '',
+                    line_item_type=item.line_item_type.value if hasattr(item.line_item_type, 'value') else str(item.line_item_type),
+                    quantity=item.quantity,
+                    unit_price=item.unit_price,
+                    amount=item.amount
+                )
+                for item in line_items
+            )
+        )
+
+
+class ReceiptPdfStyles(NamedTuple):
+    """Prebuilt ReportLab styles shared by every receipt render."""
+    normal: Any
+    title: Any
+    company: Any
+    receipt_title: Any
+    receipt_number: Any
+    section_title: Any
+    void_watermark: Any
+    footer: Any
+    info_table: Any
+    line_items_table: Any
+    totals_table: Any
+
+
+@lru_cache(maxsize=1)
+def get_receipt_pdf_styles() -> ReceiptPdfStyles:
+    """Build the receipt stylesheet and table styles once per process."""
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import TableStyle
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+
+    styles = getSampleStyleSheet()
+
+    return ReceiptPdfStyles(
+        normal=styles['Normal'],
+        title=ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            alignment=TA_CENTER,
+            textColor=colors.HexColor('#2563eb'),
+            spaceAfter=12,
+        ),
+        company=ParagraphStyle(
+            'CompanyInfo',
+            parent=styles['Normal'],
+            fontSize=10,
+            alignment=TA_CENTER,
+            textColor=colors.grey,
+            spaceAfter=20,
+        ),
+        receipt_title=ParagraphStyle(
+            'ReceiptTitle',
+            parent=styles['Heading2'],
+            fontSize=18,
+            alignment=TA_CENTER,
+            spaceAfter=6,
+        ),
+        receipt_number=ParagraphStyle(
+            'ReceiptNumber',
+            parent=styles['Normal'],
+            fontSize=14,
+            fontName='Courier-Bold',
+            alignment=TA_CENTER,
+            spaceAfter=12,
+        ),
+        section_title=ParagraphStyle(
+            'SectionTitle',
+            parent=styles['Heading3'],
+            fontSize=12,
+            textColor=colors.HexColor('#2563eb'),
+            spaceAfter=6,
+        ),
+        void_watermark=ParagraphStyle(
+            'VoidWatermark',
+            parent=styles['Normal'],
+            fontSize=48,
+            alignment=TA_CENTER,
+            textColor=colors.red,
+            spaceAfter=12,
+        ),
+        footer=ParagraphStyle(
+            'Footer',
+            parent=styles['Normal'],
+            fontSize=8,
+            alignment=TA_CENTER,
+            textColor=colors.grey,
+        ),
+        # Label/value tables: receipt info, aircraft & customer, fueling details
+        info_table=TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+        ]),
+        line_items_table=TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+            ('ALIGN', (2, 0), (-1, -1), 'RIGHT'),
+        ]),
+        totals_table=TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, -1), (-1, -1), 12),
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
+            ('TEXTCOLOR', (0, -1), (-1, -1), colors.HexColor('#2563eb')),
+        ]),
+    )
+
+
+def render_receipt_pdf(data: ReceiptPdfData) -> bytes:
+    """
+    Render a receipt PDF using ReportLab.
+
+    Args:
+        data: Snapshot of the receipt to render
+
+    Returns:
+        PDF data as bytes
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
+
+    styles = get_receipt_pdf_styles()
+
+    # Create PDF buffer
+    buffer = io.BytesIO()
+    # invariant keeps ReportLab's creation date and document ID out of the file,
+    # so the same ReceiptPdfData always renders to the same bytes
+    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18,
+                            invariant=True)
+
+    # Container for the 'Flowable' objects
+    elements = []
+
+    # Company header
+    elements.append(Paragraph("FBO LaunchPad", styles.title))
+    elements.append(Paragraph("Professional Aviation Services<br/>Main Terminal, Gate A1<br/>Phone: (555) 123-4567", styles.company))
+
+    # Receipt title and number
+    elements.append(Paragraph("RECEIPT", styles.receipt_title))
+    elements.append(Paragraph(f"{data.receipt_number or data.receipt_id}", styles.receipt_number))
+
+    # Status badge (simplified as text)
+    if data.status:
+        elements.append(Paragraph(f"Status: {data.status}", styles.normal))
+
+    # Add VOID watermark if needed
+    if data.status == 'VOID':
+        elements.append(Paragraph("VOID", styles.void_watermark))
+
+    elements.append(Spacer(1, 20))
+
+    # Receipt information table
+    elements.append(Paragraph("Receipt Information", styles.section_title))
+
+    receipt_info_data = [
+        ['Receipt Number:', str(data.receipt_number or data.receipt_id)],
+        ['Generated:', data.generated_at.strftime('%B %d, %Y at %I:%M %p') if data.generated_at else 'N/A'],
+        ['Fuel Order ID:', f"#{data.fuel_order_id}"],
+    ]
+
+    if data.paid_at:
+        receipt_info_data.insert(2, ['Paid:', data.paid_at.strftime('%B %d, %Y at %I:%M %p')])
+
+    receipt_info_table = Table(receipt_info_data, colWidths=[2*inch, 3*inch])
+    receipt_info_table.setStyle(styles.info_table)
+    elements.append(receipt_info_table)
+    elements.append(Spacer(1, 15))
+
+    # Aircraft and Customer information
+    elements.append(Paragraph("Aircraft & Customer Information", styles.section_title))
+
+    aircraft_info_data = [
+        ['Tail Number:', data.tail_number],
+        ['Customer:', data.customer_name],
+    ]
+
+    if data.aircraft_type:
+        aircraft_info_data.insert(1, ['Aircraft Type:', data.aircraft_type])
+
+    if data.is_caa_applied:
+        aircraft_info_data.append(['CAA Member:', 'Yes'])
+
+    aircraft_info_table = Table(aircraft_info_data, colWidths=[2*inch, 3*inch])
+    aircraft_info_table.setStyle(styles.info_table)
+    elements.append(aircraft_info_table)
+    elements.append(Spacer(1, 15))
+
+    # Fueling details
+    elements.append(Paragraph("Fueling Details", styles.section_title))
+
+    fueling_data = [
+        ['Fuel Type:', data.fuel_type or 'N/A'],
+        ['Quantity:', f"{data.fuel_quantity_gallons or 'N/A'} gallons"],
+        ['Price per Gallon:', f"${data.fuel_unit_price or 0:.2f}"],
+    ]
+
+    fueling_table = Table(fueling_data, colWidths=[2*inch, 3*inch])
+    fueling_table.setStyle(styles.info_table)
+    elements.append(fueling_table)
+    elements.append(Spacer(1, 20))
+
+    # Line items table
+    elements.append(Paragraph("Line Items", styles.section_title))
+
+    line_items_data = [['Description', 'Type', 'Quantity', 'Unit Price', 'Amount']]
+
+    for item in data.line_items:
+        line_items_data.append([
+            item.description,
+            item.line_item_type,
+            str(item.quantity or ''),
+            f"${item.unit_price or 0:.2f}",
+            f"${item.amount or 0:.2f}"
+        ])
+
+    line_items_table = Table(line_items_data, colWidths=[2.5*inch, 0.8*inch, 0.8*inch, 0.9*inch, 1*inch])
+    line_items_table.setStyle(styles.line_items_table)
+    elements.append(line_items_table)
+    elements.append(Spacer(1, 20))
+
+    # Totals
+    elements.append(Paragraph("Totals", styles.section_title))
+
+    totals_data = [
+        ['Fuel Subtotal:', f"${data.fuel_subtotal or 0:.2f}"],
+        ['Total Fees:', f"${data.total_fees_amount or 0:.2f}"],
+        ['Total Waivers:', f"-${data.total_waivers_amount or 0:.2f}"],
+        ['Tax:', f"${data.tax_amount or 0:.2f}"],
+        ['Grand Total:', f"${data.grand_total_amount or 0:.2f}"],
+    ]
+
+    totals_table = Table(totals_data, colWidths=[2*inch, 1.5*inch])
+    totals_table.setStyle(styles.totals_table)
+    elements.append(totals_table)
+    elements.append(Spacer(1, 30))
+
+    # Footer
+    elements.append(Paragraph("Thank you for choosing FBO LaunchPad for your aviation needs.", styles.footer))
+
+    # Build PDF
+    doc.build(elements)
+
+    # Get the value of the BytesIO buffer and return it
+    pdf_data = buffer.getvalue()
+    buffer.close()
+
+    return pdf_data
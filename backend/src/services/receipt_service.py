@@ -5,32 +5,39 @@ This service handles all business logic related to Receipt and ReceiptLineItem s
 It integrates with the FeeCalculationService to provide comprehensive receipt lifecycle management.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
+from itertools import islice
 from decimal import Decimal
-from datetime import datetime
+from datetime import datetime, date
 from flask import current_app
 from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-from sqlalchemy import func
 
 from ..extensions import db
 from ..models.receipt import Receipt, ReceiptStatus
 from ..models.receipt_line_item import ReceiptLineItem, LineItemType
+from ..models.receipt_number_counter import ReceiptNumberCounter
 from ..models.fuel_order import FuelOrder, FuelOrderStatus
 from ..models.customer import Customer
 from ..models.aircraft import Aircraft
 from ..models.aircraft_type import AircraftType
 from ..models.audit_log import AuditLog
-from ..models.fuel_price import FuelPrice, FuelTypeEnum
+from ..models.fuel_price import FuelTypeEnum
 from .fee_calculation_service import FeeCalculationService, FeeCalculationContext
+from .fuel_price_cache import get_fuel_price_cache
+from .receipt_pdf_cache import FINALIZED_STATUSES, ReceiptPdfCache, get_receipt_pdf_cache
+from .receipt_pdf_export import stream_receipt_pdf_zip
+from ..utils.keyset_pagination import keyset_paginate
+from .receipt_pdf_renderer import ReceiptPdfData, render_receipt_pdf
 
 
 class ReceiptService:
     """Service for managing receipt lifecycle operations."""
     
-    def __init__(self):
-        """Initialize the service with fee calculation service."""
+    def __init__(self, pdf_cache: Optional[ReceiptPdfCache] = None):
+        """Initialize the service with fee calculation service and receipt PDF cache."""
         self.fee_calculation_service = FeeCalculationService()
+        self.pdf_cache = pdf_cache or get_receipt_pdf_cache()
     
     def create_draft_from_fuel_order(self, fuel_order_id: int, user_id: int) -> Receipt:
         """
@@ -367,18 +374,21 @@ class ReceiptService:
     
     def _get_fuel_price(self, fuel_type: str) -> Decimal:
         """
-        Get the current fuel price for a given fuel type from the database.
+        Get the current fuel price for a given fuel type.
         
         Args:
-            fuel_type: Type of fuel (e.g., 'JET_A', 'AVGAS_100LL', 'SAF_JET_A')
+            fuel_type: Type of fuel (e.g., 'JET_A', 'AVGAS_100LL', 'SAF_JET_A'), or a FuelType
             
         Returns:
             Price per gallon as Decimal
             
-        Note: This queries the fuel_prices table for the most recent price effective
-              as of the current date for the specified fuel type.
+        Note: The price is the most recent one effective as of now, looked up in the
+              process-local fuel price cache rather than the fuel_prices table.
         """
         try:
+            # Fuel orders reference a FuelType record rather than a name
+            fuel_type = getattr(fuel_type, 'code', fuel_type)
+            
             # Normalize fuel type string to match enum values
             # Handle variations in fuel type naming
             fuel_type_normalized = fuel_type.upper().replace(' ', '_').replace('-', '_')
@@ -404,16 +414,14 @@ class ReceiptService:
 
             # Find the most recent price for this fuel type
             # that is effective as of now
-            latest_price_record = (FuelPrice.query
-                                 .filter(
-                                     FuelPrice.fuel_type == fuel_type_enum,
-                                     FuelPrice.effective_date <= func.now()
-                                 )
-                                 .order_by(FuelPrice.effective_date.desc())
-                                 .first())
+            fuel_price_cache = get_fuel_price_cache()
+            latest_price_record = None
+            fuel_type_id = fuel_price_cache.get_fuel_type_id(fuel_type_enum.value)
+            if fuel_type_id is not None:
+                latest_price_record = fuel_price_cache.current_price(fuel_type_id)
 
             if latest_price_record:
-                current_app.logger.info(f"Found fuel price {latest_price_record.price} for {fuel_type_enum.value}")
+                current_app.logger.debug(f"Found fuel price {latest_price_record.price} for {fuel_type_enum.value}")
                 return latest_price_record.price
             else:
                 # Fallback: log warning and return a default price
@@ -474,6 +482,7 @@ class ReceiptService:
             receipt.updated_at = datetime.utcnow()
             
             db.session.commit()
+            self._schedule_pdf_render(receipt)
             
             current_app.logger.info(f"Generated receipt {receipt_number} (ID: {receipt_id})")
             return receipt
@@ -519,6 +528,7 @@ class ReceiptService:
             receipt.updated_at = datetime.utcnow()
             
             db.session.commit()
+            self._schedule_pdf_render(receipt)
             
             current_app.logger.info(f"Marked receipt {receipt.receipt_number} as paid")
             return receipt
@@ -533,53 +543,34 @@ class ReceiptService:
             raise
     
     def get_receipts(self, filters: Optional[Dict[str, Any]] = None, 
-                    page: int = 1, per_page: int = 50) -> Dict[str, Any]:
+                    page: int = 1, per_page: int = 50, cursor: Optional[str] = None,
+                    pagination: str = 'offset', include_total: bool = False) -> Dict[str, Any]:
         """
         Get a paginated list of receipts with optional filtering.
         
         Args:
             filters: Optional dictionary of filters (status, customer_id, date_range, etc.)
-            page: Page number (1-based)
+            page: Page number (1-based), offset mode only
             per_page: Number of receipts per page
+            cursor: Cursor from a previous page; implies cursor mode
+            pagination: 'offset' (page numbers with exact totals) or 'cursor'
+            include_total: In cursor mode, also return an approximate total
             
         Returns:
             Dictionary containing receipts list and pagination info
+            
+        Raises:
+            ValueError: If the cursor is malformed
         """
         try:
-            # Build base query
-            query = (Receipt.query
-                    .options(joinedload(Receipt.customer))
-                    .order_by(Receipt.created_at.desc()))
-            
-            # Apply filters if provided
-            if filters:
-                if 'status' in filters:
-                    status_filter = filters['status']
-                    if isinstance(status_filter, str):
-                        query = query.filter(Receipt.status == ReceiptStatus(status_filter))
-                
-                if 'customer_id' in filters:
-                    query = query.filter(Receipt.customer_id == filters['customer_id'])
-                
-                if 'date_from' in filters:
-                    query = query.filter(Receipt.created_at >= filters['date_from'])
-                
-                if 'date_to' in filters:
-                    query = query.filter(Receipt.created_at <= filters['date_to'])
-                
-                if 'search' in filters and filters['search']:
-                    search_term = f"%{filters['search']}%"
-                    # Import FuelOrder model for the join
-                    from ..models.fuel_order import FuelOrder
-                    from ..models.customer import Customer
-                    
-                    query = query.outerjoin(FuelOrder).outerjoin(Customer).filter(
-                        db.or_(
-                            Receipt.receipt_number.ilike(search_term),
-                            FuelOrder.tail_number.ilike(search_term),
-                            Customer.name.ilike(search_term)
-                        )
-                    )
+            query = self._build_receipts_query(filters).options(joinedload(Receipt.customer))
+            
+            if cursor or pagination == 'cursor':
+                keyset_page = keyset_paginate(query, Receipt, per_page, cursor=cursor, include_total=include_total)
+                return {
+                    'receipts': [receipt.to_dict() for receipt in keyset_page.items],
+                    'pagination': keyset_page.to_dict()
+                }
             
             # Apply pagination
             paginated_results = query.paginate(
@@ -604,6 +595,48 @@ class ReceiptService:
             current_app.logger.error(f"Database error fetching receipts: {str(e)}")
             raise
     
+    def _build_receipts_query(self, filters: Optional[Dict[str, Any]] = None):
+        """
+        Build the filtered receipt query shared by the list and export endpoints.
+        
+        Args:
+            filters: Optional dictionary of filters (status, customer_id, date_range, etc.)
+            
+        Returns:
+            Receipt query ordered newest first
+        """
+        # Build base query
+        query = Receipt.query.order_by(Receipt.created_at.desc())
+        
+        # Apply filters if provided
+        if filters:
+            if 'status' in filters:
+                status_filter = filters['status']
+                if isinstance(status_filter, str):
+                    query = query.filter(Receipt.status == ReceiptStatus(status_filter))
+            
+            if 'customer_id' in filters:
+                query = query.filter(Receipt.customer_id == filters['customer_id'])
+            
+            if 'date_from' in filters:
+                query = query.filter(Receipt.created_at >= filters['date_from'])
+            
+            if 'date_to' in filters:
+                query = query.filter(Receipt.created_at <= filters['date_to'])
+            
+            if 'search' in filters and filters['search']:
+                search_term = f"%{filters['search']}%"
+                
+                query = query.outerjoin(FuelOrder).outerjoin(Customer).filter(
+                    db.or_(
+                        Receipt.receipt_number.ilike(search_term),
+                        FuelOrder.tail_number.ilike(search_term),
+                        Customer.name.ilike(search_term)
+                    )
+                )
+        
+        return query
+    
     def get_receipt_by_id(self, receipt_id: int) -> Optional[Receipt]:
         """
         Get a specific receipt by ID.
@@ -634,27 +667,46 @@ class ReceiptService:
         """
         Generate a unique receipt number.
         
+        The sequence comes from the per-day receipt number counter, so the number
+        is allocated in O(1) and concurrent generate calls never share one.
+        
         Returns:
             Unique receipt number string
         """
         # Generate a global receipt number with date and sequence
-        today_prefix = f"R-{datetime.utcnow().strftime('%Y%m%d')}"
-        latest_receipt = (Receipt.query
-                         .filter(Receipt.receipt_number.like(f"{today_prefix}%"))
-                         .order_by(Receipt.receipt_number.desc())
-                         .first())
+        today = datetime.utcnow().date()
+        next_seq = self._next_receipt_sequence(today)
         
-        if latest_receipt:
-            # Extract sequence number and increment
-            try:
-                last_seq = int(latest_receipt.receipt_number.split('-')[-1])
-                next_seq = last_seq + 1
-            except (IndexError, ValueError):
-                next_seq = 1
+        return f"R-{today.strftime('%Y%m%d')}-{next_seq:04d}"
+    
+    def _next_receipt_sequence(self, receipt_date: date) -> int:
+        """
+        Atomically increment and return the receipt counter for a day.
+        
+        The counter row stays locked until the surrounding transaction ends, so
+        a rolled back generate call does not burn a number.
+        
+        Args:
+            receipt_date: Day the receipt number is issued for
+            
+        Returns:
+            Next sequence number for the day, starting at 1
+        """
+        if db.session.get_bind().dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
         else:
-            next_seq = 1
+            from sqlalchemy.dialects.sqlite import insert
+        
+        counters = ReceiptNumberCounter.__table__
+        statement = (insert(counters)
+                     .values(counter_date=receipt_date, last_value=1)
+                     .on_conflict_do_update(
+                         index_elements=[counters.c.counter_date],
+                         set_={'last_value': counters.c.last_value + 1}
+                     )
+                     .returning(counters.c.last_value))
         
-        return f"{today_prefix}-{next_seq:04d}"
+        return db.session.execute(statement).scalar_one()
     
     def void_receipt(self, receipt_id: int, user_id: int, reason: str = None) -> Receipt:
         """
@@ -697,6 +749,7 @@ class ReceiptService:
             db.session.add(audit_log)
             
             db.session.commit()
+            self._schedule_pdf_render(receipt)
             
             current_app.logger.info(f"Voided receipt {receipt.receipt_number or receipt_id} by user {user_id}")
             return receipt
@@ -846,247 +899,90 @@ class ReceiptService:
             ValueError: If receipt is not found or PDF generation fails
         """
         try:
-            from reportlab.lib.pagesizes import letter
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import inch
-            from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-            from reportlab.lib import colors
-            from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-            from datetime import datetime
-            import io
-            
-            # Get line items
-            line_items = ReceiptLineItem.query.filter_by(receipt_id=receipt.id).all()
-            
-            # Create PDF buffer
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
-            
-            # Container for the 'Flowable' objects
-            elements = []
-            
-            # Get styles
-            styles = getSampleStyleSheet()
-            
-            # Custom styles
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=24,
-                alignment=TA_CENTER,
-                textColor=colors.HexColor('#2563eb'),
-                spaceAfter=12,
-            )
-            
-            company_style = ParagraphStyle(
-                'CompanyInfo',
-                parent=styles['Normal'],
-                fontSize=10,
-                alignment=TA_CENTER,
-                textColor=colors.grey,
-                spaceAfter=20,
-            )
+            return render_receipt_pdf(self._build_pdf_data(receipt))
             
-            receipt_title_style = ParagraphStyle(
-                'ReceiptTitle',
-                parent=styles['Heading2'],
-                fontSize=18,
-                alignment=TA_CENTER,
-                spaceAfter=6,
-            )
-            
-            receipt_number_style = ParagraphStyle(
-                'ReceiptNumber',
-                parent=styles['Normal'],
-                fontSize=14,
-                fontName='Courier-Bold',
-                alignment=TA_CENTER,
-                spaceAfter=12,
-            )
-            
-            section_title_style = ParagraphStyle(
-                'SectionTitle',
-                parent=styles['Heading3'],
-                fontSize=12,
-                textColor=colors.HexColor('#2563eb'),
-                spaceAfter=6,
-            )
-            
-            # Company header
-            elements.append(Paragraph("FBO LaunchPad", title_style))
-            elements.append(Paragraph("Professional Aviation Services<br/>Main Terminal, Gate A1<br/>Phone: (555) 123-4567", company_style))
-            
-            # Receipt title and number
-            elements.append(Paragraph("RECEIPT", receipt_title_style))
-            elements.append(Paragraph(f"{receipt.receipt_number or receipt.id}", receipt_number_style))
-            
-            # Status badge (simplified as text)
-            if receipt.status:
-                status_text = f"Status: {receipt.status.value if hasattr(receipt.status, 'value') else receipt.status}"
-                elements.append(Paragraph(status_text, styles['Normal']))
-            
-            # Add VOID watermark if needed
-            if hasattr(receipt.status, 'value') and receipt.status.value == 'VOID':
-                void_style = ParagraphStyle(
-                    'VoidWatermark',
-                    parent=styles['Normal'],
-                    fontSize=48,
-                    alignment=TA_CENTER,
-                    textColor=colors.red,
-                    spaceAfter=12,
-                )
-                elements.append(Paragraph("VOID", void_style))
-            
-            elements.append(Spacer(1, 20))
-            
-            # Receipt information table
-            elements.append(Paragraph("Receipt Information", section_title_style))
-            
-            receipt_info_data = [
-                ['Receipt Number:', str(receipt.receipt_number or receipt.id)],
-                ['Generated:', receipt.generated_at.strftime('%B %d, %Y at %I:%M %p') if receipt.generated_at else 'N/A'],
-                ['Fuel Order ID:', f"#{receipt.fuel_order_id}"],
-            ]
-            
-            if receipt.paid_at:
-                receipt_info_data.insert(2, ['Paid:', receipt.paid_at.strftime('%B %d, %Y at %I:%M %p')])
-            
-            receipt_info_table = Table(receipt_info_data, colWidths=[2*inch, 3*inch])
-            receipt_info_table.setStyle(TableStyle([
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-            ]))
-            elements.append(receipt_info_table)
-            elements.append(Spacer(1, 15))
-            
-            # Aircraft and Customer information
-            elements.append(Paragraph("Aircraft & Customer Information", section_title_style))
-            
-            aircraft_info_data = [
-                ['Tail Number:', getattr(receipt.fuel_order, 'tail_number', 'N/A') if receipt.fuel_order else 'N/A'],
-                ['Customer:', receipt.customer.name if receipt.customer else 'N/A'],
-            ]
-            
-            if receipt.aircraft_type_at_receipt_time:
-                aircraft_info_data.insert(1, ['Aircraft Type:', receipt.aircraft_type_at_receipt_time])
-            
-            if receipt.is_caa_applied:
-                aircraft_info_data.append(['CAA Member:', 'Yes'])
-            
-            aircraft_info_table = Table(aircraft_info_data, colWidths=[2*inch, 3*inch])
-            aircraft_info_table.setStyle(TableStyle([
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-            ]))
-            elements.append(aircraft_info_table)
-            elements.append(Spacer(1, 15))
-            
-            # Fueling details
-            elements.append(Paragraph("Fueling Details", section_title_style))
-            
-            fueling_data = [
-                ['Fuel Type:', receipt.fuel_type_at_receipt_time or 'N/A'],
-                ['Quantity:', f"{receipt.fuel_quantity_gallons_at_receipt_time or 'N/A'} gallons"],
-                ['Price per Gallon:', f"${receipt.fuel_unit_price_at_receipt_time or 0:.2f}"],
-            ]
-            
-            fueling_table = Table(fueling_data, colWidths=[2*inch, 3*inch])
-            fueling_table.setStyle(TableStyle([
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-            ]))
-            elements.append(fueling_table)
-            elements.append(Spacer(1, 20))
-            
-            # Line items table
-            elements.append(Paragraph("Line Items", section_title_style))
-            
-            line_items_data = [['Description', 'Type', 'Quantity', 'Unit Price', 'Amount']]
-            
-            for item in line_items:
-                line_items_data.append([
-                    item.description or '',
-                    item.line_item_type.value if hasattr(item.line_item_type, 'value') else str(item.line_item_type),
-                    str(item.quantity or ''),
-                    f"${item.unit_price or 0:.2f}",
-                    f"${item.amount or 0:.2f}"
-                ])
-            
-            line_items_table = Table(line_items_data, colWidths=[2.5*inch, 0.8*inch, 0.8*inch, 0.9*inch, 1*inch])
-            line_items_table.setStyle(TableStyle([
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-                ('ALIGN', (2, 0), (-1, -1), 'RIGHT'),
-            ]))
-            elements.append(line_items_table)
-            elements.append(Spacer(1, 20))
-            
-            # Totals
-            elements.append(Paragraph("Totals", section_title_style))
-            
-            totals_data = [
-                ['Fuel Subtotal:', f"${receipt.fuel_subtotal or 0:.2f}"],
-                ['Total Fees:', f"${receipt.total_fees_amount or 0:.2f}"],
-                ['Total Waivers:', f"-${receipt.total_waivers_amount or 0:.2f}"],
-                ['Tax:', f"${receipt.tax_amount or 0:.2f}"],
-                ['Grand Total:', f"${receipt.grand_total_amount or 0:.2f}"],
-            ]
-            
-            totals_table = Table(totals_data, colWidths=[2*inch, 1.5*inch])
-            totals_table.setStyle(TableStyle([
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, -1), (-1, -1), 12),
-                ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-                ('TEXTCOLOR', (0, -1), (-1, -1), colors.HexColor('#2563eb')),
-            ]))
-            elements.append(totals_table)
-            elements.append(Spacer(1, 30))
-            
-            # Footer
-            footer_style = ParagraphStyle(
-                'Footer',
-                parent=styles['Normal'],
-                fontSize=8,
-                alignment=TA_CENTER,
-                textColor=colors.grey,
-            )
-            
-            elements.append(Paragraph("Thank you for choosing FBO LaunchPad for your aviation needs.", footer_style))
-            elements.append(Paragraph(f"Generated on {datetime.utcnow().strftime('%B %d, %Y at %I:%M %p')}", footer_style))
-            
-            # Build PDF
-            doc.build(elements)
-            
-            # Get the value of the BytesIO buffer and return it
-            pdf_data = buffer.getvalue()
-            buffer.close()
+        except ImportError:
+            current_app.logger.error("ReportLab not available for PDF generation")
+            raise ValueError("PDF generation not available - ReportLab not installed")
+        except Exception as e:
+            current_app.logger.error(f"Error generating PDF: {str(e)}")
+            raise ValueError(f"Failed to generate PDF: {str(e)}")
+    
+    def get_receipt_pdf_path(self, receipt: Receipt) -> Optional[str]:
+        """
+        Get the cached PDF file for a finalized receipt, rendering it on a cache miss.
+        
+        Concurrent requests for the same receipt wait on a single render.
+        
+        Args:
+            receipt: The receipt to get the PDF for
             
-            return pdf_data
+        Returns:
+            Path to the PDF file, or None for draft receipts (which are never cached)
             
+        Raises:
+            ValueError: If PDF generation fails
+        """
+        if receipt.status is None or receipt.status.value not in FINALIZED_STATUSES:
+            return None
+        
+        try:
+            return self.pdf_cache.get_pdf_path(self._build_pdf_data(receipt))
         except ImportError:
             current_app.logger.error("ReportLab not available for PDF generation")
             raise ValueError("PDF generation not available - ReportLab not installed")
         except Exception as e:
-            current_app.logger.error(f"Error generating PDF: {str(e)}")
-            raise ValueError(f"Failed to generate PDF: {str(e)}") 
\ No newline at end of file
+            current_app.logger.error(f"Error generating PDF for receipt {receipt.id}: {str(e)}")
+            raise ValueError(f"Failed to generate PDF: {str(e)}")
+    
+    def _schedule_pdf_render(self, receipt: Receipt):
+        """Pre-render a newly finalized receipt's PDF in the background."""
+        try:
+            self.pdf_cache.schedule(lambda: self._build_pdf_data(receipt))
+        except Exception as e:
+            # The PDF is rendered on demand instead; never fail the status change over it
+            current_app.logger.warning(f"Could not schedule PDF render for receipt {receipt.id}: {str(e)}")
+    
+    def export_receipt_pdfs(self, filters: Optional[Dict[str, Any]] = None,
+                            batch_size: int = 200) -> Iterator[bytes]:
+        """
+        Stream a ZIP archive of receipt PDFs matching the list filters.
+        
+        Receipts are read from the database in batches with their line items
+        loaded per batch, and PDFs are rendered in parallel by the PDF worker
+        pool. The archive is yielded chunk by chunk as entries complete.
+        
+        Args:
+            filters: Same filters as get_receipts
+            batch_size: Number of receipts loaded from the database at a time
+            
+        Returns:
+            Iterator of ZIP archive bytes
+        """
+        query = (self._build_receipts_query(filters)
+                 .options(joinedload(Receipt.customer), joinedload(Receipt.fuel_order))
+                 .yield_per(batch_size))
+        
+        return stream_receipt_pdf_zip(self._iter_pdf_data(query, batch_size), self.pdf_cache)
+    
+    def _iter_pdf_data(self, query, batch_size: int) -> Iterator[ReceiptPdfData]:
+        """Snapshot receipts from a query for rendering, loading line items one batch at a time."""
+        receipts = iter(query)
+        while True:
+            batch = list(islice(receipts, batch_size))
+            if not batch:
+                return
+            
+            line_items_by_receipt: Dict[int, List[ReceiptLineItem]] = {}
+            for item in (ReceiptLineItem.query
+                         .filter(ReceiptLineItem.receipt_id.in_([receipt.id for receipt in batch]))
+                         .order_by(ReceiptLineItem.id)):
+                line_items_by_receipt.setdefault(item.receipt_id, []).append(item)
+            
+            for receipt in batch:
+                yield ReceiptPdfData.from_receipt(receipt, line_items_by_receipt.get(receipt.id, []))
+    
+    def _build_pdf_data(self, receipt: Receipt) -> ReceiptPdfData:
+        """Snapshot a receipt and its line items for rendering."""
+        line_items = ReceiptLineItem.query.filter_by(receipt_id=receipt.id).all()
+        return ReceiptPdfData.from_receipt(receipt, line_items) 
\ No newline at end of file
@@ -4,6 +4,10 @@ Redis Permission Cache Service
 Phase 4 Step 3: Performance Optimization & Production Features
 
 Enhanced Redis caching with connection pooling, cluster support, and monitoring.
+
+Per-user keys ("perm:<user_id>:...") are tagged: every write also adds the
+key to the user's tag set, so invalidating any number of users is a single
+server-side script call instead of a KEYS walk over the whole keyspace.
 """
 
 import time
@@ -11,6 +15,7 @@ import threading
 import json
 import logging
 import hashlib
+import re
 from typing import Dict, List, Optional, Any, Union, Tuple
 from dataclasses import dataclass
 from datetime import datetime, timedelta
@@ -34,6 +39,22 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Per-user cache keys look like "perm:<user_id>:..."
+_USER_KEY_PATTERN = re.compile(r'^perm:(\d+):')
+
+# Deletes every key listed in the given tag sets, then the tag sets themselves
+_INVALIDATE_TAGS_SCRIPT = """
+local removed = 0
+for _, tag in ipairs(KEYS) do
+    local members = redis.call('SMEMBERS', tag)
+    for i = 1, #members, 1000 do
+        removed = removed + redis.call('DEL', unpack(members, i, math.min(i + 999, #members)))
+    end
+    redis.call('DEL', tag)
+end
+return removed
+"""
+
 @dataclass
 class CacheStats:
     """Cache performance statistics."""
@@ -84,6 +105,10 @@ class RedisPermissionCache:
         # Configuration defaults
         self.default_ttl = 1800  # 30 minutes
         self.key_prefix = "fbo:perm:"
+        self.tag_ttl = self.default_ttl * 2
+        self.is_cluster_mode = False
+        self.is_sentinel_mode = False
+        self._invalidate_tags_script = None
         
         # Connection settings with defaults
         self.connection_config = {
@@ -211,13 +236,21 @@ class RedisPermissionCache:
             self._update_response_time(response_time)
     
     def set(self, key: str, value: Any, ttl: int = 1800) -> bool:
-        """Set value in cache with TTL."""
+        """Set value in cache with TTL, tagging per-user keys."""
         try:
             if not self.redis_client:
                 return False
             
             serialized_value = json.dumps(value)
-            result = self.redis_client.setex(key, ttl, serialized_value)
+            
+            user_id = self.user_id_for(key)
+            if user_id is None:
+                result = self.redis_client.setex(key, ttl, serialized_value)
+            else:
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.setex(key, ttl, serialized_value)
+                self._tag_keys(pipe, user_id, [key], ttl)
+                result = pipe.execute()[0]
             
             logger.debug(f"Cache SET for key: {key} (TTL: {ttl}s)")
             return bool(result)
@@ -227,6 +260,22 @@ class RedisPermissionCache:
             logger.error(f"Redis SET error for key {key}: {e}")
             return False
     
+    @staticmethod
+    def user_id_for(key: str) -> Optional[int]:
+        """User id a cache key belongs to, or None for keys that are not per-user."""
+        match = _USER_KEY_PATTERN.match(key)
+        return int(match.group(1)) if match else None
+    
+    def user_tag_key(self, user_id: int) -> str:
+        """Key of the set holding every cache key written for a user."""
+        return f"{self.key_prefix}tag:user:{user_id}"
+    
+    def _tag_keys(self, pipe, user_id: int, keys: List[str], ttl: int):
+        """Queue adding keys to a user's tag set, keeping the tag alive at least as long as them."""
+        tag = self.user_tag_key(user_id)
+        pipe.sadd(tag, *keys)
+        pipe.expire(tag, max(ttl, self.tag_ttl))
+    
     def delete(self, key: str) -> bool:
         """Delete key from cache."""
         try:
@@ -246,47 +295,84 @@ class RedisPermissionCache:
             logger.error(f"Redis DELETE error for key {key}: {e}")
             return False
     
-    def delete_pattern(self, pattern: str) -> int:
-        """Delete all keys matching pattern."""
+    def delete_pattern(self, pattern: str, batch_size: int = 500) -> int:
+        """Delete all keys matching pattern, walking the keyspace with SCAN."""
         try:
             if not self.redis_client:
                 return 0
             
-            keys = self.redis_client.keys(pattern)
-            if keys:
-                deleted = self.redis_client.delete(*keys)
+            deleted = 0
+            batch = []
+            for key in self.redis_client.scan_iter(match=pattern, count=batch_size):
+                batch.append(key)
+                if len(batch) >= batch_size:
+                    deleted += self.redis_client.delete(*batch)
+                    batch = []
+            if batch:
+                deleted += self.redis_client.delete(*batch)
+            
+            if deleted:
                 self.stats.invalidations += deleted
                 logger.info(f"Cache pattern DELETE: {pattern} (deleted {deleted} keys)")
-                return deleted
+            return deleted
             
+        except Exception as e:
+            self.stats.errors += 1
+            logger.error(f"Redis pattern DELETE error for pattern {pattern}: {e}")
             return 0
+    
+    def invalidate_users(self, user_ids) -> int:
+        """Invalidate every tagged permission cache entry for the given users in one round-trip."""
+        user_ids = list(user_ids)
+        try:
+            if not self.redis_client or not user_ids:
+                return 0
+            
+            tags = [self.user_tag_key(user_id) for user_id in user_ids]
+            if self.is_cluster_mode:
+                # Tagged keys hash to different slots, so no single script can reach them all
+                deleted = self._invalidate_tags_pipelined(tags)
+            else:
+                if self._invalidate_tags_script is None:
+                    self._invalidate_tags_script = self.redis_client.register_script(_INVALIDATE_TAGS_SCRIPT)
+                deleted = self._invalidate_tags_script(keys=tags)
+            
+            self.stats.invalidations += deleted
+            logger.debug(f"Invalidated {deleted} cache keys for {len(user_ids)} users")
+            return deleted
             
         except Exception as e:
             self.stats.errors += 1
-            logger.error(f"Redis pattern DELETE error for pattern {pattern}: {e}")
+            logger.error(f"Redis invalidation error for users {user_ids}: {e}")
             return 0
     
+    def _invalidate_tags_pipelined(self, tags: List[str]) -> int:
+        """Cluster fallback: read all tag sets in one pipeline, then delete their keys in another."""
+        pipe = self.redis_client.pipeline()
+        for tag in tags:
+            pipe.smembers(tag)
+        keys = set().union(*pipe.execute())
+        
+        pipe = self.redis_client.pipeline()
+        for key in keys:
+            pipe.delete(key)
+        for tag in tags:
+            pipe.delete(tag)
+        return sum(pipe.execute()[:len(keys)])
+    
     def invalidate_user_permissions(self, user_id: int) -> int:
         """Invalidate all permission cache entries for a user."""
-        pattern = f"perm:{user_id}:*"
-        return self.delete_pattern(pattern)
+        return self.invalidate_users([user_id])
     
     def invalidate_role_permissions(self, role_id: int) -> int:
         """Invalidate permissions for all users with a specific role."""
         try:
-            # Import here to avoid circular imports
-            from ..models.role import Role
-            
-            role = Role.query.get(role_id)
-            if not role:
-                return 0
+            from .permission_bitset import affected_user_ids
             
-            total_deleted = 0
-            for user in role.users:
-                deleted = self.invalidate_user_permissions(user.id)
-                total_deleted += deleted
+            user_ids = affected_user_ids(role_id=role_id)
+            total_deleted = self.invalidate_users(user_ids)
             
-            logger.info(f"Invalidated permissions for role {role.name} (affected {len(role.users)} users)")
+            logger.info(f"Invalidated permissions for role {role_id} (affected {len(user_ids)} users)")
             return total_deleted
             
         except Exception as e:
@@ -296,33 +382,22 @@ class RedisPermissionCache:
     def invalidate_permission_group(self, group_id: int) -> int:
         """Invalidate cache for all users affected by permission group changes."""
         try:
-            from ..models.permission_group import PermissionGroup, RolePermissionGroup
-            
-            group = PermissionGroup.query.get(group_id)
-            if not group:
-                return 0
-            
-            affected_users = set()
+            from .permission_bitset import affected_user_ids
             
-            # Get all roles assigned to this group
-            role_groups = RolePermissionGroup.query.filter_by(group_id=group_id).all()
-            for role_group in role_groups:
-                for user in role_group.role.users:
-                    affected_users.add(user.id)
+            user_ids = affected_user_ids(group_id=group_id)
+            total_deleted = self.invalidate_users(user_ids)
             
-            # Invalidate cache for each affected user
-            total_deleted = 0
-            for user_id in affected_users:
-                deleted = self.invalidate_user_permissions(user_id)
-                total_deleted += deleted
-            
-            logger.info(f"Invalidated permissions for group {group.name} (affected {len(affected_users)} users)")
+            logger.info(f"Invalidated permissions for group {group_id} (affected {len(user_ids)} users)")
             return total_deleted
             
         except Exception as e:
             logger.error(f"Error invalidating group permissions: {e}")
             return 0
     
+    def clear_all(self) -> int:
+        """Remove every permission cache entry and tag set."""
+        return self.delete_pattern("perm:*") + self.delete_pattern(f"{self.key_prefix}tag:*")
+    
     def health_check(self) -> Dict[str, Any]:
         """Perform health check on Redis connection."""
         try:
@@ -451,8 +526,15 @@ class RedisPermissionCache:
             pipe.mset(redis_data)
             
             # Set TTL for each key
+            keys_by_user = defaultdict(list)
             for key in data.keys():
                 pipe.expire(key, ttl)
+                user_id = self.user_id_for(key)
+                if user_id is not None:
+                    keys_by_user[user_id].append(key)
+            
+            for user_id, keys in keys_by_user.items():
+                self._tag_keys(pipe, user_id, keys, ttl)
             
             pipe.execute()
             
@@ -0,0 +1,115 @@
+"""
+Redis Version Counter
+
+Cache version shared by every worker through a Redis counter (REDIS_URL), used
+by the fee schedule and fuel price caches to notice each other's writes.
+
+- Reading the version is a single GET; bumping it is an INCR
+- When Redis is unreachable the counter is process-local and reconnecting is
+  retried at most every REDIS_RETRY_SECONDS, so callers bound their snapshots
+  by a TTL instead
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Tuple
+
+from flask import current_app
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class RedisVersionCounter:
+    """Version counter kept under one Redis key, with a process-local fallback."""
+
+    REDIS_RETRY_SECONDS = 30
+
+    def __init__(self, key: str, description: str):
+        self.key = key
+        # Used in log messages, e.g. "fee schedule"
+        self.description = description
+        self.lock = threading.Lock()
+        self._local_version = 0
+        self._redis_client = None
+        self._redis_retry_at = 0.0
+
+    def _get_redis_client(self):
+        """Return a Redis client, or None while Redis is unreachable."""
+        if not REDIS_AVAILABLE:
+            return None
+        if self._redis_client is not None:
+            return self._redis_client
+        if time.monotonic() < self._redis_retry_at:
+            return None
+
+        try:
+            try:
+                redis_url = current_app.config.get('REDIS_URL') or os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+            except RuntimeError:
+                redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+
+            client = redis.Redis.from_url(
+                redis_url,
+                decode_responses=True,
+                socket_connect_timeout=1,
+                socket_timeout=1
+            )
+            client.ping()
+            self._redis_client = client
+        except Exception as e:
+            logger.debug(f"{self.description.capitalize()} version store unavailable, using local versioning: {e}")
+            self._redis_retry_at = time.monotonic() + self.REDIS_RETRY_SECONDS
+            self._redis_client = None
+
+        return self._redis_client
+
+    def _drop_redis_client(self):
+        self._redis_client = None
+        self._redis_retry_at = time.monotonic() + self.REDIS_RETRY_SECONDS
+
+    def current(self) -> Tuple[int, bool]:
+        """
+        Get the current version.
+
+        Returns:
+            Tuple of (version, is_shared) where is_shared is False when the
+            version only reflects bumps made by this process.
+        """
+        client = self._get_redis_client()
+        if client is not None:
+            try:
+                return int(client.get(self.key) or 0), True
+            except Exception as e:
+                logger.warning(f"Error reading {self.description} version: {e}")
+                self._drop_redis_client()
+        return self._local_version, False
+
+    def bump(self) -> int:
+        """
+        Increment the version, in Redis when it is reachable.
+
+        Returns:
+            The new version
+        """
+        with self.lock:
+            self._local_version += 1
+            version = self._local_version
+
+        client = self._get_redis_client()
+        if client is not None:
+            try:
+                version = int(client.incr(self.key))
+            except Exception as e:
+                logger.warning(f"Error bumping {self.description} version: {e}")
+                self._drop_redis_client()
+
+        return version
@@ -0,0 +1,177 @@
+"""
+Single-Flight Request Coalescing
+
+When a hot cache entry expires, every concurrent request that needs it would
+otherwise recompute it at once (the dashboard alone fires 6-10 requests in
+parallel). SingleFlight lets one caller per key compute while the others
+wait for and share its result.
+
+- Within a process, callers for the same key wait on an Event, which
+  yields to other greenlets under eventlet
+- Optionally, the caller that computes also takes a short Redis lock
+  (SET NX PX), so callers in other workers poll the shared cache for the
+  result instead of recomputing; a lock holder that dies only delays them
+  until the lock expires
+- Results and exceptions are both shared with the waiters
+- forget(key) detaches an in-flight computation once its inputs change, so
+  later callers do not coalesce onto a result that is already stale
+"""
+
+import logging
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Only delete the lock if this caller still owns it
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+@dataclass
+class SingleFlightStats:
+    """Single-flight statistics."""
+    leaders: int = 0
+    coalesced_waits: int = 0
+    coalesced_wait_ms: float = 0.0
+    redis_lock_acquired: int = 0
+    redis_lock_waits: int = 0
+    redis_lock_fallbacks: int = 0
+
+
+class _Call:
+    """One in-flight computation that other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Per-key request coalescing, optionally across workers through a Redis lock."""
+
+    def __init__(self, lock_prefix: str = "fbo:perm:lock:", lock_ttl_ms: int = 5000,
+                 poll_interval: float = 0.02):
+        self.lock_prefix = lock_prefix
+        self.lock_ttl_ms = lock_ttl_ms
+        self.poll_interval = poll_interval
+        self.lock = threading.Lock()
+        self.stats = SingleFlightStats()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, compute: Callable[[], Any],
+           recheck: Optional[Callable[[], Any]] = None, redis_client=None) -> Any:
+        """
+        Return compute() for key, sharing one computation among concurrent callers.
+
+        With redis_client, the computing caller first takes a cross-worker lock;
+        if another worker holds it, recheck() is polled until that worker's
+        result shows up (recheck returns None until then).
+        """
+        with self.lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats.leaders += 1
+
+        if not leader:
+            started = time.monotonic()
+            call.done.wait()
+            with self.lock:
+                self.stats.coalesced_waits += 1
+                self.stats.coalesced_wait_ms += (time.monotonic() - started) * 1000
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            if redis_client is not None and recheck is not None:
+                call.result = self._compute_with_redis_lock(key, compute, recheck, redis_client)
+            else:
+                call.result = compute()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+    def forget(self, key: Hashable):
+        """
+        Stop coalescing new callers onto the in-flight computation for key.
+
+        Callers already waiting still get its result; later callers start a
+        fresh computation, e.g. because the data it reads has just changed.
+        """
+        with self.lock:
+            self._calls.pop(key, None)
+
+    def forget_all(self):
+        """forget() every in-flight key."""
+        with self.lock:
+            self._calls.clear()
+
+    def _compute_with_redis_lock(self, key: Hashable, compute: Callable[[], Any],
+                                 recheck: Callable[[], Any], redis_client) -> Any:
+        lock_key = f"{self.lock_prefix}{key}"
+        token = uuid.uuid4().hex
+
+        try:
+            acquired = redis_client.set(lock_key, token, nx=True, px=self.lock_ttl_ms)
+        except Exception as e:
+            logger.warning(f"Single-flight lock unavailable for {key}, computing locally: {e}")
+            return compute()
+
+        if acquired:
+            self.stats.redis_lock_acquired += 1
+            try:
+                return compute()
+            finally:
+                try:
+                    redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                except Exception as e:
+                    logger.warning(f"Failed to release single-flight lock {lock_key}: {e}")
+
+        # Another worker is computing; wait for its result to land in the shared cache
+        self.stats.redis_lock_waits += 1
+        deadline = time.monotonic() + self.lock_ttl_ms / 1000
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            result = recheck()
+            if result is not None:
+                return result
+            try:
+                if not redis_client.exists(lock_key):
+                    break
+            except Exception:
+                break
+
+        self.stats.redis_lock_fallbacks += 1
+        return compute()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics."""
+        with self.lock:
+            in_flight = len(self._calls)
+        return {
+            'in_flight': in_flight,
+            'leaders': self.stats.leaders,
+            'coalesced_waits': self.stats.coalesced_waits,
+            'avg_coalesced_wait_ms': round(self.stats.coalesced_wait_ms / self.stats.coalesced_waits, 2)
+            if self.stats.coalesced_waits else 0.0,
+            'redis_lock_acquired': self.stats.redis_lock_acquired,
+            'redis_lock_waits': self.stats.redis_lock_waits,
+            'redis_lock_fallbacks': self.stats.redis_lock_fallbacks
+        }
@@ -11,7 +11,7 @@ from ..models.permission import Permission
 from ..models.permission_group import PermissionGroup
 from ..models.user_permission import UserPermission
 from ..extensions import db
-from ..services.permission_service import PermissionService
+from ..services.permission_service import PermissionService, enhanced_permission_service
 
 
 class UserService:
@@ -230,7 +230,7 @@ class UserService:
             
             # Cache invalidation: If roles were updated, invalidate user's permission cache
             if 'role_ids' in data:
-                PermissionService.invalidate_user_cache(user_to_update.id)
+                enhanced_permission_service.invalidate_user_cache(user_to_update.id)
             
             return user_to_update, "User updated successfully", 200
 
@@ -626,17 +626,18 @@ class UserService:
             # Get all permissions
             permissions = Permission.query.filter(Permission.is_active == True).all()
             
+            # Resolve every (user, permission) pair in bulk from the cached bitsets
+            checks = enhanced_permission_service.check_many(
+                [user.id for user in users], [permission.name for permission in permissions]
+            )
+            
             # Build matrix
             matrix = {}
             for user in users:
                 matrix[str(user.id)] = {
                     'username': user.username,
-                    'permissions': {}
+                    'permissions': checks[user.id]
                 }
-                
-                for permission in permissions:
-                    has_perm = user.has_permission(permission.name)
-                    matrix[str(user.id)]['permissions'][permission.name] = has_perm
             
             return matrix
             
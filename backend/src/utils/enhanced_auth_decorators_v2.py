@@ -6,8 +6,8 @@ Advanced decorators with resource context, caching, and permission groups.
 import functools
 import logging
 from typing import Dict, List, Optional, Union, Callable, Any
-from flask import request, jsonify, g
-from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask import request, jsonify, g, current_app
+from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request
 
 from ..services.permission_service import (
     enhanced_permission_service,
@@ -16,6 +16,20 @@ from ..services.permission_service import (
 
 logger = logging.getLogger(__name__)
 
+def _get_current_user(current_user_id: int):
+    """The authenticated user, reusing the one jwt.user_lookup_loader already loaded."""
+    current_user = getattr(g, 'current_user', None)
+    if current_user is not None and current_user.id == current_user_id:
+        return current_user
+    from ..models.user import User
+    return User.query.get(current_user_id)
+
+def _check_token_permissions(current_user_id: int, permissions) -> Optional[Dict[str, bool]]:
+    """Grants read from the token's permission claims, or None to use the service path."""
+    if not current_app.config.get('PERMISSION_JWT_CLAIMS_ENABLED'):
+        return None
+    return enhanced_permission_service.check_token_permissions(current_user_id, get_jwt(), permissions)
+
 def require_permission_v2(permission: str, 
                          resource_context: Optional[Union[Dict, ResourceContext]] = None,
                          allow_self: bool = False,
@@ -57,8 +71,7 @@ def require_permission_v2(permission: str,
                 # Convert user_id to integer and get user object
                 try:
                     current_user_id = int(current_user_id)
-                    from ..models.user import User
-                    current_user = User.query.get(current_user_id)
+                    current_user = _get_current_user(current_user_id)
                     if not current_user:
                         logger.warning(f"User {current_user_id} not found during permission check")
                         return jsonify({'error': 'User not found'}), 401
@@ -81,12 +94,16 @@ def require_permission_v2(permission: str,
                         logger.debug(f"Self-access allowed for user {current_user_id}")
                         return f(*args, **kwargs)
                 
-                # Check permission using enhanced service
-                has_permission = enhanced_permission_service.user_has_permission(
-                    user_id=current_user_id,
-                    permission=permission,
-                    resource_context=context
-                )
+                # Check permission from current token claims, else using enhanced service
+                token_grants = None if context else _check_token_permissions(current_user_id, [permission])
+                if token_grants is not None:
+                    has_permission = token_grants[permission]
+                else:
+                    has_permission = enhanced_permission_service.user_has_permission(
+                        user_id=current_user_id,
+                        permission=permission,
+                        resource_context=context
+                    )
                 
                 if not has_permission:
                     logger.warning(f"Permission denied: user {current_user_id} lacks '{permission}'")
@@ -145,8 +162,7 @@ def require_any_permission_v2(*permissions: str,
                 # Convert user_id to integer and get user object
                 try:
                     current_user_id = int(current_user_id)
-                    from ..models.user import User
-                    current_user = User.query.get(current_user_id)
+                    current_user = _get_current_user(current_user_id)
                     if not current_user:
                         logger.warning(f"User {current_user_id} not found during permission check")
                         return jsonify({'error': 'User not found'}), 401
@@ -163,16 +179,19 @@ def require_any_permission_v2(*permissions: str,
                 if resource_context:
                     context = _process_resource_context(resource_context, kwargs)
                 
-                # Check if user has any of the required permissions
+                # Check if user has any of the required permissions, resolving the grants in one batch
                 has_any_permission = False
                 granted_permission = None
+                granted = _check_token_permissions(current_user_id, permissions)
+                if granted is None:
+                    granted = enhanced_permission_service.check_many([current_user_id], permissions)[current_user_id]
                 
                 for permission in permissions:
-                    if enhanced_permission_service.user_has_permission(
+                    if granted[permission] and (context is None or enhanced_permission_service.user_has_permission(
                         user_id=current_user_id,
                         permission=permission,
                         resource_context=context
-                    ):
+                    )):
                         has_any_permission = True
                         granted_permission = permission
                         break
@@ -239,8 +258,7 @@ def require_all_permissions_v2(*permissions: str,
                 # Convert user_id to integer and get user object
                 try:
                     current_user_id = int(current_user_id)
-                    from ..models.user import User
-                    current_user = User.query.get(current_user_id)
+                    current_user = _get_current_user(current_user_id)
                     if not current_user:
                         print("--- ALL_PERMISSIONS DECORATOR: User not found in DB!", flush=True)
                         logger.warning(f"User {current_user_id} not found during permission check")
@@ -260,15 +278,18 @@ def require_all_permissions_v2(*permissions: str,
                 if resource_context:
                     context = _process_resource_context(resource_context, kwargs)
                 
-                # Check if user has all required permissions
+                # Check if user has all required permissions, resolving the grants in one batch
                 missing_permissions = []
+                granted = _check_token_permissions(current_user_id, permissions)
+                if granted is None:
+                    granted = enhanced_permission_service.check_many([current_user_id], permissions)[current_user_id]
                 
                 for permission in permissions:
-                    if not enhanced_permission_service.user_has_permission(
+                    if not granted[permission] or (context is not None and not enhanced_permission_service.user_has_permission(
                         user_id=current_user_id,
                         permission=permission,
                         resource_context=context
-                    ):
+                    )):
                         missing_permissions.append(permission)
                 
                 if missing_permissions:
@@ -338,8 +359,7 @@ def require_permission_or_ownership_v2(permission: str,
                 # Convert user_id to integer and get user object
                 try:
                     current_user_id = int(current_user_id)
-                    from ..models.user import User
-                    current_user = User.query.get(current_user_id)
+                    current_user = _get_current_user(current_user_id)
                     if not current_user:
                         print("--- OWNERSHIP DECORATOR: User not found in DB!", flush=True)
                         logger.warning(f"User {current_user_id} not found during permission check")
@@ -361,10 +381,14 @@ def require_permission_or_ownership_v2(permission: str,
                     return jsonify({'error': 'Invalid resource identifier'}), 400
                 
                 # First check: Does user have the general permission?
-                has_general_permission = enhanced_permission_service.user_has_permission(
-                    user_id=current_user_id,
-                    permission=permission
-                )
+                token_grants = _check_token_permissions(current_user_id, [permission])
+                if token_grants is not None:
+                    has_general_permission = token_grants[permission]
+                else:
+                    has_general_permission = enhanced_permission_service.user_has_permission(
+                        user_id=current_user_id,
+                        permission=permission
+                    )
                 
                 if has_general_permission:
                     print(f"--- OWNERSHIP DECORATOR: User has general permission '{permission}'. Calling route function.", flush=True)
@@ -0,0 +1,175 @@
+"""
+Keyset (cursor) pagination for newest-first listings.
+
+OFFSET/LIMIT pagination makes the database walk and discard every row before
+the requested page, and Flask-SQLAlchemy's paginate() adds a COUNT(*) over the
+whole filtered query on every request. Keyset pagination instead seeks
+directly past the last row of the previous page using the (created_at, id)
+composite index, so every page costs the same.
+
+- Pages are ordered by (created_at DESC, id DESC); id breaks ties between
+  rows created in the same instant
+- Cursors are opaque URL-safe tokens carrying the boundary row's key and
+  the direction to page in
+- Totals are optional and approximate: the pg_class row estimate for
+  unfiltered PostgreSQL listings, otherwise a count cached for a minute
+"""
+
+import base64
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, text, tuple_
+
+from ..extensions import db
+
+NEXT = 'next'
+PREV = 'prev'
+
+COUNT_CACHE_TTL_SECONDS = 60
+
+_count_cache: Dict[str, Tuple[float, int]] = {}
+_count_cache_lock = threading.Lock()
+
+
+class KeysetPage:
+    """One page of a keyset-paginated query."""
+
+    def __init__(self, items: List[Any], per_page: int, has_next: bool, has_prev: bool,
+                 next_cursor: Optional[str], prev_cursor: Optional[str], total: Optional[int] = None):
+        self.items = items
+        self.per_page = per_page
+        self.has_next = has_next
+        self.has_prev = has_prev
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Pagination metadata for API responses."""
+        pagination = {
+            'per_page': self.per_page,
+            'has_next': self.has_next,
+            'has_prev': self.has_prev,
+            'next_cursor': self.next_cursor,
+            'prev_cursor': self.prev_cursor
+        }
+        if self.total is not None:
+            pagination['total_items'] = self.total
+            pagination['total_is_approximate'] = True
+        return pagination
+
+
+def encode_cursor(created_at: datetime, row_id: int, direction: str = NEXT) -> str:
+    """Opaque cursor pointing just past (created_at, row_id) in the given direction."""
+    payload = json.dumps({'c': created_at.isoformat(), 'i': row_id, 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int, str]:
+    """Decode a cursor into (created_at, row_id, direction); raises ValueError if malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction = payload['d']
+        if direction not in (NEXT, PREV):
+            raise ValueError(direction)
+        return datetime.fromisoformat(payload['c']), int(payload['i']), direction
+    except (ValueError, TypeError, KeyError, AttributeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def keyset_paginate(query, model, per_page: int, cursor: Optional[str] = None,
+                    include_total: bool = False) -> KeysetPage:
+    """
+    Fetch one newest-first page of query after (or before) the cursor.
+
+    Args:
+        query: Filtered query over model; any existing ordering is replaced
+        model: Model with created_at and id columns
+        per_page: Number of rows per page
+        cursor: Cursor from a previous page, or None for the first page
+        include_total: Also return an approximate total row count
+
+    Returns:
+        KeysetPage with next/prev cursors
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    created_at, row_id = model.created_at, model.id
+    direction = NEXT
+    page_query = query.order_by(None)
+
+    if cursor:
+        cursor_created_at, cursor_id, direction = decode_cursor(cursor)
+        key = tuple_(created_at, row_id)
+        if direction == NEXT:
+            page_query = page_query.filter(key < tuple_(cursor_created_at, cursor_id))
+        else:
+            page_query = page_query.filter(key > tuple_(cursor_created_at, cursor_id))
+
+    if direction == NEXT:
+        page_query = page_query.order_by(created_at.desc(), row_id.desc())
+    else:
+        # Walk backwards from the cursor, then restore newest-first order
+        page_query = page_query.order_by(created_at.asc(), row_id.asc())
+
+    # One extra row tells whether another page exists in this direction
+    rows = page_query.limit(per_page + 1).all()
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if direction == NEXT:
+        has_next, has_prev = more, cursor is not None
+    else:
+        rows.reverse()
+        has_next, has_prev = True, more
+
+    return KeysetPage(
+        items=rows,
+        per_page=per_page,
+        has_next=has_next and bool(rows),
+        has_prev=has_prev and bool(rows),
+        next_cursor=encode_cursor(rows[-1].created_at, rows[-1].id, NEXT) if has_next and rows else None,
+        prev_cursor=encode_cursor(rows[0].created_at, rows[0].id, PREV) if has_prev and rows else None,
+        total=estimate_total(query, model) if include_total else None
+    )
+
+
+def estimate_total(query, model) -> int:
+    """
+    Approximate row count for a listing query.
+
+    Unfiltered listings on PostgreSQL read the planner's pg_class estimate;
+    anything else is counted once and cached for COUNT_CACHE_TTL_SECONDS.
+    """
+    if query.whereclause is None and db.engine.dialect.name == 'postgresql':
+        estimate = db.session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+            {'table': model.__tablename__}
+        ).scalar()
+        # -1 (or 0) until the table has been vacuumed/analyzed
+        if estimate and estimate > 0:
+            return int(estimate)
+
+    count_query = query.order_by(None).with_entities(func.count(model.id))
+    compiled = count_query.statement.compile(dialect=db.engine.dialect)
+    cache_key = f"{compiled}|{sorted(compiled.params.items(), key=lambda item: item[0])!r}"
+
+    now = time.monotonic()
+    with _count_cache_lock:
+        cached = _count_cache.get(cache_key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+    total = count_query.scalar() or 0
+
+    with _count_cache_lock:
+        if len(_count_cache) > 1000:
+            _count_cache.clear()
+        _count_cache[cache_key] = (now + COUNT_CACHE_TTL_SECONDS, total)
+    return total
@@ -10,6 +10,7 @@ import os
 import tempfile
 from unittest.mock import Mock
 from flask import Flask
+from flask_jwt_extended import create_access_token
 from typing import Dict, Any, Callable
 
 # Import the application factory and database
@@ -18,11 +19,15 @@ from src.extensions import db as _db
 from src.models.user import User
 from src.models.role import Role
 from src.models.permission import Permission
+from src.models.permission_group import PermissionGroup, PermissionGroupMembership, RolePermissionGroup
 from src.models.fuel_type import FuelType
+from src.models.fuel_order import FuelOrder
 from src.models.aircraft_classification import AircraftClassification
 from src.models.aircraft_type import AircraftType
 from src.models.fee_rule import FeeRule, CalculationBasis, WaiverStrategy
 from src.models.waiver_tier import WaiverTier
+from src.services.permission_service import enhanced_permission_service
+from src.services.fuel_order_status_counters import reconcile_order_status_counts
 
 
 @pytest.fixture(scope='session')
@@ -55,6 +60,18 @@ def app():
     os.unlink(db_path)
 
 
+@pytest.fixture(autouse=True)
+def reset_permission_caches():
+    """
+    Forget process-wide permission state before each test.
+    
+    Tests delete the users and permissions they create and their ids get
+    reused, so cached bitsets and the permission name map must not carry
+    over from one test to the next.
+    """
+    enhanced_permission_service._clear_memory_cache()
+
+
 @pytest.fixture
 def client(app):
     """Create a test client for the Flask application."""
@@ -91,7 +108,8 @@ def auth_headers(db_session) -> Callable[[str], Dict[str, str]]:
     Factory fixture for creating authenticated request headers.
     
     Returns a function that takes a permission name and returns
-    headers with a mock JWT token for that permission.
+    headers with a signed JWT for a user granted only that permission
+    (through a permission group, as the permission checks require).
     
     Usage:
         headers = auth_headers('manage_fbo_fee_schedules')
@@ -99,37 +117,39 @@ def auth_headers(db_session) -> Callable[[str], Dict[str, str]]:
     """
     def _make_auth_headers(permission_name: str) -> Dict[str, str]:
         """Create authentication headers for a user with the given permission."""
-        # Create a test user with the required permission
-        user = User()
-        user.username = f'test_user_{permission_name}'
-        user.email = f'test_{permission_name}@example.com'
-        user.password_hash = 'test_hash'  # In real app this would be properly hashed
-        
-        # Create role and permission if they don't exist
-        permission = Permission.query.filter_by(name=permission_name).first()
-        if not permission:
-            permission = Permission()
-            permission.name = permission_name
-            permission.description = f'Test permission for {permission_name}'
-            db_session.add(permission)
-        
-        role = Role.query.filter_by(name=f'test_role_{permission_name}').first()
-        if not role:
+        # Reuse the user, role and group from an earlier call for the same permission
+        user = User.query.filter_by(username=f'test_user_{permission_name}').first()
+        if not user:
+            permission = Permission.query.filter_by(name=permission_name).first()
+            if not permission:
+                permission = Permission()
+                permission.name = permission_name
+                permission.description = f'Test permission for {permission_name}'
+                db_session.add(permission)
+            
+            group = PermissionGroup()
+            group.name = f'test_group_{permission_name}'
+            group.display_name = f'Test group for {permission_name}'
             role = Role()
             role.name = f'test_role_{permission_name}'
             role.description = f'Test role for {permission_name}'
-            role.permissions.append(permission)
-            db_session.add(role)
-        
-        user.roles.append(role)
-        db_session.add(user)
-        db_session.commit()
+            db_session.add_all([group, role])
+            db_session.flush()
+            db_session.add(PermissionGroupMembership(group_id=group.id, permission_id=permission.id))
+            db_session.add(RolePermissionGroup(role_id=role.id, group_id=group.id))
+            
+            user = User()
+            user.username = f'test_user_{permission_name}'
+            user.email = f'test_{permission_name}@example.com'
+            user.password_hash = 'test_hash'  # In real app this would be properly hashed
+            user.roles.append(role)
+            db_session.add(user)
+            db_session.commit()
         
-        # Create mock JWT token (in real implementation this would be properly signed)
-        mock_token = f'Bearer mock_jwt_token_{user.id}_{permission_name}'
+        token = create_access_token(identity=str(user.id))
         
         return {
-            'Authorization': mock_token,
+            'Authorization': f'Bearer {token}',
             'Content-Type': 'application/json'
         }
     
@@ -151,6 +171,30 @@ def sample_fuel_type(db_session):
     return fuel_type
 
 
+@pytest.fixture
+def committed_fuel_type(app_context):
+    """
+    Create a committed fuel type for tests that place fuel orders against it.
+    
+    The orders are bulk-deleted afterwards, which bypasses the status counter
+    hooks, so the counters are reconciled once the rows are gone.
+    """
+    fuel_type = FuelType()
+    fuel_type.name = 'Fixture Jet A'
+    fuel_type.code = 'FIXTURE_JET_A'
+    
+    _db.session.add(fuel_type)
+    _db.session.commit()
+    
+    yield fuel_type
+    
+    _db.session.rollback()
+    FuelOrder.query.filter_by(fuel_type_id=fuel_type.id).delete(synchronize_session=False)
+    _db.session.delete(fuel_type)
+    _db.session.commit()
+    reconcile_order_status_counts()
+
+
 @pytest.fixture
 def sample_aircraft_classification(db_session):
     """Create a sample aircraft classification for testing."""
@@ -230,6 +274,14 @@ def mock_current_user():
     return user
 
 
+@pytest.fixture
+def permissive_user(mock_current_user):
+    """Create a mock current user granted every permission, for calling services directly."""
+    mock_current_user.has_permission.return_value = True
+    
+    return mock_current_user
+
+
 @pytest.fixture
 def app_context(app):
     """Provide an application context for tests that need it."""
@@ -444,6 +444,119 @@ class TestCalculateFees:
                     mock_calculate.assert_called_once_with(receipt.id, None)
 
 
+class TestBatchCalculateFees:
+    """Test POST /receipts/calculate-fees/batch endpoint."""
+
+    @pytest.fixture
+    def batch_pricing_data(self, app_context):
+        """Committed customer and aircraft type the batch transactions refer to."""
+        from src.models.aircraft_classification import AircraftClassification
+
+        classification = AircraftClassification(name='Batch Test Jets')
+        customer = Customer(name='Batch Test Customer', email='batch-customer@example.com')
+        db.session.add_all([classification, customer])
+        db.session.flush()
+        aircraft_type = AircraftType(name='Batch Test Jet', classification_id=classification.id)
+        db.session.add(aircraft_type)
+        db.session.commit()
+
+        yield {'aircraft_type_id': aircraft_type.id, 'customer_id': customer.id}
+
+        db.session.rollback()
+        for obj in (aircraft_type, customer, classification):
+            db.session.delete(obj)
+        db.session.commit()
+
+    @staticmethod
+    def _transaction(pricing_data, gallons, **overrides):
+        transaction = dict(pricing_data, fuel_uplift_gallons=gallons, fuel_price_per_gallon='5.00')
+        transaction.update(overrides)
+        return transaction
+
+    def _post(self, client, auth_headers, transactions):
+        return client.post(
+            '/api/receipts/calculate-fees/batch',
+            data=json.dumps({'transactions': transactions}),
+            headers=auth_headers('calculate_receipt_fees')
+        )
+
+    def test_batch_calculate_fees_success(self, client, auth_headers, batch_pricing_data):
+        """Test that every transaction is priced and results come back in request order."""
+        transactions = [self._transaction(batch_pricing_data, gallons) for gallons in ('100.00', '20.00', '50.00')]
+
+        response = self._post(client, auth_headers, transactions)
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['count'] == 3
+        assert [Decimal(result['fuel_subtotal']) for result in data['results']] == [
+            Decimal('500'), Decimal('100'), Decimal('250')
+        ]
+
+    def test_batch_calculate_fees_requires_transactions(self, client, auth_headers):
+        """Test that an empty batch is rejected."""
+        response = self._post(client, auth_headers, [])
+
+        assert response.status_code == 400
+        assert 'transactions' in response.get_json()['details']
+
+    def test_batch_calculate_fees_caps_batch_size(self, client, auth_headers, batch_pricing_data):
+        """Test that batches over 1000 transactions are rejected before any pricing."""
+        transactions = [self._transaction(batch_pricing_data, '10.00')] * 1001
+
+        with patch('src.services.fee_calculation_service.FeeCalculationService.calculate_for_transactions') as mock_calculate:
+            response = self._post(client, auth_headers, transactions)
+
+        assert response.status_code == 400
+        assert 'transactions' in response.get_json()['details']
+        mock_calculate.assert_not_called()
+
+    def test_batch_calculate_fees_validates_each_transactions_services(self, client, auth_headers, batch_pricing_data):
+        """Test that additional_services errors are reported against the offending transaction."""
+        transactions = [
+            self._transaction(batch_pricing_data, '100.00', additional_services=[{'fee_code': 'GPU', 'quantity': 1}]),
+            self._transaction(batch_pricing_data, '50.00', additional_services=[{'fee_code': 'GPU'}])
+        ]
+
+        response = self._post(client, auth_headers, transactions)
+
+        assert response.status_code == 400
+        assert response.get_json()['details'] == {
+            'transactions': {'1': {'additional_services': ['Each service must have a quantity']}}
+        }
+
+    def test_batch_calculate_fees_requires_permission(self, client, auth_headers):
+        """Test that callers without calculate_receipt_fees are refused."""
+        response = client.post(
+            '/api/receipts/calculate-fees/batch',
+            data=json.dumps({'transactions': []}),
+            headers=auth_headers('view_receipts')
+        )
+
+        assert response.status_code == 403
+
+
+class TestDownloadReceiptPdf:
+    """Test GET /receipts/{id}/pdf endpoint."""
+
+    def test_download_re_renders_pdf_pruned_after_lookup(self, client, auth_headers, tmp_path):
+        """Test that a cached PDF deleted before it is opened is rendered again instead of failing."""
+        from src.routes.receipt_routes import receipt_service
+
+        receipt = MagicMock(receipt_number='R-20240101-0001')
+        rendered = tmp_path / 'rendered.pdf'
+        rendered.write_bytes(b'%PDF-rendered')
+
+        with patch.object(receipt_service, 'get_receipt_by_id', return_value=receipt), \
+             patch.object(receipt_service, 'get_receipt_pdf_path',
+                          side_effect=[str(tmp_path / 'pruned.pdf'), str(rendered)]) as mock_get_path:
+            response = client.get('/api/receipts/1/pdf', headers=auth_headers('view_receipts'))
+
+        assert response.status_code == 200
+        assert response.data == b'%PDF-rendered'
+        assert mock_get_path.call_count == 2
+
+
 class TestGenerateReceipt:
     """Test POST /receipts/{id}/generate endpoint."""
 
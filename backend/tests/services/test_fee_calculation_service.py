@@ -10,14 +10,55 @@ These tests ensure the core business logic correctly resolves fee amounts
 according to the simplified hierarchy model implemented in Phase 1.
 """
 
+import os
+import time
+import tracemalloc
 import pytest
 from decimal import Decimal
 from unittest.mock import Mock, patch
 
 from src.services.fee_calculation_service import FeeCalculationService
+from src.services.fee_schedule_cache import CompiledFeeSchedule
+from src.services.fee_quote_cache import FeeQuoteCache
 from src.models.fee_rule import FeeRule, CalculationBasis, WaiverStrategy
 
 
+def _make_rule(rule_id=1, fee_code='RAMP', amount=Decimal('100.00'), **attributes):
+    """A fixed-price fee rule stand-in; keyword arguments override the defaults."""
+    rule = Mock()
+    rule.id = rule_id
+    rule.fee_code = fee_code
+    rule.fee_name = f'{fee_code} Fee'
+    rule.amount = amount
+    rule.currency = 'USD'
+    rule.is_taxable = True
+    rule.is_potentially_waivable_by_fuel_uplift = False
+    rule.calculation_basis = CalculationBasis.FIXED_PRICE
+    rule.waiver_strategy = WaiverStrategy.NONE
+    rule.simple_waiver_multiplier = None
+    rule.has_caa_override = False
+    rule.caa_override_amount = None
+    rule.caa_waiver_strategy_override = None
+    rule.caa_simple_waiver_multiplier_override = None
+    rule.created_at = None
+    rule.updated_at = None
+    for name, value in attributes.items():
+        setattr(rule, name, value)
+    return rule
+
+
+def _make_tier(tier_id, priority, multiplier, codes):
+    """A waiver tier stand-in that is not CAA specific."""
+    tier = Mock()
+    tier.id = tier_id
+    tier.name = f'Tier {tier_id}'
+    tier.fuel_uplift_multiplier = multiplier
+    tier.fees_waived_codes = codes
+    tier.tier_priority = priority
+    tier.is_caa_specific_tier = False
+    return tier
+
+
 class TestFeeCalculationServiceHierarchy:
     """Test the three-tier hierarchy logic in _determine_applicable_rules method."""
     
@@ -45,9 +86,21 @@ class TestFeeCalculationServiceHierarchy:
         self.global_fee_rule.caa_simple_waiver_multiplier_override = None
         self.global_fee_rule.created_at = None
         self.global_fee_rule.updated_at = None
-        
-        # Set the aircraft type ID for override lookup
-        self.service._current_aircraft_type_id = self.aircraft_type_id
+
+    def resolve(self, overrides, rules=None, additional_services=None):
+        """Helper to compile a schedule and resolve the applicable rules for the test aircraft."""
+        schedule = CompiledFeeSchedule.compile(
+            version=1,
+            fee_rules=rules if rules is not None else [self.global_fee_rule],
+            overrides=overrides,
+            waiver_tiers=[]
+        )
+        return self.service._determine_applicable_rules(
+            schedule=schedule,
+            aircraft_type_id=self.aircraft_type_id,
+            aircraft_aircraft_classification_id=self.aircraft_classification_id,
+            additional_services=additional_services or []
+        )
 
     def create_classification_override(self, amount=Decimal('80.00'), caa_amount=None):
         """Helper to create a classification-level override."""
@@ -71,192 +124,667 @@ class TestFeeCalculationServiceHierarchy:
 
     def test_aircraft_override_supersedes_classification_and_global(self, app_context):
         """Test that aircraft-specific override has highest priority."""
-        with patch('src.models.fee_rule_override.FeeRuleOverride.query') as mock_query:
-            # Setup overrides: both classification and aircraft level exist
-            classification_override = self.create_classification_override(Decimal('80.00'))
-            aircraft_override = self.create_aircraft_override(Decimal('60.00'))
-            
-            mock_query.all.return_value = [classification_override, aircraft_override]
-            
-            # Test the hierarchy resolution
-            applicable_rules = self.service._determine_applicable_rules(
-                all_rules=[self.global_fee_rule],
-                aircraft_aircraft_classification_id=self.aircraft_classification_id,
-                additional_services=[]
-            )
-            
-            assert len(applicable_rules) == 1
-            resolved_rule = applicable_rules[0]
-            
-            # Aircraft override should win (highest priority)
-            assert resolved_rule.amount == Decimal('60.00')
-            assert resolved_rule.fee_code == 'RAMP'
+        # Setup overrides: both classification and aircraft level exist
+        classification_override = self.create_classification_override(Decimal('80.00'))
+        aircraft_override = self.create_aircraft_override(Decimal('60.00'))
+        
+        overrides = [classification_override, aircraft_override]
+        
+        # Test the hierarchy resolution
+        applicable_rules = self.resolve(overrides)
+        
+        assert len(applicable_rules) == 1
+        resolved_rule = applicable_rules[0]
+        
+        # Aircraft override should win (highest priority)
+        assert resolved_rule.amount == Decimal('60.00')
+        assert resolved_rule.fee_code == 'RAMP'
 
     def test_classification_override_supersedes_global(self, app_context):
         """Test that classification override supersedes global when no aircraft override exists."""
-        with patch('src.models.fee_rule_override.FeeRuleOverride.query') as mock_query:
-            # Setup: only classification-level override (no aircraft override)
-            classification_override = self.create_classification_override(Decimal('80.00'))
-            
-            mock_query.all.return_value = [classification_override]
-        
-            # Test the hierarchy resolution
-            applicable_rules = self.service._determine_applicable_rules(
-                all_rules=[self.global_fee_rule],
-                aircraft_aircraft_classification_id=self.aircraft_classification_id,
-                additional_services=[]
-            )
-            
-            assert len(applicable_rules) == 1
-            resolved_rule = applicable_rules[0]
-            
-            # Classification override should win
-            assert resolved_rule.amount == Decimal('80.00')
-            assert resolved_rule.fee_code == 'RAMP'
+        # Setup: only classification-level override (no aircraft override)
+        classification_override = self.create_classification_override(Decimal('80.00'))
+        
+        overrides = [classification_override]
+        
+        # Test the hierarchy resolution
+        applicable_rules = self.resolve(overrides)
+        
+        assert len(applicable_rules) == 1
+        resolved_rule = applicable_rules[0]
+        
+        # Classification override should win
+        assert resolved_rule.amount == Decimal('80.00')
+        assert resolved_rule.fee_code == 'RAMP'
 
     def test_global_fee_is_used_when_no_overrides_exist(self, app_context):
         """Test that global fee is used when no overrides exist."""
-        with patch('src.models.fee_rule_override.FeeRuleOverride.query') as mock_query:
-            # Setup: No overrides
-            mock_query.all.return_value = []
-        
-            # Test the hierarchy resolution
-            applicable_rules = self.service._determine_applicable_rules(
-                all_rules=[self.global_fee_rule],
-                aircraft_aircraft_classification_id=self.aircraft_classification_id,
-                additional_services=[]
-            )
-            
-            assert len(applicable_rules) == 1
-            resolved_rule = applicable_rules[0]
-            
-            # Global fee should be used
-            assert resolved_rule.amount == Decimal('100.00')  # Original global amount
-            assert resolved_rule.fee_code == 'RAMP'
+        # Setup: No overrides
+        overrides = []
+        
+        # Test the hierarchy resolution
+        applicable_rules = self.resolve(overrides)
+        
+        assert len(applicable_rules) == 1
+        resolved_rule = applicable_rules[0]
+        
+        # Global fee should be used
+        assert resolved_rule.amount == Decimal('100.00')  # Original global amount
+        assert resolved_rule.fee_code == 'RAMP'
 
     def test_override_with_null_amount_still_applies_override(self, app_context):
         """Test that override with null amount still applies the override record (preserves CAA amount)."""
-        with patch('src.models.fee_rule_override.FeeRuleOverride.query') as mock_query:
-            # Setup: Aircraft override with NULL amount, classification override available
-            aircraft_override = self.create_aircraft_override(amount=None, caa_amount=Decimal('50.00'))
-            classification_override = self.create_classification_override(Decimal('80.00'))
-            
-            mock_query.all.return_value = [aircraft_override, classification_override]
-        
-            # Test the hierarchy resolution
-            applicable_rules = self.service._determine_applicable_rules(
-                all_rules=[self.global_fee_rule],
-                aircraft_aircraft_classification_id=self.aircraft_classification_id,
-                additional_services=[]
-            )
-            
-            assert len(applicable_rules) == 1
-            resolved_rule = applicable_rules[0]
-            
-            # Should use the global amount since override amount is NULL, but apply CAA override
-            assert resolved_rule.amount == Decimal('100.00')  # Global amount used
-            assert resolved_rule.caa_override_amount == Decimal('50.00')  # CAA override applied
-            assert resolved_rule.fee_code == 'RAMP'
+        # Setup: Aircraft override with NULL amount, classification override available
+        aircraft_override = self.create_aircraft_override(amount=None, caa_amount=Decimal('50.00'))
+        classification_override = self.create_classification_override(Decimal('80.00'))
+        
+        overrides = [aircraft_override, classification_override]
+        
+        # Test the hierarchy resolution
+        applicable_rules = self.resolve(overrides)
+        
+        assert len(applicable_rules) == 1
+        resolved_rule = applicable_rules[0]
+        
+        # Should use the global amount since override amount is NULL, but apply CAA override
+        assert resolved_rule.amount == Decimal('100.00')  # Global amount used
+        assert resolved_rule.caa_override_amount == Decimal('50.00')  # CAA override applied
+        assert resolved_rule.fee_code == 'RAMP'
 
     def test_multiple_fee_codes_are_resolved_correctly_in_one_call(self, app_context):
         """Test that multiple fee codes are resolved correctly with different hierarchy levels."""
-        with patch('src.models.fee_rule_override.FeeRuleOverride.query') as mock_query:
-            # Create second global fee rule
-            gpu_fee_rule = Mock()
-            gpu_fee_rule.id = 2
-            gpu_fee_rule.fee_code = 'GPU'
-            gpu_fee_rule.amount = Decimal('25.00')
-            gpu_fee_rule.fee_name = 'GPU Fee'
-            gpu_fee_rule.currency = 'USD'
-            gpu_fee_rule.is_taxable = True
-            gpu_fee_rule.is_potentially_waivable_by_fuel_uplift = False
-            gpu_fee_rule.calculation_basis = CalculationBasis.FIXED_PRICE
-            gpu_fee_rule.waiver_strategy = WaiverStrategy.NONE
-            gpu_fee_rule.simple_waiver_multiplier = None
-            gpu_fee_rule.has_caa_override = False
-            gpu_fee_rule.caa_override_amount = None
-            gpu_fee_rule.caa_waiver_strategy_override = None
-            gpu_fee_rule.caa_simple_waiver_multiplier_override = None
-            gpu_fee_rule.created_at = None
-            gpu_fee_rule.updated_at = None
-        
-            # Create overrides: RAMP gets aircraft override, GPU gets classification override
-            ramp_aircraft_override = self.create_aircraft_override(Decimal('60.00'))
-            
-            gpu_classification_override = Mock()
-            gpu_classification_override.classification_id = self.aircraft_classification_id
-            gpu_classification_override.aircraft_type_id = None
-            gpu_classification_override.fee_rule_id = 2
-            gpu_classification_override.override_amount = Decimal('20.00')
-            gpu_classification_override.override_caa_amount = None
-            
-            mock_query.all.return_value = [ramp_aircraft_override, gpu_classification_override]
-        
-            # Test the hierarchy resolution for multiple rules
-            applicable_rules = self.service._determine_applicable_rules(
-                all_rules=[self.global_fee_rule, gpu_fee_rule],
-                aircraft_aircraft_classification_id=self.aircraft_classification_id,
-                additional_services=[]
-            )
-            
-            assert len(applicable_rules) == 2
-            
-            # Find each rule by fee code and verify amounts
-            ramp_rule = next(rule for rule in applicable_rules if rule.fee_code == 'RAMP')
-            gpu_rule = next(rule for rule in applicable_rules if rule.fee_code == 'GPU')
-            
-            # RAMP should use aircraft override (highest priority)
-            assert ramp_rule.amount == Decimal('60.00')
-            
-            # GPU should use classification override (no aircraft override exists)
-            assert gpu_rule.amount == Decimal('20.00')
+        # Create second global fee rule
+        gpu_fee_rule = Mock()
+        gpu_fee_rule.id = 2
+        gpu_fee_rule.fee_code = 'GPU'
+        gpu_fee_rule.amount = Decimal('25.00')
+        gpu_fee_rule.fee_name = 'GPU Fee'
+        gpu_fee_rule.currency = 'USD'
+        gpu_fee_rule.is_taxable = True
+        gpu_fee_rule.is_potentially_waivable_by_fuel_uplift = False
+        gpu_fee_rule.calculation_basis = CalculationBasis.FIXED_PRICE
+        gpu_fee_rule.waiver_strategy = WaiverStrategy.NONE
+        gpu_fee_rule.simple_waiver_multiplier = None
+        gpu_fee_rule.has_caa_override = False
+        gpu_fee_rule.caa_override_amount = None
+        gpu_fee_rule.caa_waiver_strategy_override = None
+        gpu_fee_rule.caa_simple_waiver_multiplier_override = None
+        gpu_fee_rule.created_at = None
+        gpu_fee_rule.updated_at = None
+        
+        # Create overrides: RAMP gets aircraft override, GPU gets classification override
+        ramp_aircraft_override = self.create_aircraft_override(Decimal('60.00'))
+        
+        gpu_classification_override = Mock()
+        gpu_classification_override.classification_id = self.aircraft_classification_id
+        gpu_classification_override.aircraft_type_id = None
+        gpu_classification_override.fee_rule_id = 2
+        gpu_classification_override.override_amount = Decimal('20.00')
+        gpu_classification_override.override_caa_amount = None
+        
+        overrides = [ramp_aircraft_override, gpu_classification_override]
+        
+        # Test the hierarchy resolution for multiple rules
+        applicable_rules = self.resolve(overrides, rules=[self.global_fee_rule, gpu_fee_rule])
+        
+        assert len(applicable_rules) == 2
+        
+        # Find each rule by fee code and verify amounts
+        ramp_rule = next(rule for rule in applicable_rules if rule.fee_code == 'RAMP')
+        gpu_rule = next(rule for rule in applicable_rules if rule.fee_code == 'GPU')
+        
+        # RAMP should use aircraft override (highest priority)
+        assert ramp_rule.amount == Decimal('60.00')
+        
+        # GPU should use classification override (no aircraft override exists)
+        assert gpu_rule.amount == Decimal('20.00')
 
     def test_caa_override_amounts_are_preserved_through_hierarchy(self, app_context):
         """Test that CAA override amounts are correctly preserved through the hierarchy."""
-        with patch('src.models.fee_rule_override.FeeRuleOverride.query') as mock_query:
-            # Setup: Aircraft override with different CAA amount
-            aircraft_override = self.create_aircraft_override(
-                amount=Decimal('60.00'), 
-                caa_amount=Decimal('50.00')
-            )
-            
-            mock_query.all.return_value = [aircraft_override]
-        
-            # Test the hierarchy resolution
-            applicable_rules = self.service._determine_applicable_rules(
-                all_rules=[self.global_fee_rule],
-                aircraft_aircraft_classification_id=self.aircraft_classification_id,
-                additional_services=[]
-            )
-            
-            assert len(applicable_rules) == 1
-            resolved_rule = applicable_rules[0]
-            
-            # Aircraft override should be applied for both regular and CAA amounts
-            assert resolved_rule.amount == Decimal('60.00')  # Aircraft regular amount
-            assert resolved_rule.caa_override_amount == Decimal('50.00')  # Aircraft CAA amount
+        # Setup: Aircraft override with different CAA amount
+        aircraft_override = self.create_aircraft_override(
+            amount=Decimal('60.00'), 
+            caa_amount=Decimal('50.00')
+        )
+        
+        overrides = [aircraft_override]
+        
+        # Test the hierarchy resolution
+        applicable_rules = self.resolve(overrides)
+        
+        assert len(applicable_rules) == 1
+        resolved_rule = applicable_rules[0]
+        
+        # Aircraft override should be applied for both regular and CAA amounts
+        assert resolved_rule.amount == Decimal('60.00')  # Aircraft regular amount
+        assert resolved_rule.caa_override_amount == Decimal('50.00')  # Aircraft CAA amount
 
     def test_additional_services_override_normal_hierarchy(self, app_context):
         """Test that explicit additional services requests override the normal hierarchy."""
-        with patch('src.models.fee_rule_override.FeeRuleOverride.query') as mock_query:
-            # Setup: Aircraft override that normally would be applied
-            aircraft_override = self.create_aircraft_override(Decimal('20.00'))
-            
-            mock_query.all.return_value = [aircraft_override]
-        
-            # Test with additional services request
-            additional_services = [{'fee_code': 'RAMP', 'quantity': 1}]
-            
-            applicable_rules = self.service._determine_applicable_rules(
-                all_rules=[self.global_fee_rule],
-                aircraft_aircraft_classification_id=self.aircraft_classification_id,
-                additional_services=additional_services
+        # Setup: Aircraft override that normally would be applied
+        aircraft_override = self.create_aircraft_override(Decimal('20.00'))
+        
+        overrides = [aircraft_override]
+        
+        # Test with additional services request
+        additional_services = [{'fee_code': 'RAMP', 'quantity': 1}]
+        
+        applicable_rules = self.resolve(overrides, additional_services=additional_services)
+        
+        assert len(applicable_rules) == 1
+        resolved_rule = applicable_rules[0]
+        
+        # Should include the fee when explicitly requested
+        assert resolved_rule.fee_code == 'RAMP'
+        # The current implementation still applies overrides for additional services
+        # This validates the actual behavior of the system
+
+    def test_each_aircraft_type_resolves_its_own_override(self, app_context):
+        """Test that many aircraft-specific overrides for one fee code are all kept."""
+        overrides = []
+        for aircraft_type_id, amount in [(100, Decimal('10.00')), (self.aircraft_type_id, Decimal('60.00')), (200, Decimal('30.00'))]:
+            override = self.create_aircraft_override(amount)
+            override.aircraft_type_id = aircraft_type_id
+            overrides.append(override)
+        
+        applicable_rules = self.resolve(overrides)
+        
+        assert len(applicable_rules) == 1
+        # The override for this aircraft type applies even though it is not the last one loaded
+        assert applicable_rules[0].amount == Decimal('60.00')
+
+
+class TestBatchFeeCalculation:
+    """Test calculate_for_transactions bulk loading and result ordering."""
+
+    def test_batch_loads_each_table_once_and_preserves_order(self, app_context):
+        """Test that customers and aircraft types are bulk loaded and results follow input order."""
+        from src.services.fee_calculation_service import FeeCalculationContext
+
+        schedule_cache = Mock()
+        schedule_cache.get_schedule.return_value = CompiledFeeSchedule.compile(
+            1, [_make_rule(is_taxable=False, has_caa_override=True, caa_override_amount=Decimal('50.00'))], [], []
+        )
+        service = FeeCalculationService(schedule_cache=schedule_cache)
+
+        regular_customer = Mock(id=1, is_caa_member=False)
+        caa_customer = Mock(id=2, is_caa_member=True)
+        aircraft_type = Mock(id=10, classification_id=None, base_min_fuel_gallons_for_waiver=None)
+
+        contexts = [
+            FeeCalculationContext(aircraft_type_id=10, customer_id=2, fuel_uplift_gallons=Decimal('10'), fuel_price_per_gallon=Decimal('5.00')),
+            FeeCalculationContext(aircraft_type_id=10, customer_id=1, fuel_uplift_gallons=Decimal('20'), fuel_price_per_gallon=Decimal('5.00')),
+            FeeCalculationContext(aircraft_type_id=10, customer_id=2, fuel_uplift_gallons=Decimal('30'), fuel_price_per_gallon=Decimal('5.00'))
+        ]
+
+        with patch('src.services.fee_calculation_service.Customer') as mock_customer, \
+             patch('src.services.fee_calculation_service.AircraftType') as mock_aircraft_type:
+            mock_customer.query.filter.return_value.all.return_value = [regular_customer, caa_customer]
+            mock_aircraft_type.query.filter.return_value.all.return_value = [aircraft_type]
+
+            results = service.calculate_for_transactions(contexts)
+
+            assert mock_customer.query.filter.call_count == 1
+            assert mock_aircraft_type.query.filter.call_count == 1
+
+        assert schedule_cache.get_schedule.call_count == 1
+        assert [result.fuel_subtotal for result in results] == [Decimal('50.00'), Decimal('100.00'), Decimal('150.00')]
+        assert [result.is_caa_applied for result in results] == [True, False, True]
+        assert [result.total_fees_amount for result in results] == [Decimal('50.00'), Decimal('100.00'), Decimal('50.00')]
+
+    def test_batch_with_no_contexts_returns_empty_list(self):
+        """Test that an empty batch does no work."""
+        schedule_cache = Mock()
+        service = FeeCalculationService(schedule_cache=schedule_cache)
+
+        assert service.calculate_for_transactions([]) == []
+        schedule_cache.get_schedule.assert_not_called()
+
+
+class TestFeeQuoteMemoization:
+    """Test memoization of calculate_for_transaction results."""
+
+    def _context(self, additional_services=None):
+        from src.services.fee_calculation_service import FeeCalculationContext
+        return FeeCalculationContext(
+            aircraft_type_id=10,
+            customer_id=1,
+            fuel_uplift_gallons=Decimal('20'),
+            fuel_price_per_gallon=Decimal('5.00'),
+            additional_services=additional_services or []
+        )
+
+    def _service(self, version=1):
+        schedule_cache = Mock()
+        schedule_cache.get_schedule.return_value = CompiledFeeSchedule.compile(
+            version, [_make_rule()], [], []
+        )
+        return FeeCalculationService(schedule_cache=schedule_cache, quote_cache=FeeQuoteCache()), schedule_cache
+
+    def _session_get(self, model, object_id):
+        if model.__name__ == 'Customer':
+            return Mock(id=object_id, is_caa_member=False)
+        return Mock(id=object_id, classification_id=None, base_min_fuel_gallons_for_waiver=None)
+
+    def test_repeat_calculation_is_served_from_cache(self, app_context):
+        """Test that identical inputs are priced once and later calls only load the customer."""
+        service, _ = self._service()
+
+        with patch('src.services.fee_calculation_service.db') as mock_db:
+            mock_db.session.get.side_effect = self._session_get
+            first = service.calculate_for_transaction(self._context())
+            second = service.calculate_for_transaction(self._context())
+
+            # customer + aircraft type on the miss, customer only on the hit
+            assert mock_db.session.get.call_count == 3
+
+        assert second.to_dict() == first.to_dict()
+        stats = service.quote_cache.get_stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['hit_rate_percent'] == 50.0
+
+    def test_cached_result_is_not_shared_with_callers(self, app_context):
+        """Test that mutating a returned result does not corrupt the memoized copy."""
+        service, _ = self._service()
+
+        with patch('src.services.fee_calculation_service.db') as mock_db:
+            mock_db.session.get.side_effect = self._session_get
+            first = service.calculate_for_transaction(self._context())
+            expected = first.to_dict()
+            first.line_items[0].amount = Decimal('999.00')
+            first.line_items.pop()
+            second = service.calculate_for_transaction(self._context())
+
+        assert second.to_dict() == expected
+
+    def test_schedule_version_change_clears_cache(self, app_context):
+        """Test that a new fee schedule version invalidates memoized results."""
+        service, schedule_cache = self._service(version=1)
+
+        with patch('src.services.fee_calculation_service.db') as mock_db:
+            mock_db.session.get.side_effect = self._session_get
+            service.calculate_for_transaction(self._context())
+            schedule_cache.get_schedule.return_value = CompiledFeeSchedule.compile(
+                2, [_make_rule()], [], []
             )
-            
-            assert len(applicable_rules) == 1
-            resolved_rule = applicable_rules[0]
-            
-            # Should include the fee when explicitly requested
-            assert resolved_rule.fee_code == 'RAMP'
-            # The current implementation still applies overrides for additional services
-            # This validates the actual behavior of the system
\ No newline at end of file
+            service.calculate_for_transaction(self._context())
+
+        stats = service.quote_cache.get_stats()
+        assert stats['hits'] == 0
+        assert stats['misses'] == 2
+        assert stats['version_resets'] == 1
+        assert stats['schedule_version'] == 2
+
+    def test_schedule_reload_at_same_version_clears_cache(self, app_context):
+        """Test that a TTL recompile under an unchanged local version invalidates memoized results."""
+        service, schedule_cache = self._service(version=1)
+
+        with patch('src.services.fee_calculation_service.db') as mock_db:
+            mock_db.session.get.side_effect = self._session_get
+            service.calculate_for_transaction(self._context())
+            schedule_cache.get_schedule.return_value = CompiledFeeSchedule.compile(
+                1, [_make_rule()], [], []
+            )
+            service.calculate_for_transaction(self._context())
+
+        stats = service.quote_cache.get_stats()
+        assert stats['hits'] == 0
+        assert stats['version_resets'] == 1
+
+    def test_key_ignores_additional_service_order(self):
+        """Test that additional services are normalized into the key."""
+        key_a = FeeQuoteCache.make_key(10, False, Decimal('20'), Decimal('5.00'), [
+            {'fee_code': 'GPU', 'quantity': 1}, {'fee_code': 'LAV', 'quantity': 2}
+        ])
+        key_b = FeeQuoteCache.make_key(10, False, Decimal('20'), Decimal('5.00'), [
+            {'fee_code': 'LAV', 'quantity': '2'}, {'fee_code': 'GPU'}
+        ])
+        key_caa = FeeQuoteCache.make_key(10, True, Decimal('20'), Decimal('5.00'), [
+            {'fee_code': 'GPU', 'quantity': 1}, {'fee_code': 'LAV', 'quantity': 2}
+        ])
+
+        assert key_a == key_b
+        assert key_a != key_caa
+
+    def test_equal_quantities_with_different_precision_are_priced_separately(self, app_context):
+        """Test that 20 and 20.00 gallons do not share a quote, since their line items differ."""
+        service, _ = self._service()
+
+        with patch('src.services.fee_calculation_service.db') as mock_db:
+            mock_db.session.get.side_effect = self._session_get
+            whole = service.calculate_for_transaction(self._context())
+            context = self._context()
+            context.fuel_uplift_gallons = Decimal('20.00')
+            precise = service.calculate_for_transaction(context)
+
+        assert whole.line_items[0].description == 'Fuel (20 gallons)'
+        assert precise.line_items[0].description == 'Fuel (20.00 gallons)'
+        assert str(precise.fuel_subtotal) == '100.0000'
+        assert service.quote_cache.get_stats()['hits'] == 0
+
+    def test_lru_eviction_and_ttl(self):
+        """Test that the least recently used entry is evicted and expired entries miss."""
+        cache = FeeQuoteCache(max_size=2, ttl_seconds=60)
+        cache.set(1, 'a', 'A')
+        cache.set(1, 'b', 'B')
+        assert cache.get(1, 'a') == 'A'
+        cache.set(1, 'c', 'C')
+
+        assert cache.get(1, 'b') is None
+        assert cache.get(1, 'a') == 'A'
+        assert cache.get_stats()['evictions'] == 1
+
+        with patch('src.services.fee_quote_cache.time.monotonic', return_value=time.monotonic() + 61):
+            assert cache.get(1, 'c') is None
+        assert cache.get_stats()['expirations'] == 1
+
+
+@pytest.mark.benchmark
+@pytest.mark.skipif(os.getenv('RUN_BENCHMARKS') != '1', reason='set RUN_BENCHMARKS=1 to run benchmarks')
+class TestOverrideResolutionBenchmark:
+    """Benchmark override resolution as the number of per-aircraft overrides grows."""
+
+    RESOLUTIONS = 500
+
+    def _build_schedule(self, rules, aircraft_type_count):
+        overrides = []
+        for aircraft_type_id in range(1, aircraft_type_count + 1):
+            for rule in rules:
+                override = Mock()
+                override.id = None
+                override.fee_rule_id = rule.id
+                override.aircraft_type_id = aircraft_type_id
+                override.classification_id = None
+                override.override_amount = Decimal(aircraft_type_id)
+                override.override_caa_amount = None
+                overrides.append(override)
+        return CompiledFeeSchedule.compile(1, rules, overrides, [])
+
+    def _time_resolutions(self, service, schedule, aircraft_type_count):
+        start = time.perf_counter()
+        for i in range(self.RESOLUTIONS):
+            aircraft_type_id = (i % aircraft_type_count) + 1
+            rules = service._determine_applicable_rules(schedule, aircraft_type_id, None, [])
+            assert all(rule.amount == Decimal(aircraft_type_id) for rule in rules)
+        return (time.perf_counter() - start) / self.RESOLUTIONS
+
+    def test_resolution_time_is_independent_of_override_count(self, app_context):
+        """Resolving against 10k overrides should cost about the same as against 10."""
+        service = FeeCalculationService()
+        rules = [_make_rule(1, 'RAMP'), _make_rule(2, 'GPU')]
+
+        small_schedule = self._build_schedule(rules, aircraft_type_count=5)
+        large_schedule = self._build_schedule(rules, aircraft_type_count=5000)
+        assert len(large_schedule.overrides) == 10000
+
+        small_mean = self._time_resolutions(service, small_schedule, 5)
+        large_mean = self._time_resolutions(service, large_schedule, 5000)
+
+        # O(rules) resolution: generous bound to stay stable on shared CI runners
+        assert large_mean < small_mean * 5 + 0.0005
+
+
+class TestCompiledFeeSchedule:
+    """Test the compiled fee schedule snapshot and its version-keyed cache."""
+
+    def _make_override(self, fee_rule_id, aircraft_type_id=None, classification_id=None, amount=Decimal('10.00')):
+        override = Mock()
+        override.id = None
+        override.fee_rule_id = fee_rule_id
+        override.aircraft_type_id = aircraft_type_id
+        override.classification_id = classification_id
+        override.override_amount = amount
+        override.override_caa_amount = None
+        return override
+
+    def test_compile_indexes_rules_overrides_and_tiers(self):
+        """Test that compilation indexes rules by code, overrides by target and sorts tiers."""
+        from src.services.fee_schedule_cache import CompiledFeeSchedule
+
+        rules = [_make_rule(1, 'RAMP', Decimal('100.00')), _make_rule(2, 'GPU', Decimal('25.00'))]
+        overrides = [
+            self._make_override(1, aircraft_type_id=123, amount=Decimal('60.00')),
+            self._make_override(2, classification_id=456, amount=Decimal('20.00')),
+            self._make_override(99, aircraft_type_id=123)  # Unknown fee rule, dropped
+        ]
+        tiers = [
+            _make_tier(1, 1, Decimal('1.0'), ['RAMP']),
+            _make_tier(2, 3, Decimal('2.0'), ['RAMP', 'GPU']),
+            _make_tier(3, 2, Decimal('1.5'), ['GPU'])
+        ]
+
+        schedule = CompiledFeeSchedule.compile(7, rules, overrides, tiers)
+
+        assert schedule.version == 7
+        assert schedule.rules_by_code['GPU'].amount == Decimal('25.00')
+        assert schedule.aircraft_overrides[('RAMP', 123)].override_amount == Decimal('60.00')
+        assert schedule.classification_overrides[('GPU', 456)].override_amount == Decimal('20.00')
+        assert len(schedule.overrides) == 2
+        assert [tier.tier_priority for tier in schedule.waiver_tiers] == [3, 2, 1]
+        assert schedule.waiver_tiers[0].fees_waived_codes == ('RAMP', 'GPU')
+
+        with pytest.raises(TypeError):
+            schedule.rules_by_code['NEW'] = rules[0]
+
+    def test_cache_reuses_snapshot_until_invalidated(self):
+        """Test that the cache compiles once per version and recompiles after invalidation."""
+        from src.services.fee_schedule_cache import FeeScheduleCache, CompiledFeeSchedule
+
+        cache = FeeScheduleCache()
+        rules = [_make_rule(1, 'RAMP', Decimal('100.00'))]
+
+        with patch.object(cache.versions, '_get_redis_client', return_value=None), \
+             patch.object(cache, '_load', side_effect=lambda version: CompiledFeeSchedule.compile(version, rules, [], [])) as mock_load:
+            first = cache.get_schedule()
+            second = cache.get_schedule()
+
+            assert first is second
+            assert mock_load.call_count == 1
+
+            new_version = cache.invalidate()
+            third = cache.get_schedule()
+
+            assert third is not first
+            assert third.version == new_version
+            assert mock_load.call_count == 2
+
+
+class TestWaiverThresholdTable:
+    """Test the precomputed waiver breakpoint tables against per-tier evaluation."""
+
+    def _rules(self):
+        ramp = _make_rule(1, 'RAMP', Decimal('100.00'))
+        ramp.is_potentially_waivable_by_fuel_uplift = True
+        ramp.waiver_strategy = WaiverStrategy.TIERED_MULTIPLIER
+        gpu = _make_rule(2, 'GPU', Decimal('25.00'))
+        gpu.is_potentially_waivable_by_fuel_uplift = True
+        gpu.waiver_strategy = WaiverStrategy.SIMPLE_MULTIPLIER
+        gpu.simple_waiver_multiplier = Decimal('2.0')
+        gpu.has_caa_override = True
+        gpu.caa_override_amount = Decimal('20.00')
+        gpu.caa_simple_waiver_multiplier_override = Decimal('1.5')
+        lav = _make_rule(3, 'LAV', Decimal('40.00'))
+        lav.is_potentially_waivable_by_fuel_uplift = True
+        lav.waiver_strategy = WaiverStrategy.TIERED_MULTIPLIER
+        return [ramp, gpu, lav]
+
+    def _tiers(self):
+        tiers = [
+            _make_tier(1, 1, Decimal('1.0'), ['RAMP']),
+            _make_tier(2, 3, Decimal('3.0'), ['RAMP', 'LAV', 'GPU']),
+            _make_tier(3, 2, Decimal('2.0'), ['LAV'])
+        ]
+        tiers[2].is_caa_specific_tier = True
+        return tiers
+
+    def _expected(self, schedule, gallons, base_min_fuel, is_caa_member):
+        """Reference evaluation: first tier met in priority order, plus simple-multiplier thresholds."""
+        tier_codes = set()
+        if gallons > 0:
+            for tier in schedule.waiver_tiers:
+                if tier.is_caa_specific_tier and not is_caa_member:
+                    continue
+                if gallons >= base_min_fuel * tier.fuel_uplift_multiplier:
+                    tier_codes = set(tier.fees_waived_codes)
+                    break
+
+        waived = set()
+        for rule in schedule.rules:
+            if is_caa_member and rule.has_caa_override:
+                strategy = rule.caa_waiver_strategy_override or rule.waiver_strategy
+                multiplier = rule.caa_simple_waiver_multiplier_override or rule.simple_waiver_multiplier
+            else:
+                strategy = rule.waiver_strategy
+                multiplier = rule.simple_waiver_multiplier
+            if strategy == WaiverStrategy.SIMPLE_MULTIPLIER and gallons >= base_min_fuel * multiplier:
+                waived.add(rule.fee_code)
+            elif strategy == WaiverStrategy.TIERED_MULTIPLIER and rule.fee_code in tier_codes:
+                waived.add(rule.fee_code)
+        return waived
+
+    def test_lookup_matches_per_tier_evaluation(self):
+        """Test that a bisect lookup agrees with evaluating every tier, including at exact thresholds."""
+        aircraft_type = Mock(id=7, base_min_fuel_gallons_for_waiver=Decimal('100.00'))
+        schedule = CompiledFeeSchedule.compile(1, self._rules(), [], self._tiers(), aircraft_types=[aircraft_type])
+
+        gallons_to_check = [Decimal(g) for g in range(0, 351, 5)] + [Decimal('99.99'), Decimal('149.99'), Decimal('299.99')]
+        for is_caa_member in (False, True):
+            table = schedule.waiver_tables[(7, is_caa_member)]
+            for gallons in gallons_to_check:
+                assert set(table.lookup(gallons)) == self._expected(schedule, gallons, Decimal('100.00'), is_caa_member), \
+                    (is_caa_member, gallons)
+
+    def test_table_breakpoints_are_sorted_thresholds(self):
+        """Test that the table holds one sorted breakpoint per distinct threshold."""
+        aircraft_type = Mock(id=7, base_min_fuel_gallons_for_waiver=Decimal('100.00'))
+        schedule = CompiledFeeSchedule.compile(1, self._rules(), [], self._tiers(), aircraft_types=[aircraft_type])
+
+        assert schedule.waiver_tables[(7, False)].thresholds == (Decimal('100.000'), Decimal('200.000'), Decimal('300.000'))
+        assert schedule.waiver_tables[(7, True)].thresholds == (
+            Decimal('100.000'), Decimal('150.000'), Decimal('200.000'), Decimal('300.000')
+        )
+
+    def test_no_base_min_fuel_waives_nothing(self):
+        """Test that aircraft types without a waiver minimum never waive fees."""
+        aircraft_type = Mock(id=7, base_min_fuel_gallons_for_waiver=Decimal('0'))
+        schedule = CompiledFeeSchedule.compile(1, self._rules(), [], self._tiers(), aircraft_types=[aircraft_type])
+
+        assert schedule.waiver_tables[(7, False)].lookup(Decimal('10000')) == frozenset()
+        assert schedule.waiver_table(99, None, False).lookup(Decimal('10000')) == frozenset()
+
+    def test_unknown_or_changed_aircraft_type_builds_table(self):
+        """Test that a mismatched base minimum is not served from the compiled table."""
+        aircraft_type = Mock(id=7, base_min_fuel_gallons_for_waiver=Decimal('100.00'))
+        schedule = CompiledFeeSchedule.compile(1, self._rules(), [], self._tiers(), aircraft_types=[aircraft_type])
+
+        assert schedule.waiver_table(7, Decimal('100'), False) is schedule.waiver_tables[(7, False)]
+        rebuilt = schedule.waiver_table(7, Decimal('50.00'), False)
+        assert rebuilt is not schedule.waiver_tables[(7, False)]
+        assert rebuilt.thresholds[0] == Decimal('50.000')
+
+
+class TestResolvedFeeRuleBenchmark:
+    """Compare resolved rule allocation and speed against transient FeeRule models at 50 fee rules."""
+
+    RULE_COUNT = 50
+    ITERATIONS = 200
+
+    def _build_schedule(self):
+        rules = []
+        overrides = []
+        for rule_id in range(1, self.RULE_COUNT + 1):
+            rule = FeeRule(
+                id=rule_id,
+                fee_name=f'Fee {rule_id}',
+                fee_code=f'FEE{rule_id}',
+                amount=Decimal('100.00'),
+                currency='USD',
+                is_taxable=True,
+                is_potentially_waivable_by_fuel_uplift=False,
+                calculation_basis=CalculationBasis.FIXED_PRICE,
+                waiver_strategy=WaiverStrategy.NONE,
+                simple_waiver_multiplier=None,
+                has_caa_override=False,
+                caa_override_amount=None,
+                caa_waiver_strategy_override=None,
+                caa_simple_waiver_multiplier_override=None
+            )
+            rules.append(rule)
+
+            # Every rule has an aircraft override, the worst case for allocation
+            override = Mock()
+            override.id = rule_id
+            override.fee_rule_id = rule_id
+            override.aircraft_type_id = 1
+            override.classification_id = None
+            override.override_amount = Decimal('75.00')
+            override.override_caa_amount = None
+            overrides.append(override)
+        return CompiledFeeSchedule.compile(1, rules, overrides, [])
+
+    @staticmethod
+    def _orm_copy(base_rule, override):
+        """The previous _apply_override_to_rule: one transient FeeRule model per override."""
+        return FeeRule(
+            id=base_rule.id,
+            fee_name=base_rule.fee_name,
+            fee_code=base_rule.fee_code,
+            amount=override.override_amount if override.override_amount is not None else base_rule.amount,
+            currency=base_rule.currency,
+            is_taxable=base_rule.is_taxable,
+            is_potentially_waivable_by_fuel_uplift=base_rule.is_potentially_waivable_by_fuel_uplift,
+            calculation_basis=base_rule.calculation_basis,
+            waiver_strategy=base_rule.waiver_strategy,
+            simple_waiver_multiplier=base_rule.simple_waiver_multiplier,
+            has_caa_override=base_rule.has_caa_override,
+            caa_override_amount=override.override_caa_amount if override.override_caa_amount is not None else base_rule.caa_override_amount,
+            caa_waiver_strategy_override=base_rule.caa_waiver_strategy_override,
+            caa_simple_waiver_multiplier_override=base_rule.caa_simple_waiver_multiplier_override
+        )
+
+    def _allocated(self, service, schedule):
+        resolve = lambda: service._determine_applicable_rules(schedule, 1, None, [])
+
+        resolve()  # Warm up
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            resolved = resolve()
+            allocated = tracemalloc.get_traced_memory()[0] - before
+        finally:
+            tracemalloc.stop()
+        assert len(resolved) == self.RULE_COUNT
+        assert all(rule.amount == Decimal('75.00') for rule in resolved)
+        return allocated
+
+    def _elapsed(self, service, schedule):
+        service._determine_applicable_rules(schedule, 1, None, [])  # Warm up
+        start = time.perf_counter()
+        for _ in range(self.ITERATIONS):
+            service._determine_applicable_rules(schedule, 1, None, [])
+        return (time.perf_counter() - start) / self.ITERATIONS
+
+    def test_resolved_rules_allocate_less_than_orm_copies(self, app_context):
+        """Resolving 50 overridden rules should allocate less than ORM copies."""
+        service = FeeCalculationService()
+        schedule = self._build_schedule()
+
+        slots_bytes = self._allocated(service, schedule)
+        with patch.object(FeeCalculationService, '_apply_override_to_rule', side_effect=self._orm_copy, autospec=False):
+            orm_bytes = self._allocated(service, schedule)
+
+        assert slots_bytes < orm_bytes
+
+    @pytest.mark.benchmark
+    @pytest.mark.skipif(os.getenv('RUN_BENCHMARKS') != '1', reason='set RUN_BENCHMARKS=1 to run benchmarks')
+    def test_resolved_rules_run_faster_than_orm_copies(self, app_context):
+        """Resolving 50 overridden rules should run faster than ORM copies."""
+        service = FeeCalculationService()
+        schedule = self._build_schedule()
+
+        slots_time = self._elapsed(service, schedule)
+        with patch.object(FeeCalculationService, '_apply_override_to_rule', side_effect=self._orm_copy, autospec=False):
+            orm_time = self._elapsed(service, schedule)
+
+        assert slots_time < orm_time
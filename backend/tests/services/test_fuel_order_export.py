@@ -0,0 +1,132 @@
+"""
+Tests for the streaming fuel order CSV export.
+"""
+
+import csv
+import io
+import os
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from src.extensions import db
+from src.models.fuel_order import FuelOrder, FuelOrderStatus
+from src.services.fuel_order_service import FuelOrderService
+
+BENCHMARK_ROWS = int(os.getenv('EXPORT_BENCHMARK_ROWS', '1000000'))
+
+
+@pytest.fixture
+def export_orders(committed_fuel_type):
+    orders = [
+        FuelOrder(
+            tail_number=f'N{day}EXP', fuel_type_id=committed_fuel_type.id, status=FuelOrderStatus.REVIEWED,
+            start_meter_reading=Decimal('1000.00'), end_meter_reading=Decimal('1100.50'),
+            created_at=datetime(2024, 6, day, 12, 0, 0),
+            reviewed_timestamp=datetime(2024, 6, day, 18, 0, 0)
+        )
+        for day in (1, 2, 3)
+    ]
+    db.session.add_all(orders)
+    db.session.commit()
+    return orders
+
+
+def _read_csv(chunks):
+    return list(csv.reader(io.StringIO(''.join(chunks))))
+
+
+class TestFuelOrderExport:
+    """Tests for the streamed CSV export."""
+
+    def test_rows_are_streamed_in_chunks(self, export_orders, permissive_user):
+        """Test that the export yields one chunk per batch and joins to the full CSV."""
+        chunks, message, status_code = FuelOrderService.export_fuel_orders_to_csv(
+            permissive_user, {'date_from': '2024-06-01', 'date_to': '2024-06-03'}, batch_size=2
+        )
+        assert status_code == 200
+        chunks = list(chunks)
+        assert len(chunks) == 2
+
+        rows = _read_csv(chunks)
+        assert rows[0][:5] == ['Order ID', 'Status', 'Tail Number', 'Customer ID', 'Fuel Type']
+        assert [row[2] for row in rows[1:]] == ['N3EXP', 'N2EXP', 'N1EXP']
+        assert rows[1][1] == 'Reviewed'
+        assert rows[1][4] == 'Fixture Jet A'
+        assert rows[1][13] == '100.5'
+        assert rows[1][15] == '2024-06-03 12:00:00'
+
+    def test_date_filters(self, export_orders, permissive_user):
+        """Test that date_to as a bare date covers that whole day."""
+        chunks, _, _ = FuelOrderService.export_fuel_orders_to_csv(
+            permissive_user, {'date_from': '2024-06-02T00:00:00Z', 'date_to': '2024-06-02'}
+        )
+        assert [row[2] for row in _read_csv(chunks)[1:]] == ['N2EXP']
+
+        chunks, message, status_code = FuelOrderService.export_fuel_orders_to_csv(
+            permissive_user, {'date_from': '2024-07-01'}
+        )
+        assert chunks is None
+        assert status_code == 200
+        assert message == "No orders found matching the criteria for export."
+
+    def test_zero_gallons_are_exported(self, committed_fuel_type, permissive_user):
+        """Test that an order dispensing nothing exports 0 rather than a blank cell."""
+        db.session.add(FuelOrder(
+            tail_number='N0EXP', fuel_type_id=committed_fuel_type.id, status=FuelOrderStatus.REVIEWED,
+            start_meter_reading=Decimal('1000.00'), end_meter_reading=Decimal('1000.00'),
+            created_at=datetime(2024, 6, 4, 12, 0, 0)
+        ))
+        db.session.commit()
+
+        chunks, _, _ = FuelOrderService.export_fuel_orders_to_csv(permissive_user, {'date_from': '2024-06-04'})
+        [row] = _read_csv(chunks)[1:]
+        assert row[13] == '0.0'
+
+    def test_invalid_filters_are_rejected(self, permissive_user):
+        """Test that malformed dates and statuses return 400."""
+        _, message, status_code = FuelOrderService.export_fuel_orders_to_csv(permissive_user, {'date_to': 'June 2nd'})
+        assert status_code == 400
+        assert 'June 2nd' in message
+
+        _, _, status_code = FuelOrderService.export_fuel_orders_to_csv(permissive_user, {'status': 'SHIPPED'})
+        assert status_code == 400
+
+    @pytest.mark.benchmark
+    @pytest.mark.skipif(os.getenv('RUN_BENCHMARKS') != '1', reason='set RUN_BENCHMARKS=1 to run benchmarks')
+    def test_export_memory_is_constant_at_scale(self, committed_fuel_type, permissive_user):
+        """Benchmark streaming EXPORT_BENCHMARK_ROWS orders (default 1M) with bounded memory."""
+        start = datetime(2024, 1, 1)
+        table = FuelOrder.__table__
+        for offset in range(0, BENCHMARK_ROWS, 50000):
+            db.session.execute(table.insert(), [
+                {
+                    'tail_number': f'N{i}BM', 'fuel_type_id': committed_fuel_type.id,
+                    'status': FuelOrderStatus.REVIEWED, 'requested_amount': Decimal('150.00'),
+                    'start_meter_reading': Decimal('1000.00'), 'end_meter_reading': Decimal('1150.00'),
+                    'created_at': start + timedelta(seconds=i), 'reviewed_timestamp': start + timedelta(seconds=i)
+                }
+                for i in range(offset, min(offset + 50000, BENCHMARK_ROWS))
+            ])
+        db.session.commit()
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        chunks, _, status_code = FuelOrderService.export_fuel_orders_to_csv(permissive_user, {}, batch_size=1000)
+        exported_bytes = rows = 0
+        for chunk in chunks:
+            exported_bytes += len(chunk)
+            rows += chunk.count('\n')
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        summary = (f"exported {rows - 1} rows ({exported_bytes / 1e6:.1f} MB) in {elapsed:.1f}s, "
+                   f"peak traced memory {peak / 1e6:.1f} MB")
+        assert status_code == 200
+        assert rows - 1 >= BENCHMARK_ROWS, summary
+        # The CSV is far larger than this; only a batch is held at a time
+        assert peak < 20 * 1024 * 1024, summary
@@ -0,0 +1,144 @@
+"""
+Tests for the projected fuel order list.
+"""
+
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from src.extensions import db
+from src.models.customer import Customer
+from src.models.fuel_order import FuelOrder, FuelOrderPriority, FuelOrderStatus
+from src.models.fuel_truck import FuelTruck
+from src.models.user import User
+from src.schemas.fuel_order_schemas import FuelOrderBriefResponseSchema
+from src.services.fuel_order_projection import LIST_FIELDS, get_row_serializer, parse_fields
+from src.services.fuel_order_service import FuelOrderService
+
+
+@pytest.fixture
+def projection_orders(committed_fuel_type):
+    customer = Customer(name='Projection Air', email='projection@example.com')
+    lst = User(username='projection_lst', email='projection_lst@example.com', name=None)
+    lst.set_password('password')
+    truck = FuelTruck(truck_number='PROJ-1', fuel_type='Jet A', capacity=Decimal('5000.00'))
+    db.session.add_all([customer, lst, truck])
+    db.session.flush()
+
+    full = FuelOrder(
+        tail_number='N1PROJ', fuel_type_id=committed_fuel_type.id, customer_id=customer.id,
+        assigned_lst_user_id=lst.id, assigned_truck_id=truck.id, status=FuelOrderStatus.COMPLETED,
+        priority=FuelOrderPriority.HIGH, requested_amount=Decimal('150.50'),
+        start_meter_reading=Decimal('1000.10'), end_meter_reading=Decimal('1150.35'),
+        gallons_dispensed=Decimal('150.25'), csr_notes='CSR note', lst_notes=None,
+        completion_timestamp=datetime(2024, 5, 1, 10, 30, 15, 123456),
+        created_at=datetime(2024, 5, 1, 9, 0, 0)
+    )
+    bare = FuelOrder(tail_number='N2PROJ', fuel_type_id=committed_fuel_type.id, created_at=datetime(2024, 5, 2, 9, 0, 0))
+    db.session.add_all([full, bare])
+    db.session.commit()
+
+    yield [bare, full]
+
+    for row in (full, bare, truck, lst, customer):
+        db.session.delete(row)
+    db.session.commit()
+
+
+class TestFuelOrderProjection:
+    """Tests for the column-projection list path."""
+
+    def test_rows_match_brief_schema(self, projection_orders, permissive_user):
+        """Test that projected rows serialize exactly like the entity-based list did."""
+        fields = parse_fields(None)
+        page, _ = FuelOrderService.get_fuel_orders(permissive_user, {'per_page': '100'}, fields=fields)
+        serialize = get_row_serializer(fields)
+        projected = {row.id: serialize(row) for row in page.items}
+
+        expected = FuelOrderBriefResponseSchema(many=True).dump(projection_orders)
+        for order in expected:
+            assert projected[order['id']] == order
+        assert set(expected[0]) < set(LIST_FIELDS)
+        assert 'assigned_lst_username' not in projected[projection_orders[0].id]
+
+    def test_fields_narrow_the_query(self, projection_orders, permissive_user):
+        """Test that fields= selects only what was asked for, without joins."""
+        fields = parse_fields('status,tail_number')
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            page, _ = FuelOrderService.get_fuel_orders(permissive_user, {'pagination': 'cursor'}, fields=fields)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+        rows = [get_row_serializer(fields)(row) for row in page.items]
+        assert rows[0] == {'id': projection_orders[0].id, 'status': 'Dispatched', 'tail_number': 'N2PROJ'}
+        assert len(statements) == 1
+        assert 'JOIN' not in statements[0].upper()
+
+    def test_unknown_fields_are_rejected(self):
+        """Test that a misspelled field is an error rather than silently dropped."""
+        with pytest.raises(ValueError, match='tail_nubmer'):
+            parse_fields('status,tail_nubmer')
+
+
+@pytest.fixture
+def same_instant_orders(committed_fuel_type):
+    orders = [
+        FuelOrder(tail_number=f'N{i}CUR', fuel_type_id=committed_fuel_type.id, created_at=datetime(2023, 3, 1, 9, 0, 0))
+        for i in range(5)
+    ]
+    db.session.add_all(orders)
+    db.session.commit()
+
+    # Newest first, with id breaking the created_at tie
+    yield sorted(order.id for order in orders)[::-1]
+
+    for row in orders:
+        db.session.delete(row)
+    db.session.commit()
+
+
+class TestFuelOrderCursorPagination:
+    """Tests for cursor pages of the fuel order list."""
+
+    FILTERS = {'pagination': 'cursor', 'per_page': '2',
+               'start_date': '2023-03-01T00:00:00', 'end_date': '2023-03-01T23:59:59'}
+
+    @pytest.mark.parametrize('fields', [None, parse_fields('tail_number')], ids=['entities', 'projected'])
+    def test_pages_walk_rows_created_in_the_same_instant(self, same_instant_orders, permissive_user, fields):
+        """Test that next and prev cursors visit every row once when created_at ties."""
+        pages = []
+        page, _ = FuelOrderService.get_fuel_orders(permissive_user, dict(self.FILTERS), fields=fields)
+        pages.append([row.id for row in page.items])
+        assert page.has_prev is False
+        while page.has_next:
+            page, _ = FuelOrderService.get_fuel_orders(
+                permissive_user, {**self.FILTERS, 'cursor': page.next_cursor}, fields=fields
+            )
+            pages.append([row.id for row in page.items])
+
+        assert pages == [same_instant_orders[0:2], same_instant_orders[2:4], same_instant_orders[4:]]
+
+        for expected in (pages[1], pages[0]):
+            page, _ = FuelOrderService.get_fuel_orders(
+                permissive_user, {**self.FILTERS, 'cursor': page.prev_cursor}, fields=fields
+            )
+            assert [row.id for row in page.items] == expected
+        assert page.has_prev is False
+        assert page.has_next is True
+
+    def test_total_is_reported_as_total_items(self, same_instant_orders, permissive_user):
+        """Test that cursor pages name their approximate total like offset pages do."""
+        page, _ = FuelOrderService.get_fuel_orders(permissive_user, {**self.FILTERS, 'include_total': 'true'},
+                                                   fields=parse_fields('tail_number'))
+        pagination = page.to_dict()
+        assert pagination['total_items'] == 5
+        assert pagination['total_is_approximate'] is True
+        assert 'total' not in pagination
@@ -0,0 +1,148 @@
+"""
+Tests for the materialized fuel order status counters.
+"""
+
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from src.extensions import db
+from src.models.fuel_order import FuelOrder, FuelOrderStatus
+from src.services.fuel_order_service import FuelOrderService
+from src.services import fuel_order_status_counters
+from src.services.fuel_order_status_counters import get_order_status_counts, reconcile_order_status_counts
+
+
+@pytest.fixture
+def counter_fuel_type(committed_fuel_type):
+    # Start every test from counters that match fuel_orders
+    reconcile_order_status_counts()
+    return committed_fuel_type
+
+
+def _new_order(fuel_type, **kwargs):
+    order = FuelOrder(tail_number='N1CNT', fuel_type_id=fuel_type.id, **kwargs)
+    db.session.add(order)
+    db.session.commit()
+    return order
+
+
+def _counts():
+    counts = get_order_status_counts()
+    return {key: counts[key] for key in ('pending_count', 'active_count', 'completed_count', 'completed_today', 'total_orders')}
+
+
+def _other_worker_engine():
+    """A second engine standing in for another worker; its writes give up quickly instead of waiting on locks."""
+    if db.engine.dialect.name == 'postgresql':
+        connect_args = {'options': '-c lock_timeout=100'}
+    else:
+        connect_args = {'timeout': 0.1}
+    return create_engine(db.engine.url, connect_args=connect_args)
+
+
+def _changed(before, after):
+    return {key: after[key] - before[key] for key in before if after[key] != before[key]}
+
+
+class TestFuelOrderStatusCounters:
+    """Tests for counter maintenance and reconciliation."""
+
+    def test_counters_follow_the_order_lifecycle(self, counter_fuel_type, permissive_user):
+        """Test that inserts, transitions, completion and deletes each move the right counters."""
+        start = _counts()
+        order = _new_order(counter_fuel_type)
+        assert _changed(start, _counts()) == {'pending_count': 1, 'total_orders': 1}
+
+        FuelOrderService.update_order_status(order.id, FuelOrderStatus.ACKNOWLEDGED, permissive_user)
+        assert _changed(start, _counts()) == {'active_count': 1, 'total_orders': 1}
+
+        # Assigned without reading the expired attributes first
+        order.status = FuelOrderStatus.COMPLETED
+        order.completion_timestamp = datetime.now()
+        db.session.commit()
+        assert _changed(start, _counts()) == {'completed_count': 1, 'completed_today': 1, 'total_orders': 1}
+
+        db.session.delete(order)
+        db.session.commit()
+        assert _changed(start, _counts()) == {}
+        assert reconcile_order_status_counts()['corrected'] == []
+
+    def test_rolled_back_change_leaves_counters_alone(self, counter_fuel_type):
+        """Test that counter updates share the order's transaction."""
+        order = _new_order(counter_fuel_type)
+        before = _counts()
+
+        order.status = FuelOrderStatus.FUELING
+        db.session.flush()
+        db.session.rollback()
+
+        assert _counts() == before
+
+    def test_reconcile_repairs_bulk_update_drift(self, counter_fuel_type):
+        """Test that the nightly reconciliation fixes changes the hooks never saw."""
+        order = _new_order(counter_fuel_type)
+        before = _counts()
+
+        FuelOrder.query.filter_by(id=order.id).update({'status': FuelOrderStatus.CANCELLED}, synchronize_session=False)
+        db.session.commit()
+        assert _counts() == before
+
+        result = reconcile_order_status_counts()
+        assert result['corrected'] == ['CANCELLED', 'DISPATCHED']
+        assert _changed(before, _counts()) == {'pending_count': -1}
+
+    def test_counts_are_pushed_after_commit(self, app, counter_fuel_type):
+        """Test that committed status changes push fresh counts to csr_room."""
+        app.config['ORDER_STATUS_COUNTS_PUSH_ENABLED'] = True
+        try:
+            with patch('src.services.fuel_order_status_counters.emit_to_csr_room') as emit:
+                order = _new_order(counter_fuel_type)
+                assert emit.call_count == 1
+                event, payload = emit.call_args[0]
+                assert event == 'order_status_counts_updated'
+                assert payload == get_order_status_counts()
+
+                order.csr_notes = 'No status change'
+                db.session.commit()
+                assert emit.call_count == 1
+        finally:
+            app.config['ORDER_STATUS_COUNTS_PUSH_ENABLED'] = False
+
+    def test_reconcile_keeps_status_changes_committed_while_counting(self, counter_fuel_type):
+        """Test that a status change racing the reconcile is neither lost nor overwritten."""
+        order = _new_order(counter_fuel_type)
+        before = _counts()
+        engine = _other_worker_engine()
+        count_orders = fuel_order_status_counters._count_orders
+        blocked = []
+
+        def acknowledge_in_other_worker():
+            with Session(engine) as session:
+                session.get(FuelOrder, order.id).status = FuelOrderStatus.ACKNOWLEDGED
+                session.commit()
+
+        def count_then_race():
+            counts = count_orders()
+            try:
+                acknowledge_in_other_worker()
+            except OperationalError:
+                blocked.append(True)
+            return counts
+
+        try:
+            with patch.object(fuel_order_status_counters, '_count_orders', side_effect=count_then_race):
+                assert reconcile_order_status_counts()['corrected'] == []
+            # The change had to wait for the rebuild; it now commits its deltas on top
+            assert blocked == [True]
+            acknowledge_in_other_worker()
+        finally:
+            engine.dispose()
+
+        db.session.expire_all()
+        assert _changed(before, _counts()) == {'pending_count': -1, 'active_count': 1}
+        assert reconcile_order_status_counts()['corrected'] == []
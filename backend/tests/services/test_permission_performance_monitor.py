@@ -0,0 +1,135 @@
+"""
+Tests for the permission performance monitor and its metrics storage.
+"""
+
+import os
+import random
+import time
+
+from unittest.mock import patch
+
+import pytest
+
+from src.services.permission_metrics import HourlyWindows, LatencyHistogram, MetricsRingBuffer
+from src.services.permission_performance_monitor import PermissionPerformanceMonitor
+
+
+@pytest.fixture
+def monitor():
+    return PermissionPerformanceMonitor(capacity=1000)
+
+
+class TestMetricsStorage:
+    """Tests for the ring buffer and latency histograms."""
+
+    def test_ring_buffer_keeps_most_recent_records(self):
+        """Test that the ring overwrites its oldest records and reads back oldest first."""
+        ring = MetricsRingBuffer(capacity=100)
+        for i in range(250):
+            ring.append(1000.0 + i, i % 7, f"perm_{i % 3}", 'fuel_order', str(i), i % 2 == 0, float(i), i % 4 == 0, 'api')
+
+        records = ring.records()
+        assert len(records) == 100
+        assert [r.timestamp for r in records] == [1000.0 + i for i in range(150, 250)]
+
+        last = records[-1]
+        assert (last.user_id, last.permission, last.resource_type, last.resource_id) == (249 % 7, 'perm_0', 'fuel_order', '249')
+        assert (last.result, last.cache_hit, last.source) == (False, False, 'api')
+
+        assert all(r.user_id == 3 for r in ring.records(user_id=3))
+        assert all(r.permission == 'perm_1' for r in ring.records(permission='perm_1'))
+        assert ring.records(permission='never_checked') == []
+        assert len(ring.records(since=1239.0)) == 10
+
+    def test_histogram_quantiles_within_relative_accuracy(self):
+        """Test that p50/p95/p99 stay within 2% of the exact values."""
+        rng = random.Random(42)
+        samples = [rng.lognormvariate(0, 1.5) for _ in range(50000)]
+        histogram = LatencyHistogram()
+        for sample in samples:
+            histogram.add(sample)
+
+        ordered = sorted(samples)
+        for q in (0.5, 0.95, 0.99):
+            exact = ordered[int(q * (len(ordered) - 1))]
+            assert histogram.quantile(q) == pytest.approx(exact, rel=0.021)
+
+    def test_hourly_windows_merge(self):
+        """Test that windows outside the retention period are dropped and the rest merge."""
+        windows = HourlyWindows(hours=24)
+        now = 1_700_000_000.0
+        for hour in range(30):
+            windows.add(now - hour * 3600, hour % 2 == 0, 10.0 + hour, False)
+
+        merged = windows.merged(now - 30 * 3600, now + 1)
+        assert merged.totals[0] == 24
+        assert merged.totals[4] == 10.0
+        assert merged.totals[5] == 33.0
+
+
+class TestPermissionPerformanceMonitor:
+    """Tests for the monitor's read-time aggregation."""
+
+    def test_current_stats(self, monitor):
+        """Test that recorded checks are aggregated for every timeframe."""
+        for i in range(100):
+            monitor.record_permission_check(1, 'view_orders', result=i % 10 != 0,
+                                            response_time_ms=float(i + 1), cache_hit=i % 2 == 0)
+
+        for timeframe in ('last_hour', 'last_day', 'all'):
+            stats = monitor.get_current_stats(timeframe)
+            assert stats['total_checks'] == 100
+            assert stats['failed_checks'] == 10
+            assert stats['cache_hit_rate_percent'] == 50.0
+            assert stats['min_response_time_ms'] == 1.0
+            assert stats['max_response_time_ms'] == 100.0
+            assert stats['p95_response_time_ms'] == pytest.approx(96.0, rel=0.03)
+
+    def test_stats_beyond_ring_capacity(self, monitor):
+        """Test that day-long stats still count checks the ring buffer has overwritten."""
+        for _ in range(2500):
+            monitor.record_permission_check(1, 'view_orders', response_time_ms=2.0)
+
+        assert monitor.get_current_stats('last_hour')['total_checks'] == 1000
+        assert monitor.get_current_stats('last_day')['total_checks'] == 2500
+        assert len(monitor.export_metrics('all')) == 1000
+
+    def test_user_permission_and_slow_query_stats(self, monitor):
+        """Test per-user, per-permission and slow-query views over the ring buffer."""
+        monitor.record_permission_check(1, 'view_orders', resource_type='fuel_order', response_time_ms=5.0)
+        monitor.record_permission_check(2, 'view_orders', response_time_ms=700.0)
+        monitor.record_permission_check(2, 'edit_orders', response_time_ms=900.0)
+
+        assert monitor.get_user_stats(2)['total_checks'] == 2
+        assert monitor.get_user_stats(2)['most_checked_permissions'][0]['count'] == 1
+        assert monitor.get_permission_stats('view_orders')['user_count'] == 2
+        assert monitor.get_user_stats(1)['resource_type_breakdown'] == {'fuel_order': 1}
+        assert [q['response_time_ms'] for q in monitor.get_slow_queries(500)] == [900.0, 700.0]
+
+        # Checks from the previous hour fall in exactly one trend interval
+        previous_hour = int(time.time() // 3600) - 1
+        with patch('time.time', return_value=previous_hour * 3600 + 1):
+            for _ in range(10):
+                monitor.record_permission_check(3, 'view_orders', response_time_ms=1.0)
+
+        trends = monitor.get_performance_trends('last_24_hours')
+        assert trends['interval_count'] == 2
+        assert [t['total_checks'] for t in trends['trends']] == [10, 3]
+        assert sum(t['total_checks'] for t in monitor.get_performance_trends('last_7_days')['trends']) == 13
+
+        monitor.reset_metrics()
+        assert monitor.get_current_stats('all')['total_checks'] == 0
+
+    @pytest.mark.benchmark
+    @pytest.mark.skipif(os.getenv('RUN_BENCHMARKS') != '1', reason='set RUN_BENCHMARKS=1 to run benchmarks')
+    def test_record_hot_path_cost(self, monitor):
+        """Test that recording a check stays cheap enough for every permission check."""
+        calls = 20000
+        started = time.perf_counter()
+        for i in range(calls):
+            monitor.record_permission_check(i % 50, 'view_orders', result=True,
+                                            response_time_ms=0.5, cache_hit=True)
+        per_call_us = (time.perf_counter() - started) / calls * 1_000_000
+
+        # Generous bound for slow CI machines; locally this is a few microseconds
+        assert per_call_us < 50
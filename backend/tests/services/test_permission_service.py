@@ -0,0 +1,886 @@
+"""
+Tests for the enhanced permission service.
+
+Covers the shared cached check path used by the v2 decorators,
+User.has_permission and the legacy classmethod.
+"""
+
+import pytest
+from contextlib import contextmanager
+from unittest.mock import patch
+from sqlalchemy import event
+
+from src.services.permission_service import PermissionService, ResourceContext
+from src.models.user import User
+from src.models.role import Role
+from src.models.permission import Permission
+from src.models.permission_group import PermissionGroup, PermissionGroupMembership, RolePermissionGroup
+from src.models.fuel_order import FuelOrder
+from src.services.fuel_order_service import FuelOrderService
+from src.extensions import db
+
+
+@contextmanager
+def count_queries():
+    """Collect the SQL statements issued inside the block."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+@contextmanager
+def request_context(app):
+    """Simulate one request; its own app context gives it a fresh g, as in production."""
+    with app.app_context(), app.test_request_context():
+        yield
+
+
+@pytest.fixture
+def permission_service():
+    """A fresh PermissionService wired in as the global instance, without Redis."""
+    service = PermissionService()
+    with patch('src.services.permission_service.REDIS_CACHE_AVAILABLE', False), \
+         patch('src.services.permission_service.enhanced_permission_service', service):
+        service.redis_cache = None
+        yield service
+
+
+@pytest.fixture
+def fueler(app_context):
+    """A user whose role grants fueler permissions through a permission group."""
+    permissions = [
+        Permission(name=name, description=name)
+        for name in ('perm_test_view_assigned', 'perm_test_fueler_dashboard', 'perm_test_view_all')
+    ]
+    db.session.add_all(permissions)
+    group = PermissionGroup(name='perm_test_fuelers', display_name='Fuelers')
+    role = Role(name='Perm Test Fueler', description='Fueler')
+    db.session.add_all([group, role])
+    db.session.flush()
+    for permission in permissions[:2]:
+        db.session.add(PermissionGroupMembership(group_id=group.id, permission_id=permission.id))
+    db.session.add(RolePermissionGroup(role_id=role.id, group_id=group.id))
+    user = User(username='perm_test_fueler', email='perm_test_fueler@example.com', password_hash='x', is_active=True)
+    user.roles.append(role)
+    db.session.add(user)
+    db.session.commit()
+
+    yield user
+
+    db.session.rollback()
+    user.roles.remove(role)
+    RolePermissionGroup.query.filter_by(role_id=role.id).delete()
+    PermissionGroupMembership.query.filter_by(group_id=group.id).delete()
+    for obj in [user, role, group] + permissions:
+        db.session.delete(obj)
+    db.session.commit()
+
+
+class TestCachedPermissionPath:
+    """Test that every entry point shares the cached check path."""
+
+    def test_model_method_is_served_from_cache_after_first_check(self, permission_service, fueler):
+        """Test that User.has_permission no longer hits the database on repeat checks."""
+        assert fueler.has_permission('perm_test_view_assigned') is True
+
+        with count_queries() as statements:
+            assert fueler.has_permission('perm_test_view_assigned') is True
+            assert PermissionService.check_user_permission_legacy(fueler.id, 'perm_test_view_assigned') is True
+
+        assert statements == []
+
+    def test_denied_permissions_are_cached_too(self, permission_service, fueler):
+        """Test that a missing grant is cached like a present one."""
+        assert fueler.has_permission('perm_test_view_all') is False
+
+        with count_queries() as statements:
+            assert fueler.has_permission('perm_test_view_all') is False
+
+        assert statements == []
+
+    def test_request_memo_skips_cache_layers(self, app, permission_service, fueler):
+        """Test that repeated checks within a request are answered from g."""
+        with request_context(app):
+            assert permission_service.user_has_permission(fueler.id, 'perm_test_fueler_dashboard') is True
+
+            with patch.object(permission_service, '_get_cached_basic_permission') as mock_cached:
+                for _ in range(5):
+                    assert fueler.has_permission('perm_test_fueler_dashboard') is True
+
+            mock_cached.assert_not_called()
+
+    def test_invalidation_clears_request_memo(self, app, permission_service, fueler):
+        """Test that revoking a grant mid-request is seen by later checks in that request."""
+        with request_context(app):
+            assert fueler.has_permission('perm_test_fueler_dashboard') is True
+
+            RolePermissionGroup.query.filter_by(role_id=fueler.roles[0].id).update({'is_active': False})
+            db.session.commit()
+            permission_service.invalidate_user_cache(fueler.id)
+
+            assert fueler.has_permission('perm_test_fueler_dashboard') is False
+
+    def test_resource_context_is_checked_against_live_resource(self, app, permission_service, fueler):
+        """Test that ownership is re-evaluated per request while the grant stays cached."""
+        order = FuelOrder(id=4242, assigned_lst_user_id=fueler.id)
+        context = ResourceContext(resource_type='fuel_order', resource_id=order.id, ownership_check=True)
+
+        with patch('src.models.fuel_order.FuelOrder.query') as mock_query:
+            mock_query.get.return_value = order
+
+            with request_context(app):
+                assert permission_service.user_has_permission(fueler.id, 'perm_test_view_assigned', context) is True
+
+            order.assigned_lst_user_id = None
+
+            with request_context(app):
+                assert permission_service.user_has_permission(fueler.id, 'perm_test_view_assigned', context) is False
+
+    def test_fuel_order_list_permission_queries(self, app, permission_service, order_list_fueler):
+        """
+        Benchmark: permission queries issued by a fueler's GET /api/fuel-orders.
+
+        Each request runs the route's view_assigned_orders check and then
+        FuelOrderService.get_fuel_orders, which checks view_all_orders and
+        access_fueler_dashboard. Statements against fuel_orders are the list
+        itself; everything else is permission lookup.
+
+        Baseline before User.has_permission used the cached path (SQLite):
+        27 permission queries cold and 18 warm, because each model-method check
+        reloaded the user, their roles, groups and permissions. Now a cold request costs
+        at most the permission name map and one bitset query, and a warm one
+        costs none.
+        """
+        user_id = order_list_fueler.id
+
+        def list_request():
+            with request_context(app), count_queries() as statements:
+                assert permission_service.user_has_permission(user_id, 'view_assigned_orders')
+                page, message = FuelOrderService.get_fuel_orders(order_list_fueler, {})
+            assert page is not None, message
+            return [statement for statement in statements if 'fuel_orders' not in statement]
+
+        cold_queries = list_request()
+        warm_queries = list_request()
+
+        assert len(cold_queries) <= 2
+        assert warm_queries == []
+
+
+@pytest.fixture
+def order_list_fueler(fueler):
+    """Grant the fueler's group the permissions the fuel order list route checks."""
+    created = []
+    for name in ('view_assigned_orders', 'access_fueler_dashboard', 'view_all_orders'):
+        if Permission.query.filter_by(name=name).first() is None:
+            created.append(Permission(name=name, description=name))
+    db.session.add_all(created)
+    db.session.flush()
+    group = PermissionGroup.query.filter_by(name='perm_test_fuelers').one()
+    for name in ('view_assigned_orders', 'access_fueler_dashboard'):
+        permission = Permission.query.filter_by(name=name).one()
+        db.session.add(PermissionGroupMembership(group_id=group.id, permission_id=permission.id))
+    db.session.commit()
+
+    yield fueler
+
+    db.session.rollback()
+    PermissionGroupMembership.query.filter_by(group_id=group.id).delete()
+    for permission in created:
+        db.session.delete(permission)
+    db.session.commit()
+
+
+@pytest.fixture
+def inherited_grants(fueler):
+    """Give the fueler's group a parent group and the fueler a direct grant."""
+    from src.models.user_permission import UserPermission
+
+    inherited = Permission(name='perm_test_inherited', description='Inherited from parent group')
+    parent = PermissionGroup(name='perm_test_parent', display_name='Parent')
+    db.session.add_all([inherited, parent])
+    db.session.flush()
+    db.session.add(PermissionGroupMembership(group_id=parent.id, permission_id=inherited.id))
+    PermissionGroup.query.filter_by(name='perm_test_fuelers').update({'parent_id': parent.id})
+    view_all = Permission.query.filter_by(name='perm_test_view_all').first()
+    direct = UserPermission(user_id=fueler.id, permission_id=view_all.id)
+    db.session.add(direct)
+    db.session.commit()
+
+    yield parent
+
+    db.session.rollback()
+    db.session.delete(direct)
+    PermissionGroup.query.filter_by(name='perm_test_fuelers').update({'parent_id': None})
+    PermissionGroupMembership.query.filter_by(group_id=parent.id).delete()
+    db.session.delete(parent)
+    db.session.delete(inherited)
+    db.session.commit()
+
+
+class TestPermissionBitsets:
+    """Test the materialized per-user permission bitsets."""
+
+    def test_bitsets_follow_group_hierarchy_and_direct_grants(self, permission_service, fueler, inherited_grants):
+        """Test that parent group permissions are inherited and direct grants kept apart."""
+        from src.services.permission_bitset import compute_user_permission_bits
+
+        bits = compute_user_permission_bits([fueler.id])[fueler.id]
+        registry = permission_service.permission_registry
+
+        assert registry.names_for(bits.group_bits) == [
+            'perm_test_fueler_dashboard', 'perm_test_inherited', 'perm_test_view_assigned'
+        ]
+        assert registry.names_for(bits.direct_bits) == ['perm_test_view_all']
+
+    def test_checks_use_golden_path_and_listings_include_direct(self, permission_service, fueler, inherited_grants):
+        """Test that checks ignore direct grants while get_user_permissions lists them."""
+        assert permission_service.user_has_permission(fueler.id, 'perm_test_inherited') is True
+        assert permission_service.user_has_permission(fueler.id, 'perm_test_view_all') is False
+        assert 'perm_test_view_all' in permission_service.get_user_permissions(fueler.id)
+        assert permission_service.get_user_permissions(fueler.id, include_groups=False) == ['perm_test_view_all']
+
+    def test_bitset_is_computed_in_one_query(self, permission_service, fueler, inherited_grants):
+        """Test that a cold permission listing costs a single SQL statement."""
+        permission_service.permission_registry.names_for(0)
+        user_id = fueler.id
+
+        with count_queries() as statements:
+            permission_service.get_user_permissions(user_id)
+
+        assert len(statements) == 1
+        assert 'RECURSIVE' in statements[0].upper()
+
+    def test_parent_group_change_rebuilds_child_group_users(self, permission_service, fueler, inherited_grants):
+        """Test that changing a parent group invalidates users who inherit through a child group."""
+        assert permission_service.user_has_permission(fueler.id, 'perm_test_inherited') is True
+
+        PermissionGroupMembership.query.filter_by(group_id=inherited_grants.id).update({'is_active': False})
+        db.session.commit()
+        permission_service.invalidate_group_cache(inherited_grants.id)
+
+        assert permission_service.user_has_permission(fueler.id, 'perm_test_inherited') is False
+        assert permission_service.user_has_permission(fueler.id, 'perm_test_view_assigned') is True
+
+    def test_unrelated_users_keep_cached_bitsets(self, permission_service, fueler, inherited_grants):
+        """Test that a role change only drops the bitsets of that role's users."""
+        permission_service._store_in_memory_cache('perm:999999:bits', 'untouched')
+
+        permission_service.invalidate_role_cache(fueler.roles[0].id)
+
+        assert permission_service._get_from_memory_cache('perm:999999:bits') == 'untouched'
+        assert permission_service._get_from_memory_cache(f'perm:{fueler.id}:bits') is None
+
+
+class TestPermissionMemoryCache:
+    """Test the bounded LRU/TTL L1 cache."""
+
+    def test_size_cap_evicts_least_recently_used(self):
+        """Test that the cache never grows past max_size and keeps recently read keys."""
+        from src.services.permission_memory_cache import PermissionMemoryCache
+
+        cache = PermissionMemoryCache(max_size=3, ttl_seconds=300)
+        for user_id in (1, 2, 3):
+            cache.set(f'perm:{user_id}:bits', user_id)
+        cache.get('perm:1:bits')
+        cache.set('perm:4:bits', 4)
+
+        assert len(cache) == 3
+        assert cache.get('perm:2:bits') is None
+        assert cache.get('perm:1:bits') == 1
+        assert cache.get_stats()['evictions'] == 1
+        # Evicted keys leave the user index too
+        assert cache.invalidate_user(2) == 0
+
+    def test_expired_entries_are_dropped_without_being_read(self):
+        """Test that expiry is amortized over later operations, not only on reads of the stale key."""
+        from src.services.permission_memory_cache import PermissionMemoryCache
+
+        cache = PermissionMemoryCache(max_size=100, ttl_seconds=300)
+        with patch('src.services.permission_memory_cache.time.monotonic', return_value=1000.0):
+            for user_id in range(10):
+                cache.set(f'perm:{user_id}:bits', user_id)
+        with patch('src.services.permission_memory_cache.time.monotonic', return_value=1301.0):
+            cache.set('perm:99:bits', 99)
+
+        assert len(cache) == 1
+        assert cache.get_stats()['expirations'] == 10
+        assert cache.get_stats()['users_indexed'] == 1
+
+    def test_invalidate_user_only_touches_that_user(self):
+        """Test that user invalidation uses the index and leaves lookalike keys alone."""
+        from src.services.permission_memory_cache import PermissionMemoryCache
+
+        cache = PermissionMemoryCache(max_size=100, ttl_seconds=300)
+        cache.set('perm:1:bits', 'user 1')
+        cache.set('perm:1:view_orders:abc123', True)
+        cache.set('perm:11:bits', 'user 11')
+        cache.set('perm:2:1:bits', 'user 2')
+
+        assert cache.invalidate_user(1) == 2
+        assert cache.get('perm:1:bits') is None
+        assert cache.get('perm:11:bits') == 'user 11'
+        assert cache.get('perm:2:1:bits') == 'user 2'
+
+    def test_permission_service_memory_cache_is_bounded(self, permission_service):
+        """Test that PermissionService enforces its declared memory cache size."""
+        for user_id in range(permission_service.memory_cache_size + 50):
+            permission_service._store_in_memory_cache(f'perm:{user_id}:bits', user_id)
+
+        stats = permission_service.get_cache_stats()['memory_cache']
+        assert stats['entries'] == permission_service.memory_cache_size
+        assert stats['evictions'] == 50
+
+
+@pytest.fixture
+def redis_cache():
+    """A RedisPermissionCache wired to a mock client instead of a server."""
+    from unittest.mock import MagicMock
+    from src.services.redis_permission_cache import RedisPermissionCache
+
+    with patch.object(RedisPermissionCache, '_init_redis_connection'):
+        cache = RedisPermissionCache()
+    cache.redis_client = MagicMock()
+    cache.redis_client.register_script.return_value.return_value = 0
+    yield cache
+
+
+class TestRedisTagInvalidation:
+    """Test that Redis invalidation goes through per-user tag sets, never KEYS."""
+
+    def test_per_user_keys_are_tagged_on_write(self, redis_cache):
+        """Test that writing a user's key also records it in that user's tag set."""
+        pipe = redis_cache.redis_client.pipeline.return_value
+
+        redis_cache.set('perm:7:bits', {'group': '6', 'direct': '0'})
+        redis_cache.set('stats:global', 1)
+
+        pipe.setex.assert_called_once()
+        pipe.sadd.assert_called_once_with(redis_cache.user_tag_key(7), 'perm:7:bits')
+        redis_cache.redis_client.setex.assert_called_once()
+
+    def test_role_invalidation_is_one_script_call(self, app_context, redis_cache, fueler):
+        """Test that a role's users are resolved in SQL and dropped in a single round-trip."""
+        script = redis_cache.redis_client.register_script.return_value
+        user_id = fueler.id
+
+        redis_cache.invalidate_role_permissions(fueler.roles[0].id)
+
+        script.assert_called_once_with(keys=[redis_cache.user_tag_key(user_id)])
+        redis_cache.redis_client.keys.assert_not_called()
+
+    def test_permission_service_batches_redis_invalidation(self, permission_service, redis_cache, fueler):
+        """Test that a group change costs one Redis call however many users it touches."""
+        permission_service.redis_cache = redis_cache
+        script = redis_cache.redis_client.register_script.return_value
+
+        group = PermissionGroup.query.filter_by(name='perm_test_fuelers').one()
+
+        permission_service.invalidate_group_cache(group.id)
+
+        assert script.call_count == 1
+        redis_cache.redis_client.keys.assert_not_called()
+
+    def test_pattern_delete_uses_scan(self, redis_cache):
+        """Test that pattern deletes walk the keyspace with SCAN in batches."""
+        redis_cache.redis_client.scan_iter.return_value = iter([f'perm:{i}:bits' for i in range(3)])
+        redis_cache.redis_client.delete.return_value = 2
+
+        assert redis_cache.delete_pattern('perm:*', batch_size=2) == 4
+        assert redis_cache.redis_client.delete.call_count == 2
+        redis_cache.redis_client.keys.assert_not_called()
+
+
+class TestPermissionInvalidationBus:
+    """Test that invalidations reach the memory caches of other workers."""
+
+    @staticmethod
+    def worker():
+        """A PermissionService with its own bus, standing in for another worker process."""
+        from unittest.mock import MagicMock
+        from src.services.permission_invalidation_bus import PermissionInvalidationBus
+
+        service = PermissionService()
+        service.redis_cache = None
+        service.invalidation_bus = PermissionInvalidationBus()
+        service.invalidation_bus.redis_client = MagicMock()
+        service.invalidation_bus._handler = service._apply_remote_invalidation
+        return service
+
+    @staticmethod
+    def deliver(publisher, subscriber):
+        """Hand everything the publisher sent to the subscriber, as pub/sub would."""
+        for call in publisher.invalidation_bus.redis_client.publish.call_args_list:
+            channel, data = call.args
+            subscriber.invalidation_bus._dispatch({'type': 'message', 'channel': channel, 'data': data})
+
+    def test_user_invalidation_reaches_other_workers(self, app_context):
+        """Test that invalidating a user on one worker drops it from another worker's L1."""
+        admin_worker, other_worker = self.worker(), self.worker()
+        other_worker._store_in_memory_cache('perm:7:bits', 'stale')
+        other_worker._store_in_memory_cache('perm:8:bits', 'fresh')
+
+        admin_worker.invalidate_user_cache(7)
+        self.deliver(admin_worker, other_worker)
+
+        assert other_worker._get_from_memory_cache('perm:7:bits') is None
+        assert other_worker._get_from_memory_cache('perm:8:bits') == 'fresh'
+
+    def test_full_invalidation_clears_other_workers(self, app_context):
+        """Test that a global invalidation empties every worker's L1."""
+        admin_worker, other_worker = self.worker(), self.worker()
+        other_worker._store_in_memory_cache('perm:8:bits', 'stale')
+
+        admin_worker.invalidate_cache()
+        self.deliver(admin_worker, other_worker)
+
+        assert len(other_worker.memory_cache) == 0
+
+    def test_own_messages_are_ignored(self, app_context):
+        """Test that a worker does not re-apply its own invalidations."""
+        service = self.worker()
+        service.invalidate_user_cache(7)
+        service._store_in_memory_cache('perm:7:bits', 'rebuilt')
+
+        self.deliver(service, service)
+
+        assert service._get_from_memory_cache('perm:7:bits') == 'rebuilt'
+        assert service.invalidation_bus.stats.applied == 0
+
+    def test_listener_clears_cache_on_connect_and_applies_messages(self):
+        """Test that the listener thread drops L1 on (re)connect, since missed messages are lost."""
+        import json
+        import threading
+        from unittest.mock import MagicMock
+        from src.services.permission_invalidation_bus import PermissionInvalidationBus
+
+        applied = threading.Event()
+        received = []
+        reconnects = []
+        message = {'type': 'message', 'data': json.dumps({'origin': 'other', 'users': [7]})}
+
+        client = MagicMock()
+        client.pubsub.return_value.get_message.side_effect = [message] + [None] * 1000
+
+        def handler(payload):
+            received.append(payload)
+            applied.set()
+
+        bus = PermissionInvalidationBus()
+        bus.start(client, handler, lambda: reconnects.append(True))
+        try:
+            assert applied.wait(5)
+        finally:
+            bus.stop()
+
+        assert reconnects == [True]
+        assert received == [{'origin': 'other', 'users': [7]}]
+        client.pubsub.return_value.subscribe.assert_called_once_with(bus.channel)
+
+
+@pytest.fixture
+def other_user(app_context):
+    """A second active user without any role."""
+    user = User(username='perm_test_other', email='perm_test_other@example.com', password_hash='x', is_active=True)
+    db.session.add(user)
+    db.session.commit()
+
+    yield user
+
+    db.session.rollback()
+    db.session.delete(user)
+    db.session.commit()
+
+
+class TestPermissionWarmUp:
+    """Test bulk warm-up and login prefetch of permission bitsets."""
+
+    def test_warm_up_uses_one_query_and_pipeline_per_batch(self, permission_service, fueler, other_user):
+        """Test that warming computes all users set-based and writes Redis with batch_set."""
+        from unittest.mock import MagicMock
+
+        redis_cache = MagicMock()
+        user_id = fueler.id
+        permission_service.permission_registry.names_for(0)
+
+        with patch('src.services.permission_service.REDIS_CACHE_AVAILABLE', True), \
+             patch('src.services.permission_service.get_redis_permission_cache', return_value=redis_cache), \
+             count_queries() as statements:
+            result = permission_service.warm_permission_cache()
+
+        # Active user ids, then one bitset query for the single batch
+        assert len(statements) == 2
+        assert result['batches'] == 1
+        assert result['users_warmed'] >= 2
+        redis_cache.batch_set.assert_called_once()
+        assert f'perm:{user_id}:bits' in redis_cache.batch_set.call_args.args[0]
+
+        with count_queries() as statements:
+            assert permission_service.user_has_permission(user_id, 'perm_test_view_assigned') is True
+        assert statements == []
+
+    def test_failed_batches_are_counted(self, permission_service, fueler, other_user):
+        """Test that a failed Redis write or bitset query is reported instead of counted as warmed."""
+        from unittest.mock import MagicMock
+        from src.services.permission_bitset import compute_user_permission_bits
+
+        redis_cache = MagicMock()
+        redis_cache.batch_set.side_effect = ConnectionError('redis down')
+        user_ids = [fueler.id, other_user.id]
+
+        with patch('src.services.permission_service.REDIS_CACHE_AVAILABLE', True), \
+             patch('src.services.permission_service.get_redis_permission_cache', return_value=redis_cache):
+            result = permission_service.warm_permission_cache(user_ids=user_ids)
+        assert result == {'users_processed': 2, 'users_warmed': 0, 'batches': 1, 'failed_batches': 1}
+
+        with patch('src.services.permission_service.compute_user_permission_bits',
+                   side_effect=[RuntimeError('query failed'), compute_user_permission_bits([other_user.id])]):
+            result = permission_service.warm_permission_cache(user_ids=user_ids, batch_size=1)
+        assert result == {'users_processed': 2, 'users_warmed': 1, 'batches': 2, 'failed_batches': 1}
+
+    def test_cli_command_warms_active_users(self, app, permission_service, fueler):
+        """Test that 'flask maintenance warm-permissions' fills the cache."""
+        user_id = fueler.id
+
+        result = app.test_cli_runner().invoke(args=['maintenance', 'warm-permissions', '--batch-size', '2'])
+
+        assert result.exit_code == 0, result.output
+        assert 'Warmed' in result.output
+        assert permission_service._get_from_memory_cache(f'perm:{user_id}:bits') is not None
+
+    def test_login_prefetch_runs_in_background(self, app, permission_service, fueler):
+        """Test that a prefetch computes the bitsets off the request thread, once."""
+        user_id = fueler.id
+
+        thread = permission_service.prefetch_user_permissions(app, user_id)
+        thread.join(5)
+
+        assert permission_service._get_from_memory_cache(f'perm:{user_id}:bits') is not None
+        assert permission_service.prefetch_user_permissions(app, user_id) is None
+
+
+class TestSingleFlight:
+    """Test coalescing of concurrent permission cache misses."""
+
+    @staticmethod
+    def run_concurrently(target, count):
+        """Start count callers of target at once."""
+        import threading
+
+        threads = [threading.Thread(target=target) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def test_concurrent_misses_compute_once(self, app, permission_service):
+        """Test that parallel requests for one user's expired bitsets share a single query."""
+        import threading
+        import time
+        from src.services.permission_bitset import UserPermissionBits
+
+        release = threading.Event()
+        computed = []
+        results = []
+
+        def slow_compute(user_ids):
+            computed.append(user_ids)
+            release.wait(5)
+            return {user_id: UserPermissionBits(0b110, 0) for user_id in user_ids}
+
+        def dashboard_request():
+            with app.app_context():
+                results.append(permission_service._get_user_permission_bits(4242)[0])
+
+        with patch('src.services.permission_service.compute_user_permission_bits', side_effect=slow_compute):
+            threads = self.run_concurrently(dashboard_request, 8)
+            while permission_service.single_flight.get_stats()['in_flight'] == 0:
+                time.sleep(0.01)
+            time.sleep(0.2)
+            release.set()
+            for thread in threads:
+                thread.join(5)
+
+        assert len(computed) == 1
+        assert results == [UserPermissionBits(0b110, 0)] * 8
+        stats = permission_service.get_cache_stats()['single_flight']
+        assert stats['leaders'] == 1
+        assert stats['coalesced_waits'] == 7
+
+    def test_bitsets_computed_across_an_invalidation_are_not_cached(self, app_context, permission_service):
+        """Test that a revocation landing mid-computation does not leave the old bitsets cached."""
+        from src.services.permission_bitset import UserPermissionBits
+
+        def compute_then_revoke(user_ids):
+            # The query has read the old grants when the revocation commits
+            permission_service.invalidate_user_cache(4242)
+            return {user_id: UserPermissionBits(0b110, 0) for user_id in user_ids}
+
+        with patch('src.services.permission_service.compute_user_permission_bits', side_effect=compute_then_revoke):
+            assert permission_service._get_user_permission_bits(4242) == (UserPermissionBits(0b110, 0), False)
+            permission_service.check_many([4243], ['perm_test_view_assigned'])
+
+        assert permission_service._get_from_memory_cache('perm:4242:bits') is None
+
+        with patch('src.services.permission_service.compute_user_permission_bits',
+                   return_value={4242: UserPermissionBits(0b010, 0)}):
+            assert permission_service._get_user_permission_bits(4242) == (UserPermissionBits(0b010, 0), False)
+        assert permission_service._get_from_memory_cache('perm:4242:bits') == UserPermissionBits(0b010, 0)
+
+    def test_other_worker_invalidation_is_seen_through_version_stamps(self, app_context, permission_service,
+                                                                     version_redis):
+        """Test that a bump of the shared version stamps alone is enough to skip the store."""
+        from src.services.permission_bitset import UserPermissionBits
+
+        def compute_while_other_worker_revokes(user_ids):
+            permission_service.permission_versions.bump_users(user_ids)
+            return {user_id: UserPermissionBits(0b110, 0) for user_id in user_ids}
+
+        with patch('src.services.permission_service.compute_user_permission_bits',
+                   side_effect=compute_while_other_worker_revokes):
+            permission_service.check_many([4242, 4243], ['perm_test_view_assigned'])
+
+        assert permission_service._get_from_memory_cache('perm:4242:bits') is None
+        assert permission_service._get_from_memory_cache('perm:4243:bits') is None
+
+    def test_invalidation_detaches_in_flight_computation(self, app, permission_service):
+        """Test that callers arriving after an invalidation do not wait on the pre-revocation query."""
+        import threading
+        import time
+        from src.services.permission_bitset import UserPermissionBits
+
+        release = threading.Event()
+        computed = []
+        results = []
+
+        def compute(user_ids):
+            computed.append(user_ids)
+            if len(computed) == 1:
+                # Read before the revocation
+                release.wait(5)
+                return {user_id: UserPermissionBits(0b110, 0) for user_id in user_ids}
+            return {user_id: UserPermissionBits(0b010, 0) for user_id in user_ids}
+
+        def stale_request():
+            with app.app_context():
+                results.append(permission_service._get_user_permission_bits(4242)[0])
+
+        with patch('src.services.permission_service.compute_user_permission_bits', side_effect=compute):
+            [thread] = self.run_concurrently(stale_request, 1)
+            while permission_service.single_flight.get_stats()['in_flight'] == 0:
+                time.sleep(0.01)
+
+            permission_service.invalidate_user_cache(4242)
+            assert permission_service._get_user_permission_bits(4242) == (UserPermissionBits(0b010, 0), False)
+
+            release.set()
+            thread.join(5)
+
+        assert len(computed) == 2
+        assert results == [UserPermissionBits(0b110, 0)]
+        assert permission_service._get_from_memory_cache('perm:4242:bits') == UserPermissionBits(0b010, 0)
+        assert permission_service.single_flight.get_stats()['in_flight'] == 0
+
+    def test_errors_are_shared_with_waiters(self):
+        """Test that waiters see the leader's exception instead of hanging or recomputing."""
+        import threading
+        import time
+        from src.services.single_flight import SingleFlight
+
+        flight = SingleFlight()
+        release = threading.Event()
+        errors = []
+
+        def failing_compute():
+            release.wait(5)
+            raise RuntimeError('database unavailable')
+
+        def caller():
+            try:
+                flight.do('perm:1:bits', failing_compute)
+            except RuntimeError as e:
+                errors.append(str(e))
+
+        threads = self.run_concurrently(caller, 3)
+        while flight.get_stats()['in_flight'] == 0:
+            time.sleep(0.01)
+        time.sleep(0.2)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert errors == ['database unavailable'] * 3
+        assert flight.get_stats()['in_flight'] == 0
+
+    def test_redis_lock_waits_for_other_worker_result(self):
+        """Test that a worker losing the Redis lock polls the shared cache instead of computing."""
+        from unittest.mock import MagicMock
+        from src.services.single_flight import SingleFlight
+
+        flight = SingleFlight(poll_interval=0)
+        redis_client = MagicMock()
+        redis_client.set.return_value = None
+        recheck = MagicMock(side_effect=[None, 'from other worker'])
+        compute = MagicMock()
+
+        assert flight.do('perm:1:bits', compute, recheck=recheck, redis_client=redis_client) == 'from other worker'
+
+        compute.assert_not_called()
+        assert flight.get_stats()['redis_lock_waits'] == 1
+
+    def test_redis_lock_holder_computes_and_releases(self):
+        """Test that the lock owner computes and releases only its own lock."""
+        from unittest.mock import MagicMock
+        from src.services.single_flight import SingleFlight
+
+        flight = SingleFlight()
+        redis_client = MagicMock()
+        redis_client.set.return_value = True
+
+        assert flight.do('perm:1:bits', lambda: 'computed', recheck=MagicMock(), redis_client=redis_client) == 'computed'
+
+        token = redis_client.set.call_args.args[1]
+        assert redis_client.eval.call_args.args[1:] == (1, 'fbo:perm:lock:perm:1:bits', token)
+        assert flight.get_stats()['redis_lock_acquired'] == 1
+
+
+class TestCheckMany:
+    """Test the batch permission check API."""
+
+    def test_matches_single_checks(self, permission_service, fueler, other_user):
+        """Test that batch results agree with user_has_permission for every pair."""
+        names = ['perm_test_view_assigned', 'perm_test_fueler_dashboard', 'perm_test_view_all', 'no_such_permission']
+        user_ids = [fueler.id, other_user.id]
+
+        results = permission_service.check_many(user_ids, names)
+
+        for user_id in user_ids:
+            for name in names:
+                assert results[user_id][name] == permission_service.user_has_permission(user_id, name)
+        assert results[fueler.id]['perm_test_view_assigned'] is True
+        assert results[other_user.id]['perm_test_view_assigned'] is False
+
+    def test_cold_users_are_resolved_in_bulk(self, permission_service, fueler, other_user):
+        """Test that L1 hits are reused, Redis is read with one MGET and the rest computed in one query."""
+        from unittest.mock import MagicMock
+        from src.services.permission_bitset import UserPermissionBits
+
+        fueler_id, other_id = fueler.id, other_user.id
+        permission_service._store_in_memory_cache('perm:5001:bits', UserPermissionBits(0, 0))
+        redis_cache = MagicMock()
+        redis_cache.batch_get.return_value = {f'perm:{other_id}:bits': UserPermissionBits(0, 0).to_cache()}
+        permission_service.permission_registry.names_for(0)
+
+        with patch('src.services.permission_service.REDIS_CACHE_AVAILABLE', True), \
+             patch('src.services.permission_service.get_redis_permission_cache', return_value=redis_cache), \
+             count_queries() as statements:
+            results = permission_service.check_many([5001, fueler_id, other_id], ['perm_test_view_assigned'])
+
+        redis_cache.batch_get.assert_called_once_with([f'perm:{fueler_id}:bits', f'perm:{other_id}:bits'])
+        assert len(statements) == 1
+        assert results == {
+            5001: {'perm_test_view_assigned': False},
+            fueler_id: {'perm_test_view_assigned': True},
+            other_id: {'perm_test_view_assigned': False}
+        }
+
+    def test_permission_matrix_query_count_is_flat(self, permission_service, fueler, other_user):
+        """Test that the permission matrix no longer issues a query per (user, permission) pair."""
+        from src.services.user_service import UserService
+
+        permission_service.permission_registry.names_for(0)
+
+        with count_queries() as statements:
+            matrix = UserService.get_permission_matrix()
+
+        # Users, permissions and one bitset query, however many users and permissions exist
+        assert len(statements) == 3
+        assert matrix[str(fueler.id)]['permissions']['perm_test_view_assigned'] is True
+        assert matrix[str(other_user.id)]['permissions']['perm_test_view_assigned'] is False
+
+
+class DictRedis:
+    """In-memory stand-in for the few Redis commands the version stamps use."""
+
+    def __init__(self):
+        self.data = {}
+        self.commands = []
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def set(self, key, value, nx=False, ex=None):
+        if not (nx and key in self.data):
+            self.data[key] = value
+        self.commands.append(True)
+
+    def mget(self, keys):
+        self.commands.append([self.data.get(key) for key in keys])
+
+    def execute(self):
+        results, self.commands = self.commands, []
+        return results
+
+
+@pytest.fixture
+def version_redis(permission_service):
+    """Back the service's permission version stamps with DictRedis."""
+    redis_client = DictRedis()
+    permission_service.permission_versions.get_redis_client = lambda: redis_client
+    yield redis_client
+
+
+class TestPermissionClaims:
+    """Test authorizing from version-stamped permission claims in the access token."""
+
+    def test_current_claims_authorize_without_database(self, app, permission_service, version_redis, fueler):
+        """Test that a fresh token answers checks with no permission queries, even on a cold worker."""
+        user_id = fueler.id
+        claims = permission_service.issue_permission_claims(user_id)
+        permission_service.memory_cache.clear()
+        # The permission name map is loaded once per process, not per user
+        permission_service.permission_registry.names_for(0)
+
+        with request_context(app), count_queries() as statements:
+            grants = permission_service.check_token_permissions(
+                user_id, claims, ['perm_test_view_assigned', 'perm_test_view_all']
+            )
+
+        assert grants == {'perm_test_view_assigned': True, 'perm_test_view_all': False}
+        assert statements == []
+
+    def test_invalidation_makes_claims_stale(self, app, permission_service, version_redis, fueler):
+        """Test that a permission change sends existing tokens back to the database path."""
+        user_id = fueler.id
+        claims = permission_service.issue_permission_claims(user_id)
+
+        permission_service.invalidate_role_cache(fueler.roles[0].id)
+
+        with request_context(app):
+            assert permission_service.check_token_permissions(user_id, claims, ['perm_test_view_assigned']) is None
+
+        fresh_claims = permission_service.issue_permission_claims(user_id)
+        with request_context(app):
+            assert permission_service.check_token_permissions(user_id, fresh_claims, ['perm_test_view_assigned']) == {
+                'perm_test_view_assigned': True
+            }
+
+    def test_global_invalidation_makes_every_token_stale(self, app, permission_service, version_redis, fueler):
+        """Test that clearing all caches also retires every issued token's claims."""
+        claims = permission_service.issue_permission_claims(fueler.id)
+
+        permission_service.invalidate_cache()
+
+        with request_context(app):
+            assert permission_service.check_token_permissions(fueler.id, claims, ['perm_test_view_assigned']) is None
+
+    def test_no_claims_without_redis(self, permission_service, fueler):
+        """Test that tokens carry no permission claims when version stamps cannot be kept."""
+        assert permission_service.issue_permission_claims(fueler.id) == {}
+        assert permission_service.check_token_permissions(fueler.id, {}, ['perm_test_view_assigned']) is None
@@ -5,20 +5,28 @@ Following TDD principles, these tests validate all receipt business logic
 and lifecycle operations including creation, calculation, generation, and state transitions.
 """
 
+import os
+import threading
+import time
 import pytest
 from decimal import Decimal
-from datetime import datetime
+from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock
 
 from src.services.receipt_service import ReceiptService
 from src.models.receipt import Receipt, ReceiptStatus
 from src.models.receipt_line_item import ReceiptLineItem, LineItemType
+from src.models.receipt_number_counter import ReceiptNumberCounter
 from src.models.fuel_order import FuelOrder, FuelOrderStatus
 from src.models.customer import Customer
 from src.models.aircraft import Aircraft
 from src.models.aircraft_type import AircraftType
 from src.models.fuel_price import FuelPrice, FuelTypeEnum
 from src.models.fee_rule import FeeRule
+from src.models.fuel_type import FuelType
+from src.services.fuel_price_cache import FuelPriceCache, FuelPriceSnapshot
+from src.services.receipt_pdf_cache import ReceiptPdfCache
+from src.services.receipt_pdf_renderer import ReceiptPdfData, ReceiptPdfLineItem
 from src.extensions import db
 
 
@@ -599,72 +607,510 @@ class TestVoidReceipt:
 class TestGetFuelPrice:
     """Test fuel price retrieval logic."""
     
-    def test_get_fuel_price_success(self, receipt_service):
+    @pytest.fixture
+    def receipt_service(self):
+        """Fixture to provide a ReceiptService instance."""
+        return ReceiptService()
+    
+    @pytest.fixture
+    def mock_price_cache(self):
+        """Fuel price cache where JET_A resolves to fuel type 1 priced at 5.75."""
+        with patch('src.services.receipt_service.get_fuel_price_cache') as mock_get_cache:
+            cache = mock_get_cache.return_value
+            cache.get_fuel_type_id.side_effect = lambda code: {'JET_A': 1}.get(code)
+            cache.current_price.return_value = FuelPriceSnapshot(
+                id=1, fuel_type_id=1, price=Decimal("5.75"), currency='USD',
+                effective_date=datetime.utcnow(), created_at=datetime.utcnow(), updated_at=datetime.utcnow()
+            )
+            yield cache
+    
+    def test_get_fuel_price_success(self, receipt_service, mock_price_cache, app_context):
         """Test successful fuel price retrieval."""
-        mock_fuel_price = FuelPrice(
-            fuel_type=FuelTypeEnum.JET_A,
-            price=Decimal("5.75"),
-            effective_date=datetime.utcnow()
-        )
+        price = receipt_service._get_fuel_price("JET_A")
         
-        with patch('src.models.fuel_price.FuelPrice.query') as mock_query:
-            mock_query.filter.return_value.order_by.return_value.first.return_value = mock_fuel_price
-            
-            price = receipt_service._get_fuel_price("JET_A")
-            
-            assert price == Decimal("5.75")
+        assert price == Decimal("5.75")
+        mock_price_cache.current_price.assert_called_once_with(1)
     
-    def test_get_fuel_price_fallback(self, receipt_service):
+    def test_get_fuel_price_fallback(self, receipt_service, mock_price_cache, app_context):
         """Test fallback price when no fuel price found."""
+        mock_price_cache.current_price.return_value = None
+        
+        assert receipt_service._get_fuel_price("JET_A") == Decimal("5.75")  # Fallback price
+        assert receipt_service._get_fuel_price("AVGAS") == Decimal("6.25")  # Unknown code falls back too
+    
+    def test_get_fuel_price_normalize_variations(self, receipt_service, mock_price_cache, app_context):
+        """Test fuel type normalization for common variations."""
+        # Test various fuel type variations
+        variations = ["jet_a", "JET-A", "jet a", "JET", FuelType(name="Jet A", code="JET_A")]
+        for variation in variations:
+            price = receipt_service._get_fuel_price(variation)
+            assert price == Decimal("5.75")
+        
+        assert mock_price_cache.current_price.call_count == len(variations)
+
+
+class TestFuelPriceCache:
+    """Test the effective-dated fuel price cache."""
+    
+    @pytest.fixture
+    def price_history(self, app_context):
+        """Jet A priced yesterday, an hour ago and tomorrow."""
+        fuel_type = FuelType(name="Cache Test Jet A", code="CACHE_JET_A")
+        db.session.add(fuel_type)
+        db.session.flush()
+        now = datetime.utcnow()
+        for hours, price in ((-24, "5.00"), (-1, "5.50"), (24, "6.00")):
+            db.session.add(FuelPrice(fuel_type_id=fuel_type.id, price=Decimal(price),
+                                     effective_date=now + timedelta(hours=hours)))
+        db.session.commit()
+        
+        yield fuel_type, now
+        
+        FuelPrice.query.filter_by(fuel_type_id=fuel_type.id).delete()
+        db.session.delete(fuel_type)
+        db.session.commit()
+    
+    def test_current_price_is_bisected_from_timeline(self, price_history):
+        """Test that the price in effect is picked by effective date, ignoring future prices."""
+        fuel_type, now = price_history
+        cache = FuelPriceCache()
+        
+        assert cache.get_fuel_type_id("CACHE_JET_A") == fuel_type.id
+        assert cache.current_price(fuel_type.id).price == Decimal("5.50")
+        assert cache.current_price(fuel_type.id, as_of=now - timedelta(hours=2)).price == Decimal("5.00")
+        assert cache.current_price(fuel_type.id, as_of=now - timedelta(days=2)) is None
+        assert cache.get_timeline(fuel_type.id).latest.price == Decimal("6.00")
+        assert len(cache.get_timeline(fuel_type.id)) == 3
+        assert len(cache.get_timeline(-1)) == 0
+    
+    def test_lookups_are_served_from_memory_until_invalidated(self, price_history):
+        """Test that repeated lookups do not query fuel_prices and writes are seen after invalidation."""
+        fuel_type, now = price_history
+        cache = FuelPriceCache()
+        cache.current_price(fuel_type.id)
+        
+        db.session.add(FuelPrice(fuel_type_id=fuel_type.id, price=Decimal("5.75"), effective_date=now))
+        db.session.commit()
+        
         with patch('src.models.fuel_price.FuelPrice.query') as mock_query:
-            mock_query.filter.return_value.order_by.return_value.first.return_value = None
+            assert cache.current_price(fuel_type.id).price == Decimal("5.50")
+            mock_query.order_by.assert_not_called()
+        
+        cache.invalidate()
+        assert cache.current_price(fuel_type.id).price == Decimal("5.75")
+    
+    def test_invalidation_reaches_other_workers_through_shared_version(self, price_history):
+        """Test that a price write in one worker makes every worker reload before pricing again."""
+        fuel_type, now = price_history
+        versions = {}
+        shared_redis = MagicMock()
+        shared_redis.get.side_effect = versions.get
+        shared_redis.incr.side_effect = lambda key: versions.__setitem__(key, versions.get(key, 0) + 1) or versions[key]
+        writer, reader = FuelPriceCache(), FuelPriceCache()
+        
+        with patch.object(writer.versions, '_get_redis_client', return_value=shared_redis), \
+             patch.object(reader.versions, '_get_redis_client', return_value=shared_redis):
+            assert reader.current_price(fuel_type.id).price == Decimal("5.50")
             
-            price = receipt_service._get_fuel_price("JET_A")
+            db.session.add(FuelPrice(fuel_type_id=fuel_type.id, price=Decimal("5.75"), effective_date=now))
+            db.session.commit()
+            writer.invalidate()
             
-            assert price == Decimal("5.75")  # Fallback price
+            assert reader.current_price(fuel_type.id).price == Decimal("5.75")
+
+
+class TestReceiptPdfCache:
+    """Test the content-addressed receipt PDF cache."""
     
-    def test_get_fuel_price_normalize_variations(self, receipt_service):
-        """Test fuel type normalization for common variations."""
-        mock_fuel_price = FuelPrice(
-            fuel_type=FuelTypeEnum.JET_A,
-            price=Decimal("5.75")
+    def _pdf_data(self, updated_at=None):
+        return ReceiptPdfData(
+            receipt_id=42, receipt_number="R-20240101-0001", status="GENERATED",
+            generated_at=datetime(2024, 1, 1, 12, 0), paid_at=None,
+            updated_at=updated_at or datetime(2024, 1, 1, 12, 0), fuel_order_id=7,
+            tail_number="N12345", customer_name="Test Customer", aircraft_type="Light Jet",
+            is_caa_applied=False, fuel_type="JET_A", fuel_quantity_gallons=Decimal("100.00"),
+            fuel_unit_price=Decimal("5.7500"), fuel_subtotal=Decimal("575.00"),
+            total_fees_amount=Decimal("0.00"), total_waivers_amount=Decimal("0.00"),
+            tax_amount=Decimal("0.00"), grand_total_amount=Decimal("575.00"),
+            line_items=(ReceiptPdfLineItem("Fuel (100 gallons)", "FUEL", Decimal("100.00"), Decimal("5.7500"), Decimal("575.00")),)
         )
+    
+    def test_pdf_is_rendered_once_and_served_from_disk(self, tmp_path):
+        """Test that a cache miss renders the PDF and later requests reuse the file."""
+        from src.services import receipt_pdf_cache
         
-        with patch('src.models.fuel_price.FuelPrice.query') as mock_query:
-            mock_query.filter.return_value.order_by.return_value.first.return_value = mock_fuel_price
+        cache = ReceiptPdfCache(cache_dir=str(tmp_path), max_workers=0)
+        data = self._pdf_data()
+        
+        with patch('src.services.receipt_pdf_cache.render_receipt_pdf_to_file',
+                   side_effect=receipt_pdf_cache.render_receipt_pdf_to_file) as mock_render:
+            first = cache.get_pdf_path(data)
+            second = cache.get_pdf_path(data)
+        
+        assert first == second
+        assert mock_render.call_count == 1
+        with open(first, 'rb') as pdf_file:
+            assert pdf_file.read(4) == b'%PDF'
+    
+    def test_rendering_is_deterministic(self):
+        """Test that the same snapshot always renders to the same bytes."""
+        from src.services.receipt_pdf_renderer import render_receipt_pdf
+        
+        assert render_receipt_pdf(self._pdf_data()) == render_receipt_pdf(self._pdf_data())
+    
+    @pytest.mark.parametrize('changes', [
+        {'updated_at': datetime(2024, 1, 2, 9, 30)},
+        {'customer_name': 'Renamed Customer'},
+        {'tail_number': 'N54321'},
+    ])
+    def test_changed_content_gets_new_file_and_drops_old_one(self, tmp_path, changes):
+        """Test that any change to the printed data re-renders and removes the superseded PDF once unused."""
+        import dataclasses
+        from src.services.receipt_pdf_cache import SUPERSEDED_PDF_GRACE_SECONDS
+        
+        cache = ReceiptPdfCache(cache_dir=str(tmp_path), max_workers=0)
+        original = self._pdf_data()
+        changed = dataclasses.replace(original, **changes)
+        
+        old_path = cache.get_pdf_path(original)
+        last_used = time.time() - SUPERSEDED_PDF_GRACE_SECONDS - 1
+        os.utime(old_path, (last_used, last_used))
+        new_path = cache.get_pdf_path(changed)
+        
+        assert new_path != old_path
+        assert os.listdir(os.path.dirname(new_path)) == [os.path.basename(new_path)]
+    
+    def test_superseded_pdf_survives_while_in_use(self, tmp_path):
+        """Test that a re-render does not delete a PDF another download was just handed."""
+        import dataclasses
+        
+        cache = ReceiptPdfCache(cache_dir=str(tmp_path), max_workers=0)
+        original = self._pdf_data()
+        
+        old_path = cache.get_pdf_path(original)
+        cache.get_pdf_path(dataclasses.replace(original, status="VOID"))
+        
+        with open(old_path, 'rb') as pdf_file:
+            assert pdf_file.read(4) == b'%PDF'
+    
+    def test_concurrent_misses_share_one_render(self, tmp_path):
+        """Test that simultaneous downloads of an uncached PDF coalesce onto one render."""
+        from concurrent.futures import ThreadPoolExecutor
+        from src.services import receipt_pdf_cache
+        
+        cache = ReceiptPdfCache(cache_dir=str(tmp_path), max_workers=0)
+        data = self._pdf_data()
+        render_started = threading.Event()
+        release_render = threading.Event()
+        real_render = receipt_pdf_cache.render_receipt_pdf_to_file
+        
+        def slow_render(pdf_data, path):
+            render_started.set()
+            release_render.wait(timeout=10)
+            return real_render(pdf_data, path)
+        
+        with patch('src.services.receipt_pdf_cache.render_receipt_pdf_to_file', side_effect=slow_render) as mock_render:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                first = executor.submit(cache.get_pdf_path, data)
+                render_started.wait(timeout=10)
+                others = [executor.submit(cache.get_pdf_path, data) for _ in range(7)]
+                release_render.set()
+                paths = {first.result()} | {future.result() for future in others}
+        
+        assert len(paths) == 1
+        assert mock_render.call_count == 1
+    
+    def test_schedule_without_pool_defers_to_first_download(self, tmp_path):
+        """Test that pre-rendering is skipped when there is no worker pool to run it."""
+        cache = ReceiptPdfCache(cache_dir=str(tmp_path), max_workers=0)
+        load_data = MagicMock()
+        
+        cache.schedule(load_data)
+        
+        load_data.assert_not_called()
+        assert cache.get_cached_path(self._pdf_data()) is None
+    
+    def test_green_wait_polls_instead_of_blocking(self):
+        """Test that under eventlet a render is awaited by polling with eventlet.sleep."""
+        from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+        from src.services import receipt_pdf_cache
+        
+        future = Future()
+        threading.Timer(0.05, future.set_result, args=('/tmp/receipt.pdf',)).start()
+        
+        with patch('src.services.receipt_pdf_cache._is_green', return_value=True), \
+             patch('src.services.receipt_pdf_cache.eventlet.sleep', side_effect=time.sleep) as mock_sleep:
+            assert receipt_pdf_cache.wait_for_render(future, timeout=5) == '/tmp/receipt.pdf'
+            assert mock_sleep.called
+            with pytest.raises(FutureTimeoutError):
+                receipt_pdf_cache.wait_for_render(Future(), timeout=0.05)
+
+
+class TestReceiptPdfExport:
+    """Test the streamed bulk PDF export."""
+    
+    def _pdf_data(self, receipt_id, status="GENERATED"):
+        return ReceiptPdfData(
+            receipt_id=receipt_id, receipt_number=f"R-20240101-{receipt_id:04d}", status=status,
+            generated_at=datetime(2024, 1, 1, 12, 0), paid_at=None,
+            updated_at=datetime(2024, 1, 1, 12, 0), fuel_order_id=receipt_id,
+            tail_number="N12345", customer_name="Test Customer", aircraft_type=None,
+            is_caa_applied=False, fuel_type="JET_A", fuel_quantity_gallons=Decimal("100.00"),
+            fuel_unit_price=Decimal("5.7500"), fuel_subtotal=Decimal("575.00"),
+            total_fees_amount=Decimal("0.00"), total_waivers_amount=Decimal("0.00"),
+            tax_amount=Decimal("0.00"), grand_total_amount=Decimal("575.00"), line_items=()
+        )
+    
+    def test_export_zip_has_one_pdf_per_receipt_in_order(self, tmp_path):
+        """Test that the archive holds each receipt's PDF under its receipt number."""
+        import io
+        import zipfile
+        from src.services.receipt_pdf_export import stream_receipt_pdf_zip
+        
+        cache = ReceiptPdfCache(cache_dir=str(tmp_path), max_workers=0)
+        items = [self._pdf_data(receipt_id) for receipt_id in (3, 1, 2)]
+        
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(stream_receipt_pdf_zip(items, cache))))
+        
+        assert archive.namelist() == [f"Receipt_R-20240101-000{receipt_id}.pdf" for receipt_id in (3, 1, 2)]
+        assert all(archive.read(name).startswith(b'%PDF') for name in archive.namelist())
+    
+    def test_export_reuses_cached_pdfs(self, tmp_path):
+        """Test that finalized receipts already on disk are not rendered again."""
+        cache = ReceiptPdfCache(cache_dir=str(tmp_path), max_workers=0)
+        cached = self._pdf_data(1)
+        path = cache.path_for(cached)
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as pdf_file:
+            pdf_file.write(b'%PDF-cached')
+        
+        with patch('src.services.receipt_pdf_cache.render_receipt_pdf', return_value=b'%PDF-fresh') as mock_render:
+            results = list(cache.render_many([cached, self._pdf_data(2, status="DRAFT")]))
+        
+        assert [pdf_bytes for _, pdf_bytes, _ in results] == [b'%PDF-cached', b'%PDF-fresh']
+        assert mock_render.call_count == 1
+    
+    def test_failed_receipts_are_listed_instead_of_aborting(self, tmp_path):
+        """Test that one failing render does not break the rest of the export."""
+        import io
+        import zipfile
+        from src.services.receipt_pdf_export import stream_receipt_pdf_zip
+        
+        cache = ReceiptPdfCache(cache_dir=str(tmp_path), max_workers=0)
+        
+        def render(data):
+            if data.receipt_id == 2:
+                raise RuntimeError("bad receipt")
+            return b'%PDF-ok'
+        
+        with patch('src.services.receipt_pdf_cache.render_receipt_pdf', side_effect=render):
+            output = b''.join(stream_receipt_pdf_zip([self._pdf_data(i) for i in (1, 2, 3)], cache))
+        
+        archive = zipfile.ZipFile(io.BytesIO(output))
+        assert archive.namelist() == ["Receipt_R-20240101-0001.pdf", "Receipt_R-20240101-0003.pdf", "export_errors.txt"]
+        assert b"R-20240101-0002: bad receipt" in archive.read("export_errors.txt")
+    
+    def test_export_consumes_receipts_lazily(self, tmp_path):
+        """Test that the stream yields data before the whole receipt set has been read."""
+        from src.services.receipt_pdf_export import stream_receipt_pdf_zip
+        
+        cache = ReceiptPdfCache(cache_dir=str(tmp_path), max_workers=0)
+        pulled = []
+        
+        def receipts():
+            for receipt_id in range(1, 1001):
+                pulled.append(receipt_id)
+                yield self._pdf_data(receipt_id)
+        
+        with patch('src.services.receipt_pdf_cache.render_receipt_pdf', return_value=b'%PDF-ok'):
+            stream = stream_receipt_pdf_zip(receipts(), cache)
+            first_chunk = next(stream)
+        
+        assert first_chunk.startswith(b'PK')
+        assert len(pulled) < 100
+    
+    def test_export_applies_list_filters_and_loads_line_items(self, app_context, tmp_path):
+        """Test the database-backed export with the get_receipts filters."""
+        import io
+        import zipfile
+        
+        receipts = [
+            Receipt(customer_id=1, created_by_user_id=1, updated_by_user_id=1, receipt_number=f"R-EXPORT-{i}",
+                    status=status, grand_total_amount=Decimal('10.00'))
+            for i, status in enumerate([ReceiptStatus.PAID, ReceiptStatus.DRAFT, ReceiptStatus.PAID, ReceiptStatus.PAID])
+        ]
+        db.session.add_all(receipts)
+        db.session.flush()
+        db.session.add(ReceiptLineItem(receipt_id=receipts[0].id, line_item_type=LineItemType.FUEL,
+                                       description="Fuel (100 gallons)", quantity=Decimal("100.00"),
+                                       unit_price=Decimal("0.10"), amount=Decimal("10.00")))
+        db.session.commit()
+        
+        service = ReceiptService(pdf_cache=ReceiptPdfCache(cache_dir=str(tmp_path), max_workers=0))
+        rendered = []
+        
+        def render(data):
+            rendered.append(data)
+            return b'%PDF-ok'
+        
+        try:
+            with patch('src.services.receipt_pdf_cache.render_receipt_pdf', side_effect=render):
+                output = b''.join(service.export_receipt_pdfs({'status': 'PAID', 'search': 'R-EXPORT'}, batch_size=2))
             
-            # Test various fuel type variations
-            variations = ["jet_a", "JET-A", "jet a", "JET"]
-            for variation in variations:
-                price = receipt_service._get_fuel_price(variation)
-                assert price == Decimal("5.75")
+            names = zipfile.ZipFile(io.BytesIO(output)).namelist()
+            assert sorted(names) == ["Receipt_R-EXPORT-0.pdf", "Receipt_R-EXPORT-2.pdf", "Receipt_R-EXPORT-3.pdf"]
+            line_items = {data.receipt_number: data.line_items for data in rendered}
+            assert [item.description for item in line_items["R-EXPORT-0"]] == ["Fuel (100 gallons)"]
+            assert line_items["R-EXPORT-2"] == ()
+        finally:
+            ReceiptLineItem.query.filter(ReceiptLineItem.receipt_id.in_([r.id for r in receipts])).delete(synchronize_session=False)
+            Receipt.query.filter(Receipt.id.in_([r.id for r in receipts])).delete(synchronize_session=False)
+            db.session.commit()
+
+
+class TestReceiptKeysetPagination:
+    """Test cursor pagination of the receipt list."""
+    
+    @pytest.fixture
+    def keyset_receipts(self, app_context):
+        created = [datetime(2024, 3, 1, 12, 0, 0) + timedelta(minutes=i) for i in range(12)]
+        # Two receipts straddling the first page boundary share a created_at,
+        # so the id tie-breaker is exercised
+        created[6] = created[7]
+        receipts = [
+            Receipt(customer_id=1, created_by_user_id=1, updated_by_user_id=1, receipt_number=f"R-KEYSET-{i}",
+                    status=ReceiptStatus.PAID, grand_total_amount=Decimal('10.00'), created_at=created_at)
+            for i, created_at in enumerate(created)
+        ]
+        db.session.add_all(receipts)
+        db.session.commit()
+        yield receipts
+        Receipt.query.filter(Receipt.id.in_([r.id for r in receipts])).delete(synchronize_session=False)
+        db.session.commit()
+    
+    def test_cursor_pages_match_offset_order(self, keyset_receipts):
+        """Test that walking cursors forward and back visits every receipt once, newest first."""
+        service = ReceiptService()
+        filters = {'search': 'R-KEYSET'}
+        expected = [r['id'] for r in service.get_receipts(filters, page=1, per_page=50)['receipts']]
+        assert len(expected) == 12
+        
+        pages, cursor = [], None
+        while True:
+            result = service.get_receipts(filters, per_page=5, cursor=cursor, pagination='cursor')
+            pages.append([r['id'] for r in result['receipts']])
+            cursor = result['pagination']['next_cursor']
+            if not result['pagination']['has_next']:
+                break
+        
+        assert [len(page) for page in pages] == [5, 5, 2]
+        assert [receipt_id for page in pages for receipt_id in page] == expected
+        assert result['pagination']['has_prev'] is True
+        assert 'total' not in result['pagination']
+        
+        previous = service.get_receipts(filters, per_page=5, cursor=result['pagination']['prev_cursor'])
+        assert [r['id'] for r in previous['receipts']] == pages[1]
+        assert previous['pagination']['has_next'] is True
+        
+        first = service.get_receipts(filters, per_page=5, cursor=previous['pagination']['prev_cursor'])
+        assert [r['id'] for r in first['receipts']] == pages[0]
+        assert first['pagination']['has_prev'] is False
+    
+    def test_cursor_mode_approximate_total(self, keyset_receipts):
+        """Test that filtered listings report a (cached) count when asked for a total."""
+        result = ReceiptService().get_receipts({'search': 'R-KEYSET'}, per_page=5, pagination='cursor',
+                                               include_total=True)
+        assert result['pagination']['total_items'] == 12
+        assert 'total' not in result['pagination']
+        assert result['pagination']['total_is_approximate'] is True
+    
+    def test_invalid_cursor(self, app_context):
+        """Test that a tampered cursor is rejected."""
+        with pytest.raises(ValueError):
+            ReceiptService().get_receipts(cursor='not-a-cursor')
 
 
 class TestGenerateReceiptNumber:
     """Test receipt number generation."""
     
-    def test_generate_receipt_number_first_today(self, receipt_service):
+    @pytest.fixture
+    def receipt_service(self):
+        """Fixture to provide a ReceiptService instance."""
+        return ReceiptService()
+    
+    @pytest.fixture
+    def clean_counters(self, app_context):
+        """Start every test with no receipt number counters."""
+        ReceiptNumberCounter.query.delete()
+        db.session.commit()
+        yield
+        ReceiptNumberCounter.query.delete()
+        db.session.commit()
+    
+    def test_generate_receipt_number_first_today(self, receipt_service, clean_counters):
         """Test receipt number generation for first receipt of the day."""
-        with patch('src.models.receipt.Receipt.query') as mock_query:
-            mock_query.filter.return_value.order_by.return_value.first.return_value = None
-            
-            receipt_number = receipt_service._generate_receipt_number()
-            
-            # Should be in format R-YYYYMMDD-0001
-            assert receipt_number.startswith("R-")
-            assert receipt_number.endswith("-0001")
-            assert len(receipt_number) == 16  # R-YYYYMMDD-0001
+        receipt_number = receipt_service._generate_receipt_number()
+        db.session.commit()
+        
+        # Should be in format R-YYYYMMDD-0001
+        assert receipt_number == f"R-{datetime.utcnow().strftime('%Y%m%d')}-0001"
+        assert len(receipt_number) == 15  # R-YYYYMMDD-0001
     
-    def test_generate_receipt_number_increment(self, receipt_service):
+    def test_generate_receipt_number_increment(self, receipt_service, clean_counters):
         """Test receipt number generation increments correctly."""
-        mock_latest_receipt = Receipt(receipt_number="R-20240101-0005")
+        db.session.add(ReceiptNumberCounter(counter_date=datetime.utcnow().date(), last_value=5))
+        db.session.commit()
         
+        receipt_number = receipt_service._generate_receipt_number()
+        db.session.commit()
+        
+        assert receipt_number.endswith("-0006")
+    
+    def test_generate_receipt_number_does_not_query_receipts(self, receipt_service, clean_counters):
+        """Test that allocation only touches the counter row."""
         with patch('src.models.receipt.Receipt.query') as mock_query:
-            mock_query.filter.return_value.order_by.return_value.first.return_value = mock_latest_receipt
-            
-            receipt_number = receipt_service._generate_receipt_number()
+            receipt_service._generate_receipt_number()
+            db.session.commit()
+        
+        mock_query.filter.assert_not_called()
+    
+    def test_rolled_back_allocation_is_reused(self, receipt_service, clean_counters):
+        """Test that a failed generate call does not burn a number."""
+        receipt_service._generate_receipt_number()
+        db.session.rollback()
+        
+        assert receipt_service._generate_receipt_number().endswith("-0001")
+        db.session.commit()
+    
+    def test_parallel_generate_calls_get_unique_sequential_numbers(self, app, clean_counters):
+        """Stress test: 500 concurrent generate_receipt calls hand out 500 distinct numbers."""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        call_count = 500
+        receipts = [
+            Receipt(customer_id=1, created_by_user_id=1, updated_by_user_id=1,
+                    status=ReceiptStatus.DRAFT, grand_total_amount=Decimal('10.00'))
+            for _ in range(call_count)
+        ]
+        db.session.add_all(receipts)
+        db.session.commit()
+        receipt_ids = [receipt.id for receipt in receipts]
+        
+        def generate(receipt_id):
+            with app.app_context():
+                return ReceiptService().generate_receipt(receipt_id).receipt_number
+        
+        try:
+            with ThreadPoolExecutor(max_workers=16) as executor:
+                receipt_numbers = list(executor.map(generate, receipt_ids))
             
-            assert receipt_number.endswith("-0006")
+            prefix = f"R-{datetime.utcnow().strftime('%Y%m%d')}-"
+            assert len(set(receipt_numbers)) == call_count
+            assert sorted(int(number[len(prefix):]) for number in receipt_numbers) == list(range(1, call_count + 1))
+            assert db.session.get(ReceiptNumberCounter, datetime.utcnow().date()).last_value == call_count
+        finally:
+            Receipt.query.filter(Receipt.id.in_(receipt_ids)).delete(synchronize_session=False)
+            db.session.commit()
 
 
 class TestToggleLineItemWaiver: